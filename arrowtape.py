@@ -0,0 +1,214 @@
+# Arrow representation of clean data tapes.
+# A clean tape is held as an Arrow table typed from the AssetVariableConfig (see AssetVariableConfig.arrow_schema), or
+# as a pandas DataFrame whose columns are views of the table's buffers (pd.ArrowDtype), so cleaning, profiling and
+# stratification can hand the same buffers to each other without converting them.  SharedTape writes a table once to
+# an uncompressed Arrow IPC (Feather) file that other processes memory map, so a tape is shared with worker processes
+# by its path instead of being pickled.
+
+import os
+import json
+import tempfile
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError('pyarrow is required for Arrow backed tapes')
+
+
+def _cast_column(column, arrow_type):
+    if column.type == arrow_type:
+        return column
+    try:
+        if pa.types.is_dictionary(arrow_type) and not pa.types.is_dictionary(column.type):
+            column = column.cast(arrow_type.value_type).dictionary_encode()
+        return column.cast(arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        # values that do not fit the configured type (e.g. fractional ints or 'ramp_error' schedules) keep their type
+        return column
+
+
+def _pandas_metadata_fixed(table):
+    # pyarrow records ArrowDtype columns in the pandas metadata, and rebuilds them as ArrowDtype whatever types_mapper
+    # is used (and fails for nested types, e.g. 'large_list<item: double>[pyarrow]').  They are recorded as object so
+    # the Arrow schema alone decides the types and table_to_pandas decides the representation.
+    metadata = table.schema.pandas_metadata
+    if metadata is None:
+        return table
+    changed = False
+    for column in metadata['columns']:
+        if str(column['numpy_type']).endswith('[pyarrow]'):
+            column['numpy_type'] = 'object'
+            changed = True
+    if changed is False:
+        return table
+    return table.replace_schema_metadata({**table.schema.metadata, b'pandas': json.dumps(metadata).encode('utf8')})
+
+
+def to_arrow_table(data_tape, config_data=None, preserve_index: bool = None):
+    """
+    Arrow table of a clean data tape.  Configured fields are cast to the types of config_data.arrow_schema, and a field
+    whose values can not be cast keeps the type Arrow inferred for it.  Other columns keep their inferred type.
+    :param data_tape: clean pd.DataFrame, or pyarrow.Table to cast
+    :param config_data: varsconfig.AssetVariableConfig.  Default is None, which keeps the inferred types
+    :param bool preserve_index: passed to pyarrow.Table.from_pandas.  Default is None, which stores a RangeIndex as
+            metadata only
+    :return: pyarrow.Table
+    """
+    _require_pyarrow()
+    if isinstance(data_tape, pa.Table):
+        table = data_tape
+    else:
+        table = _pandas_metadata_fixed(pa.Table.from_pandas(data_tape, preserve_index=preserve_index))
+    if config_data is None:
+        return table
+    schema = config_data.arrow_schema([field for field in table.column_names if field in config_data.variables])
+    for field in schema:
+        position = table.schema.get_field_index(field.name)
+        column = _cast_column(table.column(position), field.type)
+        if column.type != table.schema.field(position).type:
+            table = table.set_column(position, field.name, column)
+    return table
+
+
+def _arrow_dtype(arrow_type):
+    # dictionary encoded fields become pandas categoricals, which the stratification code factorizes without a copy
+    return None if pa.types.is_dictionary(arrow_type) else pd.ArrowDtype(arrow_type)
+
+
+def table_to_pandas(table, arrow_backed: bool = True) -> pd.DataFrame:
+    """
+    DataFrame of an Arrow table
+    :param pyarrow.Table table: tape table
+    :param bool arrow_backed: if True, columns are pd.ArrowDtype views of the table's buffers, so no values are
+            copied.  Dictionary encoded columns are categoricals.  If False, columns are converted to numpy dtypes.
+            Default is True
+    :return: pd.DataFrame
+    """
+    return table.to_pandas(types_mapper=_arrow_dtype if arrow_backed is True else None)
+
+
+def to_arrow_backed(data_tape, config_data=None) -> pd.DataFrame:
+    """
+    Arrow backed copy of a clean data tape, typed from the configuration (see to_arrow_table and table_to_pandas)
+    :param data_tape: clean pd.DataFrame or pyarrow.Table
+    :param config_data: varsconfig.AssetVariableConfig.  Default is None
+    :return: pd.DataFrame of pd.ArrowDtype (and categorical) columns
+    """
+    return table_to_pandas(to_arrow_table(data_tape, config_data), arrow_backed=True)
+
+
+def is_arrow_tape(data_tape) -> bool:
+    """
+    True if the data tape is a pyarrow.Table or a SharedTape rather than a DataFrame or an iterable of chunks
+    """
+    return pa is not None and isinstance(data_tape, (pa.Table, SharedTape))
+
+
+def as_dataframe(data_tape):
+    """
+    Arrow backed DataFrame of a pyarrow.Table or SharedTape.  Anything else (a DataFrame or an iterable of chunks) is
+    returned unchanged, so functions that take a tape can accept every representation with one call.
+    :param data_tape: pd.DataFrame, pyarrow.Table, SharedTape or iterable of pd.DataFrame chunks
+    :return: pd.DataFrame, or data_tape unchanged
+    """
+    if pa is None:
+        return data_tape
+    elif isinstance(data_tape, SharedTape):
+        return data_tape.to_pandas()
+    elif isinstance(data_tape, pa.Table):
+        return table_to_pandas(data_tape)
+    return data_tape
+
+
+class SharedTape:
+    """
+    A clean data tape (or a contiguous row range of one) stored in an uncompressed Arrow IPC file that any process can
+    memory map.  Only the path and the row range are pickled, so passing a SharedTape to a worker process costs the
+    same whatever the size of the tape, and the workers read the same pages of the page cache instead of private
+    copies.  Reads are zero copy: columns are views of the memory mapped file.
+    """
+
+    _suffix = '.feather'
+
+    def __init__(self, path: str, start: int = 0, length: int = None):
+        _require_pyarrow()
+        self.path = path
+        self.start = start
+        self.length = length
+
+    @classmethod
+    def write(cls, data_tape, path: str = None, config_data=None, temp_dir: str = None) -> 'SharedTape':
+        """
+        Write a tape to a shared file
+        :param data_tape: clean pd.DataFrame or pyarrow.Table
+        :param str path: file to write.  Default is a new file in temp_dir, which the caller removes (see remove)
+        :param config_data: varsconfig.AssetVariableConfig used to type the table (see to_arrow_table).  Default is None
+        :param str temp_dir: directory of the default file.  Default is the system temporary directory
+        :return: SharedTape of the whole file
+        """
+        _require_pyarrow()
+        table = to_arrow_table(data_tape, config_data)
+        if path is None:
+            file_handle, path = tempfile.mkstemp(suffix=cls._suffix, dir=temp_dir)
+            os.close(file_handle)
+        feather.write_feather(table, path, compression='uncompressed')
+        return cls(path, 0, table.num_rows)
+
+    def table(self, columns: list = None):
+        """
+        Memory mapped table of the tape's rows
+        :param list columns: columns to read.  Default is every column
+        :return: pyarrow.Table
+        """
+        table = feather.read_table(self.path, columns=columns, memory_map=True)
+        if self.start == 0 and (self.length is None or self.length == table.num_rows):
+            return table
+        return table.slice(self.start, self.length)
+
+    def to_pandas(self, columns: list = None, arrow_backed: bool = True) -> pd.DataFrame:
+        """
+        DataFrame of the tape's rows (see table_to_pandas)
+        :param list columns: columns to read.  Default is every column
+        :param bool arrow_backed: if True, the columns are views of the memory mapped file.  Default is True
+        :return: pd.DataFrame
+        """
+        return table_to_pandas(self.table(columns), arrow_backed)
+
+    def slice(self, start: int, length: int = None) -> 'SharedTape':
+        """
+        SharedTape of a contiguous row range of this tape, relative to its first row.  Nothing is read or copied.
+        :param int start: first row
+        :param int length: number of rows.  Default is every row after start
+        :return: SharedTape
+        """
+        length = len(self) - start if length is None else min(length, len(self) - start)
+        return SharedTape(self.path, self.start + start, length)
+
+    def __len__(self):
+        if self.length is None:
+            self.length = feather.read_table(self.path, memory_map=True).num_rows - self.start
+        return self.length
+
+    def remove(self):
+        """
+        Delete the shared file.  Every SharedTape of the file is invalid afterwards.
+        :return: None
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.remove()
+
+    def __repr__(self):
+        return f'SharedTape({self.path!r}, start={self.start}, length={self.length})'
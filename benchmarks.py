@@ -0,0 +1,936 @@
+# Benchmarks comparing the vectorized tape routines against the original scalar (per-cell) code paths.
+# Run from the project root:  python benchmarks.py [benchmark_name ...] [--rows N]
+# With no names every benchmark is run.
+
+import os
+import sys
+import time
+import pickle
+import tempfile
+import difflib
+import numpy as np
+import pandas as pd
+import numpy_financial as npf
+import varsconfig
+import tapetools
+import tapecache
+import headermap
+import strattools
+import arrowtape
+import sqlstrat
+from cmutils import mathutils
+from cmutils import dateutils
+from cmutils import bondmath
+from cmutils.mathutils import pandas_weighted_average_factory
+
+
+def _best_time(func, *args, repeat=3, **kwargs):
+    """
+    Run func repeat times and return the fastest wall clock time in seconds along with the last result
+    """
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _report(name, scalar_time, vector_time, n_rows):
+    print(f'{name:<28}{n_rows:>12,}{scalar_time:>12.4f}{vector_time:>12.4f}{scalar_time / vector_time:>10.1f}x')
+
+
+def _report_header(title):
+    print(title)
+    print(f'{"case":<28}{"rows":>12}{"scalar s":>12}{"vector s":>12}{"speedup":>11}')
+
+
+def random_raw_tape(n_rows: int = 100000, seed: int = 42) -> pd.DataFrame:
+    """
+    Build a raw (uncleaned) tape of string columns that look like servicer data, including null tokens,
+    percentages, currency, bps, boolean strings and Excel serial dates.
+    """
+    rng = np.random.default_rng(seed)
+    null_tokens = np.array(['', 'NA', 'n/a', 'NULL', 'None'], dtype=object)
+
+    def with_nulls(values, pct=0.05):
+        values = np.asarray(values, dtype=object)
+        mask = rng.random(n_rows) < pct
+        values[mask] = rng.choice(null_tokens, size=mask.sum())
+        return values
+
+    balances = rng.uniform(1000, 750000, n_rows)
+    return pd.DataFrame({
+        'bal_curr': with_nulls(np.char.add('$', np.char.mod('%.2f', balances))),
+        'rate_curr': with_nulls(np.char.add(np.char.mod('%.3f', rng.uniform(2, 12, n_rows)), '%')),
+        'rate_margin': with_nulls(np.char.add(np.char.mod('%d', rng.integers(0, 500, n_rows)), 'bps')),
+        'term_rem': with_nulls(np.char.mod('%d', rng.integers(1, 360, n_rows))),
+        'flag_runcf': with_nulls(rng.choice(np.array(['Y', 'N', 'true', 'false', '1', '0']), n_rows)),
+        'asset_state': with_nulls(rng.choice(np.array(['CA', 'TX', 'FL', 'NY', 'WA']), n_rows)),
+        'term_origdate': with_nulls(np.char.mod('%d', rng.integers(36000, 45000, n_rows))),
+        'term_matdate': with_nulls(pd.to_datetime(rng.integers(18000, 30000, n_rows), unit='D')
+                                   .strftime('%Y-%m-%d').to_numpy()),
+    })
+
+
+def random_clean_tape(n_rows: int = 100000, seed: int = 42) -> pd.DataFrame:
+    """
+    Build a clean (typed) consumer loan tape with the fields used by the stratification summaries.
+    """
+    rng = np.random.default_rng(seed)
+    tape = pd.DataFrame({'asset_id': np.arange(n_rows).astype(str),
+                         'asset_sector': rng.choice(np.array(['consumer_mortgage', 'consumer_auto', 'consumer_student']),
+                                                    n_rows, p=[0.6, 0.3, 0.1]),
+                         'bal_orig': rng.uniform(10000, 750000, n_rows).round(2)})
+    tape['bal_curr'] = (tape['bal_orig'] * rng.uniform(0, 1, n_rows)).round(2)
+    tape['bal_limit_curr'] = tape['bal_orig']
+    tape['rate_margin'] = rng.uniform(0.01, 0.08, n_rows)
+    tape['term_orig'] = rng.choice(np.array([120, 180, 240, 360]), n_rows)
+    tape['term_rem'] = tape['term_orig'] - rng.integers(0, 120, n_rows)
+    tape['fico_orig'] = rng.integers(500, 850, n_rows)
+    tape['fico_curr'] = np.clip(tape['fico_orig'] + rng.integers(-60, 60, n_rows), 300, 850).astype(float)
+    tape['uw_ltv_orig'] = rng.uniform(0.3, 1.0, n_rows)
+    tape['bal_orig_cum'] = tape['bal_orig'] * rng.uniform(1.0, 1.2, n_rows)
+    tape['prop_appraisal'] = tape['bal_orig'] / tape['uw_ltv_orig']
+    tape['uw_dti_orig'] = rng.uniform(0.1, 0.5, n_rows)
+    tape['fc_status'] = rng.choice(np.array(['FC', None], dtype=object), n_rows, p=[0.04, 0.96])
+    tape['bk_status'] = rng.choice(np.array(['BK', None], dtype=object), n_rows, p=[0.02, 0.98])
+    tape['prop_state'] = rng.choice(np.array(['CA', 'TX', 'FL', 'NY', 'WA', 'IL', 'GA']), n_rows)
+    tape['mod_type'] = rng.choice(np.array(['rate', 'term', None], dtype=object), n_rows, p=[0.05, 0.05, 0.9])
+    tape.loc[rng.random(n_rows) < 0.03, 'rate_margin'] = np.nan
+    tape.loc[rng.random(n_rows) < 0.05, 'fico_curr'] = np.nan
+    return tape
+
+
+def lambda_strat_summary(tape: pd.DataFrame, stratification_variable: str, stratification_buckets: list,
+                         zeros=0) -> pd.DataFrame:
+    """
+    The groupby().agg(lambda ...) implementation that strat_summary_consumer_closed used before the totals engine.
+    """
+    buckets = strattools.assign_strat_buckets(tape[stratification_variable], stratification_buckets)
+    origbal_weight = pandas_weighted_average_factory(weights=tape['bal_orig'], zeros=zeros)
+    origbal_weight_int = pandas_weighted_average_factory(weights=tape['bal_orig'], zeros=zeros, rounding=True,
+                                                         output_type='int')
+    currbal_weight_int = pandas_weighted_average_factory(weights=tape['bal_curr'], zeros=zeros, rounding=True,
+                                                         output_type='int')
+    top_states = tape['prop_state'].value_counts().index[:2]
+    summary_strat = tape.groupby(buckets, observed=False).agg(
+        count=('bal_orig', 'count'),
+        count_pct=('bal_orig', lambda x: round(x.count() / tape['bal_orig'].count() * 100, 3)),
+        origbal=('bal_orig', 'sum'),
+        origbal_pct=('bal_orig', lambda x: round(x.sum() / tape['bal_orig'].sum() * 100, 3)),
+        currbal=('bal_curr', 'sum'),
+        currbal_pct=('bal_curr', lambda x: round(x.sum() / tape['bal_curr'].sum() * 100, 3)),
+        factor=('bal_curr', lambda x: round(x.sum() / tape.loc[x.index, 'bal_orig'].sum() * 100, 3)),
+        wa_origrate=('rate_margin', origbal_weight),
+        wa_origterm=('term_orig', origbal_weight_int),
+        wa_remterm=('term_rem', currbal_weight_int),
+        wa_origfico=('fico_orig', origbal_weight_int),
+        wa_currfico=('fico_curr', currbal_weight_int),
+        wa_origltv=('uw_ltv_orig', origbal_weight),
+        wa_origcltv=('bal_orig_cum', lambda x: x.sum() / tape.loc[x.index, 'prop_appraisal'].sum()),
+        wa_origdti=('uw_dti_orig', origbal_weight),
+        fc_pct=('fc_status', lambda x: x.count() / (x.count() + x.isna().sum()) * 100),
+        bk_pct=('bk_status', lambda x: x.count() / (x.count() + x.isna().sum()) * 100),
+        top1_pct=('prop_state', lambda x: round((x == top_states[0]).sum() / x.count() * 100, 3)),
+        top2_pct=('prop_state', lambda x: round((x == top_states[1]).sum() / x.count() * 100, 3)))
+    return summary_strat.rename(columns={'top1_pct': f'{top_states[0]}_pct', 'top2_pct': f'{top_states[1]}_pct'})
+
+
+def bench_column_converters(n_rows: int = 200000):
+    """
+    Series.apply with the scalar converters (old process_to_clean_tape path) vs. the column converters.
+    """
+    tape = random_raw_tape(n_rows)
+    converters = varsconfig.AssetVariableConfig
+    cases = (('floats: currency', 'bal_curr', converters.convert_floats, converters.convert_floats_array),
+             ('floats: percent', 'rate_curr', converters.convert_floats, converters.convert_floats_array),
+             ('ints: bps', 'rate_margin', converters.convert_ints, converters.convert_ints_array),
+             ('ints: plain', 'term_rem', converters.convert_ints, converters.convert_ints_array),
+             ('bools', 'flag_runcf', converters.convert_bools, converters.convert_bools_array),
+             ('strs', 'asset_state', converters.convert_strs, converters.convert_strs_array),
+             ('dates: excel serial', 'term_origdate', converters.convert_ints, None),
+             ('dates: iso strings', 'term_matdate', converters.convert_dates, converters.convert_dates_array))
+    _report_header('Column converters vs. Series.apply(scalar converter)')
+    for name, column, scalar, vector in cases:
+        if vector is None:
+            # Excel serial dates arrive as integer text; clean to ints first then convert to dates
+            raw = converters.convert_ints_array(tape[column]).astype(float)
+            scalar, vector = converters.convert_dates, converters.convert_dates_array
+        else:
+            raw = tape[column]
+        scalar_time, _ = _best_time(raw.apply, scalar, repeat=1)
+        vector_time, _ = _best_time(vector, raw)
+        _report(name, scalar_time, vector_time, n_rows)
+
+
+def bench_tape_cache(n_rows: int = 200000):
+    """
+    Parsing the raw csv tape vs. a repeat load from the columnar tape cache.
+    """
+    _report_header('Raw csv import vs. cached columnar load')
+    with tempfile.TemporaryDirectory() as temp_dir:
+        tape_path = os.path.join(temp_dir, 'tape.csv')
+        random_raw_tape(n_rows).to_csv(tape_path)
+        cache = tapecache.TapeCache(os.path.join(temp_dir, 'cache'))
+        tapetools.import_raw_datatape(tape_path, cache=cache)
+        parse_time, _ = _best_time(tapetools.import_raw_datatape, tape_path)
+        cache_time, _ = _best_time(tapetools.import_raw_datatape, tape_path, cache=cache)
+        _report('import_raw_datatape', parse_time, cache_time, n_rows)
+
+
+def bench_strat_summary(n_rows: int = 3000000):
+    """
+    groupby().agg with per bucket lambdas vs. the single pass totals engine in strat_summary_consumer_closed.
+    """
+    tape = random_clean_tape(n_rows)
+    buckets = list(range(540, 820, 20))
+    _report_header('Summary strat: per bucket lambdas vs. single pass totals')
+    scalar_time, _ = _best_time(lambda_strat_summary, tape, 'fico_orig', buckets, repeat=1)
+    vector_time, _ = _best_time(strattools.Stratification.strat_summary_consumer_closed, tape, 'fico_orig', buckets)
+    _report(f'{len(buckets) + 1} fico buckets', scalar_time, vector_time, n_rows)
+
+
+def bench_strat_package(n_rows: int = 3000000):
+    """
+    strat_summary_consumer_closed per variable vs. Stratification_Package sharing the per loan contributions.
+    """
+    tape = random_clean_tape(n_rows)
+    variables = ['fico_orig', 'uw_ltv_orig', 'uw_dti_orig', 'term_orig', 'rate_margin', 'prop_state']
+    package = strattools.Stratification_Package(tape, stratify_by_variables=variables)
+
+    def per_variable():
+        return {x: strattools.Stratification.strat_summary_consumer_closed(tape, x, package.buckets[x])
+                for x in variables}
+
+    def shared():
+        package._contributions = {}
+        return package.summary_package()
+
+    _report_header('Strat package: independent summaries vs. shared contributions')
+    scalar_time, _ = _best_time(per_variable, repeat=1)
+    vector_time, _ = _best_time(shared)
+    _report(f'{len(variables)} variables', scalar_time, vector_time, n_rows)
+
+
+def bench_sector_strats(n_rows: int = 3000000):
+    """
+    Stratification_Package per asset_sector one after another vs. stratify_by_sector in worker processes.
+    """
+    tape = random_clean_tape(n_rows)
+    variables = ['fico_orig', 'uw_ltv_orig', 'uw_dti_orig', 'term_orig', 'rate_margin', 'prop_state']
+    full_package = strattools.Stratification_Package(tape, stratify_by_variables=variables)
+    buckets = {f'buckets_{x}': full_package.buckets[x] for x in variables}
+
+    def sequential():
+        return {sector: strattools.Stratification_Package(tape, asset_class=sector, stratify_by_variables=variables,
+                                                          **buckets).summary_package()
+                for sector in tape['asset_sector'].unique()}
+
+    _report_header(f'Sector strats: sequential vs. process pool ({os.cpu_count()} cpus)')
+    scalar_time, _ = _best_time(sequential, repeat=1)
+    vector_time, _ = _best_time(strattools.stratify_by_sector, tape, stratify_by_variables=variables, **buckets)
+    _report(f'{tape["asset_sector"].nunique()} sectors', scalar_time, vector_time, n_rows)
+
+
+def bench_weighted_average(n_rows: int = 1000000):
+    """
+    groupby().agg(pandas_weighted_average_factory closure) vs. weighted_average_kernel over group codes.
+    """
+    tape = random_clean_tape(n_rows)
+    _report_header('Weighted average: factory closure per group vs. kernel over group codes')
+    for n_groups in (15, 500):
+        groups = pd.Series(np.arange(n_rows) % n_groups, index=tape.index)
+        factory = pandas_weighted_average_factory(weights=tape['bal_orig'], zeros=0)
+        scalar_time, _ = _best_time(tape['rate_margin'].groupby(groups).agg, factory, repeat=1)
+        vector_time, _ = _best_time(mathutils.weighted_average_kernel, tape['rate_margin'].to_numpy(),
+                                    tape['bal_orig'].to_numpy(), groups.to_numpy(), n_groups)
+        _report(f'{n_groups} groups', scalar_time, vector_time, n_rows)
+
+
+
+def bench_dayfrac(n_rows: int = 1000000):
+    """
+    Scalar dayfrac per pair of dates vs. the compiled dayfrac_array engine.
+    """
+    rng = np.random.default_rng(42)
+    start = np.datetime64('2000-01-01') + rng.integers(0, 9000, size=n_rows).astype('timedelta64[D]')
+    end = start + rng.integers(1, 800, size=n_rows).astype('timedelta64[D]')
+    n_scalar = min(n_rows, 20000)
+    start_dates = pd.DatetimeIndex(start[:n_scalar]).to_pydatetime()
+    end_dates = pd.DatetimeIndex(end[:n_scalar]).to_pydatetime()
+    dateutils.dayfrac_array(start[:10], end[:10])
+
+    def scalar_dayfrac(method):
+        return [dateutils.dayfrac(s, e, method) for s, e in zip(start_dates, end_dates)]
+
+    _report_header(f'Day count fraction: scalar dayfrac (timed on {n_scalar:,} rows, scaled) vs. dayfrac_array')
+    for method in ('30/360 NASD', '30/360 ISDA', 'act/360', 'act/act'):
+        scalar_time, _ = _best_time(scalar_dayfrac, method, repeat=1)
+        vector_time, _ = _best_time(dateutils.dayfrac_array, start, end, method)
+        _report(method, scalar_time * n_rows / n_scalar, vector_time, n_rows)
+
+
+def bench_date_schedule(n_rows: int = 100000):
+    """
+    dateRangeVec per loan vs. date_schedule_array for every loan at once (360 monthly payment dates per loan).
+    """
+    rng = np.random.default_rng(42)
+    start = np.datetime64('2010-01-01') + rng.integers(0, 4000, size=n_rows).astype('timedelta64[D]')
+    n_scalar = min(n_rows, 2000)
+    start_dates = start[:n_scalar].astype(object)
+
+    def scalar_schedules(increment_type):
+        return [dateutils.dateRangeVec(x, 360, increment_type) for x in start_dates]
+
+    _report_header(f'Payment schedules: dateRangeVec per loan (timed on {n_scalar:,} loans, scaled) '
+                   f'vs. date_schedule_array')
+    for increment_type in ('monthly', 'monthend'):
+        scalar_time, _ = _best_time(scalar_schedules, increment_type, repeat=1)
+        vector_time, _ = _best_time(dateutils.date_schedule_array, start, 360, increment_type, ragged=True)
+        _report(increment_type, scalar_time * n_rows / n_scalar, vector_time, n_rows)
+
+
+def loop_amortize(bal_curr, rate_curr, term_rem, cpr, cdr, severity):
+    """
+    Per loan, per period Python projection (the path the engine replaces) returning pool level cash flows
+    """
+    n_periods = int(term_rem.max())
+    pool = {field: np.zeros(n_periods) for field in bondmath.CASH_FLOW_FIELDS}
+    smm, mdr = bondmath.cpr2smm(cpr), bondmath.cpr2smm(cdr)
+    for bal, rate, term in zip(bal_curr, rate_curr / 1200, term_rem):
+        for period in range(term):
+            default = bal * mdr
+            bal_perf = bal - default
+            prin_sched = bal_perf if period == term - 1 else bal_perf * (bondmath.annuity(rate, term - period) - rate)
+            prepay = (bal_perf - prin_sched) * smm
+            for field, value in zip(bondmath.CASH_FLOW_FIELDS,
+                                    (bal, prin_sched, bal_perf * rate, prepay, default, default * severity / 100,
+                                     default * (1 - severity / 100), bal_perf - prin_sched - prepay)):
+                pool[field][period] += value
+            bal = bal_perf - prin_sched - prepay
+    return pool
+
+
+def bench_amortization(n_rows: int = 200000):
+    """
+    Per loan Python projection vs. the compiled amortize_cash_flows engine (pool level cash flows only).
+    """
+    tape = random_clean_tape(n_rows)
+    bal, rate = tape['bal_curr'].to_numpy(), tape['rate_margin'].to_numpy() * 100
+    term = np.random.default_rng(42).integers(60, 361, size=n_rows)
+    n_scalar = min(n_rows, 500)
+    bondmath.amortize_cash_flows(bal[:10], rate[:10], term[:10])
+    _report_header(f'Amortization: per loan loop (timed on {n_scalar:,} loans, scaled) vs. amortize_cash_flows')
+    scalar_time, _ = _best_time(loop_amortize, bal[:n_scalar], rate[:n_scalar], term[:n_scalar], 8., 1., 35.,
+                                repeat=1)
+    vector_time, _ = _best_time(bondmath.amortize_cash_flows, bal, rate, term, cpr=8., cdr=1., severity=35.)
+    _report('cpr 8 / cdr 1 / sev 35', scalar_time * n_rows / n_scalar, vector_time, n_rows)
+
+
+def bench_irr(n_rows: int = 100000):
+    """
+    irrNewton per stream vs. irr_array over a loans x periods matrix of level payment streams.
+    """
+    rng = np.random.default_rng(42)
+    rates = rng.uniform(0.001, 0.02, size=n_rows)
+    streams = np.repeat(bondmath.annuity(rates, 120)[:, None] * rng.uniform(0.95, 1.05, size=(n_rows, 1)), 121, axis=1)
+    streams[:, 0] = -1
+    n_scalar = min(n_rows, 5000)
+    bondmath.irr_array(streams[:10])
+    _report_header(f'IRR: irrNewton per stream (timed on {n_scalar:,} streams, scaled) vs. irr_array')
+    scalar_time, _ = _best_time(lambda: [bondmath.irrNewton(x) for x in streams[:n_scalar]], repeat=1)
+    vector_time, _ = _best_time(bondmath.irr_array, streams)
+    _report('120 period streams', scalar_time * n_rows / n_scalar, vector_time, n_rows)
+
+
+def bench_reg_z_apr(n_rows: int = 1000000):
+    """
+    regZRate per loan vs. regZRate_array for an origination tape.
+    """
+    rng = np.random.default_rng(42)
+    loans = (rng.uniform(1e3, 1e5, n_rows), rng.uniform(0, 500, n_rows), rng.uniform(0, 100, n_rows),
+             rng.uniform(0.02, 0.3, n_rows), rng.choice(['simple', 'monthly', 'daily', 'annual'], n_rows),
+             rng.integers(1, 361, n_rows))
+    n_scalar = min(n_rows, 5000)
+    _report_header(f'Reg Z APR: regZRate per loan (timed on {n_scalar:,} loans, scaled) vs. regZRate_array')
+    scalar_time, _ = _best_time(lambda: [bondmath.regZRate(*x) for x in zip(*(y[:n_scalar] for y in loans))],
+                                repeat=1)
+    vector_time, _ = _best_time(bondmath.regZRate_array, *loans)
+    _report('mixed compounding', scalar_time * n_rows / n_scalar, vector_time, n_rows)
+
+
+def bench_categorical(n_rows: int = 3000000):
+    """
+    Object dtype vs. dictionary encoded (Categorical) prop_state: conversion, memory and a unique value strat.
+    """
+    tape = random_clean_tape(n_rows)
+    raw_states = tape['prop_state'].astype(object)
+    states = list(dict.fromkeys(raw_states.dropna()))
+    object_time, object_states = _best_time(varsconfig.AssetVariableConfig.convert_strs_array, raw_states)
+    categorical_time, categorical_states = _best_time(varsconfig.AssetVariableConfig.convert_categorical_array,
+                                                      raw_states, states)
+    _report_header('Categorical strs: object dtype vs. dictionary encoded')
+    _report('convert prop_state', object_time, categorical_time, n_rows)
+    print(f'{"prop_state memory MB":<28}{n_rows:>12,}{object_states.memory_usage(deep=True) / 2 ** 20:>12.1f}'
+          f'{categorical_states.memory_usage(deep=True) / 2 ** 20:>12.1f}')
+    for states_column in (object_states, categorical_states):
+        tape['prop_state'] = states_column
+        strat_time, _ = _best_time(strattools.Stratification.strat_summary_consumer_closed, tape, 'prop_state', None)
+        if states_column is object_states:
+            object_time = strat_time
+    _report('prop_state strat', object_time, strat_time, n_rows)
+
+
+def bench_compact_dtypes(n_rows: int = 3000000):
+    """
+    Memory of a clean tape before and after compact_tape, and the summary strat on each.
+    """
+    tape = random_clean_tape(n_rows)
+    compact_time, compact = _best_time(tapetools.compact_tape, tape, repeat=1)
+    report = tapetools.tape_memory_report(tape, compact)
+    _report_header('Compact dtypes: clean tape vs. compact_tape')
+    print(f'{"compact_tape s":<28}{n_rows:>12,}{compact_time:>12.4f}')
+    for field, row in report.iterrows():
+        print(f'{field + " MB":<28}{str(row["type"]) + " -> " + str(row["compact_type"]):>24}'
+              f'{row["bytes"] / 2 ** 20:>12.1f}{row["compact_bytes"] / 2 ** 20:>12.1f}{row["ratio"]:>10.1f}x')
+    wide_time, _ = _best_time(strattools.Stratification.strat_summary_consumer_closed, tape, 'fico_orig', None)
+    narrow_time, _ = _best_time(strattools.Stratification.strat_summary_consumer_closed, compact, 'fico_orig', None)
+    _report('fico_orig strat', wide_time, narrow_time, n_rows)
+
+
+
+def legacy_summarize_tape(data_tape: pd.DataFrame) -> pd.DataFrame:
+    """
+    summarize_tape before the one pass profiler: repeated isna / quantile passes and a value_counts per unique value.
+    """
+    unique_values = {}
+    for field in data_tape.columns:
+        if data_tape[field].nunique() <= 500:
+            if len(data_tape[field].unique()) > 25:
+                values_list = []
+                for value in data_tape[field].unique()[~pd.isnull(data_tape[field].unique())]:
+                    values_list.append((value, data_tape[field].value_counts()[value]))
+                values_list = sorted(values_list, key=lambda values: values[1], reverse=True)
+                unique_values[field] = [values_list[i][0] for i in range(min(len(values_list), 25))]
+            else:
+                unique_values[field] = data_tape[field].unique()[~pd.isnull(data_tape[field].unique())]
+        else:
+            unique_values[field] = ''
+    return pd.DataFrame({
+        'type': data_tape.dtypes,
+        'count': data_tape.count(),
+        'mean': data_tape.mean(numeric_only=True),
+        'median': data_tape.median(numeric_only=True),
+        'min': data_tape.min(numeric_only=True),
+        'quart1': data_tape.quantile(0.25, numeric_only=True, interpolation='midpoint'),
+        'quart2': data_tape.quantile(0.50, numeric_only=True, interpolation='midpoint'),
+        'quart3': data_tape.quantile(0.75, numeric_only=True, interpolation='midpoint'),
+        'max': data_tape.max(numeric_only=True),
+        'missing': data_tape.isna().sum(),
+        'missing_pct': data_tape.isna().sum() / data_tape.shape[0],
+        'unique_num': data_tape.nunique(),
+        'unique_values': unique_values
+    })
+
+
+def bench_tape_profile(n_rows: int = 1000000):
+    """
+    summarize_tape: the previous implementation vs. the exact profiler and the one pass sketch profiler, in memory and
+    over 100,000 row chunks.
+    """
+    tape = random_clean_tape(n_rows)
+    legacy_time, _ = _best_time(legacy_summarize_tape, tape, repeat=1)
+    exact_time, _ = _best_time(tapetools.summarize_tape, tape)
+    sketch_time, _ = _best_time(tapetools.summarize_tape, tape, exact=False)
+    chunks = [tape.iloc[i:i + 100000] for i in range(0, n_rows, 100000)]
+    chunk_exact_time, _ = _best_time(tapetools.summarize_tape, chunks)
+    chunk_sketch_time, _ = _best_time(tapetools.summarize_tape, chunks, exact=False)
+    _report_header('Tape profile: previous summarize_tape vs. one pass profiler')
+    _report('exact', legacy_time, exact_time, n_rows)
+    _report('sketches', legacy_time, sketch_time, n_rows)
+    _report('chunked sample / sketches', chunk_exact_time, chunk_sketch_time, n_rows)
+
+
+
+def bench_profile_merge(n_rows: int = 1000000):
+    """
+    Re-profiling a whole tape vs. merging saved per-chunk (e.g. per file or per deal) sketch profiles.
+    """
+    tape = random_clean_tape(n_rows)
+    chunks = [tape.iloc[i:i + 100000] for i in range(0, n_rows, 100000)]
+    profile_time, _ = _best_time(lambda: tapetools.TapeSummaryAccumulator(exact=False).update_all(chunks), repeat=1)
+    partial_profiles = [tapetools.TapeSummaryAccumulator(exact=False).update(chunk) for chunk in chunks]
+
+    def merge_profiles():
+        merged = partial_profiles[0].empty_copy()
+        for profile in partial_profiles:
+            merged.merge(profile)
+        return merged.summarize_tape()
+
+    merge_time, _ = _best_time(merge_profiles)
+    _report_header('Profile merge: re-profile the tape vs. merge saved partial profiles')
+    _report('sketch profile', profile_time, merge_time, n_rows)
+
+
+def random_integrity_tape(n_rows: int = 100000, seed: int = 42) -> pd.DataFrame:
+    """
+    Clean tape with the term, date, payment and documentation fields used by the integrity rules, about 1% of each
+    field broken.
+    """
+    rng = np.random.default_rng(seed)
+    tape = random_clean_tape(n_rows, seed)
+    tape['term_age'] = tape['term_orig'] - tape['term_rem']
+    tape['term_promo'] = 0
+    tape['term_io'] = 0
+    tape['term_amort'] = tape['term_orig']
+    tape['rate_curr'] = rng.uniform(3.0, 9.0, n_rows).round(3)
+    tape['pmt_curr'] = -np.round(npf.pmt(tape['rate_curr'] / 1200, tape['term_rem'], tape['bal_curr']), 2)
+    tape['cutoffdate'] = pd.Timestamp('2024-06-01')
+    firstpay_months = np.datetime64('2024-06', 'M') - tape['term_age'].to_numpy().astype('timedelta64[M]')
+    tape['pmt_date_firstpay'] = pd.to_datetime(firstpay_months.astype('datetime64[D]'))
+    tape['term_origdate'] = tape['pmt_date_firstpay'] - pd.Timedelta(days=45)
+    tape['term_matdate'] = [first + pd.DateOffset(months=term - 1)
+                            for first, term in zip(tape['pmt_date_firstpay'], tape['term_orig'])]
+    tape['uw_doctype'] = rng.choice(np.array(['full', 'siva', 'nina']), n_rows, p=[0.8, 0.1, 0.1])
+    tape['uw_inc_verify'] = np.where(tape['uw_doctype'] == 'full', rng.uniform(2000, 20000, n_rows).round(2), np.nan)
+    for field in ('pmt_curr', 'term_age', 'term_amort', 'uw_inc_verify'):
+        broken = rng.random(n_rows) < 0.01
+        tape.loc[broken, field] = tape.loc[broken, field].fillna(1.0) * 2
+    return tape
+
+
+def legacy_check_tape_integrity(data_tape: pd.DataFrame) -> list:
+    """
+    Loan by loan integrity checks, the way the scalar check_* functions were written: one Python call per loan and
+    rule.
+    """
+    doc_income = {'full': 'verified', 'siva': 'stated', 'sisa': 'stated', 'nina': 'none', 'no_doc': 'none'}
+    exceptions = []
+    for index, loan in data_tape.iterrows():
+        calc_pmt = -npf.pmt(loan['rate_curr'] / 1200, loan['term_rem'], loan['bal_curr'])
+        if abs(calc_pmt - loan['pmt_curr']) / loan['pmt_curr'] >= 0.005:
+            exceptions.append((index, 'pmt_calculation'))
+        if loan['term_orig'] - loan['term_age'] - loan['term_rem'] != 0:
+            exceptions.append((index, 'term_age'))
+        if loan['term_promo'] + loan['term_io'] + loan['term_amort'] != loan['term_orig']:
+            exceptions.append((index, 'term_structure'))
+        matdate, firstpay = loan['term_matdate'], loan['pmt_date_firstpay']
+        if (matdate.year - firstpay.year) * 12 + matdate.month - firstpay.month + 1 != loan['term_orig']:
+            exceptions.append((index, 'orig_term_dates'))
+        cutoff = loan['cutoffdate']
+        if abs((matdate.year - cutoff.year) * 12 + matdate.month - cutoff.month - loan['term_rem']) > 1:
+            exceptions.append((index, 'rem_term_dates'))
+        if not loan['term_origdate'] <= firstpay <= matdate or matdate < cutoff:
+            exceptions.append((index, 'date_order'))
+        income_type = doc_income.get(loan['uw_doctype'])
+        if (income_type == 'verified' and not loan['uw_inc_verify'] > 0) or \
+                (income_type in ('stated', 'none') and loan['uw_inc_verify'] > 0):
+            exceptions.append((index, 'doc_income'))
+    return exceptions
+
+
+def bench_integrity_checks(n_rows: int = 1000000):
+    """
+    Loan by loan integrity checks vs. the vectorized rule engine (check_tape_integrity).
+    """
+    tape = random_integrity_tape(n_rows)
+    n_scalar = min(n_rows, 20000)
+    scalar_time, _ = _best_time(legacy_check_tape_integrity, tape.iloc[:n_scalar], repeat=1)
+    vector_time, (exceptions, _) = _best_time(tapetools.check_tape_integrity, tape)
+    _report_header('Integrity checks: loan by loan vs. vectorized rules')
+    _report('7 rules', scalar_time * n_rows / n_scalar, vector_time, n_rows)
+    print(f'{"exceptions":<28}{n_rows:>12,}{len(exceptions):>12,}')
+
+
+def clean_tape_config() -> varsconfig.AssetVariableConfig:
+    """
+    Configuration of the random_clean_tape fields, with the PossibleValues bounds and value sets of the default config
+    """
+    config_data = varsconfig.AssetVariableConfig()
+    config_data.strs = ['asset_id', 'asset_sector', 'fc_status', 'bk_status', 'prop_state', 'mod_type']
+    config_data.ints = ['term_orig', 'term_rem', 'fico_orig']
+    config_data.floats = ['bal_orig', 'bal_curr', 'bal_limit_curr', 'rate_margin', 'fico_curr', 'uw_ltv_orig',
+                          'bal_orig_cum', 'prop_appraisal', 'uw_dti_orig']
+    config_data._possible_values_text = {'term_orig': 'INT>0', 'term_rem': 'INT>0', 'fico_orig': '300 <= INT <= 850',
+                                         'fico_curr': '300 <= FLOAT <= 850', 'bal_orig': 'FLOAT>=0',
+                                         'bal_curr': 'FLOAT>=0', 'rate_margin': 'FLOAT(03)>=0'}
+    config_data.possible_values = {'asset_sector': ['consumer_mortgage', 'consumer_auto', 'consumer_student'],
+                                   'prop_state': ['CA', 'TX', 'FL', 'NY', 'WA', 'IL', 'GA']}
+    return config_data
+
+
+def bench_schema_validation(n_rows: int = 1000000):
+    """
+    pandera lazy validation of the config schema vs. validate_tape in lazy, sampled and chunked mode, with the
+    slowest checks.
+    """
+    tape = random_clean_tape(n_rows)
+    schema = clean_tape_config().build_tape_schema()
+
+    def pandera_validate():
+        try:
+            return schema.validate(tape, lazy=True)
+        except Exception as schema_errors:
+            return schema_errors
+
+    pandera_time, _ = _best_time(pandera_validate, repeat=1)
+    lazy_time, (_, timings) = _best_time(tapetools.validate_tape, tape, schema)
+    sample_time, _ = _best_time(tapetools.validate_tape, tape, schema, mode='sample', seed=1)
+    chunked_time, _ = _best_time(tapetools.validate_tape, tape, schema, mode='chunked')
+    _report_header('Schema validation: pandera validate(lazy=True) vs. validate_tape')
+    _report('lazy', pandera_time, lazy_time, n_rows)
+    _report('sample 100,000', pandera_time, sample_time, n_rows)
+    _report('chunked 100,000', pandera_time, chunked_time, n_rows)
+    for (field, check), row in timings.head(5).iterrows():
+        print(f'{field + " " + check:<40}{row["seconds"]:>12.4f}')
+
+
+def write_loadable_default_config(directory: str) -> str:
+    """
+    Copy of default_config.csv that passes config validation: the GenericLoan column is added and placeholder values
+    (e.g. [TBD]) in the validated columns are replaced.
+    """
+    required_fields = varsconfig.AssetVariableConfig._required_config_fields
+    placeholders = {'DataDesc': 'numeric', 'DataCategory': 'strs', 'DataType': 'str'}
+    default_config = pd.read_csv(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'default_config.csv'),
+                                 dtype=str, keep_default_na=False, encoding='latin-1')
+    default_config.insert(default_config.columns.get_loc('ConsumerLoan'), 'GenericLoan', 'TRUE')
+    for column, (_, accepted) in required_fields.items():
+        if accepted is not None:
+            invalid = ~default_config[column].str.strip().str.lower().isin(accepted)
+            default_config.loc[invalid, column] = 'FALSE' if 'false' in accepted else placeholders.get(column, 'None')
+    config_path = os.path.join(directory, 'default_config.csv')
+    default_config.to_csv(config_path, index=False, encoding='latin-1')
+    return config_path
+
+
+def bench_config_load(n_rows: int = None):
+    """
+    Loading default_config.csv: parsing and validating the csv vs. loading the compiled config.  n_rows is not used.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_path = write_loadable_default_config(temp_dir)
+        csv_time, config_data = _best_time(varsconfig.AssetVariableConfig, config_path, repeat=10)
+        varsconfig.AssetVariableConfig(config_path, compiled_dir=temp_dir)
+        compiled_time, _ = _best_time(varsconfig.AssetVariableConfig, config_path, compiled_dir=temp_dir, repeat=10)
+    _report_header('Config load: parse and validate csv vs. compiled config')
+    _report('AssetVariableConfig', csv_time, compiled_time, len(config_data.variables))
+
+
+def servicer_headers(fields: list, seed: int = 42) -> list:
+    """
+    Headers a servicer might use for config fields: field tokens spelled out in camel case or title case, in the
+    field's order or reversed.
+    """
+    rng = np.random.default_rng(seed)
+    spelled_out = {short: long for long, short in headermap.HeaderIndex._token_synonyms.items() if len(long) > 3}
+    headers = []
+    for field in fields:
+        tokens = [spelled_out.get(token, token) for token in field.strip('_').split('_')]
+        if rng.random() < 0.5:
+            tokens = tokens[::-1]
+        headers.append(''.join(token.title() for token in tokens) if rng.random() < 0.5 else
+                       ' '.join(token.title() for token in tokens))
+    return headers
+
+
+def difflib_header_map(headers: list, fields: list, min_score: float = 0.6) -> dict:
+    """
+    Header by header fuzzy matching with difflib against every field name, with no index.
+    """
+    normalized_fields = {field.replace('_', ' '): field for field in fields}
+    header_map = {}
+    for header in headers:
+        matches = difflib.get_close_matches(header.lower(), normalized_fields.keys(), n=1, cutoff=min_score)
+        if len(matches) > 0:
+            header_map[header] = normalized_fields[matches[0]]
+    return header_map
+
+
+def bench_header_map(n_rows: int = None):
+    """
+    Mapping the headers of a new servicer layout (every default_config field): difflib matching vs. the header index,
+    and a repeat load of the same layout from the layout cache.  n_rows is not used.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        fields = varsconfig.AssetVariableConfig(write_loadable_default_config(temp_dir)).variables
+        headers = servicer_headers(fields)
+        difflib_time, difflib_map = _best_time(difflib_header_map, headers, fields, repeat=1)
+        header_index = headermap.HeaderIndex(os.path.join(temp_dir, 'headers'), fields=fields)
+        index_time, resolved = _best_time(header_index.resolve, headers, use_layout_cache=False)
+        header_index.resolve(headers)
+        cached_time, _ = _best_time(headermap.HeaderIndex(os.path.join(temp_dir, 'headers'), fields=fields).resolve,
+                                    headers)
+    truth = dict(zip(headers, fields))
+    _report_header('Header map: difflib matching vs. header index')
+    _report('resolve new layout', difflib_time, index_time, len(headers))
+    _report('repeat layout (cached)', difflib_time, cached_time, len(headers))
+    print(f'{"correct difflib / index":<28}{len(headers):>12,}'
+          f'{sum(truth[header] == field for header, field in difflib_map.items()):>12,}'
+          f'{int((resolved["field"] == pd.Series(truth)).sum()):>12,}')
+
+
+def bench_date_parsing(n_rows: int = 1000000):
+    """
+    Series.apply(convert_dates) vs. parse_dates_array for each date encoding (the scalar path is timed on a subset and
+    scaled), and cell by cell read_dates_to_array vs. read_dates_to_array_column for payment schedule dates.
+    """
+    rng = np.random.default_rng(8)
+    dates = np.datetime64('1995-01-01') + rng.integers(0, 365 * 30, n_rows).astype('timedelta64[D]')
+    years, months, days = [dates.astype(f'datetime64[{unit}]') for unit in ('Y', 'M', 'D')]
+    year = years.astype(np.int64) + 1970
+    month = (months - years).astype(np.int64) + 1
+    day = (days - months).astype(np.int64) + 1
+    serial = (dates - np.datetime64('1899-12-30')).astype(np.int64)
+    cases = (('excel serial numbers', pd.Series(serial.astype(np.float64)), None),
+             ('YYYYMMDD text', pd.Series((year * 10000 + month * 100 + day).astype(str), dtype=object), '%Y%m%d'),
+             ('iso strings', pd.Series(np.datetime_as_string(dates), dtype=object), '%Y-%m-%d'),
+             ('mm/dd/yyyy strings', pd.Series([f'{m}/{d}/{y}' for y, m, d in zip(year, month, day)], dtype=object),
+              '%m/%d/%Y'))
+    n_scalar = min(n_rows, 100000)
+    _report_header('Date parsing: Series.apply(convert_dates) vs. parse_dates_array')
+    for name, raw, dt_format in cases:
+        scalar_time, _ = _best_time(raw.iloc[:n_scalar].apply, varsconfig.AssetVariableConfig.convert_dates,
+                                    args=(dt_format or '%Y-%m-%d',), repeat=1)
+        vector_time, parsed = _best_time(varsconfig.AssetVariableConfig.parse_dates_array, raw)
+        assert (parsed.to_numpy(dtype='datetime64[D]') == dates).all()
+        _report(name, scalar_time * n_rows / n_scalar, vector_time, n_rows)
+    n_cells = n_rows // 12
+    schedules = pd.Series([';'.join(cell) for cell in np.datetime_as_string(dates[:n_cells * 12]).reshape(n_cells, 12)])
+    n_scalar = min(n_cells, 10000)
+    scalar_time, _ = _best_time(schedules.iloc[:n_scalar].apply, varsconfig.AssetVariableConfig.read_dates_to_array,
+                                repeat=1)
+    vector_time, _ = _best_time(varsconfig.AssetVariableConfig.read_dates_to_array_column, schedules)
+    _report('schedule dates (12 / cell)', scalar_time * n_cells / n_scalar, vector_time, n_cells)
+
+
+def legacy_read_ramp_to_array(ramp_string):
+    """
+    read_ramp_to_array as it was written: the schedule grows with np.append for every element
+    """
+    try:
+        if ramp_string is None or str(ramp_string).strip().lower() in ('none', 'na', 'nan', 'n/a', 'null', '', ' '):
+            return None
+        elif not isinstance(ramp_string, (str, int, float, np.integer, np.floating, list, tuple)):
+            raise ValueError('ramp_string must be a string, integer, float, list or tuple')
+        else:
+            ramp_array = np.empty(0)
+            ramp_string = str(ramp_string)
+            for symbol in ('[', ']', '(', ')', '{', '}'):
+                ramp_string = ramp_string.strip(symbol)
+            ramp_string = ramp_string.replace(';', ',')
+            for element in ramp_string.split(','):
+                if 'ramp' in element and 'for' in element:
+                    subramp = element.replace('ramp', ',').replace('for', ',').split(',')
+                    for i in range(len(subramp)):
+                        subramp[i] = float(subramp[i])
+                    ramp_array = np.append(ramp_array,
+                                           np.arange(subramp[0], subramp[1] + ((subramp[1] - subramp[0]) / subramp[2]),
+                                                     ((subramp[1] - subramp[0]) / (subramp[2] - 1))))
+                    del subramp
+                    del element
+                elif 'ramp' in element and 'for' not in element:
+                    subramp = element.replace('ramp', ',').split(',')
+                    for i in range(len(subramp)):
+                        subramp[i] = float(subramp[i])
+                    ramp_array = np.append(ramp_array, np.arange(subramp[0], subramp[1] + 1))
+                    del subramp
+                    del element
+                elif 'for' in element:
+                    subramp = element.split('for')
+                    ramp_array = np.append(ramp_array, np.ones(int(subramp[1])) * float(subramp[0]))
+                    del subramp
+                    del element
+                else:
+                    ramp_array = np.append(ramp_array, float(element))
+                    del element
+            return ramp_array
+    except ValueError:
+        return 'ramp_error'
+
+
+def random_ramp_expressions(n_rows: int, seed: int = 9) -> pd.Series:
+    """
+    Payment schedule ramp expressions for step rate, teaser and IO loans: mostly distinct level periods and ramps
+    """
+    rng = np.random.default_rng(seed)
+    teaser = rng.integers(1, 37, n_rows)
+    ramp_periods = rng.integers(2, 25, n_rows)
+    level = 360 - teaser - ramp_periods
+    start = rng.uniform(500, 1500, n_rows).round(2)
+    end = (start * rng.uniform(1.1, 1.6, n_rows)).round(2)
+    return pd.Series([f'{a} for {t}; {a} ramp {b} for {r}; {b} for {n}'
+                      for a, b, t, r, n in zip(start, end, teaser, ramp_periods, level)], dtype=object)
+
+
+def bench_ramp_schedules(n_rows: int = 200000):
+    """
+    Payment schedule parsing: Series.apply of the np.append read_ramp_to_array (one ndarray per loan) vs.
+    read_ramp_to_array_column (one values buffer and offsets), and summing every schedule from each layout.
+    """
+    ramps = random_ramp_expressions(n_rows)
+    n_scalar = min(n_rows, 20000)
+    legacy_time, _ = _best_time(ramps.iloc[:n_scalar].apply, legacy_read_ramp_to_array, repeat=1)
+    scalar_time, per_loan = _best_time(ramps.apply, varsconfig.AssetVariableConfig.read_ramp_to_array, repeat=1)
+    column_time, schedules = _best_time(varsconfig.AssetVariableConfig.read_ramp_to_array_column, ramps)
+    loop_sum_time, _ = _best_time(lambda cells: np.array([cell.sum() for cell in cells]), per_loan)
+    values, offsets = tapetools.schedule_buffers(schedules)
+    ragged_sum_time, _ = _best_time(np.add.reduceat, values, offsets[:-1])
+    _report_header('Ramp schedules: np.append per loan vs. one values buffer with offsets')
+    _report('parse (np.append)', legacy_time * n_rows / n_scalar, column_time, n_rows)
+    _report('parse (preallocated, scalar)', scalar_time, column_time, n_rows)
+    _report('sum each schedule', loop_sum_time, ragged_sum_time, n_rows)
+    print(f'{"values in buffer":<28}{n_rows:>12,}{values.size:>12,}')
+
+
+def bench_arrow_tape(n_rows: int = 3000000):
+    """
+    Handing a clean tape to another stage or process: a pickled DataFrame vs. an arrowtape.SharedTape (a pickled path
+    whose reader memory maps the file), and a strat package run on the numpy conversion vs. the Arrow backed views.
+    """
+    tape = random_clean_tape(n_rows)
+    variables = ['fico_orig', 'uw_ltv_orig', 'uw_dti_orig', 'term_orig', 'rate_margin', 'prop_state']
+    with tempfile.TemporaryDirectory() as temp_dir:
+        shared_tape = arrowtape.SharedTape.write(tape, os.path.join(temp_dir, 'tape.feather'))
+        pickle_time, _ = _best_time(lambda: pickle.loads(pickle.dumps(tape, protocol=pickle.HIGHEST_PROTOCOL)))
+        shared_time, _ = _best_time(lambda: pickle.loads(pickle.dumps(shared_tape)).to_pandas())
+        numpy_time, _ = _best_time(shared_tape.to_pandas, arrow_backed=False)
+        arrow_time, _ = _best_time(shared_tape.to_pandas)
+
+        def strat_package(arrow_backed):
+            data_tape = shared_tape.to_pandas(arrow_backed=arrow_backed)
+            return strattools.Stratification_Package(data_tape, stratify_by_variables=variables).summary_package()
+
+        numpy_strat_time, _ = _best_time(strat_package, False)
+        arrow_strat_time, _ = _best_time(strat_package, True)
+        _report_header('Arrow tape: pickled DataFrame / numpy conversion vs. shared memory mapped Arrow tape')
+        _report('hand off to a process', pickle_time, shared_time, n_rows)
+        _report('load from shared file', numpy_time, arrow_time, n_rows)
+        _report('load + strat package', numpy_strat_time, arrow_strat_time, n_rows)
+
+
+def bench_sql_strats(n_rows: int = 3000000):
+    """
+    Loading a Parquet tape into pandas and running Stratification_Package vs. SQLStratification, which runs one GROUP
+    BY per variable in DuckDB directly on the file, so pandas only holds the grouped totals.
+    """
+    tape = random_clean_tape(n_rows)
+    variables = ['fico_orig', 'uw_ltv_orig', 'uw_dti_orig', 'term_orig', 'rate_margin', 'prop_state']
+    with tempfile.TemporaryDirectory() as temp_dir:
+        tape_path = os.path.join(temp_dir, 'tape.parquet')
+        tape.to_parquet(tape_path)
+        del tape
+
+        def pandas_package():
+            data_tape = pd.read_parquet(tape_path)
+            return strattools.Stratification_Package(data_tape, stratify_by_variables=variables).summary_package()
+
+        def sql_package():
+            return sqlstrat.SQLStratification(tape_path, stratify_by_variables=variables).summary_package()
+
+        _report_header('SQL strats: pandas load + strat package vs. DuckDB GROUP BY on the Parquet file')
+        scalar_time, _ = _best_time(pandas_package, repeat=1)
+        vector_time, _ = _best_time(sql_package)
+        _report(f'{len(variables)} variables', scalar_time, vector_time, n_rows)
+
+
+def legacy_standardize_state(state_string):
+    """
+    standardize_state as it was written: both lookup dictionaries are rebuilt on every call
+    """
+    state_string = state_string.strip().lower()
+    full_name_dict = {'alabama': 'AL', 'alaska': 'AK', 'arizona': 'AZ', 'arkansas': 'AR', 'california': 'CA',
+                        'colorado': 'CO', 'connecticut': 'CT', 'delaware': 'DE', 'florida': 'FL', 'georgia': 'GA',
+                        'hawaii': 'HI', 'idaho': 'ID', 'illinois': 'IL', 'indiana': 'IN', 'iowa': 'IA', 'kansas': 'KS',
+                        'kentucky': 'KY', 'louisiana': 'LA', 'maine': 'ME', 'maryland': 'MD', 'massachusetts': 'MA',
+                        'michigan': 'MI', 'minnesota': 'MN', 'mississippi': 'MS', 'missouri': 'MO', 'montana': 'MT',
+                        'nebraska': 'NE', 'nevada': 'NV', 'new hampshire': 'NH', 'new jersey': 'NJ', 'new mexico': 'NM',
+                        'new york': 'NY', 'north carolina': 'NC', 'north dakota': 'ND', 'ohio': 'OH', 'oklahoma': 'OK',
+                        'oregon': 'OR', 'pennsylvania': 'PA', 'rhode island': 'RI', 'south carolina': 'SC',
+                        'south dakota': 'SD', 'tennessee': 'TN', 'texas': 'TX', 'utah': 'UT', 'vermont': 'VT',
+                        'virginia': 'VA', 'washington': 'WA', 'west virginia': 'WV', 'wisconsin': 'WI',
+                        'wyoming': 'WY', 'district of columbia': 'DC', 'american samoa': 'AS', 'guam': 'GU',
+                        'northern mariana islands': 'MP', 'puerto rico': 'PR', 'united states minor outlying islands': 'UM',
+                        'u.s. virgin islands': 'VI'}
+    abbreviation_dict = {'al': 'AL', 'ak': 'AK', 'az': 'AZ', 'ar': 'AR', 'ca': 'CA', 'co': 'CO', 'ct': 'CT', 'de': 'DE',
+                            'fl': 'FL', 'ga': 'GA', 'hi': 'HI', 'id': 'ID', 'il': 'IL', 'in': 'IN', 'ia': 'IA', 'ks': 'KS',
+                            'ky': 'KY', 'la': 'LA', 'me': 'ME', 'md': 'MD', 'ma': 'MA', 'mi': 'MI', 'mn': 'MN', 'ms': 'MS',
+                            'mo': 'MO', 'mt': 'MT', 'ne': 'NE', 'nv': 'NV', 'nh': 'NH', 'nj': 'NJ', 'nm': 'NM', 'ny': 'NY',
+                            'nc': 'NC', 'nd': 'ND', 'oh': 'OH', 'ok': 'OK', 'or': 'OR', 'pa': 'PA', 'ri': 'RI', 'sc': 'SC',
+                            'sd': 'SD', 'tn': 'TN', 'tx': 'TX', 'ut': 'UT', 'vt': 'VT', 'va': 'VA', 'wa': 'WA', 'wv': 'WV',
+                            'wi': 'WI', 'wy': 'WY', 'dc': 'DC', 'as': 'AS', 'gu': 'GU', 'mp': 'MP', 'pr': 'PR', 'um': 'UM',
+                            'vi': 'VI'}
+    if state_string in full_name_dict.keys():
+        return full_name_dict[state_string]
+    elif state_string in abbreviation_dict.keys():
+        return abbreviation_dict[state_string]
+    else:
+        return state_string.strip().upper()
+
+
+def bench_normalizers(n_rows: int = 5000000):
+    """
+    Row by row .apply of standardize_state vs. the dictionary lookup normalizers, which clean and look up each distinct
+    value once and map the results back by factorized codes.
+    """
+    rng = np.random.default_rng(7)
+    states = np.array(['CA', 'ca', 'California', ' TX ', 'texas', 'NY', 'New York', 'fl', 'Florida', 'WA', 'n/a'])
+    state_values = pd.Series(states[rng.integers(0, states.size, n_rows)])
+    doc_types = np.array(['Full Doc', 'full', 'SIVA', 'Stated Income', 'Low Doc', 'NINA', 'No Doc', None])
+    doc_values = pd.Series(doc_types[rng.integers(0, doc_types.size, n_rows)])
+    products = np.array(['30 Yr Fixed', 'FRM30', '15 Year Fixed', '5/1 ARM', '7/1 ARM IO', 'Balloon 15/30', 'HELOC'])
+    product_values = pd.Series(products[rng.integers(0, products.size, n_rows)])
+    n_scalar = min(n_rows, 200000)
+    scalar_time, _ = _best_time(state_values.iloc[:n_scalar].apply, legacy_standardize_state, repeat=1)
+    vector_time, _ = _best_time(tapetools.standardize_state_array, state_values)
+    category_time, _ = _best_time(tapetools.standardize_state_array, state_values, as_category=True)
+    doc_scalar_time, _ = _best_time(doc_values.iloc[:n_scalar].apply, tapetools.standardize_doctypes, repeat=1)
+    doc_time, _ = _best_time(tapetools.standardize_doctypes_array, doc_values)
+    product_scalar_time, _ = _best_time(product_values.iloc[:n_scalar].apply, tapetools.product_normalizer.normalize_value,
+                                        repeat=1)
+    product_time, _ = _best_time(tapetools.product_normalizer, product_values)
+    _report_header('Normalizers: row by row .apply vs. lookup of distinct values')
+    _report('standardize_state', scalar_time * n_rows / n_scalar, vector_time, n_rows)
+    _report('standardize_state category', scalar_time * n_rows / n_scalar, category_time, n_rows)
+    _report('standardize_doctypes', doc_scalar_time * n_rows / n_scalar, doc_time, n_rows)
+    _report('product codes', product_scalar_time * n_rows / n_scalar, product_time, n_rows)
+
+
+BENCHMARKS = {'column_converters': bench_column_converters,
+              'tape_cache': bench_tape_cache,
+              'strat_summary': bench_strat_summary,
+              'weighted_average': bench_weighted_average,
+              'strat_package': bench_strat_package,
+              'sector_strats': bench_sector_strats,
+              'dayfrac': bench_dayfrac,
+              'date_schedule': bench_date_schedule,
+              'amortization': bench_amortization,
+              'irr': bench_irr,
+              'reg_z_apr': bench_reg_z_apr,
+              'categorical': bench_categorical,
+              'compact_dtypes': bench_compact_dtypes,
+              'tape_profile': bench_tape_profile,
+              'profile_merge': bench_profile_merge,
+              'integrity_checks': bench_integrity_checks,
+              'schema_validation': bench_schema_validation,
+              'config_load': bench_config_load,
+              'header_map': bench_header_map,
+              'normalizers': bench_normalizers,
+              'date_parsing': bench_date_parsing,
+              'ramp_schedules': bench_ramp_schedules,
+              'arrow_tape': bench_arrow_tape,
+              'sql_strats': bench_sql_strats}
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    rows = {}
+    if '--rows' in args:
+        rows = {'n_rows': int(args[args.index('--rows') + 1])}
+        del args[args.index('--rows'):args.index('--rows') + 2]
+    for bench_name in (args or BENCHMARKS.keys()):
+        BENCHMARKS[bench_name](**rows)
+        print()
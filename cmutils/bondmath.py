@@ -3,7 +3,7 @@
 
 import math
 import numpy as np
-from numba import njit, float64
+from numba import njit, prange, float64, get_num_threads
 
 MAX_LOG_RATE = 1e3
 BASE_TOL = 1e-12
@@ -37,44 +37,237 @@ def smm2cpr(smm):
     cpr_ = 100*(1. - np.power(1-smm , 12))
     return cpr_
 
+# Loan level amortization engine
+# Cash flow fields of the engine, in the order of the kernel's output axis
+CASH_FLOW_FIELDS = ('bal_beg', 'prin_sched', 'interest', 'prepay', 'default', 'loss', 'recovery', 'bal_end')
+
+
+def _amortize_blocks(bal_curr, rate_curr, term_rem, term_io, pmt_curr, smm, mdr, severity, block_starts,
+                     pool_out, loan_out, loan_level):
+    # Projects every loan in each block of loans, adding the cash flows to the block's slice of pool_out (and to
+    # loan_out if loan_level).  Blocks are independent so they can run in parallel without sharing accumulators.
+    n_periods = smm.shape[0]
+    for block in prange(block_starts.shape[0] - 1):
+        for loan in range(block_starts[block], block_starts[block + 1]):
+            bal = bal_curr[loan]
+            periodic_rate = rate_curr[loan] / 1200.
+            if not (bal > 0) or not (term_rem[loan] > 0) or np.isnan(periodic_rate):
+                continue
+            sched_bal = bal
+            # (1 + rate) ** remaining term, carried forward so the level payment (annuity(rate, remaining term) - rate
+            # = rate / ((1 + rate) ** remaining term - 1) of the balance) needs no power each period
+            growth = np.power(1. + periodic_rate, term_rem[loan])
+            for period in range(min(n_periods, term_rem[loan])):
+                default = bal * mdr[period]
+                bal_perf = bal - default
+                if period == term_rem[loan] - 1:
+                    prin_sched = bal_perf
+                elif period < term_io[loan]:
+                    prin_sched = 0.
+                elif pmt_curr[loan] > 0:
+                    # contractual payment on the contractual balance, applied pro rata to the performing balance
+                    contract_prin = min(max(pmt_curr[loan] - sched_bal * periodic_rate, 0.), sched_bal)
+                    prin_sched = 0. if sched_bal <= 0 else bal_perf * contract_prin / sched_bal
+                    sched_bal -= contract_prin
+                elif periodic_rate == 0:
+                    prin_sched = bal_perf / (term_rem[loan] - period)
+                else:
+                    prin_sched = bal_perf * periodic_rate / (growth - 1.)
+                growth /= 1. + periodic_rate
+                prepay = (bal_perf - prin_sched) * smm[period]
+                interest = bal_perf * periodic_rate
+                loss = default * severity[period]
+                bal_end = bal_perf - prin_sched - prepay
+                pool_out[block, period, 0] += bal
+                pool_out[block, period, 1] += prin_sched
+                pool_out[block, period, 2] += interest
+                pool_out[block, period, 3] += prepay
+                pool_out[block, period, 4] += default
+                pool_out[block, period, 5] += loss
+                pool_out[block, period, 6] += default - loss
+                pool_out[block, period, 7] += bal_end
+                if loan_level:
+                    loan_out[0, loan, period] = bal
+                    loan_out[1, loan, period] = prin_sched
+                    loan_out[2, loan, period] = interest
+                    loan_out[3, loan, period] = prepay
+                    loan_out[4, loan, period] = default
+                    loan_out[5, loan, period] = loss
+                    loan_out[6, loan, period] = default - loss
+                    loan_out[7, loan, period] = bal_end
+                bal = bal_end
+                if bal <= 0:
+                    break
+
+
+_amortize_blocks_serial = njit(nogil=True, cache=False)(_amortize_blocks)
+_amortize_blocks_parallel = njit(nogil=True, cache=False, parallel=True)(_amortize_blocks)
+
+
+def _period_vector(value, n_periods):
+    # scalar or per period vector, extended with its last value if shorter than n_periods
+    vector = np.atleast_1d(np.asarray(value, dtype=np.float64))
+    if vector.shape[0] < n_periods:
+        vector = np.concatenate((vector, np.full(n_periods - vector.shape[0], vector[-1])))
+    return vector[:n_periods]
+
+
+def amortize_cash_flows(bal_curr, rate_curr, term_rem, term_io=None, pmt_curr=None, cpr=0., cdr=0., severity=0.,
+                        n_periods=None, loan_level=False, parallel=True):
+    """
+    Projects monthly scheduled principal, interest, prepayments, defaults and balances for every loan at once and
+    aggregates them into pool level cash flows.
+
+    Each period, defaults are taken from the beginning balance (cdr converted to a monthly default rate), interest
+    accrues on the performing balance, scheduled principal is paid, and prepayments (cpr converted to smm) are taken
+    from the balance remaining after scheduled principal.  Loans are interest only for their first term_io periods.
+    Scheduled principal follows pmt_curr on the contractual balance, applied pro rata to the performing balance, or
+    the level payment (annuity) over the remaining term if pmt_curr is missing.  The balance left in the last period
+    of term_rem is paid as scheduled principal.
+
+    :param bal_curr: array of current balances
+    :param rate_curr: array of current annual interest rates in XXX.000% format (i.e. 5.25 for 5.25%)
+    :param term_rem: array of remaining terms in months
+    :param term_io: array of remaining interest only months.  Default is no interest only period
+    :param pmt_curr: array of current scheduled payments.  Default is the level payment over the remaining term
+    :param cpr: annual prepayment rate in percent, as a scalar or a vector by period
+    :param cdr: annual default rate in percent, as a scalar or a vector by period
+    :param severity: loss severity in percent of the defaulted balance, as a scalar or a vector by period
+    :param int n_periods: number of periods to project.  Default is the longest remaining term
+    :param bool loan_level: if True, also return the loans x periods cash flows of every field
+    :param bool parallel: if True, project blocks of loans in parallel threads.  Default is True
+    :return: tuple of (dict of field -> pool level cash flow vector by period,
+                       dict of field -> loans x periods matrix, or None if loan_level is False)
+    """
+    bal_curr = np.ascontiguousarray(bal_curr, dtype=np.float64)
+    n_loans = bal_curr.shape[0]
+    rate_curr = np.ascontiguousarray(np.broadcast_to(np.asarray(rate_curr, dtype=np.float64), (n_loans,)))
+    term_rem = np.nan_to_num(np.broadcast_to(np.asarray(term_rem, dtype=np.float64), (n_loans,))).astype(np.int64)
+    term_io = np.zeros(n_loans, dtype=np.int64) if term_io is None else \
+        np.nan_to_num(np.broadcast_to(np.asarray(term_io, dtype=np.float64), (n_loans,))).astype(np.int64)
+    pmt_curr = np.zeros(n_loans, dtype=np.float64) if pmt_curr is None else \
+        np.nan_to_num(np.broadcast_to(np.asarray(pmt_curr, dtype=np.float64), (n_loans,)))
+    if n_periods is None:
+        n_periods = int(term_rem.max()) if n_loans > 0 else 0
+    n_periods = max(int(n_periods), 0)
+
+    smm = np.array([cpr2smm(x) for x in _period_vector(cpr, n_periods)], dtype=np.float64)
+    mdr = np.array([cpr2smm(x) for x in _period_vector(cdr, n_periods)], dtype=np.float64)
+    severity = _period_vector(severity, n_periods) / 100.
+
+    n_blocks = max(min(n_loans, 8 * get_num_threads()), 1) if parallel else 1
+    block_starts = np.linspace(0, n_loans, n_blocks + 1).astype(np.int64)
+    pool_out = np.zeros((n_blocks, n_periods, len(CASH_FLOW_FIELDS)), dtype=np.float64)
+    loan_out = np.zeros((len(CASH_FLOW_FIELDS), n_loans, n_periods) if loan_level else (len(CASH_FLOW_FIELDS), 0, 0),
+                        dtype=np.float64)
+    kernel = _amortize_blocks_parallel if parallel else _amortize_blocks_serial
+    kernel(bal_curr, rate_curr, term_rem, term_io, pmt_curr, smm, mdr, severity, block_starts, pool_out, loan_out,
+           loan_level)
+
+    pool = dict(zip(CASH_FLOW_FIELDS, pool_out.sum(axis=0).T))
+    loans = dict(zip(CASH_FLOW_FIELDS, loan_out)) if loan_level else None
+    return pool, loans
+
+
+def amortize_tape(data_tape, **kwargs):
+    """
+    Projects the cash flows of a clean data tape with amortize_cash_flows, using its bal_curr, rate_curr, term_rem,
+    term_io and pmt_curr columns (term_io and pmt_curr are optional)
+    :param data_tape: clean data tape (pd.DataFrame)
+    :param kwargs: keyword arguments for amortize_cash_flows (cpr, cdr, severity, n_periods, loan_level, parallel)
+    :return: see amortize_cash_flows
+    """
+    optional = {x: data_tape[x].to_numpy(dtype=np.float64, na_value=np.nan) for x in ('term_io', 'pmt_curr')
+                if x in data_tape.columns}
+    return amortize_cash_flows(*(data_tape[x].to_numpy(dtype=np.float64, na_value=np.nan)
+                                 for x in ('bal_curr', 'rate_curr', 'term_rem')), **optional, **kwargs)
+
+
 # Interest Rate Conversion Formulas:
+COMPOUND_DICT = {'daily':365, 'weekly':52, 'monthly':12, 'quarterly':4, 'semiannual':2, 'annual':1}
+
 def intEffectiveAnnualRate(stated_rate,compound_type):
     if compound_type == 'simple':
         return stated_rate
     else:
-        COMPOUND_DICT = {'daily':365, 'weekly':52, 'monthly':12, 'quarterly':4, 'semiannual':2, 'annual':1}
         return np.float_power((1 + np.divide(stated_rate, COMPOUND_DICT[compound_type])), COMPOUND_DICT[compound_type]) -1
 
+def intEffectiveAnnualRate_array(stated_rate, compound_type):
+    """
+    Effective annual rate of arrays of stated rates and compounding types ('simple' or a key of COMPOUND_DICT)
+    """
+    stated_rate = np.asarray(stated_rate, dtype=np.float64)
+    compound_type = np.broadcast_to(np.asarray(compound_type, dtype=object), stated_rate.shape)
+    types, type_codes = np.unique(compound_type.astype(str), return_inverse=True)
+    periods = np.array([0 if x == 'simple' else COMPOUND_DICT.get(x, -1) for x in types],
+                       dtype=np.float64)[type_codes].reshape(stated_rate.shape)
+    if np.any(periods < 0):
+        raise ValueError(f'Invalid compound type(s).  Must be simple or one of {list(COMPOUND_DICT.keys())}')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(periods == 0, stated_rate, np.float_power(1 + stated_rate / np.where(periods == 0, 1, periods),
+                                                                  periods) - 1)
+
 def regZRate(cash_disbursed, up_front_fees, back_end_fees, stated_rate, compound_type, months):
+    return '%.6f' % regZRate_array(cash_disbursed, up_front_fees, back_end_fees, stated_rate, compound_type, months)[0]
+
+def regZRate_array(cash_disbursed, up_front_fees, back_end_fees, stated_rate, compound_type, months, tol=1e-10,
+                   max_iter=50):
+    """
+    Reg Z APR of arrays of loans, solved for every loan at once.
+    The amount due at maturity ((cash_disbursed + up_front_fees) accrued at the effective annual rate of the stated
+    rate, plus back_end_fees) is divided by cash_disbursed, and the APR is the annual rate that accrues the same
+    multiple over the term: (1 + APR) ** whole years * (1 + APR * fraction of the last year).
+    :param cash_disbursed: array of cash disbursed to the borrower
+    :param up_front_fees: array of fees financed at origination
+    :param back_end_fees: array of fees due at maturity
+    :param stated_rate: array of stated annual rates (decimal)
+    :param compound_type: compounding type, or array of compounding types: 'simple' or a key of COMPOUND_DICT
+    :param months: array of terms in months
+    :param float tol: relative tolerance on the accrued multiple
+    :param int max_iter: maximum number of Newton iterations
+    :return: np.ndarray of APRs (decimal).  NaN where the inputs are invalid or the solver did not converge
+    """
+    cash_disbursed, up_front_fees, back_end_fees, stated_rate, months = np.broadcast_arrays(
+        *(np.asarray(x, dtype=np.float64) for x in (cash_disbursed, up_front_fees, back_end_fees, stated_rate, months)))
+    cash_disbursed, up_front_fees, back_end_fees, stated_rate, months = (
+        np.atleast_1d(x) for x in (cash_disbursed, up_front_fees, back_end_fees, stated_rate, months))
     mofrac = (months % 12) / 12
     yrfrac = months // 12
-    effrate = intEffectiveAnnualRate(stated_rate, compound_type)
-    if compound_type == 'simple':
-        intfrac = (1 + effrate / 12 * months)
-    else:
-        intfrac = (1 + effrate) ** yrfrac + (1 if mofrac > 0 else 0 + (effrate / 12 * mofrac))
-    moic = ((cash_disbursed + up_front_fees) * intfrac + back_end_fees) / cash_disbursed
-    rate_guess = (moic - 1) * (12 / months)
-    moic_guess = ((1 + mofrac * rate_guess) * (1+rate_guess) ** yrfrac)
-    while abs(moic - moic_guess)>0.0001:
-        rate_up = rate_guess + (0.1 / 100)
-        moic_up = (1 + mofrac * rate_up) * (1 + rate_up) ** yrfrac
-        rate_guess = rate_guess + (0.1/100) * ((moic-moic_guess)/(moic_up-moic_guess))
-        moic_guess = (1 + mofrac * rate_guess) * (1 + rate_guess) ** yrfrac
-    return '%.6f' % rate_guess
+    effrate = intEffectiveAnnualRate_array(stated_rate, compound_type)
+    simple = np.broadcast_to(np.asarray(compound_type).astype(str) == 'simple', effrate.shape)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        intfrac = np.where(simple, 1 + effrate / 12 * months,
+                           np.float_power(1 + effrate, yrfrac) * (1 + effrate * mofrac))
+        moic = ((cash_disbursed + up_front_fees) * intfrac + back_end_fees) / cash_disbursed
+        # exact for whole years of compounding, so Newton only corrects for the fraction of the last year
+        rate = np.float_power(moic, 12 / months) - 1
+        active = np.flatnonzero(np.isfinite(rate) & (cash_disbursed > 0) & (months > 0))
+        converged = np.zeros(rate.shape, dtype=bool)
+        for _ in range(max_iter):
+            active_rate, active_mofrac, active_yrfrac = rate[active], mofrac[active], yrfrac[active]
+            growth = np.float_power(1 + active_rate, active_yrfrac)
+            moic_guess = (1 + active_mofrac * active_rate) * growth
+            done = np.abs(moic[active] - moic_guess) <= tol * moic[active]
+            converged[active[done]] = True
+            if done.all():
+                break
+            slope = active_mofrac * growth + (1 + active_mofrac * active_rate) * active_yrfrac * growth / (1 + active_rate)
+            # Newton step, kept above -100% so the accrued multiple stays defined
+            rate[active] = np.maximum(active_rate - (moic_guess - moic[active]) / slope, (active_rate - 1) / 2)
+            active = active[~done]
+    return np.where(converged, rate, np.nan)
 
 
 # IRR Solution Searches---------------------------------------------------------------------------
 #TODO: rewrite IRR functions so variables are clearer
-#TODO: numba compile IRR functions (need to know numba array declaration method)
 
 # BEGIN: Binary Search Method IRR
 def irrBinary(stream, tol=BASE_TOL):
     rate_lo, rate_hi = -MAX_LOG_RATE, +MAX_LOG_RATE
     sgn = np.sign(stream[0]) # f(x) is decreasing
+    r = np.arange(len(stream))
     for steps in range(100):
         rate = (rate_lo + rate_hi)/2
-        r = np.arange(len(stream))
         # Factor exp(m) out because it doesn't affect the sign
         m = max(-rate * r)
         f = np.exp(-rate * r - m)
@@ -93,8 +286,8 @@ def irrBinary(stream, tol=BASE_TOL):
 # BEGIN: Newton's Method IRR
 def irrNewton(stream, tol=BASE_TOL):
     rate = 0.0
+    r = np.arange(len(stream))
     for steps in range(50):
-        r = np.arange(len(stream))
         # Factor exp(m) out of the numerator & denominator for numerical stability
         m = max(-rate * r)
         f = np.exp(-rate * r - m)
@@ -105,4 +298,99 @@ def irrNewton(stream, tol=BASE_TOL):
         # Clip the update to avoid jumping into some numerically unstable place
         rate = rate + np.clip(t / u, -1.0, 1.0)
     return math.exp(rate) - 1
-# END: Newton's Method from LDCMA Utilities
\ No newline at end of file
+# END: Newton's Method from LDCMA Utilities
+
+
+# BEGIN: Vectorized IRR for many streams
+def _irr_streams(values, offsets, guess, tol, max_iter, rates, iterations, converged):
+    # Safeguarded Newton's method on the log rate (as in irrNewton) for each stream values[offsets[i]:offsets[i + 1]].
+    # The log rate is kept inside a bracket updated with the sign of the npv (as in irrBinary), and any Newton step
+    # that leaves the bracket or has no slope is replaced with a bisection step.
+    for i in prange(offsets.shape[0] - 1):
+        iterations[i] = 0
+        converged[i] = False
+        rates[i] = np.nan
+        # Only the periods from the first to the last non-zero cash flow are used, so padding does not change the
+        # stability factor below
+        first, last = -1, -1
+        for t in range(offsets[i], offsets[i + 1]):
+            if values[t] != 0 and not np.isnan(values[t]):
+                if first < 0:
+                    first = t
+                last = t
+        if first < 0:
+            continue
+        sgn = np.sign(values[first])
+        start = offsets[i]
+        rate_lo, rate_hi = -MAX_LOG_RATE, MAX_LOG_RATE
+        rate = guess
+        for step in range(max_iter):
+            iterations[i] = step + 1
+            # Factor exp(m) = max(exp(-rate * t)) out of the npv and its slope for numerical stability
+            m = max(-rate * (first - start), -rate * (last - start))
+            npv = 0.
+            slope = 0.
+            # discount factors exp(-rate * t - m) as a running product from the period where the factor is 1, so the
+            # product never overflows: forward from the first cash flow if rate >= 0, backward from the last if not
+            discount = math.exp(-abs(rate))
+            factor = 1.
+            for k in range(last - first + 1):
+                t = (first - start + k) if rate >= 0 else (last - start - k)
+                if not np.isnan(values[start + t]):
+                    f = factor * values[start + t]
+                    npv += f
+                    slope += t * f
+                factor *= discount
+            if abs(npv) < tol * math.exp(-m):
+                converged[i] = True
+                break
+            if npv * sgn > 0:
+                rate_hi = rate
+            else:
+                rate_lo = rate
+            if rate_hi - rate_lo < tol:
+                # the bracket only contains a root if the npv changed sign, i.e. neither end is still at its limit
+                converged[i] = -MAX_LOG_RATE < rate_lo and rate_hi < MAX_LOG_RATE
+                break
+            rate_next = rate + min(max(npv / slope, -1.), 1.) if slope != 0 else np.nan
+            if not (rate_lo < rate_next < rate_hi):
+                rate_next = (rate_lo + rate_hi) / 2
+            rate = rate_next
+        if converged[i]:
+            rates[i] = math.exp(rate) - 1
+
+
+_irr_streams_serial = njit(nogil=True, cache=False)(_irr_streams)
+_irr_streams_parallel = njit(nogil=True, cache=False, parallel=True)(_irr_streams)
+
+
+def irr_array(streams, offsets=None, guess=0., tol=BASE_TOL, max_iter=100, parallel=True):
+    """
+    Periodic IRR of many cash flow streams at once (e.g. the yield of every loan in a tape under a scenario)
+    :param streams: 2-D array with one cash flow stream per row (missing values are ignored), or a 1-D array of every
+            stream one after another if offsets is given
+    :param offsets: array of offsets where stream i is streams[offsets[i]:offsets[i + 1]] (ragged streams, see
+            dateutils.date_schedule_array)
+    :param float guess: starting log rate for Newton's method.  Default is 0
+    :param float tol: convergence tolerance on the npv
+    :param int max_iter: maximum number of iterations per stream
+    :param bool parallel: if True, solve the streams in parallel threads.  Default is True
+    :return: tuple of (array of periodic IRRs (NaN if not converged), array of iterations used,
+                       boolean array of converged streams)
+    """
+    if offsets is None:
+        streams = np.ascontiguousarray(np.atleast_2d(streams), dtype=np.float64)
+        n_streams, n_periods = streams.shape
+        values = streams.reshape(-1)
+        offsets = np.arange(n_streams + 1, dtype=np.int64) * n_periods
+    else:
+        values = np.ascontiguousarray(streams, dtype=np.float64)
+        offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+        n_streams = offsets.shape[0] - 1
+    rates = np.empty(n_streams, dtype=np.float64)
+    iterations = np.empty(n_streams, dtype=np.int64)
+    converged = np.empty(n_streams, dtype=np.bool_)
+    kernel = _irr_streams_parallel if parallel else _irr_streams_serial
+    kernel(values, offsets, float(guess), float(tol), int(max_iter), rates, iterations, converged)
+    return rates, iterations, converged
+# END: Vectorized IRR for many streams
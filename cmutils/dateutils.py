@@ -4,7 +4,7 @@ import datetime
 
 import numpy as np
 import pandas as pd
-from numba import jit
+from numba import jit, njit
 
 #TODO: consider embeding this stuff in classes
 # --BEGIN: Some extended datetime checking utilities similar to datetime.py private functions
@@ -405,6 +405,23 @@ def dayfrac_actact(start_date, end_date, method='ISDA'):
 
 
 def dayfrac(start_date,end_date,method):
+    """
+    Day count fraction between start_date and end_date.  Standalone dates use the scalar dayfrac_* functions and arrays
+    (numpy, pandas DatetimeIndex or Series) use the compiled dayfrac_array engine.
+
+    Parameters:
+    -----------
+    start_date -> DATETIME OR DATETIME ARRAY
+    end_date -> DATETIME OR DATETIME ARRAY
+    method -> STRING: '30/360 NASD', '30/360 ISDA', '30/360 FNMA', 'act/360', 'act/365' OR 'act/act'
+
+    Returns:
+    --------
+    FLOAT OR NUMPY FLOAT ARRAY: day count fraction
+    """
+    if (hasattr(start_date, '__len__') and not isinstance(start_date, str)) or (
+            hasattr(end_date, '__len__') and not isinstance(end_date, str)):
+        return dayfrac_array(start_date, end_date, method)
     __DAYFRAC_FUNC_DICT = { '30/360 NASD': (dayfrac_30360,'NASD'),
                             '30/360 ISDA': (dayfrac_30360, 'ISDA'),
                             '30/360 FNMA': (dayfrac_fnma, 'NASD'),
@@ -414,6 +431,133 @@ def dayfrac(start_date,end_date,method):
                             }
     return __DAYFRAC_FUNC_DICT[method][0](start_date, end_date, __DAYFRAC_FUNC_DICT[method][1])
 
+
+# Compiled day count engine.  Dates are passed to the kernels as int64 days since 1970-01-01 (datetime64[D]) so the
+# year, month and day are calculated with integer arithmetic instead of object conversions.
+_DAYCOUNT_METHODS = {'30/360 NASD': 0, '30/360 ISDA': 1, '30/360 FNMA': 2, 'act/360': 3, 'act/365': 4, 'act/act': 5}
+_NAT_DAYS = np.iinfo(np.int64).min
+_DAYS_IN_MONTH_ARRAY = np.array(_DAYS_IN_MONTH_LIST, dtype=np.int64)
+
+
+@njit(nogil=True, cache=False, error_model='numpy')
+def _isleap_int(year):
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+@njit(nogil=True, cache=False, error_model='numpy')
+def _epoch_days_before_year(year):
+    # days from 1970-01-01 to January 1st of year (daysbeforeyear relative to the epoch)
+    y = year - 1
+    return y * 365 + y // 4 - y // 100 + y // 400 - 719162
+
+
+@njit(nogil=True, cache=False, error_model='numpy')
+def _civil_from_days(days):
+    # year, month and day of the proleptic Gregorian date days after 1970-01-01.  Dates are shifted to a positive
+    # count of 400 year eras so the divisions are unsigned
+    z = np.uint64(days + 719468 + 146097 * 5000)
+    era = z // np.uint64(146097)
+    doe = z - era * np.uint64(146097)
+    yoe = (doe - doe // np.uint64(1460) + doe // np.uint64(36524) - doe // np.uint64(146096)) // np.uint64(365)
+    doy = doe - (np.uint64(365) * yoe + yoe // np.uint64(4) - yoe // np.uint64(100))
+    mp = (np.uint64(5) * doy + np.uint64(2)) // np.uint64(153)
+    day = np.int64(doy - (np.uint64(153) * mp + np.uint64(2)) // np.uint64(5)) + 1
+    month = np.int64(mp) + 3 if mp < 10 else np.int64(mp) - 9
+    year = np.int64(yoe) + np.int64(era) * 400 - 2000000 + (1 if month <= 2 else 0)
+    return year, month, day
+
+
+@njit(nogil=True, cache=False, error_model='numpy')
+def _days360diff_int(start_days, end_days, isda):
+    # same conventions as days360diff
+    sy, sm, sd = _civil_from_days(start_days)
+    ey, em, ed = _civil_from_days(end_days)
+    if isda:
+        if sd == 31:
+            sd = 30
+        if ed == 31 and sd == 30:
+            ed = 30
+    else:
+        start_dim = _DAYS_IN_MONTH_ARRAY[sm] + (1 if sm == 2 and _isleap_int(sy) else 0)
+        end_dim = _DAYS_IN_MONTH_ARRAY[em] + (1 if em == 2 and _isleap_int(ey) else 0)
+        if ed == end_dim and sd == start_dim:
+            ed = 30
+            sd = 30
+        elif sd == start_dim:
+            sd = 30
+    return (ey - sy) * 360 + (em - sm) * 30 + (ed - sd)
+
+
+@njit(nogil=True, cache=False, error_model='numpy')
+def _actact_isda_int(start_days, end_days):
+    # days in each calendar year divided by the number of days in that year
+    sy = _civil_from_days(start_days)[0]
+    ey = _civil_from_days(end_days)[0]
+    if sy == ey:
+        return (end_days - start_days) / (366. if _isleap_int(sy) else 365.)
+    frac_start = (_epoch_days_before_year(sy + 1) - start_days) / (366. if _isleap_int(sy) else 365.)
+    frac_end = (end_days - _epoch_days_before_year(ey)) / (366. if _isleap_int(ey) else 365.)
+    return frac_start + frac_end + (ey - sy - 1)
+
+
+@njit(nogil=True, cache=False, error_model='numpy')
+def _dayfrac_kernel(start_days, end_days, method_code, nat_days):
+    out = np.empty(start_days.shape[0], dtype=np.float64)
+    for i in range(start_days.shape[0]):
+        start = start_days[i]
+        end = end_days[i]
+        if start == nat_days or end == nat_days:
+            out[i] = np.nan
+            continue
+        sign = 1.
+        if start > end:
+            sign = -1.
+            start, end = end, start
+        if method_code == 0 or method_code == 1:
+            frac = _days360diff_int(start, end, method_code == 1) / 360.
+        elif method_code == 2:
+            num = _days360diff_int(start, end, False)
+            frac = (num // 30) / 360. + (num % 30) / 365.
+        elif method_code == 3:
+            frac = (end - start) / 360.
+        elif method_code == 4:
+            frac = (end - start) / 365.
+        else:
+            frac = _actact_isda_int(start, end)
+        out[i] = sign * frac
+    return out
+
+
+def dayfrac_array(start_dates, end_dates, method='30/360 NASD'):
+    """
+    Compiled day count fraction calculator for arrays of dates.
+
+    Parameters:
+    -----------
+    start_dates -> DATETIME ARRAY (numpy datetime64, pandas DatetimeIndex or Series) or a single date
+    end_dates -> DATETIME ARRAY (numpy datetime64, pandas DatetimeIndex or Series) or a single date
+    method -> STRING: '30/360 NASD' (Default), '30/360 ISDA', '30/360 FNMA', 'act/360', 'act/365' OR 'act/act'
+
+    Returns:
+    --------
+    NUMPY FLOAT ARRAY: day count fraction for each pair of dates
+
+    Notes:
+    ------
+    Start and end dates are broadcast against each other, so one date can be paired with an array of dates.
+    30/360 methods follow the same conventions as days360diff and act/act is the ISDA method.  If a start date is
+    after its end date the fraction is negative, and if either date is missing (NaT) the fraction is NaN.
+    """
+    if method not in _DAYCOUNT_METHODS:
+        raise ValueError(f'Invalid day count method {method}.  Must be one of {list(_DAYCOUNT_METHODS.keys())}')
+    start_days, end_days = np.broadcast_arrays(np.asarray(start_dates, dtype='datetime64[D]'),
+                                               np.asarray(end_dates, dtype='datetime64[D]'))
+    shape = start_days.shape
+    out = _dayfrac_kernel(np.ascontiguousarray(start_days).reshape(-1).view(np.int64),
+                          np.ascontiguousarray(end_days).reshape(-1).view(np.int64),
+                          _DAYCOUNT_METHODS[method], _NAT_DAYS)
+    return out.reshape(shape)
+
 # --END: Day Count Fraction Calculators
 
 
@@ -570,18 +714,15 @@ def dateRangeVec(start_date, periods, increment_type, weekday_only=False):
             _dateRange = _dateRange + (lambda x: 1 if x > 15 else 0)(start_date.day) * np.timedelta64(1, 'M') + np.timedelta64(14,'D')
     # CASES 3, 4
         else:
-            _yearVector = [dt.year for dt in _dateRange.astype(object)]
-            _monthVector = [dt.month for dt in _dateRange.astype(object)]
-            _dateAdder = np.empty(len(_dateRange), dtype='<m8[D]')
+            _monthLength = ((_dateRange.astype('datetime64[M]') + np.timedelta64(1, 'M')).astype('datetime64[D]') -
+                            _dateRange.astype('datetime64[M]').astype('datetime64[D]')).astype(int)
             #CASE 3
             if increment_type == 'monthend':
-                for i in range(0, len(_dateRange)):
-                    _dateAdder[i] = np.timedelta64(daysinmonth(_yearVector[i], _monthVector[i]) - 1, 'D')
+                _dateRange = _dateRange.astype('datetime64[D]') + (_monthLength - 1).astype('timedelta64[D]')
             #CASE 4
             else:
-                for i in range(0, len(_dateRange)):
-                    _dateAdder[i] = np.timedelta64(min(start_date.day, daysinmonth(_yearVector[i], _monthVector[i])) - 1, 'D')
-            _dateRange = _dateRange + _dateAdder
+                _dateRange = _dateRange.astype('datetime64[D]') + \
+                             (np.minimum(start_date.day, _monthLength) - 1).astype('timedelta64[D]')
     # Do the business day logics
     if weekday_only == True:
         _dateRange = nextbusday(_dateRange)
@@ -599,6 +740,114 @@ def dateRangeGen(start_date, end_date, increment_type, weekday_only=False):
     except:
         print('dateRangeGenerator inputs not correctly specified')
 
+
+# Step of each increment type for date_schedule_array: (number of days, number of months, day of month rule)
+# Day of month rules: 0 = start day (capped at the days in the month), 1 = month end, 2 = 15th of the month
+_SCHEDULE_STEPS = {'daily': (1, 0, 0),
+                   'weekly': (7, 0, 0),
+                   'monthly': (0, 1, 0),
+                   'monthend': (0, 1, 1),
+                   'monthmid': (0, 1, 2),
+                   'quarterly': (0, 3, 0),
+                   'semiannual': (0, 6, 0),
+                   'annual': (0, 12, 0)}
+
+
+_DAYS_BEFORE_MONTH_ARRAY = np.array(_DAYS_BEFORE_MONTH_LIST, dtype=np.int64)
+
+
+@njit(nogil=True, cache=False, error_model='numpy')
+def _schedule_kernel(start_days, offsets, step_days, step_months, day_rule, out, nat_days):
+    for i in range(start_days.shape[0]):
+        start = start_days[i]
+        if start == nat_days:
+            out[offsets[i]:offsets[i + 1]] = nat_days
+            continue
+        year, month, day = _civil_from_days(start)
+        first_month = year * 12 + month - 1 + (1 if day_rule[i] == 2 and day > 15 else 0)
+        for k in range(offsets[i + 1] - offsets[i]):
+            if step_months[i] == 0:
+                out[offsets[i] + k] = start + step_days[i] * k
+                continue
+            total_months = first_month + step_months[i] * k
+            sched_year = total_months // 12
+            sched_month = total_months - sched_year * 12 + 1
+            leap_day = 1 if sched_month == 2 and _isleap_int(sched_year) else 0
+            if day_rule[i] == 1:
+                sched_day = _DAYS_IN_MONTH_ARRAY[sched_month] + leap_day
+            elif day_rule[i] == 2:
+                sched_day = 15
+            else:
+                sched_day = min(day, _DAYS_IN_MONTH_ARRAY[sched_month] + leap_day)
+            out[offsets[i] + k] = (_epoch_days_before_year(sched_year) + _DAYS_BEFORE_MONTH_ARRAY[sched_month] +
+                                   (1 if sched_month > 2 and _isleap_int(sched_year) else 0) + sched_day - 1)
+
+
+@njit(nogil=True, cache=False)
+def _ragged_to_matrix_kernel(values, offsets, out):
+    for i in range(offsets.shape[0] - 1):
+        for k in range(offsets[i + 1] - offsets[i]):
+            out[i, k] = values[offsets[i] + k]
+
+
+def date_schedule_array(start_dates, periods, increment_type='monthly', weekday_only=False, ragged=False):
+    """
+    Vectorized schedule of dates for many start dates at once (e.g. the payment dates of every loan in a tape).
+
+    Parameters:
+    -----------
+    start_dates -> DATETIME ARRAY (numpy datetime64, pandas DatetimeIndex or Series)
+    periods -> INTEGER OR INTEGER ARRAY: number of dates in each schedule
+    increment_type -> STRING OR STRING ARRAY: 'daily', 'weekly', 'monthly' (Default), 'monthend', 'monthmid',
+                      'quarterly', 'semiannual' OR 'annual'
+    weekday_only -> BOOLEAN: if True, dates are rolled forward to the next business day (see nextbusday)
+    ragged -> BOOLEAN: if True, return the schedules in CSR form instead of a matrix
+
+    Returns:
+    --------
+    NUMPY DATETIME64[D] MATRIX with a row for each start date and periods.max() columns, padded with NaT.
+    If ragged is True, a tuple of (NUMPY DATETIME64[D] ARRAY of every schedule one after another,
+    NUMPY INTEGER ARRAY of offsets) where schedule i is values[offsets[i]:offsets[i + 1]].
+
+    Notes:
+    ------
+    Date k of each schedule follows the same rules as dateIncrement(start_date, k, increment_type): monthly steps keep
+    the start day, capped at the number of days in the month, 'monthend' uses the last day of each month and
+    'monthmid' uses the 15th, starting the following month if the start day is after the 15th.
+    The first date of each schedule is the start date itself for 'daily', 'weekly', 'monthly', 'quarterly',
+    'semiannual' and 'annual' schedules.
+    """
+    start_dates = np.asarray(start_dates, dtype='datetime64[D]').reshape(-1)
+    n_schedules = start_dates.shape[0]
+    periods = np.broadcast_to(np.asarray(periods, dtype=np.int64), (n_schedules,))
+    increment_type = np.broadcast_to(np.asarray(increment_type, dtype=object), (n_schedules,))
+    if np.any(periods < 0):
+        raise ValueError('periods must be non-negative')
+
+    # Step and day of month rule of each schedule
+    type_codes, type_names = pd.factorize(increment_type)
+    unknown_types = set(type_names) - set(_SCHEDULE_STEPS.keys())
+    if unknown_types or np.any(type_codes < 0):
+        raise ValueError(f'Invalid increment type(s) {sorted(map(str, unknown_types))}.  Must be one of '
+                         f'{list(_SCHEDULE_STEPS.keys())}')
+    steps = np.array([_SCHEDULE_STEPS[x] for x in type_names], dtype=np.int64).reshape(-1, 3)[type_codes]
+
+    offsets = np.zeros(n_schedules + 1, dtype=np.int64)
+    np.cumsum(periods, out=offsets[1:])
+    values = np.empty(offsets[-1], dtype='datetime64[D]')
+    _schedule_kernel(np.ascontiguousarray(start_dates).view(np.int64), offsets, np.ascontiguousarray(steps[:, 0]),
+                     np.ascontiguousarray(steps[:, 1]), np.ascontiguousarray(steps[:, 2]), values.view(np.int64),
+                     _NAT_DAYS)
+    if weekday_only is True:
+        valid = ~np.isnat(values)
+        values[valid] = np.busday_offset(values[valid], 0, roll='forward')
+    if ragged is True:
+        return values, offsets
+    matrix = np.full((n_schedules, int(periods.max()) if n_schedules > 0 else 0), np.datetime64('NaT'),
+                     dtype='datetime64[D]')
+    _ragged_to_matrix_kernel(values.view(np.int64), offsets, matrix.view(np.int64))
+    return matrix
+
 # END: Date Range Creator
 
 #TODO: consider inserting some del statements to clean up some of the internal variables and methods defined in the module
@@ -52,30 +52,164 @@ def geometric_mean(x: np.array) -> float:
     """
     return np.prod(x) ** (1/len(x))
 
+def _skip_missing_values(zero_values) -> bool:
+    """
+    True if the zeros option of the weighted average functions skips missing values instead of filling them
+    """
+    return zero_values is None or str(zero_values).lower() in ('na', 'nan', 'none', 'null')
+
+
+def weighted_average_contributions(values, weights, zeros=0) -> dict:
+    """
+    Function to calculate each value's contribution to the totals behind a weighted average.  Summing the
+    contributions over a group gives the group's totals (see weighted_average_totals), so the contributions can be
+    calculated once and reduced over several different groupings.
+    :param values: array of values to average
+    :param weights: array of weights aligned with values
+    :param zeros: value used to fill missing values.  If None or one of ('na', 'nan', 'none', 'null'), missing values
+            and their weights are skipped
+    :return: dict of arrays aligned with values: wsum (value * weight), weight (weight if the value is included),
+            vsum (value, 0 if missing), vcount (1 if the value is included)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    missing = np.isnan(values)
+    if _skip_missing_values(zeros) is False:
+        included_values = np.where(missing, zeros, values)
+        value_count = np.ones(values.shape[0], dtype=np.float64)
+    else:
+        included_values = np.where(missing, 0.0, values)
+        weights = np.where(missing, 0.0, weights)
+        value_count = (~missing).astype(np.float64)
+    return {'wsum': included_values * weights,
+            'weight': weights,
+            'vsum': included_values,
+            'vcount': value_count}
+
+
+def weighted_average_totals(values, weights, group_codes=None, n_groups: int = None, zeros=0,
+                            group_counts: np.ndarray = None, contributions: dict = None) -> dict:
+    """
+    Function to calculate the additive totals behind a weighted average for every group in one pass.  Totals from
+    separate pieces of the data can be added before calling weighted_average_from_totals.
+    :param values: array of values to average
+    :param weights: array of weights aligned with values
+    :param group_codes: array of integer group codes (0 to n_groups - 1) aligned with values, negative codes are
+            excluded.  If None, all values are one group
+    :param n_groups: number of groups.  Default is max(group_codes) + 1
+    :param zeros: value used to fill missing values.  If None or one of ('na', 'nan', 'none', 'null'), missing values
+            and their weights are skipped
+    :param group_counts: number of values in each group, if already calculated
+    :param contributions: output of weighted_average_contributions for values and weights, if already calculated
+    :return: dict of arrays with one element per group: wsum (sum of value * weight), weight (sum of weights of
+            included values), vsum (sum of non-missing values), vcount (number of included values), count (number of
+            values)
+    """
+    if contributions is None:
+        contributions = weighted_average_contributions(values, weights, zeros)
+    n_values = contributions['wsum'].shape[0]
+    if group_codes is None:
+        group_codes = np.zeros(n_values, dtype=np.intp)
+        n_groups = 1
+    else:
+        group_codes = np.asarray(group_codes, dtype=np.intp)
+        n_groups = int(group_codes.max(initial=-1)) + 1 if n_groups is None else n_groups
+        in_group = group_codes >= 0
+        if not in_group.all():
+            group_codes = group_codes[in_group]
+            contributions = {key: contribution[in_group] for key, contribution in contributions.items()}
+            group_counts = None
+    totals = {key: np.bincount(group_codes, weights=contribution, minlength=n_groups)
+              for key, contribution in contributions.items()}
+    if group_counts is None:
+        group_counts = np.bincount(group_codes, minlength=n_groups)
+    totals['count'] = np.asarray(group_counts, dtype=np.float64)
+    return totals
+
+
+def weighted_average_from_totals(totals: dict, rounding: bool = None, output_type: str = None, na_value=np.nan):
+    """
+    Function to calculate the weighted average of each group from the totals of weighted_average_totals, with the same
+    results as pandas_weighted_average_factory: if the weights of a group sum to zero the simple average of its values
+    is returned (missing if a skipped value is missing), or na_value if the values also sum to zero.
+    :param dict totals: output of weighted_average_totals (or the sum of several)
+    :param rounding: if True, round the weighted averages to 0 decimal places
+    :param output_type: if 'int' (with rounding), return the rounded weighted averages as integers
+    :param na_value: value returned for groups where the weights and values sum to zero.  Default is np.nan
+    :return: numpy array with one element per group.  The array is float, int64 if every element is an integer, or
+            object if it mixes integers or na_value with floats
+    """
+    weighted_sum, weight = np.asarray(totals['wsum'], dtype=np.float64), np.asarray(totals['weight'], dtype=np.float64)
+    value_sum, value_count = np.asarray(totals['vsum'], dtype=np.float64), np.asarray(totals['vcount'], dtype=np.float64)
+    count = np.asarray(totals['count'], dtype=np.float64)
+    zero_weight = weight == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weighted = weighted_sum / weight
+        simple = np.where(value_count == count, value_sum / count, np.nan)
+    if rounding is True:
+        weighted = np.round(weighted, 0)
+    result = np.where(zero_weight, simple, weighted)
+    na_mask = zero_weight & (value_sum == 0)
+    result[na_mask] = np.nan
+    if rounding is True and output_type == 'int':
+        int_mask = ~zero_weight & np.isfinite(result)
+        if int_mask.all():
+            return result.astype(np.int64)
+        result = result.astype(object)
+        result[int_mask] = [int(x) for x in result[int_mask]]
+    if na_mask.any() and not (isinstance(na_value, float) and np.isnan(na_value)):
+        result = result.astype(object)
+        result[na_mask] = na_value
+    return result
+
+
+def weighted_average_kernel(values, weights, group_codes=None, n_groups: int = None, zeros=0, rounding: bool = None,
+                            output_type: str = None, na_value=np.nan):
+    """
+    Function to calculate the weighted average of values for every group in one call, using bincount reductions over
+    aligned numpy arrays.  Matches pandas_weighted_average_factory applied to each group.
+    :param values: array of values to average
+    :param weights: array of weights aligned with values
+    :param group_codes: array of integer group codes aligned with values (negative codes are excluded), or None for
+            one group
+    :param n_groups: number of groups.  Default is max(group_codes) + 1
+    :param zeros: value used to fill missing values, or None / 'na' to skip missing values.  Default is 0
+    :param rounding: if True, round to 0 decimal places
+    :param output_type: if 'int' (with rounding), return integers
+    :param na_value: value returned for groups where the weights and values sum to zero.  Default is np.nan
+    :return: numpy array with the weighted average of each group
+    """
+    totals = weighted_average_totals(values, weights, group_codes, n_groups, zeros)
+    return weighted_average_from_totals(totals, rounding, output_type, na_value)
+
+
 def pandas_weighted_average_factory(**kwargs) -> object:
-    weights = kwargs.get('weights').copy()
+    """
+    Function to create a weighted average function for pandas groupby aggregation.  The returned function takes a
+    Series of values, aligns the weights to it by index label and calls weighted_average_kernel.  To average every
+    group at once, use weighted_average_kernel with group codes instead.
+    :param kwargs:
+        :keyword pd.Series weights: weights with an index that includes the index of the values
+        :keyword zeros: value used to fill missing values, or None / 'na' to skip missing values
+        :keyword bool rounding: if True, round to 0 decimal places
+        :keyword str output_type: if 'int' (with rounding), return an int
+    :return: function of a pd.Series returning the weighted average, or 'NA' if the weights and values sum to zero
+    :exception ValueError: (from the returned function) if missing values are skipped and every value is missing
+    """
+    weights = kwargs.get('weights')
+    weight_values = weights.to_numpy(dtype=np.float64, na_value=np.nan)
     zero_values = kwargs.get('zeros')
     rounding = kwargs.get('rounding')
     output_type = kwargs.get('output_type')
     def weighted_average(values):
-        try:
-            if zero_values is None or str(zero_values).lower() in ('na', 'nan', 'none', 'null'):
-                values_mask = ~np.isnan(values)
-                if all(v is False for v in values_mask):
-                    raise ValueError('there are no non-missing x variable values')
-            else:
-                values = values.fillna(zero_values)
-                values_mask = ~np.isnan(values)
-            weight = weights.loc[values.index]
-            if rounding is True and output_type == 'int':
-                return int(np.round(np.average(values[values_mask], weights=weight[values_mask]), 0))
-            elif rounding is True:
-                return np.round(np.average(values[values_mask], weights=weight[values_mask]), 0)
-            else:
-                return np.average(values[values_mask], weights=weight[values_mask])
-        except ZeroDivisionError:
-            if values.sum() != 0:
-                return np.average(values)
-            else:
-                return 'NA'
+        if weights.index.is_unique:
+            weight = weight_values[weights.index.get_indexer(values.index)]
+        else:
+            weight = weights.loc[values.index].to_numpy(dtype=np.float64, na_value=np.nan)
+        values = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        if _skip_missing_values(zero_values) and np.isnan(values).all():
+            raise ValueError('there are no non-missing x variable values')
+        result = weighted_average_kernel(values, weight, zeros=zero_values, rounding=rounding, output_type=output_type,
+                                         na_value='NA')[0]
+        return int(result) if isinstance(result, np.integer) else result
     return weighted_average
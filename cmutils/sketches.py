@@ -0,0 +1,228 @@
+import numpy as np
+import pandas as pd
+
+
+def hash_values(values) -> np.ndarray:
+    """
+    64 bit hash of each non-missing value.  Equal values hash equally whether they are stored as object or category,
+    or as integers, bools or floats (numbers are hashed as float64, as read_csv gives a chunk with missing values),
+    so sketches of chunks with different dtypes can be combined.
+    :param values: pandas Series or array like of values
+    :return: np.ndarray of uint64 hashes
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    series = series[series.notna()]
+    if pd.api.types.is_numeric_dtype(series.dtype) and series.dtype != np.float64:
+        series = pd.Series(series.to_numpy(dtype=np.float64), index=series.index)
+    return pd.util.hash_pandas_object(series, index=False).to_numpy(dtype=np.uint64)
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    # frexp is exact on 32 bit halves of a uint64, unlike on the full 64 bit value
+    high = np.frexp((values >> np.uint64(32)).astype(np.float64))[1]
+    low = np.frexp((values & np.uint64(0xFFFFFFFF)).astype(np.float64))[1]
+    return np.where(high > 0, high + 32, low)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct value counter.  Uses 2 ** precision one byte registers and estimates the number of distinct
+    values with a relative standard error of about 1.04 / sqrt(2 ** precision) (0.8% at the default precision of 14).
+    Small counts use linear counting, so they are close to exact.
+    """
+
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError('precision must be between 4 and 18')
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype=np.uint8)
+
+    def add(self, values):
+        """
+        Add values to the sketch.  Missing values are ignored.
+        :param values: pandas Series or array like of values
+        :return: self
+        """
+        return self.add_hashes(hash_values(values))
+
+    def add_hashes(self, hashes: np.ndarray):
+        """
+        Add values that are already hashed with hash_values
+        :param np.ndarray hashes: uint64 hashes
+        :return: self
+        """
+        shift = np.uint64(64 - self.precision)
+        index = (hashes >> shift).astype(np.intp)
+        remainder = hashes << np.uint64(self.precision)
+        rank = np.minimum(64 - _bit_length(remainder) + 1, 64 - self.precision + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other: 'HyperLogLog'):
+        """
+        Add the values of another sketch.  The result is the same as one sketch of both sets of values.
+        :param HyperLogLog other: sketch with the same precision
+        :return: self
+        """
+        if other.precision != self.precision:
+            raise ValueError('HyperLogLog sketches must have the same precision to be merged')
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    @property
+    def count(self) -> int:
+        """
+        Estimated number of distinct values added
+        """
+        m = self.registers.size
+        alpha = 0.7213 / (1.0 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros > 0:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+class TDigest:
+    """
+    Merging t-digest for quantiles.  Values are kept as at most about compression weighted centroids, which are small
+    near the tails (the k1 scale function) so extreme quantiles stay accurate.  min and max are exact.
+    """
+
+    def __init__(self, compression: int = 200):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def total_weight(self) -> float:
+        return float(self.weights.sum())
+
+    def add(self, values, weights=None):
+        """
+        Add values to the digest.  NaN values are ignored.
+        :param values: array like of numbers
+        :param weights: array like of weights of the values.  Default is 1 for every value
+        :return: self
+        """
+        values = np.asarray(values, dtype=np.float64)
+        weights = np.ones(values.size) if weights is None else np.asarray(weights, dtype=np.float64)
+        keep = ~np.isnan(values)
+        values, weights = values[keep], weights[keep]
+        if values.size == 0:
+            return self
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        if self.weights.size == 0 or values.size <= self.weights.size:
+            means, weights = np.concatenate([self.means, values]), np.concatenate([self.weights, weights])
+        else:
+            # digest a large batch on its own first, so only two small centroid arrays are merged
+            centroid_means, centroid_weights = self.means, self.weights
+            self._compress(values, weights)
+            means = np.concatenate([centroid_means, self.means])
+            weights = np.concatenate([centroid_weights, self.weights])
+        self._compress(means, weights)
+        return self
+
+    def merge(self, other: 'TDigest'):
+        """
+        Add the centroids of another digest
+        :param TDigest other: digest
+        :return: self
+        """
+        if other.weights.size > 0:
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._compress(np.concatenate([self.means, other.means]), np.concatenate([self.weights, other.weights]))
+        return self
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        if np.all(weights == 1.0):
+            means = np.sort(means)
+        else:
+            order = np.argsort(means, kind='stable')
+            means, weights = means[order], weights[order]
+        cumulative = np.cumsum(weights)
+        q_left = (cumulative - weights) / cumulative[-1]
+        # centroids whose left edges fall in the same unit of the k1 scale are merged
+        k = np.floor(self.compression * (np.arcsin(2.0 * q_left - 1.0) / np.pi + 0.5))
+        starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(weights * means, starts) / self.weights
+
+    def quantile(self, q):
+        """
+        Estimated quantile(s), interpolated between centroid centers and the exact min and max
+        :param q: quantile or array like of quantiles in [0, 1]
+        :return: float or np.ndarray, NaN if the digest is empty
+        """
+        q = np.asarray(q, dtype=np.float64)
+        if self.weights.size == 0:
+            return np.full(q.shape, np.nan)[()] if q.ndim else np.nan
+        cumulative = np.cumsum(self.weights)
+        centers = cumulative - self.weights / 2.0
+        positions = np.concatenate([[0.0], centers, [cumulative[-1]]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return np.interp(q * cumulative[-1], positions, values)[()]
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy hitter (top-K) summary.  At most capacity values are tracked, each with a count that never
+    underestimates its true count and an error: the true count is between count - error and count.  Values that are
+    not tracked occurred at most bound times, and when bound is 0 the counts are exact.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+        self.errors = pd.Series(dtype=np.int64)
+        self.bound = 0
+        self.total = 0
+
+    def add(self, values):
+        """
+        Add values to the summary.  Missing values are ignored.
+        :param values: pandas Series or array like of values
+        :return: self
+        """
+        series = values if isinstance(values, pd.Series) else pd.Series(values)
+        chunk_counts = series.value_counts(dropna=True, sort=False)
+        chunk_counts = chunk_counts[chunk_counts > 0]
+        chunk_counts.index = pd.Index(chunk_counts.index.to_numpy(), dtype=object)
+        self.total += int(chunk_counts.sum())
+        return self._merge(chunk_counts.astype(np.int64), pd.Series(0, index=chunk_counts.index, dtype=np.int64), 0)
+
+    def merge(self, other: 'SpaceSaving'):
+        """
+        Add the counts of another summary.  The merged counts keep the guarantees of both summaries.
+        :param SpaceSaving other: summary
+        :return: self
+        """
+        self.total += other.total
+        return self._merge(other.counts, other.errors, other.bound)
+
+    def _merge(self, counts: pd.Series, errors: pd.Series, bound: int):
+        # a value missing from one summary may have occurred up to that summary's bound times
+        values = self.counts.index.union(counts.index, sort=False)
+        merged_counts = self.counts.reindex(values, fill_value=self.bound) + counts.reindex(values, fill_value=bound)
+        merged_errors = self.errors.reindex(values, fill_value=self.bound) + errors.reindex(values, fill_value=bound)
+        merged_bound = self.bound + bound
+        merged_counts = merged_counts.sort_values(ascending=False, kind='stable')
+        if merged_counts.size > self.capacity:
+            merged_bound = max(merged_bound, int(merged_counts.iloc[self.capacity]))
+            merged_counts = merged_counts.iloc[:self.capacity]
+        self.counts = merged_counts
+        self.errors = merged_errors.reindex(merged_counts.index)
+        self.bound = merged_bound
+        return self
+
+    def top(self, k: int = None) -> pd.Series:
+        """
+        Most frequent values
+        :param int k: number of values.  Default is every tracked value
+        :return: pd.Series of estimated counts indexed by value, largest first
+        """
+        return self.counts if k is None else self.counts.iloc[:k]
@@ -0,0 +1,270 @@
+# Header-resolution index for mapping a new servicer's tape headers to config field names.
+# Known field names and aliases from past header maps are matched by normalized tokens and character trigrams, and the
+# aliases and resolved layouts can be kept in a small json store so repeat layouts resolve with one lookup.
+
+import os
+import re
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+
+class HeaderIndex:
+    """
+    Index of known field names and their aliases for mapping the headers of a new tape to config field names.  Headers
+    are normalized to canonical tokens (e.g. 'CurrentBalance' and 'Current Balance' both become curr_bal) and matched
+    to a field by, in order of confidence, an exact alias, the same set of tokens or the character trigram (Dice)
+    similarity of the tokens.  Each field is mapped from at most one header.
+
+    With a store_dir, aliases learned from header maps and the resolved map of each header layout (the ordered list of
+    a servicer's headers) are saved to header_index.json, so the aliases persist and a repeat layout is resolved with
+    one lookup.
+    """
+
+    _store_format_version = 1
+    _store_file = 'header_index.json'
+
+    # Header words and abbreviations written as the tokens used in the config field names
+    _token_synonyms = {'current': 'curr', 'cur': 'curr', 'original': 'orig', 'origination': 'orig',
+                       'originated': 'orig', 'balance': 'bal', 'payment': 'pmt', 'pymt': 'pmt', 'pmnt': 'pmt',
+                       'remaining': 'rem', 'maturity': 'mat', 'property': 'prop', 'amount': 'amt',
+                       'number': 'num', 'no': 'num', 'identifier': 'id', 'dt': 'date', 'zipcode': 'zip',
+                       'postal': 'zip', 'modification': 'mod', 'bankruptcy': 'bk', 'foreclosure': 'fc',
+                       'underwriting': 'uw', 'documentation': 'doctype', 'doc': 'doctype', 'appraised': 'appraisal',
+                       'income': 'inc', 'verified': 'verify'}
+    _stop_tokens = ('of', 'the', 'and', 'a', 'in', 'on', 'for')
+    _acronym_pattern = re.compile(r'([A-Z]+)([A-Z][a-z])')
+    _camel_pattern = re.compile(r'([a-z0-9])([A-Z])')
+    _split_pattern = re.compile(r'[^a-z0-9]+')
+    # Scores of the match methods that do not depend on the headers
+    _exact_score = 1.0
+    _token_score = 0.95
+
+    def __init__(self, store_dir: str = None, fields: list = None, min_score: float = 0.6):
+        """
+        :param str store_dir: directory of the persistent alias store.  Default is None for an in-memory index
+        :param list fields: known field names, e.g. AssetVariableConfig.variables
+        :param float min_score: minimum score for a header to be mapped.  Default is 0.6
+        """
+        self.store_dir = store_dir
+        self.min_score = min_score
+        self.fields = []
+        self.aliases = {}
+        self.layouts = {}
+        self._candidates = None
+        if store_dir is not None:
+            os.makedirs(store_dir, exist_ok=True)
+            self._load_store()
+        if fields is not None:
+            self.add_fields(fields)
+
+    @staticmethod
+    def normalize(header) -> str:
+        """
+        Normalize a header to canonical tokens joined by '_': camel case and punctuation are split, words are lower
+        cased, common words and abbreviations are written as the config field names write them and stop words are
+        dropped.  e.g. 'CurrentBalance', 'Current Balance ($)' and 'bal_curr' become curr_bal, curr_bal and bal_curr
+        :param header: header name
+        :return: str
+        """
+        text = HeaderIndex._acronym_pattern.sub(r'\1_\2', str(header).strip())
+        text = HeaderIndex._camel_pattern.sub(r'\1_\2', text).lower()
+        tokens = [HeaderIndex._token_synonyms.get(token, token) for token in HeaderIndex._split_pattern.split(text)]
+        return '_'.join(token for token in tokens if token != '' and token not in HeaderIndex._stop_tokens)
+
+    @staticmethod
+    def _token_key(normalized: str) -> str:
+        return '_'.join(sorted(normalized.split('_')))
+
+    @staticmethod
+    def _trigrams(normalized: str) -> set:
+        padded = f'  {normalized.replace("_", " ")} '
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def add_fields(self, fields: list):
+        """
+        Add known field names, e.g. AssetVariableConfig.variables
+        :param list fields: field names
+        :return: self
+        """
+        fields = list(dict.fromkeys(self.fields + [str(field) for field in fields]))
+        if len(fields) > len(self.fields):
+            # layouts resolved before these fields were known may now resolve differently
+            self.fields = fields
+            self.layouts = {}
+            self._candidates = None
+        return self
+
+    def add_header_map(self, header_map: dict, save: bool = True):
+        """
+        Learn the raw headers of a header map as aliases of their fields, e.g. a past hand built map or a resolved map
+        that has been checked.  Fields that are not known yet are added.
+        :param dict header_map: dict of raw header name to field name (see tapetools.import_raw_datatape)
+        :param bool save: if True and the index has a store_dir, save the store.  Default is True
+        :return: self
+        """
+        header_map = {header: field for header, field in header_map.items() if not pd.isna(field)}
+        self.add_fields(list(header_map.values()))
+        for header, field in header_map.items():
+            self.aliases[HeaderIndex.normalize(header)] = str(field)
+        # layouts resolved before these aliases were known may now resolve differently
+        self.layouts = {}
+        self._candidates = None
+        if save is True and self.store_dir is not None:
+            self.save()
+        return self
+
+    def _build_candidates(self):
+        """
+        Helper function to build the match index: every field name and alias as normalized text, token key and a
+        trigram x candidate incidence matrix
+        """
+        names = [(HeaderIndex.normalize(field), field) for field in self.fields] + list(self.aliases.items())
+        names = list(dict(names).items())
+        trigram_ids = {}
+        rows, columns = [], []
+        for column, (normalized, _) in enumerate(names):
+            for trigram in HeaderIndex._trigrams(normalized):
+                rows.append(trigram_ids.setdefault(trigram, len(trigram_ids)))
+                columns.append(column)
+        incidence = np.zeros((len(trigram_ids), len(names)), dtype=np.int16)
+        incidence[rows, columns] = 1
+        self._candidates = {'normalized': {normalized: field for normalized, field in names},
+                            'token_keys': {HeaderIndex._token_key(normalized): field for normalized, field in names},
+                            'fields': np.array([field for _, field in names], dtype=object),
+                            'trigram_ids': trigram_ids,
+                            'incidence': incidence,
+                            'sizes': incidence.sum(axis=0)}
+
+    @staticmethod
+    def layout_key(headers: list) -> str:
+        """
+        Key of a header layout: a sha256 hash of the ordered header names
+        :param list headers: header names
+        :return: hex digest
+        """
+        return hashlib.sha256(json.dumps([str(header) for header in headers]).encode()).hexdigest()
+
+    def resolve(self, headers: list, min_score: float = None, use_layout_cache: bool = True) -> pd.DataFrame:
+        """
+        Map the headers of a tape to field names.  Each header is scored against every field name and alias: an
+        exact name or alias scores 1.0, the same tokens in another order 0.95, and otherwise the trigram Dice
+        similarity of the normalized header and name.  Headers are assigned to fields from the highest score down, so each field is
+        mapped from at most one header.
+        :param list headers: header names of the tape
+        :param float min_score: minimum score for a header to be mapped.  Default is the index's min_score
+        :param bool use_layout_cache: if True, a layout resolved before is returned from the layout cache, and a new
+                layout is added to it (and saved, if the index has a store_dir).  Default is True
+        :return: pd.DataFrame indexed by header with columns field (None if not mapped), score and method ('exact'
+                for a field name or alias, 'tokens', 'ngram' or None)
+        """
+        headers = [str(header) for header in headers]
+        min_score = self.min_score if min_score is None else min_score
+        key = f'{HeaderIndex.layout_key(headers)}:{min_score}'
+        if use_layout_cache is True and key in self.layouts:
+            return pd.DataFrame(self.layouts[key], index=pd.Index(headers, name='header'),
+                                columns=['field', 'score', 'method'])
+        if self._candidates is None:
+            self._build_candidates()
+        candidates = self._candidates
+        normalized = [HeaderIndex.normalize(header) for header in headers]
+        scores = self._trigram_scores(normalized)
+        methods = {}
+        field_index = {field: i for i, field in enumerate(candidates['fields'])}
+        for row, header in enumerate(normalized):
+            for method, lookup, lookup_key, score in (
+                    ('tokens', candidates['token_keys'], HeaderIndex._token_key(header), HeaderIndex._token_score),
+                    ('exact', candidates['normalized'], header, HeaderIndex._exact_score)):
+                if lookup_key in lookup:
+                    scores[row, field_index[lookup[lookup_key]]] = score
+                    methods[row, field_index[lookup[lookup_key]]] = method
+        result = self._assign(headers, scores, methods, min_score)
+        if use_layout_cache is True:
+            self.layouts[key] = result.to_numpy().tolist()
+            if self.store_dir is not None:
+                self.save()
+        return result
+
+    def _trigram_scores(self, normalized: list) -> np.ndarray:
+        """
+        Helper function to score normalized headers against every candidate by trigram Dice similarity
+        :return: np.ndarray of headers x candidates
+        """
+        candidates = self._candidates
+        header_trigrams = [HeaderIndex._trigrams(header) for header in normalized]
+        known_ids = [[candidates['trigram_ids'][trigram] for trigram in trigrams
+                      if trigram in candidates['trigram_ids']] for trigrams in header_trigrams]
+        counts = np.array([len(ids) for ids in known_ids])
+        scores = np.zeros((len(normalized), candidates['incidence'].shape[1]))
+        matched = np.flatnonzero(counts > 0)
+        if matched.size > 0:
+            ids = np.concatenate([known_ids[row] for row in matched])
+            starts = np.concatenate([[0], np.cumsum(counts[matched])[:-1]])
+            scores[matched] = np.add.reduceat(candidates['incidence'][ids], starts, axis=0)
+        sizes = np.array([len(trigrams) for trigrams in header_trigrams])
+        return 2.0 * scores / (sizes[:, None] + candidates['sizes'][None, :])
+
+    def _assign(self, headers: list, scores: np.ndarray, methods: dict, min_score: float) -> pd.DataFrame:
+        """
+        Helper function to assign headers to fields from the highest score down.  Scores of the aliases of a field
+        count as scores of the field, and methods holds the method of the exact and token matches by (header,
+        candidate).
+        """
+        fields = self._candidates['fields']
+        rows, columns = np.nonzero(scores >= min_score)
+        order = np.lexsort((rows, -scores[rows, columns]))
+        assigned = {}
+        assigned_fields = set()
+        for row, column in zip(rows[order].tolist(), columns[order].tolist()):
+            if row in assigned or fields[column] in assigned_fields:
+                continue
+            assigned[row] = (fields[column], float(scores[row, column]), methods.get((row, column), 'ngram'))
+            assigned_fields.add(fields[column])
+        return pd.DataFrame([assigned.get(row, (None, np.nan, None)) for row in range(len(headers))],
+                            index=pd.Index(headers, name='header'), columns=['field', 'score', 'method'])
+
+    def header_map(self, headers: list, min_score: float = None) -> dict:
+        """
+        Resolve the headers of a tape to a header map (see resolve)
+        :param list headers: header names of the tape
+        :param float min_score: minimum score for a header to be mapped.  Default is the index's min_score
+        :return: dict of header name to field name for the mapped headers
+        """
+        resolved = self.resolve(headers, min_score)
+        resolved = resolved[resolved['field'].notna()]
+        return dict(zip(resolved.index, resolved['field']))
+
+    @property
+    def version(self) -> str:
+        """
+        Hash of the fields, aliases and min_score, which together determine how headers are mapped
+        """
+        return hashlib.sha256(json.dumps([self.fields, sorted(self.aliases.items()), self.min_score]).encode()
+                              ).hexdigest()
+
+    def save(self):
+        """
+        Save the fields, aliases and layout cache to header_index.json in store_dir
+        :return: str path of the store
+        """
+        if self.store_dir is None:
+            raise ValueError('The header index has no store_dir to save to')
+        store_path = os.path.join(self.store_dir, HeaderIndex._store_file)
+        temp_path = f'{store_path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w') as store_file:
+            json.dump({'format': HeaderIndex._store_format_version, 'fields': self.fields, 'aliases': self.aliases,
+                       'layouts': self.layouts}, store_file)
+        os.replace(temp_path, store_path)
+        return store_path
+
+    def _load_store(self):
+        store_path = os.path.join(self.store_dir, HeaderIndex._store_file)
+        if not os.path.exists(store_path):
+            return
+        with open(store_path, 'r') as store_file:
+            store = json.load(store_file)
+        if store.get('format') == HeaderIndex._store_format_version:
+            self.fields = store['fields']
+            self.aliases = store['aliases']
+            self.layouts = store['layouts']
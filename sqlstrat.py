@@ -0,0 +1,285 @@
+# SQL backend for stratifications.
+# A strat definition (bucketing plus the count, sum and weighted average totals of strattools.strat_totals) is
+# compiled into one SQL GROUP BY and run by an embedded database, so the tape is scanned by the database and pandas only
+# holds the grouped totals (one row per bucket and category value).  With DuckDB the tape can be a Parquet or csv file
+# (or a glob of them) that is read directly, so a tape larger than memory is stratified without loading it.  The
+# percentages and weighted averages are derived from the totals by the same code as the pandas stratifications.
+
+import os
+import numbers
+import sqlite3
+import numpy as np
+import pandas as pd
+import strattools
+import arrowtape
+from cmutils.mathutils import _skip_missing_values
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+
+def quote_identifier(name: str) -> str:
+    """
+    SQL identifier quoted for DuckDB and SQLite
+    """
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def quote_literal(value: str) -> str:
+    """
+    SQL string literal for DuckDB and SQLite
+    """
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class SQLStratification:
+    """
+    Stratification_Package that runs against a database instead of a DataFrame.  Each stratification is one GROUP BY
+    query over the tape (see strat_totals_query), and the strat is derived from the returned totals with the strat
+    set's function from Stratification_Package._strat_sets, so the results match Stratification_Package.
+
+    The tape can be:
+        - a Parquet file (.parquet, .pq) or delimited file (.csv, .tsv, .txt), or a glob of them, read directly by
+          DuckDB
+        - the name of a table or view in the connection (the only option for SQLite)
+        - a pd.DataFrame, pyarrow.Table or arrowtape.SharedTape, scanned in place by DuckDB
+    """
+
+    _file_readers = {'.parquet': 'read_parquet({path})', '.pq': 'read_parquet({path})',
+                     '.csv': 'read_csv_auto({path})', '.tsv': "read_csv_auto({path}, delim='\\t')",
+                     '.txt': "read_csv_auto({path}, delim='\\t')"}
+
+    _vintage_formats = {'duckdb': {'vintage_month': "strftime({column}, '%Y-%m')",
+                                   'vintage_quarter': "CAST(year({column}) AS VARCHAR) || 'Q' || "
+                                                      "CAST(quarter({column}) AS VARCHAR)",
+                                   'vintage_annual': "strftime({column}, '%Y')"},
+                        'sqlite': {'vintage_month': "strftime('%Y-%m', {column})",
+                                   'vintage_quarter': "strftime('%Y', {column}) || 'Q' || "
+                                                      "((CAST(strftime('%m', {column}) AS INTEGER) + 2) / 3)",
+                                   'vintage_annual': "strftime('%Y', {column})"}}
+
+    _float_types = {'duckdb': 'DOUBLE', 'sqlite': 'REAL'}
+
+    def __init__(self, source, connection=None, config=None, asset_class: str = None,
+                 stratify_by_variables: list = None, stratify_types: dict = None, header_map: dict = None, **kwargs):
+        """
+        :param source: tape file path or glob, table name, pd.DataFrame, pyarrow.Table or arrowtape.SharedTape
+        :param connection: duckdb or sqlite3 connection.  Default is a new in-memory DuckDB connection
+        :param varsconfig.AssetVariableConfig config: configuration object.  The stratification variables and their
+                strat types are taken from config.stratify_by_fields and config.stratify_types
+        :param str asset_class: if given, only loans with this asset_sector are stratified
+        :param list stratify_by_variables: stratification variables to use instead of config.stratify_by_fields
+        :param dict stratify_types: strat types to use instead of config.stratify_types
+        :param dict header_map: dict of raw column name to field name for tapes whose columns are not named by field
+        :param kwargs:
+            :keyword list buckets_<variable>: bucket boundaries for a variable.  Default is bucketize_data of the
+                    variable's minimum and maximum for numeric variables, and unique values otherwise
+            :keyword wa_zeros: value used for missing values in weighted averages.  Default is 0
+        """
+        if connection is None:
+            if duckdb is None:
+                raise ImportError('duckdb is required to stratify without a database connection')
+            connection = duckdb.connect()
+        self.connection = connection
+        self.dialect = 'sqlite' if isinstance(connection, sqlite3.Connection) else 'duckdb'
+        self.relation = self._source_relation(source)
+        self.asset_class = asset_class
+        self.zeros = kwargs.get('wa_zeros', 0)
+        self.source_columns = self.execute(f'SELECT * FROM {self.relation} LIMIT 0').columns.tolist()
+        # field name to column name in the source
+        self.fields = {column: column for column in self.source_columns}
+        self.fields.update({field: column for column, field in (header_map or {}).items()
+                            if column in self.source_columns})
+        if asset_class is not None and self.execute(f'SELECT 1 FROM {self.relation} WHERE {self.where} LIMIT 1',
+                                                    self.where_params).empty:
+            raise ValueError(f'Input tape is empty or does not contain the asset class {asset_class}')
+        if stratify_by_variables is None:
+            stratify_by_variables = [] if config is None else config.stratify_by_fields
+        if stratify_types is None:
+            stratify_types = {} if config is None else config.stratify_types
+        self.stratify_types = dict(stratify_types)
+        self.stratification_variables = [x for x in stratify_by_variables if x in self.fields]
+        self.buckets = {}
+        self.reload_buckets(**kwargs)
+
+    def _source_relation(self, source) -> str:
+        if isinstance(source, pd.DataFrame) or arrowtape.is_arrow_tape(source):
+            if self.dialect != 'duckdb':
+                raise ValueError('Only DuckDB can stratify a DataFrame or Arrow tape in place')
+            view_name = f'strat_tape_{id(self)}'
+            self.connection.register(view_name, source.table() if isinstance(source, arrowtape.SharedTape) else source)
+            return quote_identifier(view_name)
+        extension = os.path.splitext(source.strip().lower())[1]
+        if extension in SQLStratification._file_readers:
+            if self.dialect != 'duckdb':
+                raise ValueError(f'SQLite can not read {source} directly.  Load it into a table or use DuckDB')
+            return SQLStratification._file_readers[extension].format(path=quote_literal(source.strip()))
+        return quote_identifier(source)
+
+    @property
+    def where(self) -> str:
+        return '1 = 1' if self.asset_class is None else f'{self.column("asset_sector")} = ?'
+
+    @property
+    def where_params(self) -> list:
+        return [] if self.asset_class is None else [self.asset_class]
+
+    def column(self, field: str) -> str:
+        """
+        Quoted source column of a field
+        """
+        return quote_identifier(self.fields.get(field, field))
+
+    def execute(self, query: str, params: list = None) -> pd.DataFrame:
+        """
+        Run a query on the connection
+        :param str query: SQL query with ? placeholders
+        :param list params: values of the placeholders
+        :return: pd.DataFrame of the result
+        """
+        cursor = self.connection.execute(query, params or [])
+        columns = [description[0] for description in cursor.description]
+        return pd.DataFrame.from_records(cursor.fetchall(), columns=columns)
+
+    def _is_numeric(self, field: str) -> bool:
+        value = self.execute(f'SELECT {self.column(field)} FROM {self.relation} WHERE {self.where} AND '
+                             f'{self.column(field)} IS NOT NULL LIMIT 1', self.where_params)
+        return not value.empty and isinstance(value.iloc[0, 0], numbers.Number) and \
+            not isinstance(value.iloc[0, 0], (bool, np.bool_))
+
+    def reload_buckets(self, **kwargs):
+        """
+        Reloads the buckets of every stratification variable.  Numeric buckets only need the minimum and maximum of
+        the variable, which the database calculates.
+        :param kwargs: buckets_<variable>: bucket boundaries for a variable
+        :return: self
+        """
+        for variable in self.stratification_variables:
+            strat_type = self.stratify_types.get(variable, '')
+            if f'buckets_{variable}' in kwargs:
+                self.buckets[variable] = kwargs[f'buckets_{variable}']
+            elif strat_type == 'unique_value' or strat_type in strattools.Stratification_Package._vintage_periods or \
+                    not self._is_numeric(variable):
+                self.buckets[variable] = None
+            else:
+                column = self.column(variable)
+                bounds = self.execute(f'SELECT MIN({column}), MAX({column}) FROM {self.relation} WHERE {self.where}',
+                                      self.where_params)
+                self.buckets[variable] = strattools.bucketize_data(
+                    pd.DataFrame({variable: bounds.iloc[0].to_numpy(dtype=np.float64)}), variable)
+        return self
+
+    def bucket_expression(self, variable: str) -> (str, pd.Index):
+        """
+        SQL expression of each row's bucket and the bucket labels.  Fixed buckets are numbered in the order of
+        strattools.assign_strat_buckets ([b_i, b_i+1) with open ended first and last buckets) and labelled with its
+        intervals, unique value buckets are the values themselves and vintage buckets are periods.
+        :param str variable: stratification variable
+        :return: tuple of (SQL expression, pd.Index of bucket labels or None for unique value and vintage buckets)
+        """
+        column = self.column(variable)
+        period = strattools.Stratification_Package._vintage_periods.get(self.stratify_types.get(variable))
+        if period is not None:
+            vintage_format = SQLStratification._vintage_formats[self.dialect][self.stratify_types[variable]]
+            return vintage_format.format(column=column), None
+        buckets = self.buckets.get(variable)
+        if buckets is None:
+            return column, None
+        boundaries = sorted(buckets)
+        cases = ' '.join(f'WHEN {column} < {float(boundary)!r} THEN {i}' for i, boundary in enumerate(boundaries))
+        labels = pd.cut(pd.Series([], dtype=np.float64), bins=[-np.inf] + boundaries + [np.inf], right=False)
+        return f'CASE {cases} ELSE {len(boundaries)} END', pd.CategoricalIndex(labels.cat.categories, name=variable)
+
+    def strat_totals_query(self, variable: str, count_fields: tuple = (), sum_fields: tuple = (),
+                           weighted_fields: tuple = (), category_fields: tuple = ()) -> str:
+        """
+        Compile the totals of strattools.strat_totals into one GROUP BY query.  Rows are grouped by bucket and by the
+        value of every category field, so the category counts need no separate query: the other totals of a bucket
+        are the sum over its category rows.  Rows with a missing stratification variable are not in any bucket, as in
+        strattools.strat_totals.  A missing weight counts as zero weight.
+        :param str variable: stratification variable
+        :param tuple count_fields: fields for which the non-missing count is calculated, as count_<field>
+        :param tuple sum_fields: fields for which the sum is calculated, as sum_<field>
+        :param tuple weighted_fields: (value_field, weight_field) pairs for weighted averages (see strat_totals)
+        :param tuple category_fields: fields for which the count of each value is calculated
+        :return: str SQL query with the asset class as its only (optional) parameter
+        """
+        float_type = SQLStratification._float_types[self.dialect]
+
+        def number(field):
+            return f'CAST({self.column(field)} AS {float_type})'
+
+        bucket, _ = self.bucket_expression(variable)
+        totals = ['COUNT(*) AS "count"']
+        totals += [f'COUNT({self.column(field)}) AS {quote_identifier(f"count_{field}")}' for field in count_fields]
+        totals += [f'COALESCE(SUM({number(field)}), 0) AS {quote_identifier(f"sum_{field}")}' for field in sum_fields]
+        skip_missing = _skip_missing_values(self.zeros)
+        for value_field, weight_field in weighted_fields:
+            suffix = f'{value_field}_by_{weight_field}'
+            value, weight = number(value_field), f'COALESCE({number(weight_field)}, 0)'
+            if skip_missing is False:
+                value = f'COALESCE({value}, {float(self.zeros)!r})'
+                included_weight, value_count = weight, 'COUNT(*)'
+            else:
+                included_weight = f'CASE WHEN {value} IS NULL THEN 0 ELSE {weight} END'
+                value_count = f'COUNT({value})'
+            totals += [f'COALESCE(SUM({value} * {weight}), 0) AS {quote_identifier(f"wsum_{suffix}")}',
+                       f'COALESCE(SUM({included_weight}), 0) AS {quote_identifier(f"wt_{suffix}")}',
+                       f'COALESCE(SUM({value}), 0) AS {quote_identifier(f"vsum_{suffix}")}',
+                       f'{value_count} AS {quote_identifier(f"vcount_{suffix}")}']
+        groups = ['bucket'] + [f'category_{i}' for i in range(len(category_fields))]
+        selects = [f'{bucket} AS bucket'] + [f'{self.column(field)} AS category_{i}'
+                                             for i, field in enumerate(category_fields)]
+        return (f'SELECT {", ".join(selects + totals)} FROM {self.relation} '
+                f'WHERE {self.where} AND {self.column(variable)} IS NOT NULL GROUP BY {", ".join(groups)}')
+
+    def strat_totals(self, variable: str, count_fields: tuple = (), sum_fields: tuple = (),
+                     weighted_fields: tuple = (), category_fields: tuple = ()) -> pd.DataFrame:
+        """
+        Bucket totals of a variable calculated by the database, in the form of strattools.strat_totals
+        :return: pd.DataFrame indexed by bucket with a column for each total, and count for the number of rows
+        """
+        query = self.strat_totals_query(variable, count_fields, sum_fields, weighted_fields, category_fields)
+        grouped = self.execute(query, self.where_params)
+        category_columns = [f'category_{i}' for i in range(len(category_fields))]
+        totals = grouped.drop(columns=category_columns).groupby('bucket', sort=True).sum()
+        for i, field in enumerate(category_fields):
+            counts = grouped.pivot_table(index='bucket', columns=category_columns[i], values='count', aggfunc='sum',
+                                         fill_value=0)
+            counts = counts.reindex(columns=sorted(counts.columns), index=totals.index, fill_value=0)
+            counts.columns = [f'count_{field}={value}' for value in counts.columns]
+            totals = totals.join(counts)
+        _, bucket_index = self.bucket_expression(variable)
+        period = strattools.Stratification_Package._vintage_periods.get(self.stratify_types.get(variable))
+        if bucket_index is not None:
+            totals = totals.reindex(range(len(bucket_index)), fill_value=0)
+            totals.index = bucket_index
+        elif period is not None:
+            totals.index = pd.PeriodIndex([pd.Period(x, freq=period) for x in totals.index], name=variable)
+        else:
+            totals.index.name = variable
+        return strattools._finalize_strat_totals(totals)
+
+    def stratify(self, variable: str, strat_set: str = 'summary') -> pd.DataFrame:
+        """
+        Stratify the tape by one variable
+        :param str variable: stratification variable
+        :param str strat_set: name of the strat set (see Stratification_Package._strat_sets)
+        :return: pd.DataFrame with a row for each stratification bucket
+        """
+        required_fields, totals_fields, from_totals = strattools.Stratification_Package._strat_sets[strat_set]
+        missing_fields = [x for x in required_fields if x not in self.fields]
+        if len(missing_fields) > 0:
+            raise ValueError(f'Not all required fields are present in the input_tape.  Required fields are: '
+                             f'{required_fields}')
+        return from_totals(self.strat_totals(variable, **totals_fields))
+
+    def summary_package(self, strat_set: str = 'summary') -> dict:
+        """
+        Stratify the tape by every stratification variable
+        :param str strat_set: name of the strat set
+        :return: dict of stratification variable to strat pd.DataFrame
+        """
+        return {variable: self.stratify(variable, strat_set) for variable in self.stratification_variables}
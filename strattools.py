@@ -1,11 +1,23 @@
 
 from functools import cached_property
+from concurrent.futures import ThreadPoolExecutor
 import math
 import pandas as pd
 import numpy as np
+import os
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import varsconfig
+import arrowtape
 from cmutils.mathutils import round_to_nearest
 from cmutils.mathutils import pandas_weighted_average_factory
+from cmutils.mathutils import weighted_average_contributions, weighted_average_from_totals
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
 
 
 def bucketize_data(dataframe: pd.DataFrame, variable: str, max_buckets: int = 10, **kwargs) -> list:
@@ -31,14 +43,16 @@ def bucketize_data(dataframe: pd.DataFrame, variable: str, max_buckets: int = 10
         value = value * factor
         return round_to_nearest(value, base=5 * 10 ** (int(math.log10(value)) - (precision - 1)), method='up') / factor
 
+    #Step sizes are the data range / max_buckets rounded to 1bp of decimal rates or 0.01 of percent rates.  Rounding
+    #down to a quarter point left the steps well short of the highest value (e.g. 0.25 for a 2% to 6% range)
     if max_value < 1:
-        round_base = .0025
+        round_base = .0001
         bucket_mult = 100
     elif max_value > 1 and min_value < 1 and min_value != 0:
-        round_base = .0025
+        round_base = .0001
         bucket_mult = 100
     else:
-        round_base = .25
+        round_base = .01
         bucket_mult = 1
 
     buckets_dict = {
@@ -46,10 +60,10 @@ def bucketize_data(dataframe: pd.DataFrame, variable: str, max_buckets: int = 10
         'ltv': ('bucket', [val / bucket_mult for val in (30.0, 40.0, 50.0, 60.0, 65.0, 70.0, 75.0, 80.0, 85.0, 90.0)]),
         'dti': ('bucket', [val / bucket_mult for val in (10.0, 15.0, 20.0, 25.0, 30.0, 35.0, 40.0, 45.0, 50.0, 55.0)]),
         'term': ('bucket', (3, 6, 12, 24, 36, 48, 60, 84, 120, 180, 240, 360, 420)),
-        'rate': ('step', round_to_nearest(((highest_bucket() - lowest_bucket()) / max_buckets),
-                                          base=round_base, method='down') if 'rate' in variable else None),
-        'margin': ('step', round_to_nearest(((highest_bucket() - lowest_bucket()) / max_buckets),
-                                            base=round_base, method='down') if 'margin' in variable else None),
+        'rate': ('step', round_to_nearest(((max_value - min_value) / max_buckets),
+                                          base=round_base, method='mid') if 'rate' in variable else None),
+        'margin': ('step', round_to_nearest(((max_value - min_value) / max_buckets),
+                                            base=round_base, method='mid') if 'margin' in variable else None),
     }
 
     if dataframe[variable].dtype in \
@@ -75,6 +89,199 @@ def bucketize_data(dataframe: pd.DataFrame, variable: str, max_buckets: int = 10
             return [bottom_bucket + step_size * i for i in range(max_buckets + 1)]
 
 
+def assign_strat_buckets(values: pd.Series, stratification_buckets: list = None) -> pd.Series:
+    """
+    Assign each value of the stratification variable to its stratification bucket
+    :param pd.Series values: values of the stratification variable
+    :param list stratification_buckets: sorted bucket boundaries (e.g. from bucketize_data).  Numeric values are cut
+            into buckets [b_i, b_i+1), with open ended buckets below the first and above the last boundary.  If None,
+            or if the values are not numeric, each unique value is its own bucket.
+    :return: pd.Series of bucket labels with the same index as values
+    """
+    if stratification_buckets is None or not pd.api.types.is_numeric_dtype(values.dtype) \
+            or pd.api.types.is_bool_dtype(values.dtype):
+        return values
+    else:
+        bins = [-np.inf] + sorted(stratification_buckets) + [np.inf]
+        return pd.cut(values, bins=bins, right=False)
+
+
+def _bucket_codes(values: pd.Series, stratification_buckets: list = None) -> (np.ndarray, pd.Index):
+    """
+    Integer bucket code of each value (-1 for missing) and the bucket labels.  Fixed buckets always include every
+    bucket, unique value buckets only the values present, sorted.
+    """
+    buckets = assign_strat_buckets(values, stratification_buckets)
+    if buckets is not values and isinstance(buckets.dtype, pd.CategoricalDtype):
+        return buckets.cat.codes.to_numpy(), pd.CategoricalIndex(buckets.cat.categories, name=values.name)
+    codes, uniques = _factorize_sorted(buckets)
+    return codes, pd.Index(uniques, name=values.name)
+
+
+def _factorize_sorted(values: pd.Series) -> (np.ndarray, np.ndarray):
+    """
+    pd.factorize(values, sort=True) that uses the integer codes of dictionary encoded (Categorical) columns instead of
+    hashing every value.  Only the categories present are returned, sorted.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        categories = values.cat.categories
+        used = np.bincount(codes[codes >= 0], minlength=len(categories)) > 0
+        order = categories.argsort()
+        order = order[used[order]]
+        recode = np.full(len(categories) + 1, -1, dtype=np.intp)
+        recode[order] = np.arange(len(order))
+        return recode[codes], categories[order].to_numpy()
+    return pd.factorize(values.to_numpy() if isinstance(values, pd.Series) else values, sort=True)
+
+
+def strat_contributions(data_chunk: pd.DataFrame, count_fields: tuple = (), sum_fields: tuple = (),
+                        weighted_fields: tuple = (), category_fields: tuple = (), zeros=0) -> tuple:
+    """
+    Calculate each row's contribution to the totals of strat_totals.  Summing the contributions over a bucket gives the
+    bucket's totals, so the contributions can be calculated once and reduced by any number of stratification variables
+    (see Stratification_Package).  See strat_totals for the parameters.
+    :return: tuple of (dict of total name to array of row contributions, dict of category field to (codes, categories))
+    """
+    columns = {}
+    for field in count_fields:
+        columns[f'count_{field}'] = data_chunk[field].notna().to_numpy()
+    numeric_columns = {}
+
+    def column(field):
+        if field not in numeric_columns:
+            numeric_columns[field] = data_chunk[field].to_numpy(dtype=np.float64, na_value=np.nan)
+        return numeric_columns[field]
+
+    for field in sum_fields:
+        values = column(field)
+        columns[f'sum_{field}'] = np.where(np.isnan(values), 0.0, values)
+    for value_field, weight_field in weighted_fields:
+        pair_contributions = weighted_average_contributions(column(value_field), column(weight_field), zeros)
+        suffix = f'{value_field}_by_{weight_field}'
+        columns[f'wsum_{suffix}'] = pair_contributions['wsum']
+        columns[f'wt_{suffix}'] = pair_contributions['weight']
+        columns[f'vsum_{suffix}'] = pair_contributions['vsum']
+        columns[f'vcount_{suffix}'] = pair_contributions['vcount']
+    categories = {field: _factorize_sorted(data_chunk[field]) for field in category_fields}
+    return columns, categories
+
+
+def reduce_strat_contributions(contributions: tuple, codes: np.ndarray, bucket_index: pd.Index) -> pd.DataFrame:
+    """
+    Sum row contributions (from strat_contributions) into bucket totals
+    :param tuple contributions: output of strat_contributions
+    :param np.ndarray codes: bucket code of each row, -1 for rows that are not in a bucket
+    :param pd.Index bucket_index: bucket labels
+    :return: pd.DataFrame indexed by bucket with a column for each total
+    """
+    columns, categories = contributions
+    in_bucket = codes >= 0
+    all_in_bucket = bool(in_bucket.all())
+    codes = codes.astype(np.intp) if all_in_bucket else codes[in_bucket].astype(np.intp)
+    n_buckets = len(bucket_index)
+
+    def bucket_sum(weights=None):
+        if weights is not None and not all_in_bucket:
+            weights = weights[in_bucket]
+        return np.bincount(codes, weights=weights, minlength=n_buckets)
+
+    totals = {'count': bucket_sum()}
+    for name, row_contributions in columns.items():
+        totals[name] = bucket_sum(row_contributions)
+    for field, (category_codes, category_values) in categories.items():
+        category_codes = category_codes if all_in_bucket else category_codes[in_bucket]
+        valid = category_codes >= 0
+        n_values = len(category_values)
+        category_counts = np.bincount(codes[valid] * n_values + category_codes[valid],
+                                      minlength=n_buckets * n_values).reshape(n_buckets, n_values)
+        for i, value in enumerate(category_values):
+            totals[f'count_{field}={value}'] = category_counts[:, i]
+    return pd.DataFrame(totals, index=bucket_index)
+
+
+def _finalize_strat_totals(totals: pd.DataFrame) -> pd.DataFrame:
+    totals = totals.fillna(0)
+    count_columns = [col for col in totals.columns if col == 'count' or col.startswith(('count_', 'vcount_'))]
+    return totals.sort_index().astype({col: 'int64' for col in count_columns})
+
+
+def strat_totals(data, stratification_variable: str, stratification_buckets: list = None, count_fields: tuple = (),
+                 sum_fields: tuple = (), weighted_fields: tuple = (), category_fields: tuple = (),
+                 zeros=0) -> pd.DataFrame:
+    """
+    Calculate the additive totals (sufficient statistics) for each stratification bucket.  Totals of separate chunks
+    can simply be added, so the data can be a single dataframe or an iterable of chunks (e.g. from
+    tapetools.iter_raw_datatape) and only one chunk is held in memory at a time.  Percentages and weighted averages
+    are derived from the totals.
+    :param data: pd.DataFrame or iterable of pd.DataFrame chunks
+    :param str stratification_variable: field to stratify by
+    :param list stratification_buckets: bucket boundaries, or None to stratify by unique value (see assign_strat_buckets)
+    :param tuple count_fields: fields for which the non-missing count is calculated, as count_<field>
+    :param tuple sum_fields: fields for which the sum is calculated, as sum_<field>
+    :param tuple weighted_fields: (value_field, weight_field) pairs for weighted averages.  For each pair the weighted
+            sum wsum_<value>_by_<weight>, the weight total wt_, the value total vsum_ and the value count vcount_ are
+            calculated.
+    :param tuple category_fields: fields for which the count of each value is calculated, as count_<field>=<value>
+    :param zeros: value used to fill missing values of the weighted fields.  If one of ('na', 'nan', 'none', 'null') or
+            None, missing values (and their weights) are skipped.  Default is 0, as in pandas_weighted_average_factory
+    :return: pd.DataFrame indexed by bucket with a column for each total, and count for the number of rows
+    """
+    if isinstance(data, pd.DataFrame):
+        data = (data,)
+    totals = None
+    for data_chunk in data:
+        contributions = strat_contributions(data_chunk, count_fields, sum_fields, weighted_fields, category_fields, zeros)
+        chunk_totals = reduce_strat_contributions(contributions, *_bucket_codes(data_chunk[stratification_variable],
+                                                                                stratification_buckets))
+        totals = chunk_totals if totals is None else totals.add(chunk_totals, fill_value=0)
+    if totals is None:
+        raise ValueError('No data to stratify')
+    return _finalize_strat_totals(totals)
+
+
+def strat_weighted_average(totals: pd.DataFrame, value_field: str, weight_field: str, rounding: bool = False,
+                           output_type: str = None) -> pd.Series:
+    """
+    Weighted average of each bucket from the totals calculated by strat_totals (see
+    cmutils.mathutils.weighted_average_from_totals).  Buckets whose weights and values sum to zero are missing.
+    :param pd.DataFrame totals: output of strat_totals including (value_field, weight_field) in weighted_fields
+    :param str value_field: field to average
+    :param str weight_field: field to weight by
+    :param bool rounding: if True, round the weighted average to 0 decimal places
+    :param str output_type: if 'int' (with rounding), return nullable integers
+    :return: pd.Series indexed by bucket
+    """
+    suffix = f'{value_field}_by_{weight_field}'
+    weighted_average = weighted_average_from_totals({'wsum': totals[f'wsum_{suffix}'], 'weight': totals[f'wt_{suffix}'],
+                                                     'vsum': totals[f'vsum_{suffix}'],
+                                                     'vcount': totals[f'vcount_{suffix}'], 'count': totals['count']},
+                                                    rounding=rounding, output_type=output_type)
+    weighted_average = pd.Series(weighted_average, index=totals.index, name=value_field)
+    if rounding is True and output_type == 'int':
+        try:
+            return weighted_average.astype('Int64')
+        except (TypeError, ValueError):
+            # a bucket with zero weights falls back to its (unrounded) simple average
+            return weighted_average.astype('float64')
+    return weighted_average.astype('float64')
+
+
+def _check_required_fields(data, required_fields: tuple):
+    """
+    Raise ValueError if a dataframe, or any chunk of an iterable of chunks, is missing a required field
+    :return: the data (a generator that checks each chunk as it is read if data is an iterable of chunks)
+    """
+    def check_chunk(data_chunk):
+        if not all(x in data_chunk.columns for x in required_fields):
+            raise ValueError(f'Not all required fields are present in the input_tape.  Required fields are: {required_fields}')
+        return data_chunk
+    if isinstance(data, pd.DataFrame):
+        return check_chunk(data)
+    else:
+        return (check_chunk(data_chunk) for data_chunk in data)
+
+
 class Stratification:
 
     # def __new__(cls, *args, **kwargs):
@@ -100,8 +307,8 @@ class Stratification:
         return self
 
 
-    def reload_buckets(self, stratify_by_variable: str = self.stratify_by, **kwargs):
-        self.stratify_by = stratify_by_variable
+    def reload_buckets(self, stratify_by_variable: str = None, **kwargs):
+        self.stratify_by = self.stratify_by if stratify_by_variable is None else stratify_by_variable
         self.buckets = kwargs.get(f'buckets_{self.tape_type}',
                                                     kwargs.get('buckets_consumer', 
                                                                kwargs.get('buckets', 
@@ -122,55 +329,81 @@ class Stratification:
         self._currlimit_wa_zero = pandas_weighted_average_factory(weights=self.tape['bal_limit_curr'], zeros=kwargs.get('wa_zeros', 0))
         self._currlimit_wa_zero_int = pandas_weighted_average_factory(weights=self.tape['bal_limit_curr'], zeros=kwargs.get('wa_zeros', 0), rounding=True, output_type='int')
 
+    #Fields and totals used by strat_summary_consumer_closed.
+    #Weighted averages are (output column, value field, weight field, integer output)
+    _summary_consumer_closed_required_fields = ('bal_orig', 'bal_curr', 'rate_margin', 'term_orig', 'term_rem',
+                                                'fico_orig', 'fico_curr', 'uw_ltv_orig', 'bal_orig_cum',
+                                                'prop_appraisal', 'uw_dti_orig', 'fc_status', 'bk_status',
+                                                'prop_state', 'mod_type')
+    _summary_consumer_closed_weighted_averages = (('wa_origrate', 'rate_margin', 'bal_orig', False),
+                                                  ('wa_origterm', 'term_orig', 'bal_orig', True),
+                                                  ('wa_remterm', 'term_rem', 'bal_curr', True),
+                                                  ('wa_origfico', 'fico_orig', 'bal_orig', True),
+                                                  ('wa_currfico', 'fico_curr', 'bal_curr', True),
+                                                  ('wa_origltv', 'uw_ltv_orig', 'bal_orig', False),
+                                                  ('wa_origdti', 'uw_dti_orig', 'bal_orig', False))
+    _summary_consumer_closed_totals = {'count_fields': ('bal_orig', 'fc_status', 'bk_status'),
+                                       'sum_fields': ('bal_orig', 'bal_curr', 'bal_orig_cum', 'prop_appraisal'),
+                                       'weighted_fields': tuple((value, weight) for _, value, weight, _
+                                                                in _summary_consumer_closed_weighted_averages),
+                                       'category_fields': ('prop_state',)}
+
     @staticmethod
     def strat_summary_consumer_closed(input_tape: pd.DataFrame, stratification_variable: str, stratification_buckets: list, **kwargs) -> pd.DataFrame:
+        """
+        Summary stratification for closed end consumer loans.  Every total (counts, sums and value x weight sums) is
+        calculated in one vectorized pass with strat_totals, and the percentages and weighted averages are derived from
+        the bucket totals.
+        :param input_tape: data tape, or an iterable of data tape chunks (see tapetools.iter_raw_datatape)
+        :param str stratification_variable: field to stratify by
+        :param list stratification_buckets: bucket boundaries, or None to stratify by unique value
+        :param kwargs:
+            :keyword zeros: value used for missing values in weighted averages (see pandas_weighted_average_factory).
+                    Default is 0
+        :return: pd.DataFrame with a row for each stratification bucket
+        """
         #Check that the required fields for the strat are in the input_tape:
-        required_fields = ('bal_orig', 'bal_curr', 'rate_margin', 'term_orig', 'term_rem', 'fico_orig', 'fico_curr',
-                            'uw_ltv_orig', 'bal_orig_cum', 'prop_appraisal', 'uw_dti_orig', 'fc_status', 'bk_status',
-                            'state', 'mod_type')
-        if not all(x in input_tape.columns for x in required_fields):
-            raise ValueError(f'Not all required fields are present in the input_tape.  Required fields are: {required_fields}')
+        input_tape = _check_required_fields(input_tape, Stratification._summary_consumer_closed_required_fields)
 
-        #Create the weighted average functions requried for dataframe summary
-        origbal_weight = pandas_weighted_average_factory(weights=input_tape['origbal'], zeros=kwargs.get('zeros', 0))
-        origbal_weight_int = pandas_weighted_average_factory(weights=input_tape['origbal'],
-                                                             zeros=kwargs.get('zeros', 0), rounding=True,
-                                                             output_type='int')
-        currbal_weight = pandas_weighted_average_factory(weights=input_tape['currbal'], zeros=kwargs.get('zeros', 0))
-        currbal_weight_int = pandas_weighted_average_factory(weights=input_tape['currbal'],
-                                                             zeros=kwargs.get('zeros', 0), rounding=True,
-                                                             output_type='int')
+        #Calculate all of the bucket totals in one pass over the input_tape
+        totals = strat_totals(input_tape, stratification_variable, stratification_buckets,
+                              zeros=kwargs.get('zeros', 0), **Stratification._summary_consumer_closed_totals)
+        return Stratification.summary_consumer_closed_from_totals(totals)
 
-        #Calculate teh top two stated by count of assets in the input_tape
-        top_1_state = input_tape[['prop_state', 'count']].groupby(['prop_state']).count().sort_values(by='count', ascending=False)[:1].index[0]
-        top_2_state = input_tape[['prop_state', 'count']].groupby(['prop_state']).count().sort_values(by='count', ascending=False)[1:2].index[0]
+    @staticmethod
+    def summary_consumer_closed_from_totals(totals: pd.DataFrame) -> pd.DataFrame:
+        """
+        Derive the closed end consumer summary stratification from its bucket totals
+        :param pd.DataFrame totals: strat_totals with the totals in Stratification._summary_consumer_closed_totals
+        :return: pd.DataFrame with a row for each stratification bucket
+        """
+        #Calculate the top two states by count of assets in the input_tape
+        state_columns = [col for col in totals.columns if col.startswith('count_prop_state=')]
+        state_counts = totals[state_columns].sum().sort_values(ascending=False, kind='stable')
+        top_states = [col.replace('count_prop_state=', '') for col in state_counts.index[:2]]
+        state_total = totals[state_columns].sum(axis=1)
 
         #Create the summary dataframe
-        summary_strat = input_tape.groupby(stratification_variable).agg(
-            count=('bal_orig', 'count'),
-            count_pct=('bal_orig', lambda x: round(x.count() / input_tape['bal_orig'].count() * 100, 3)),
-            origbal=('bal_orig', 'sum'),
-            origbal_pct=('bal_orig', lambda x: round(x.sum() / input_tape['bal_orig'].sum() * 100, 3)),
-            currbal=('bal_curr', 'sum'),
-            currbal_pct=('bal_curr', lambda x: round(x.sum() / input_tape['bal_curr'].sum() * 100, 3)),
-            factor=('bal_curr', lambda x: round(x.sum() / self.tape.loc[x.index, 'bal_orig'].sum() * 100, 3)),
-            wa_origrate=('rate_margin', origbal_weight),
-            wa_origterm=('term_orig', origbal_weight_int),
-            wa_remterm=('term_rem', currbal_weight_int),
-            wa_origfico=('fico_orig', origbal_weight_int),
-            wa_currfico=('fico_curr', currbal_weight_int),
-            wa_origltv=('uw_ltv_orig', origbal_weight),
-            wa_origcltv=('bal_orig_cum', lambda x: x.sum() / self.tape.loc[x.index, 'prop_appraisal'].sum()),
-            wa_origdti=('uw_dti_orig', origbal_weight),
-            fc_pct=('fc_status', lambda x: x.count() / (x.count() + x.isna().sum()) * 100),
-            bk_pct=('bk_status', lambda x: x.count() / (x.count() + x.isna().sum()) * 100),
-            # CA_pct=('state', lambda x: round(x.str.contains('CA').sum() / x.count() * 100, 3)),
-            # FL_pct=('state', lambda x: round(x.str.contains('FL').sum() / x.count() * 100, 3)),
-            # TX_pct=('state', lambda x: round(x.str.contains('TX').sum() / x.count() * 100, 3)),
-            top1_pct=('state', lambda x: round(x.str.contains(top_1_state).sum() / x.count() * 100, 3)),
-            top2_pct=('state', lambda x: round(x.str.contains(top_2_state).sum() / x.count() * 100, 3))
-        )
-        summary_strat.rename(columns={'top1_pct': f'{top_1_state.upper()}_pct', 'top2_pct': f'{top_2_state.upper()}_pct'}, inplace=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            summary_strat = pd.DataFrame({
+                'count': totals['count_bal_orig'],
+                'count_pct': (totals['count_bal_orig'] / totals['count_bal_orig'].sum() * 100).round(3),
+                'origbal': totals['sum_bal_orig'],
+                'origbal_pct': (totals['sum_bal_orig'] / totals['sum_bal_orig'].sum() * 100).round(3),
+                'currbal': totals['sum_bal_curr'],
+                'currbal_pct': (totals['sum_bal_curr'] / totals['sum_bal_curr'].sum() * 100).round(3),
+                'factor': (totals['sum_bal_curr'] / totals['sum_bal_orig'] * 100).round(3)}, index=totals.index)
+            for column, value_field, weight_field, integer_output in \
+                    Stratification._summary_consumer_closed_weighted_averages:
+                summary_strat[column] = strat_weighted_average(totals, value_field, weight_field,
+                                                               rounding=integer_output,
+                                                               output_type='int' if integer_output else None)
+                if column == 'wa_origltv':
+                    summary_strat['wa_origcltv'] = totals['sum_bal_orig_cum'] / totals['sum_prop_appraisal']
+            summary_strat['fc_pct'] = totals['count_fc_status'] / totals['count'] * 100
+            summary_strat['bk_pct'] = totals['count_bk_status'] / totals['count'] * 100
+            for state in top_states:
+                summary_strat[f'{state.upper()}_pct'] = (totals[f'count_prop_state={state}'] / state_total * 100).round(3)
         return summary_strat
 
     @staticmethod
@@ -340,13 +573,192 @@ class ConsumerUnsecuredStratification(Stratification):
 
 
 
-# class Stratification_Package:
-#     def __init__(self, data_tape: pd.DataFrame, config: varsconfig.AssetVariableConfig):
-#         self.tape = data_tape
-#         self.stratification_variables = [x for x in config.stratification_variables if x in self.tape.columns]
-#
-#
-#
-#
-#     def summary_package(self, **kwargs):
-#         pass
\ No newline at end of file
+class Stratification_Package:
+    """
+    Runs every stratification of a tape (e.g. a full strat deck by FICO, LTV, DTI, term, rate, state, vintage, ...)
+    from shared state.  The tape is filtered and indexed once, and the per-loan contributions to every total (the
+    weight products value x weight, counts and sums) are calculated once per strat set.  Each stratification variable
+    then only needs its bucket codes and one bincount per total.
+    """
+
+    # strat set name: (required fields, strat_totals keyword arguments, function deriving the strat from its totals)
+    _strat_sets = {'summary': (Stratification._summary_consumer_closed_required_fields,
+                               Stratification._summary_consumer_closed_totals,
+                               Stratification.summary_consumer_closed_from_totals)}
+
+    _vintage_periods = {'vintage_month': 'M', 'vintage_quarter': 'Q', 'vintage_annual': 'Y'}
+
+    def __init__(self, data_tape: pd.DataFrame, config: varsconfig.AssetVariableConfig = None, asset_class: str = None,
+                 stratify_by_variables: list = None, stratify_types: dict = None, **kwargs):
+        """
+        :param pd.DataFrame data_tape: clean data tape, or an Arrow tape (pyarrow.Table or arrowtape.SharedTape)
+        :param varsconfig.AssetVariableConfig config: configuration object.  The stratification variables and their
+                strat types are taken from config.stratify_by_fields and config.stratify_types
+        :param str asset_class: if given, only loans with this asset_sector are stratified
+        :param list stratify_by_variables: stratification variables to use instead of config.stratify_by_fields
+        :param dict stratify_types: strat types to use instead of config.stratify_types
+        :param kwargs:
+            :keyword list buckets_<variable>: bucket boundaries for a variable.  Default is bucketize_data for numeric
+                    variables and unique values for categorical, unique_value and vintage variables
+            :keyword wa_zeros: value used for missing values in weighted averages.  Default is 0
+        """
+        data_tape = arrowtape.as_dataframe(data_tape)
+        if asset_class is not None:
+            data_tape = data_tape[data_tape['asset_sector'] == asset_class]
+        if data_tape is None or data_tape.empty:
+            raise ValueError(f'Input tape is empty or does not contain the asset class {asset_class}')
+        if 'asset_id' in data_tape.columns:
+            data_tape = data_tape.set_index('asset_id')
+        self.tape = data_tape
+        self.asset_class = asset_class
+        self.zeros = kwargs.get('wa_zeros', 0)
+        if stratify_by_variables is None:
+            stratify_by_variables = [] if config is None else config.stratify_by_fields
+        if stratify_types is None:
+            stratify_types = {} if config is None else config.stratify_types
+        self.stratify_types = dict(stratify_types)
+        self.stratification_variables = [x for x in stratify_by_variables if x in self.tape.columns]
+        self.buckets = {}
+        self._contributions = {}
+        self.reload_buckets(**kwargs)
+
+    def reload_buckets(self, **kwargs):
+        """
+        Reloads the buckets of every stratification variable
+        :param kwargs: buckets_<variable>: bucket boundaries for a variable
+        :return: self
+        """
+        for variable in self.stratification_variables:
+            strat_type = self.stratify_types.get(variable, '')
+            values = self.tape[variable]
+            if f'buckets_{variable}' in kwargs:
+                self.buckets[variable] = kwargs[f'buckets_{variable}']
+            elif strat_type == 'unique_value' or strat_type in Stratification_Package._vintage_periods or \
+                    not pd.api.types.is_numeric_dtype(values.dtype) or pd.api.types.is_bool_dtype(values.dtype):
+                self.buckets[variable] = None
+            else:
+                self.buckets[variable] = bucketize_data(self.tape, variable)
+        return self
+
+    def stratification_values(self, variable: str) -> pd.Series:
+        """
+        Values that a variable is stratified on: the field itself, or its month / quarter / year for vintage strats
+        """
+        period = Stratification_Package._vintage_periods.get(self.stratify_types.get(variable))
+        if period is None:
+            return self.tape[variable]
+        return pd.to_datetime(self.tape[variable]).dt.to_period(period)
+
+    def contributions(self, strat_set: str = 'summary') -> tuple:
+        """
+        Per-loan contributions to the totals of a strat set, calculated once and shared by every variable
+        :param str strat_set: name of the strat set
+        :return: output of strat_contributions
+        """
+        if strat_set not in self._contributions:
+            required_fields, totals_fields, _ = Stratification_Package._strat_sets[strat_set]
+            _check_required_fields(self.tape, required_fields)
+            self._contributions[strat_set] = strat_contributions(self.tape, zeros=self.zeros, **totals_fields)
+        return self._contributions[strat_set]
+
+    def stratify(self, variable: str, strat_set: str = 'summary') -> pd.DataFrame:
+        """
+        Stratify the tape by one variable
+        :param str variable: stratification variable
+        :param str strat_set: name of the strat set
+        :return: pd.DataFrame with a row for each stratification bucket
+        """
+        codes, bucket_index = _bucket_codes(self.stratification_values(variable), self.buckets.get(variable))
+        totals = _finalize_strat_totals(reduce_strat_contributions(self.contributions(strat_set), codes, bucket_index))
+        return Stratification_Package._strat_sets[strat_set][2](totals)
+
+    def summary_package(self, strat_set: str = 'summary', parallel: bool = False, max_workers: int = None) -> dict:
+        """
+        Stratify the tape by every stratification variable
+        :param str strat_set: name of the strat set
+        :param bool parallel: if True, stratify the variables in a thread pool.  The threads share the tape and the
+                per-loan contributions, so nothing is copied or pickled.  Default is False
+        :param int max_workers: maximum number of threads.  Default is the ThreadPoolExecutor default
+        :return: dict of stratification variable to strat pd.DataFrame
+        """
+        self.contributions(strat_set)
+        if parallel is True:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                strats = executor.map(lambda variable: self.stratify(variable, strat_set), self.stratification_variables)
+                return dict(zip(self.stratification_variables, strats))
+        return {variable: self.stratify(variable, strat_set) for variable in self.stratification_variables}
+
+
+def _stratify_sector_partition(partition: arrowtape.SharedTape, strat_set: str, stratify_by_variables: list,
+                               stratify_types: dict, kwargs: dict) -> dict:
+    #Worker process: the sector's rows are Arrow backed views of the memory mapped shared tape file, nothing is copied
+    package = Stratification_Package(partition, stratify_by_variables=stratify_by_variables,
+                                     stratify_types=stratify_types, **kwargs)
+    return package.summary_package(strat_set)
+
+
+def stratify_by_sector(data_tape: pd.DataFrame, config: varsconfig.AssetVariableConfig = None,
+                       stratify_by_variables: list = None, strat_set: str = 'summary', max_workers: int = None,
+                       **kwargs) -> pd.DataFrame:
+    """
+    Runs the strat set of every asset_sector in the tape in a pool of worker processes and merges the results into one
+    report.  The tape is sorted by asset_sector and written once to a shared Arrow IPC file (arrowtape.SharedTape), so
+    every sector is a contiguous row range that its worker memory maps instead of receiving a pickled DataFrame.
+    Buckets are calculated on the whole tape so every sector is stratified on the same buckets.  Rows without an
+    asset_sector belong to no sector and are left out of the report and of the bucket calculation.
+    :param pd.DataFrame data_tape: clean data tape with an asset_sector column, or an Arrow tape (pyarrow.Table or
+            arrowtape.SharedTape)
+    :param varsconfig.AssetVariableConfig config: configuration object (see Stratification_Package)
+    :param list stratify_by_variables: stratification variables to use instead of config.stratify_by_fields
+    :param str strat_set: name of the strat set
+    :param int max_workers: maximum number of worker processes.  Default is the number of sectors, capped by the
+            ProcessPoolExecutor default.  If 1, the sectors are stratified in this process
+    :param kwargs: keyword arguments for Stratification_Package (buckets_<variable>, wa_zeros)
+    :keyword str temp_dir: directory for the shared tape file.  Default is the system temporary directory
+    :return: pd.DataFrame indexed by (asset_sector, strat_variable, bucket)
+    :exception ValueError: if no row of the tape has an asset_sector
+    """
+    if pa is None:
+        raise ImportError('pyarrow is required to stratify sectors in parallel')
+    temp_dir = kwargs.pop('temp_dir', None)
+    data_tape = arrowtape.as_dataframe(data_tape)
+    has_sector = data_tape['asset_sector'].notna()
+    if not has_sector.all():
+        data_tape = data_tape[has_sector]
+    if data_tape.shape[0] == 0:
+        raise ValueError('No row of the tape has an asset_sector to stratify by')
+    full_package = Stratification_Package(data_tape, config=config, stratify_by_variables=stratify_by_variables,
+                                          **kwargs)
+    variables = full_package.stratification_variables
+    package_kwargs = {'wa_zeros': full_package.zeros}
+    package_kwargs.update({f'buckets_{x}': full_package.buckets[x] for x in variables})
+
+    #Sort the tape by sector so every partition is a contiguous slice of the shared file
+    sorted_tape = data_tape.sort_values('asset_sector', kind='stable')
+    sector_sizes = sorted_tape['asset_sector'].value_counts(sort=False).reindex(sorted_tape['asset_sector'].unique())
+    sector_starts = np.concatenate(([0], np.cumsum(sector_sizes.to_numpy())[:-1]))
+
+    results = {}
+    with tempfile.TemporaryDirectory(dir=temp_dir) as shared_dir:
+        shared_tape = arrowtape.SharedTape.write(sorted_tape.reset_index(drop=True),
+                                                 os.path.join(shared_dir, 'tape.feather'))
+        del sorted_tape
+        partitions = {sector: shared_tape.slice(int(start), int(length)) for sector, start, length in
+                      zip(sector_sizes.index, sector_starts, sector_sizes.to_numpy())}
+        if max_workers == 1:
+            for sector, partition in partitions.items():
+                results[sector] = _stratify_sector_partition(partition, strat_set, variables,
+                                                             full_package.stratify_types, package_kwargs)
+        else:
+            if max_workers is None:
+                max_workers = min(len(partitions), os.cpu_count() or 1)
+            # Workers are spawned rather than forked: a SharedTape only pickles the path of the shared tape file, and
+            # forking a process that has started threads (e.g. numba's parallel kernels) can deadlock the workers
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+                futures = {sector: executor.submit(_stratify_sector_partition, partition, strat_set, variables,
+                                                   full_package.stratify_types, package_kwargs)
+                           for sector, partition in partitions.items()}
+                results = {sector: future.result() for sector, future in futures.items()}
+
+    return pd.concat({(sector, variable): strat for sector, strats in results.items()
+                      for variable, strat in strats.items()}, names=['asset_sector', 'strat_variable', 'bucket'])
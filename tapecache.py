@@ -0,0 +1,246 @@
+# On-disk columnar cache of cleaned data tapes.
+# Cached tapes are stored as uncompressed Feather (Arrow IPC) files so a repeat load is a memory mapped read instead of
+# a re-parse of the raw csv / Excel file and a re-run of every converter.
+
+import os
+import json
+import tempfile
+import hashlib
+import pandas as pd
+import headermap
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.ipc as ipc
+except ImportError:
+    pa = None
+
+
+class TapeCache:
+    """
+    Size bounded, least recently used cache of cleaned data tapes.  Each entry is keyed by the content hash of the
+    source tape file, the header map, the version of the configuration used to clean the tape and the read options.
+    Loading an entry updates its modification time, and when the cache grows past max_size_bytes the entries with the
+    oldest modification time are evicted first.
+    """
+
+    _cache_format_version = 1
+    _cache_suffix = '.feather'
+    _categorical_key = b'tapecache_categorical'
+    _uncached_kwargs = ('cache', 'refresh_cache', 'chunksize', 'config_data', 'db_connection', 'db_connection_string')
+
+    def __init__(self, cache_dir: str, max_size_bytes: int = 20 * 2 ** 30):
+        if pa is None:
+            raise ImportError('pyarrow is required to use the tape cache')
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def file_hash(file_path: str, block_size: int = 2 ** 20) -> str:
+        """
+        sha256 hash of the contents of a file, read in blocks so large tapes are not loaded into memory
+        :param str file_path: path to file
+        :param int block_size: number of bytes read at a time
+        :return: hex digest
+        """
+        file_hash = hashlib.sha256()
+        with open(file_path, 'rb') as file_bytes:
+            for block in iter(lambda: file_bytes.read(block_size), b''):
+                file_hash.update(block)
+        return file_hash.hexdigest()
+
+    @staticmethod
+    def _option_repr(value) -> str:
+        if callable(value):
+            return f'{getattr(value, "__module__", "")}.{getattr(value, "__qualname__", repr(value))}'
+        elif isinstance(value, dict):
+            return repr(sorted((str(k), TapeCache._option_repr(v)) for k, v in value.items()))
+        else:
+            return repr(value)
+
+    def cache_key(self, tape_file_path: str, header_map: (str, dict) = None, config_data=None, **kwargs) -> str:
+        """
+        Build the cache key for a tape
+        :param str tape_file_path: path to the raw tape file
+        :param header_map: path to header map file, dict of header names or headermap.HeaderIndex
+        :param config_data: AssetVariableConfig used to clean the tape, or None for a raw tape
+        :param kwargs: read options passed to import_raw_datatape
+        :return: hex digest cache key
+        """
+        if header_map is None or isinstance(header_map, dict):
+            header_key = TapeCache._option_repr(header_map)
+        elif isinstance(header_map, headermap.HeaderIndex):
+            header_key = header_map.version
+        else:
+            header_key = TapeCache.file_hash(header_map)
+        key_parts = {'format': TapeCache._cache_format_version,
+                     'tape': TapeCache.file_hash(tape_file_path.strip()),
+                     'header_map': header_key,
+                     'config': None if config_data is None else config_data.config_version,
+                     'options': {k: TapeCache._option_repr(v) for k, v in sorted(kwargs.items())
+                                 if k not in TapeCache._uncached_kwargs}}
+        return hashlib.sha256(json.dumps(key_parts, sort_keys=True).encode()).hexdigest()
+
+    def cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + TapeCache._cache_suffix)
+
+    def _temp_path(self, key: str) -> str:
+        # each writer gets its own temporary file, so processes caching the same tape never write into one file
+        file_handle, temp_path = tempfile.mkstemp(prefix=key + '.', suffix='.tmp', dir=self.cache_dir)
+        os.close(file_handle)
+        return temp_path
+
+    def contains(self, key: str) -> bool:
+        return os.path.exists(self.cache_path(key))
+
+    def load(self, key: str) -> pd.DataFrame:
+        """
+        Load a cached tape with a memory mapped read and mark it as most recently used
+        :param str key: cache key
+        :return: pd.DataFrame, or None if the key is not cached
+        """
+        table = self.load_table(key)
+        return None if table is None else table.to_pandas()
+
+    def load_table(self, key: str):
+        """
+        Load a cached tape as a memory mapped pyarrow Table and mark it as most recently used
+        :param str key: cache key
+        :return: pyarrow.Table, or None if the key is not cached
+        """
+        if self.contains(key) is False:
+            return None
+        os.utime(self.cache_path(key))
+        table = feather.read_table(self.cache_path(key), memory_map=True)
+        # categorical columns of chunked entries are stored decoded (see store_chunks) and dictionary encoded again
+        categorical = json.loads((table.schema.metadata or {}).get(TapeCache._categorical_key, b'[]'))
+        for column_name in categorical:
+            position = table.schema.get_field_index(column_name)
+            table = table.set_column(position, column_name, table.column(position).dictionary_encode())
+        return table
+
+    def iter_load(self, key: str, chunksize: int):
+        """
+        Generator of chunks of at most chunksize rows from a cached tape.  Only the current chunk is converted to pandas.
+        :param str key: cache key
+        :param int chunksize: maximum number of rows in each chunk
+        :return: generator of pd.DataFrame
+        """
+        table = self.load_table(key)
+        for start in range(0, table.num_rows, chunksize):
+            yield table.slice(start, chunksize).to_pandas()
+
+    def store(self, key: str, data_tape: pd.DataFrame) -> bool:
+        """
+        Store a tape in the cache and evict least recently used entries if the cache is over its size limit
+        :param str key: cache key
+        :param pd.DataFrame data_tape: tape to cache
+        :return: True if the tape was cached, False if it could not be converted to a columnar table
+        """
+        try:
+            table = pa.Table.from_pandas(data_tape, preserve_index=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as error:
+            print(f'Tape could not be cached in columnar format: {error}')
+            return False
+        temp_path = self._temp_path(key)
+        try:
+            feather.write_feather(table, temp_path, compression='uncompressed')
+            os.replace(temp_path, self.cache_path(key))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self.evict(keep=key)
+        return True
+
+    def store_chunks(self, key: str, data_chunks):
+        """
+        Generator that passes chunks through unchanged while writing them to the cache, so a streamed tape is cached
+        without holding it in memory.  If a chunk can not be converted to the schema of the first chunk the partial
+        entry is discarded and the remaining chunks are passed through uncached.  Each chunk of a categorical column
+        can have its own categories, and an Arrow IPC file holds one dictionary per column, so categorical columns are
+        written as their values and dictionary encoded again when the entry is loaded.
+        :param str key: cache key
+        :param data_chunks: iterable of pd.DataFrame
+        :return: generator of pd.DataFrame
+        """
+        temp_path = None
+        writer = None
+        caching = True
+        try:
+            for data_chunk in data_chunks:
+                if caching is True:
+                    try:
+                        if writer is None:
+                            schema = TapeCache._decoded_schema(pa.Schema.from_pandas(data_chunk, preserve_index=True))
+                            temp_path = self._temp_path(key)
+                            writer = ipc.new_file(temp_path, schema)
+                        writer.write_batch(pa.RecordBatch.from_pandas(data_chunk, schema=schema, preserve_index=True))
+                    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as error:
+                        print(f'Tape could not be cached in columnar format: {error}')
+                        caching = False
+                        if writer is not None:
+                            writer.close()
+                        if temp_path is not None:
+                            os.remove(temp_path)
+                yield data_chunk
+            if caching is True and writer is not None:
+                writer.close()
+                os.replace(temp_path, self.cache_path(key))
+                self.evict(keep=key)
+        finally:
+            # the consumer stopped before the last chunk: discard the partial entry
+            if caching is True and writer is not None and os.path.exists(temp_path):
+                writer.close()
+                os.remove(temp_path)
+
+    @staticmethod
+    def _decoded_schema(schema):
+        categorical = [field.name for field in schema if pa.types.is_dictionary(field.type)]
+        fields = [pa.field(field.name, field.type.value_type) if field.name in categorical else field
+                  for field in schema]
+        metadata = dict(schema.metadata or {})
+        metadata[TapeCache._categorical_key] = json.dumps(categorical).encode()
+        return pa.schema(fields, metadata=metadata)
+
+    def invalidate(self, key: str = None):
+        """
+        Remove one entry from the cache, or every entry if key is None
+        :param str key: cache key
+        :return: None
+        """
+        keys = [key] if key is not None else [entry[0] for entry in self._entries()]
+        for cache_key in keys:
+            if self.contains(cache_key):
+                os.remove(self.cache_path(cache_key))
+
+    def _entries(self) -> list:
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.endswith(TapeCache._cache_suffix):
+                file_stat = os.stat(os.path.join(self.cache_dir, file_name))
+                entries.append((file_name[:-len(TapeCache._cache_suffix)], file_stat.st_mtime, file_stat.st_size))
+        return entries
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(entry[2] for entry in self._entries())
+
+    def evict(self, keep: str = None):
+        """
+        Remove least recently used entries until the cache is no larger than max_size_bytes
+        :param str keep: cache key that is never evicted (the entry just written)
+        :return: list of evicted keys
+        """
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total_size = sum(entry[2] for entry in entries)
+        evicted = []
+        for cache_key, _, entry_size in entries:
+            if total_size <= self.max_size_bytes:
+                break
+            if cache_key != keep:
+                os.remove(self.cache_path(cache_key))
+                total_size -= entry_size
+                evicted.append(cache_key)
+        return evicted
@@ -1,19 +1,34 @@
 import os
+import re
+import time
+import pickle
+import multiprocessing
 import datetime as dt
 import numpy as np
 import numpy_financial as npf
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import pandera as pda
 import cmutils.sysutils as sysutils
+import cmutils.sketches as sketches
 import varsconfig as config
+import tapecache
+import arrowtape
+import headermap
 from IPython.display import HTML, display
 
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
 def import_raw_datatape(tape_file_path: str, header_map: (str, dict) = None, **kwargs) -> pd.DataFrame:
     """
     Import raw tape file of multiple format types into a pandas dataframe, with option to remap header names.
     :param str tape_file_path: path to tape file.  File type can be csv, tsv, txt, xlsx, xls, or sql_query=<query>.
             If sql_query, then tape_file_path is the query string and db connection string is required.
-    :param str header_map: path to header map file
+    :param header_map: path to header map file, dict of raw header name to mapped field name, or
+            headermap.HeaderIndex to resolve the tape's headers to field names
     :param optional kwargs: optional arguments
         :keyword str delimiter: delimiter for csv, tsv, txt tape files
         :keyword str sheet_name: sheet name for xlsx, xls tape files
@@ -22,59 +37,178 @@ def import_raw_datatape(tape_file_path: str, header_map: (str, dict) = None, **k
         :keyword dict converters: dict of functions for converting values in certain columns.  Default is None
         :keyword dict dtype: dict of column names and types for columns. Default is None
         :keyword list index_col: list of columns to use as index. Default is first column.
-        :keyword str db_connection_string: connection string for sql query
+        :keyword db_connection_string: connection string (requires SQLAlchemy) or DB-API connection (e.g. sqlite3 or
+                duckdb) for sql query.  db_connection is accepted as an alias
         :keyword str header_delimiter: delimiter for header map file for tsv, txt files
         :keyword str header_sheet_name: sheet name for header map file for xlsx, xls files
+        :keyword int chunksize: if given, return a generator of dataframes of at most chunksize rows instead of a
+                single dataframe (see iter_raw_datatape).  Default is None
+        :keyword config.AssetVariableConfig config_data: if given, each field is converted to its clean type with
+                process_to_clean_tape after the header map is applied.  Default is None
+        :keyword bool compact_dtypes: if True (and config_data is given), the clean tape is stored in compact dtypes
+                (see compact_tape).  Not applied to chunked reads, where each chunk would get its own dtypes.
+                Default is False
+        :keyword cache: tapecache.TapeCache, or path of a cache directory.  If given, the mapped (and cleaned) tape
+                is cached in columnar format and a repeat load of an unchanged tape with the same header map, config
+                and read options is a memory mapped read of the cache.  Default is None
+        :keyword bool refresh_cache: if True, re-read the tape and replace the cached copy.  Default is False
 
 
-    :return: pandas dataframe
+    :return: pandas dataframe, or generator of pandas dataframes if chunksize is given
     :exception FileNotFoundError: if tape_file_path does not exist
+    :exception ValueError: if tape_file_path is a sql query and no db_connection_string is given
     :exception ImportError: if tape_file_path is not a supported file type
     :exception ImportWarning: if header_map is not a supported file type
     Note: Exception handling does not occur in this function.  It must be handled in the calling function or by the user.
     """
-    if sysutils.check_file_exists(tape_file_path) is False:
+    if kwargs.get('chunksize') is not None:
+        return iter_raw_datatape(tape_file_path, header_map, **kwargs)
+    cache, cache_key = _tape_cache_entry(tape_file_path, header_map, **kwargs)
+    if cache is not None and kwargs.get('refresh_cache', False) is False and cache.contains(cache_key):
+        return cache.load(cache_key)
+    tape_data = _read_tape_file(tape_file_path, **kwargs)
+    header_dict = _load_header_map(header_map, tape_data.columns, **kwargs)
+    if header_dict is not None:
+        tape_data = tape_data.rename(columns=header_dict)
+    if kwargs.get('config_data') is not None:
+        tape_data = process_to_clean_tape(tape_data, kwargs.get('config_data'), kwargs.get('compact_dtypes', False))
+    if cache is not None and tape_data is not False:
+        cache.store(cache_key, tape_data)
+    return tape_data
+
+
+def iter_raw_datatape(tape_file_path: str, header_map: (str, dict) = None, chunksize: int = 100000, **kwargs):
+    """
+    Generator version of import_raw_datatape that yields the tape in chunks of at most chunksize rows, so that peak
+    memory is bounded by the chunk size and not by the size of the tape.  The header map is loaded once and applied to
+    every chunk; if config_data is given each chunk is also converted with process_to_clean_tape.
+    Delimited files and sql queries are read incrementally.  Excel files can not be read incrementally by pandas, so
+    they are read whole and then yielded in chunks.
+    :param str tape_file_path: path to tape file (see import_raw_datatape)
+    :param header_map: path to header map file, dict of raw header name to mapped field name, or
+            headermap.HeaderIndex (resolved from the headers of the first chunk)
+    :param int chunksize: maximum number of rows in each chunk.  Default is 100000
+    :param optional kwargs: same keywords as import_raw_datatape
+        :keyword config.AssetVariableConfig config_data: configuration object used to clean each chunk
+        :keyword cache: tapecache.TapeCache or cache directory.  Chunks are written to the cache as they are read, and
+                if the tape is already cached the chunks are read from the memory mapped cache instead
+        :keyword bool refresh_cache: if True, re-read the tape and replace the cached copy.  Default is False
+    :return: generator of pandas dataframes
+    :exception ImportError: if config_data is given and the tape is missing required fields
+    """
+    cache, cache_key = _tape_cache_entry(tape_file_path, header_map, chunked=True, **kwargs)
+    if cache is not None and kwargs.get('refresh_cache', False) is False and cache.contains(cache_key):
+        yield from cache.iter_load(cache_key, chunksize)
+    elif cache is not None:
+        yield from cache.store_chunks(cache_key, _iter_tape_chunks(tape_file_path, header_map, chunksize, **kwargs))
+    else:
+        yield from _iter_tape_chunks(tape_file_path, header_map, chunksize, **kwargs)
+
+
+def _iter_tape_chunks(tape_file_path: str, header_map: (str, dict), chunksize: int, **kwargs):
+    header_dict = None
+    config_data = kwargs.get('config_data')
+    for i, tape_chunk in enumerate(_read_tape_file(tape_file_path, chunksize=chunksize, **kwargs)):
+        if i == 0:
+            header_dict = _load_header_map(header_map, tape_chunk.columns, **kwargs)
+        if header_dict is not None:
+            tape_chunk = tape_chunk.rename(columns=header_dict)
+        if config_data is not None:
+            tape_chunk = process_to_clean_tape(tape_chunk, config_data)
+            if tape_chunk is False:
+                raise ImportError(f'Tape {tape_file_path} is missing required fields and can not be processed')
+        yield tape_chunk
+
+
+def _tape_cache_entry(tape_file_path: str, header_map: (str, dict) = None, chunked: bool = False, **kwargs) -> tuple:
+    """
+    Helper function to get the tape cache and cache key for a tape from the cache keyword
+    :param bool chunked: True for a chunked read, which does not compact dtypes.  Default is False
+    :return: (tapecache.TapeCache, cache key), or (None, None) if no cache is used or the tape is a sql query
+    """
+    cache = kwargs.get('cache')
+    if cache is None or tape_file_path.strip().lower().startswith('sql_query='):
+        return None, None
+    if not isinstance(cache, tapecache.TapeCache):
+        cache = tapecache.TapeCache(cache)
+    # the key records whether dtypes are compacted, not the option, so a chunked read and a whole read with
+    # compact_dtypes=True do not share an entry
+    compact_dtypes = kwargs.pop('compact_dtypes', False)
+    if chunked is False and kwargs.get('config_data') is not None and compact_dtypes is True:
+        kwargs['compact_dtypes'] = True
+    return cache, cache.cache_key(tape_file_path, header_map, **kwargs)
+
+
+def _read_tape_file(tape_file_path: str, chunksize: int = None, **kwargs):
+    """
+    Helper function to read a raw tape file with pandas.  See import_raw_datatape for the keyword arguments.
+    :param str tape_file_path: path to tape file
+    :param int chunksize: if given, return an iterator of dataframes of at most chunksize rows.  Default is None
+    :return: pandas dataframe, or iterator of pandas dataframes if chunksize is given
+    """
+    if tape_file_path.strip().lower().startswith('sql_query='):
+        sql_query = tape_file_path.strip()[len('sql_query='):]
+        db_connection = kwargs.get('db_connection_string', kwargs.get('db_connection'))
+        if db_connection is None:
+            raise ValueError('A db_connection_string is required to import a tape from a sql query')
+        tape_data = pd.read_sql(sql_query, db_connection, chunksize=chunksize)
+    elif sysutils.check_file_exist(tape_file_path.strip()) is False:
         raise FileNotFoundError(f'File {tape_file_path} does not exist')
     elif tape_file_path.strip().lower().endswith('.csv'):
         delim = kwargs.get('delimiter', ',')
         tape_data = pd.read_csv(tape_file_path.strip(), delimiter=delim, parse_dates=kwargs.get('parse_dates', False),
                                 date_parser=kwargs.get('date_parser', None), converters=kwargs.get('converters', None),
-                                dtype=kwargs.get('dtype', None), index_col=kwargs.get('index_col', 0))
-    elif tape_file_path.strip().lower().endswith('.tsv') or tape_file_path.lower.endswith('.txt'):
+                                dtype=kwargs.get('dtype', None), index_col=kwargs.get('index_col', 0),
+                                chunksize=chunksize)
+    elif tape_file_path.strip().lower().endswith('.tsv') or tape_file_path.strip().lower().endswith('.txt'):
         delim = kwargs.get('delimiter', '\t')
         tape_data = pd.read_csv(tape_file_path.strip(), delimiter=delim, parse_dates=kwargs.get('parse_dates', False),
                                 date_parser=kwargs.get('date_parser', None), converters=kwargs.get('converters', None),
-                                dtype=kwargs.get('dtype', None), index_col=kwargs.get('index_col', 0))
+                                dtype=kwargs.get('dtype', None), index_col=kwargs.get('index_col', 0),
+                                chunksize=chunksize)
     elif tape_file_path.endswith('.xlsx') or tape_file_path.endswith('.xls'):
         tape_data = pd.read_excel(tape_file_path, sheet_name=kwargs.get('sheet_name', 0),
                                   parse_dates=kwargs.get('parse_dates', False),
                                   date_parser=kwargs.get('date_parser', None), converters=kwargs.get('converters', None),
                                   dtype=kwargs.get('dtype', None), index_col=kwargs.get('index_col', 0))
-    #SQL Query is still in development
-    elif tape_file_path.strip().lower().beginwith('sql_query='):
-        sql_query = tape_file_path.strip().lower().replace('sql_query=', '')
-        tape_data = pd.read_sql(sql_query, kwargs.get('db_connection'))
+        if chunksize is not None:
+            tape_data = (tape_data.iloc[i:i + chunksize] for i in range(0, tape_data.shape[0], chunksize))
     else:
         raise ImportError(
             f'File {tape_file_path} is not a valid file type.  Must use .csv, .tsv, .txt, .xls, .xlsx, or sql_query=<query>')
+    return tape_data
+
+
+def _load_header_map(header_map: (str, dict) = None, headers: list = None, **kwargs) -> dict:
+    """
+    Helper function to load a header map into a dict of raw header name to mapped field name
+    :param header_map: path to header map file (csv, tsv, txt, xls, xlsx) with a mapped_field column, dict, or
+            headermap.HeaderIndex
+    :param list headers: headers of the tape, resolved to field names when header_map is a headermap.HeaderIndex
+    :param optional kwargs:
+        :keyword str header_delimiter: delimiter for header map file for tsv, txt files
+        :keyword str header_sheet_name: sheet name for header map file for xlsx, xls files
+    :return: dict of header names, or None if no header map is given
+    :exception ImportWarning: if header_map is not a supported file type
+    """
     if header_map is None:
-        return tape_data
+        return None
     elif isinstance(header_map, dict):
-        tape_data = tape_data.rename(columns=header_map)
+        return header_map
+    elif isinstance(header_map, headermap.HeaderIndex):
+        if headers is None:
+            raise ValueError('The headers of the tape are required to resolve a header index')
+        return header_map.header_map(list(headers))
     elif header_map.lower().endswith('.csv'):
-        header_map = pd.read_csv(header_map, header=0, index_col=0).to_dict()['mapped_field']
-        tape_data = tape_data.rename(columns=header_map)
+        return pd.read_csv(header_map, header=0, index_col=0).to_dict()['mapped_field']
     elif header_map.lower().endswith('.tsv') or header_map.lower().endswith('.txt'):
-        header_map = pd.read_csv(header_map, header=0, index_col=0,
-                                 delimiter=kwargs.get('header_delimiter', '\t')).to_dict()['mapped_field']
-        tape_data = tape_data.rename(columns=header_map)
+        return pd.read_csv(header_map, header=0, index_col=0,
+                           delimiter=kwargs.get('header_delimiter', '\t')).to_dict()['mapped_field']
     elif header_map.lower().endswith('.xlsx') or header_map.lower().endswith('.xls'):
-        header_map = pd.read_excel(header_map, header=0, index_col=0,
-                                   sheet_name=kwargs.get('header_sheet_name',0)).to_dict()['mapped_field']
-        tape_data = tape_data.rename(columns=header_map, inplace=True)
+        return pd.read_excel(header_map, header=0, index_col=0,
+                             sheet_name=kwargs.get('header_sheet_name', 0)).to_dict()['mapped_field']
     else:
         raise ImportWarning('Unsupported header file input.  Header must be dictionary or flat file format')
-    return tape_data
 
 
 def _get_unique_values_dict(data_tape: pd.DataFrame, **kwargs) -> dict:
@@ -91,16 +225,14 @@ def _get_unique_values_dict(data_tape: pd.DataFrame, **kwargs) -> dict:
     max_unique_value_display = kwargs.get('max_unique_value_display', 25)
     unique_value_id_threshold = kwargs.get('uinque_value_absolute_threshold',500)
     unique_value_types = kwargs.get('unique_value_types', None)
+    value_counts = kwargs.get('value_counts') or _get_value_counts_dict(data_tape, unique_value_id_threshold)[1]
     for field in data_tape.columns:
+        field_counts = value_counts[field]
         if (unique_value_types is None or data_tape[field].dtype in unique_value_types) and \
-                (data_tape[field].nunique() <= unique_value_id_threshold):
-            if len(data_tape[field].unique()) > max_unique_value_display:
-                values_list = []
-                for value in data_tape[field].unique()[~pd.isnull(data_tape[field].unique())]:
-                    values_list.append((value, data_tape[field].value_counts()[value]))
-                values_list = sorted(values_list, key=lambda values:values[1], reverse=True)
-                unique_values[field] = [values_list[i][0]for i in range(min(len(values_list),max_unique_value_display))]
-                del values_list
+                (field_counts is not None and len(field_counts) <= unique_value_id_threshold):
+            if len(field_counts) > max_unique_value_display:
+                top_counts = field_counts.sort_values(ascending=False, kind='stable')
+                unique_values[field] = top_counts.index[:max_unique_value_display].tolist()
             else:
                 unique_values[field] = data_tape[field].unique()[~pd.isnull(data_tape[field].unique())]
         else:
@@ -108,47 +240,403 @@ def _get_unique_values_dict(data_tape: pd.DataFrame, **kwargs) -> dict:
     return unique_values
 
 
-def summarize_unique_values(data_tape: pd.DataFrame) -> pd.DataFrame:
+def _get_value_counts_dict(data_tape: pd.DataFrame, unique_value_id_threshold: int = 500) -> (dict, dict):
+    """
+    Number of distinct non-missing values of each column, and the count of each distinct value (in order of first
+    appearance) of the columns with no more than unique_value_id_threshold distinct values
+    :return: (dict of field to number of distinct values, dict of field to pd.Series of counts indexed by value, or
+            None above the threshold)
+    """
+    unique_num = {}
+    value_counts = {}
+    for field in data_tape.columns:
+        unique_num[field] = _count_distinct(data_tape[field])
+        if unique_num[field] <= unique_value_id_threshold:
+            field_counts = data_tape[field].value_counts(sort=False, dropna=True)
+            value_counts[field] = field_counts[field_counts > 0]
+        else:
+            value_counts[field] = None
+    return unique_num, value_counts
+
+
+def _count_distinct(values: pd.Series) -> int:
+    # numbers and dates are counted with a sort, which is several times faster than hashing every value
+    numbers = values.dropna().to_numpy()
+    if numbers.dtype.kind in 'biufmM':
+        numbers = np.sort(numbers)
+        return int(numbers.size > 0) + int(np.count_nonzero(numbers[1:] != numbers[:-1]))
+    return values.nunique()
+
+
+def summarize_unique_values(data_tape: pd.DataFrame, exact: bool = True) -> pd.DataFrame:
     """
     Provides a summary of unique values for each column in data tape
-    :param pd.DataFrame data_tape: data tape to analyze
+    :param pd.DataFrame data_tape: data tape to analyze, an Arrow tape (pyarrow.Table or arrowtape.SharedTape), or an
+            iterable of data tape chunks (see iter_raw_datatape)
+    :param bool exact: if False, distinct counts and most frequent values are estimated with sketches in one pass
+            (see TapeSummaryAccumulator).  Default is True
     :return: pd.DataFrame with each field as a row and columns with descriptive statistics
     """
     pd.set_option('display.max_colwidth', None)
+    data_tape = arrowtape.as_dataframe(data_tape)
+    if not isinstance(data_tape, pd.DataFrame):
+        return TapeSummaryAccumulator(exact=exact).update_all(data_tape).summarize_unique_values()
+    elif exact is False:
+        return TapeSummaryAccumulator(exact=exact).update(data_tape).summarize_unique_values()
+    missing = data_tape.isna().sum()
+    unique_num, value_counts = _get_value_counts_dict(data_tape)
     return pd.DataFrame({
         'type': data_tape.dtypes,
-        'count': data_tape.count(),
-        'missing': data_tape.isna().sum(),
-        'missing_pct': data_tape.isna().sum() / data_tape.shape[0],
-        'unique_num': data_tape.nunique(),
-        'unique_values': _get_unique_values_dict(data_tape)
+        'count': data_tape.shape[0] - missing,
+        'missing': missing,
+        'missing_pct': missing / data_tape.shape[0],
+        'unique_num': pd.Series(unique_num),
+        'unique_values': _get_unique_values_dict(data_tape, value_counts=value_counts)
     })
 
 
-def summarize_tape(data_tape: pd.DataFrame) -> pd.DataFrame:
+def summarize_tape(data_tape: pd.DataFrame, exact: bool = True) -> pd.DataFrame:
     """
     Provides a detailed summary of descriptive statistics for each column in data tape
-    :param pd.DataFrame data_tape:  data tape to analyze
+    :param pd.DataFrame data_tape:  data tape to analyze, an Arrow tape (pyarrow.Table or arrowtape.SharedTape), or an
+            iterable of data tape chunks (see iter_raw_datatape)
+    :param bool exact: if False, distinct counts, quantiles and most frequent values are estimated with sketches in
+            one pass (see TapeSummaryAccumulator).  Default is True
     :return: pd.DataFrame with each field as a row and columns with descriptive statistics
     """
     pd.set_option('display.max_colwidth', None)
+    data_tape = arrowtape.as_dataframe(data_tape)
+    if not isinstance(data_tape, pd.DataFrame):
+        return TapeSummaryAccumulator(exact=exact).update_all(data_tape).summarize_tape()
+    elif exact is False:
+        return TapeSummaryAccumulator(exact=exact).update(data_tape).summarize_tape()
+    missing = data_tape.isna().sum()
+    quartiles = data_tape.quantile([0.25, 0.50, 0.75], numeric_only=True, interpolation='midpoint')
+    unique_num, value_counts = _get_value_counts_dict(data_tape)
     return pd.DataFrame({
         'type': data_tape.dtypes,
-        'count': data_tape.count(),
+        'count': data_tape.shape[0] - missing,
         'mean': data_tape.mean(numeric_only=True),
         'median': data_tape.median(numeric_only=True),
         'min': data_tape.min(numeric_only=True),
-        'quart1': data_tape.quantile(0.25, numeric_only=True, interpolation='midpoint'),
-        'quart2': data_tape.quantile(0.50, numeric_only=True, interpolation='midpoint'),
-        'quart3': data_tape.quantile(0.75, numeric_only=True, interpolation='midpoint'),
+        'quart1': quartiles.loc[0.25],
+        'quart2': quartiles.loc[0.50],
+        'quart3': quartiles.loc[0.75],
         'max': data_tape.max(numeric_only=True),
-        'missing': data_tape.isna().sum(),
-        'missing_pct': data_tape.isna().sum() / data_tape.shape[0],
-        'unique_num': data_tape.nunique(),
-        'unique_values': _get_unique_values_dict(data_tape)
+        'missing': missing,
+        'missing_pct': missing / data_tape.shape[0],
+        'unique_num': pd.Series(unique_num),
+        'unique_values': _get_unique_values_dict(data_tape, value_counts=value_counts)
     })
 
 
+class TapeSummaryAccumulator:
+    """
+    Accumulates the statistics behind summarize_tape and summarize_unique_values one chunk at a time, so a tape that
+    does not fit in memory can be summarized from iter_raw_datatape.  Counts, missing values, sums, min and max are
+    exact.
+
+    With exact=True, unique values are tracked exactly until a field exceeds unique_value_id_threshold, after which
+    unique_num is reported as NaN (as with the in-memory summary, unique values are not shown above the threshold).
+    Quartiles and median are calculated from a uniform random sample of at most sample_size values per field, so they
+    are exact when a field has no more than sample_size non-missing values.
+
+    With exact=False, each field is summarized in one pass with fixed size sketches (see cmutils.sketches): unique_num
+    is a HyperLogLog estimate, quantiles come from a t-digest and the most frequent values from a Space-Saving
+    summary, which are exact when a field has no more than top_k_capacity distinct values.
+    """
+
+    def __init__(self, sample_size: int = 10000, unique_value_id_threshold: int = 500,
+                 max_unique_value_display: int = 25, seed: int = None, exact: bool = True,
+                 top_k_capacity: int = 1000, compression: int = 200, hll_precision: int = 14):
+        self.sample_size = sample_size
+        self.unique_value_id_threshold = unique_value_id_threshold
+        self.max_unique_value_display = max_unique_value_display
+        self.exact = exact
+        self.top_k_capacity = top_k_capacity
+        self.compression = compression
+        self.hll_precision = hll_precision
+        self.rows = 0
+        self.dtypes = {}
+        self.counts = {}
+        self.sums = {}
+        self.mins = {}
+        self.maxs = {}
+        self.value_counts = {}
+        self.distinct = {}
+        self.top_values = {}
+        self.digests = {}
+        self._sample_keys = {}
+        self._sample_values = {}
+        self._rng = np.random.default_rng(seed)
+
+    def update_all(self, data_chunks):
+        """
+        Add every chunk of an iterable of data tape chunks
+        :param data_chunks: iterable of pd.DataFrame
+        :return: self
+        """
+        for data_chunk in data_chunks:
+            self.update(data_chunk)
+        return self
+
+    def update(self, data_chunk: pd.DataFrame):
+        """
+        Add one chunk of the data tape to the accumulated statistics
+        :param pd.DataFrame data_chunk: chunk of data tape, or an Arrow tape (pyarrow.Table or arrowtape.SharedTape)
+        :return: self
+        """
+        data_chunk = arrowtape.as_dataframe(data_chunk)
+        self.rows += data_chunk.shape[0]
+        for field in data_chunk.columns:
+            values = data_chunk[field]
+            self._add_field(field, values.dtype)
+            self.counts[field] += int(values.count())
+            if self.exact is False:
+                self.distinct[field].add(values)
+                self._check_top_values(field)
+                if self.top_values[field] is not None:
+                    self.top_values[field].add(values)
+            elif self.value_counts[field] is not None:
+                self._merge_value_counts(field, values.value_counts(sort=False, dropna=True))
+            if pd.api.types.is_numeric_dtype(values.dtype):
+                self._update_numeric(field, values.to_numpy(dtype=np.float64, na_value=np.nan))
+        return self
+
+    def merge(self, other: 'TapeSummaryAccumulator'):
+        """
+        Add the statistics of another accumulator, e.g. the profile of another chunk, file or deal, so a profile can be
+        built from partial profiles in parallel, or a portfolio profile from deal profiles, without re-reading the
+        data.  Merging gives the same counts, sums, min, max, distinct counts and value counts as one accumulator of
+        all the data; samples and sketches are merged with the same guarantees.
+        :param TapeSummaryAccumulator other: accumulator with the same exact mode and sketch precision
+        :return: self
+        """
+        if other.exact != self.exact or (self.exact is False and other.hll_precision != self.hll_precision):
+            raise ValueError('Accumulators must use the same exact mode and sketch precision to be merged')
+        self.rows += other.rows
+        for field, dtype in other.dtypes.items():
+            self._add_field(field, dtype)
+            self.counts[field] += other.counts[field]
+            if self.exact is False:
+                self.distinct[field].merge(other.distinct[field])
+                if other.top_values[field] is None:
+                    self.top_values[field] = None
+                elif self.top_values[field] is not None:
+                    self.top_values[field].merge(other.top_values[field])
+                self._check_top_values(field)
+            elif other.value_counts[field] is None:
+                self.value_counts[field] = None
+            elif self.value_counts[field] is not None:
+                self._merge_value_counts(field, other.value_counts[field])
+            if field in other.sums:
+                self.sums[field] = self.sums.get(field, 0.0) + other.sums[field]
+                self.mins[field] = min(self.mins.get(field, np.inf), other.mins[field])
+                self.maxs[field] = max(self.maxs.get(field, -np.inf), other.maxs[field])
+                if self.exact is False:
+                    self.digests.setdefault(field, sketches.TDigest(self.compression)).merge(other.digests[field])
+                else:
+                    self._merge_sample(field, other._sample_keys[field], other._sample_values[field])
+        return self
+
+    def empty_copy(self) -> 'TapeSummaryAccumulator':
+        """
+        New accumulator with the same settings and no data, e.g. for a worker building a partial profile.  The copy
+        draws its own random sample keys so that merged samples stay uniform.
+        :return: TapeSummaryAccumulator
+        """
+        return TapeSummaryAccumulator(self.sample_size, self.unique_value_id_threshold, self.max_unique_value_display,
+                                      exact=self.exact, top_k_capacity=self.top_k_capacity,
+                                      compression=self.compression, hll_precision=self.hll_precision)
+
+    def save(self, file_path: str):
+        """
+        Write the accumulator to a file, so the profile can be merged with later profiles without re-reading the tape
+        :param str file_path: path of the profile file
+        :return: None
+        """
+        with open(file_path, 'wb') as profile_file:
+            pickle.dump(self, profile_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(file_path: str) -> 'TapeSummaryAccumulator':
+        """
+        Read an accumulator written with save
+        :param str file_path: path of the profile file
+        :return: TapeSummaryAccumulator
+        :exception ValueError: if the file does not hold a TapeSummaryAccumulator
+        """
+        with open(file_path, 'rb') as profile_file:
+            accumulator = pickle.load(profile_file)
+        if not isinstance(accumulator, TapeSummaryAccumulator):
+            raise ValueError(f'File {file_path} does not contain a tape profile')
+        return accumulator
+
+    def _add_field(self, field: str, dtype):
+        if field not in self.dtypes:
+            self.dtypes[field] = dtype
+            self.counts[field] = 0
+            self.value_counts[field] = pd.Series(dtype='int64') if self.exact is True else None
+            if self.exact is False:
+                self.distinct[field] = sketches.HyperLogLog(self.hll_precision)
+                self.top_values[field] = sketches.SpaceSaving(self.top_k_capacity)
+        elif self.dtypes[field] != dtype:
+            # read_csv gives an integer column as float in chunks with missing values
+            numeric = [pd.api.types.is_numeric_dtype(x) and not pd.api.types.is_bool_dtype(x)
+                       for x in (self.dtypes[field], dtype)]
+            self.dtypes[field] = np.dtype(np.float64) if all(numeric) else np.dtype(object)
+
+    def _check_top_values(self, field: str):
+        # most frequent values are only shown below the threshold, and the distinct count never decreases
+        if self.top_values[field] is not None and self.distinct[field].count > self.unique_value_id_threshold:
+            self.top_values[field] = None
+
+    def _merge_value_counts(self, field: str, field_counts: pd.Series):
+        if self.value_counts[field].empty:
+            # the counts of Arrow backed columns are Arrow integers, which can not be concatenated with numpy counts
+            merged_counts = field_counts.astype(np.int64)
+        else:
+            merged_counts = pd.concat([self.value_counts[field], field_counts.astype(np.int64)])
+            merged_counts = merged_counts.groupby(level=0, sort=False).sum()
+        self.value_counts[field] = merged_counts if len(merged_counts) <= self.unique_value_id_threshold else None
+
+    def _update_numeric(self, field: str, values: np.ndarray):
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.sums[field] = self.sums.get(field, 0.0) + values.sum()
+        self.mins[field] = min(self.mins.get(field, np.inf), values.min())
+        self.maxs[field] = max(self.maxs.get(field, -np.inf), values.max())
+        if self.exact is False:
+            self.digests.setdefault(field, sketches.TDigest(self.compression)).add(values)
+        else:
+            self._merge_sample(field, self._rng.random(values.size), values)
+
+    def _merge_sample(self, field: str, keys: np.ndarray, values: np.ndarray):
+        # Keep the values with the sample_size largest random keys; this is a uniform sample without replacement of
+        # every value seen so far, and merging chunks this way gives the same sample as one pass over the tape.
+        keys = np.concatenate([self._sample_keys.get(field, np.empty(0)), keys])
+        values = np.concatenate([self._sample_values.get(field, np.empty(0)), values])
+        if keys.size > self.sample_size:
+            keep = np.argpartition(keys, keys.size - self.sample_size)[keys.size - self.sample_size:]
+            keys, values = keys[keep], values[keep]
+        self._sample_keys[field] = keys
+        self._sample_values[field] = values
+
+    def _quantile(self, q: float, interpolation: str = 'midpoint') -> pd.Series:
+        if self.exact is False:
+            return pd.Series({field: digest.quantile(q) for field, digest in self.digests.items()}, dtype='float64')
+        return pd.Series({field: np.quantile(sample, q, method=interpolation)
+                          for field, sample in self._sample_values.items()}, dtype='float64')
+
+    def _unique_num(self) -> dict:
+        if self.exact is False:
+            return {field: distinct.count for field, distinct in self.distinct.items()}
+        return {field: np.nan if field_counts is None else len(field_counts)
+                for field, field_counts in self.value_counts.items()}
+
+    def _unique_values_dict(self) -> dict:
+        unique_values = {}
+        unique_num = self._unique_num()
+        for field in self.dtypes:
+            if self.exact is False:
+                field_counts = self.top_values[field].top() if self.top_values[field] is not None and \
+                    unique_num[field] <= self.unique_value_id_threshold else None
+            else:
+                field_counts = self.value_counts[field]
+            if field_counts is None:
+                unique_values[field] = ''
+            elif len(field_counts) > self.max_unique_value_display:
+                top_counts = field_counts.sort_values(ascending=False, kind='stable')
+                unique_values[field] = top_counts.index[:self.max_unique_value_display].tolist()
+            else:
+                unique_values[field] = field_counts.index.to_numpy()
+        return unique_values
+
+    def _base_summary(self) -> dict:
+        fields = list(self.dtypes.keys())
+        count = pd.Series(self.counts, index=fields, dtype='int64')
+        missing = self.rows - count
+        return {'type': pd.Series(self.dtypes, index=fields),
+                'count': count,
+                'missing': missing,
+                'missing_pct': missing / self.rows,
+                'unique_num': pd.Series(self._unique_num(), index=fields),
+                'unique_values': self._unique_values_dict()}
+
+    def summarize_unique_values(self) -> pd.DataFrame:
+        """
+        Same output as summarize_unique_values for the chunks added so far
+        :return: pd.DataFrame with each field as a row and columns with descriptive statistics
+        """
+        summary = self._base_summary()
+        return pd.DataFrame({key: summary[key] for key in ('type', 'count', 'missing', 'missing_pct',
+                                                           'unique_num', 'unique_values')})
+
+    def summarize_tape(self) -> pd.DataFrame:
+        """
+        Same output as summarize_tape for the chunks added so far
+        :return: pd.DataFrame with each field as a row and columns with descriptive statistics
+        """
+        summary = self._base_summary()
+        numeric_count = pd.Series({field: self.counts[field] for field in self.sums}, dtype='float64')
+        return pd.DataFrame({
+            'type': summary['type'],
+            'count': summary['count'],
+            'mean': pd.Series(self.sums, dtype='float64') / numeric_count,
+            'median': self._quantile(0.50, interpolation='linear'),
+            'min': pd.Series(self.mins, dtype='float64'),
+            'quart1': self._quantile(0.25),
+            'quart2': self._quantile(0.50),
+            'quart3': self._quantile(0.75),
+            'max': pd.Series(self.maxs, dtype='float64'),
+            'missing': summary['missing'],
+            'missing_pct': summary['missing_pct'],
+            'unique_num': summary['unique_num'],
+            'unique_values': summary['unique_values']
+        })
+
+
+def profile_tape_files(tape_file_paths: list, header_map: (str, dict) = None,
+                       accumulator: TapeSummaryAccumulator = None, max_workers: int = None,
+                       **kwargs) -> TapeSummaryAccumulator:
+    """
+    Profile several tape files (e.g. the files of a deal, or this month's new files) in a pool of worker processes.
+    Each worker reads its file in chunks with iter_raw_datatape and returns only its fixed size partial profile, which
+    are merged into accumulator.  Pass a saved profile as accumulator to add new files to it without re-reading the
+    files already profiled.
+    :param list tape_file_paths: paths of the tape files
+    :param header_map: path to header map file or dict of raw header name to mapped field name
+    :param TapeSummaryAccumulator accumulator: profile the files are merged into, and whose settings the workers use.
+            Default is a new TapeSummaryAccumulator(exact=False)
+    :param int max_workers: maximum number of worker processes.  Default is the number of files, capped by the number
+            of CPUs.  If 1, the files are profiled in this process
+    :param optional kwargs: same keywords as iter_raw_datatape (chunksize, config_data, cache, ...)
+    :return: TapeSummaryAccumulator
+    """
+    accumulator = TapeSummaryAccumulator(exact=False) if accumulator is None else accumulator
+    if max_workers is None:
+        max_workers = min(len(tape_file_paths), os.cpu_count() or 1)
+    if max_workers <= 1:
+        profiles = [_profile_tape_file(path, header_map, accumulator.empty_copy(), kwargs) for path in tape_file_paths]
+    else:
+        # spawned rather than forked workers, as in strattools.stratify_by_sector
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            profiles = list(executor.map(_profile_tape_file, tape_file_paths, [header_map] * len(tape_file_paths),
+                                         [accumulator.empty_copy() for _ in tape_file_paths],
+                                         [kwargs] * len(tape_file_paths)))
+    for profile in profiles:
+        accumulator.merge(profile)
+    return accumulator
+
+
+def _profile_tape_file(tape_file_path: str, header_map: (str, dict), accumulator: TapeSummaryAccumulator,
+                       kwargs: dict) -> TapeSummaryAccumulator:
+    kwargs = dict(kwargs)
+    chunksize = kwargs.pop('chunksize', 100000)
+    return accumulator.update_all(iter_raw_datatape(tape_file_path, header_map, chunksize=chunksize, **kwargs))
+
+
 def check_required_tape_fields(data_tape: pd.DataFrame, config_data: config.AssetVariableConfig) -> (bool, list):
     """Checks to see if all required fields from a configueration object are contained in the data tape
     :param data_tape: pandas dataframe of data tape
@@ -167,115 +655,706 @@ def check_required_tape_fields(data_tape: pd.DataFrame, config_data: config.Asse
     return not missing_bool, missing_fields
 
 
-def process_to_clean_tape(data_tape, config_data):
+def process_to_clean_tape(data_tape: pd.DataFrame, config_data: config.AssetVariableConfig,
+                          compact_dtypes: bool = False, arrow_backed: bool = False) -> pd.DataFrame:
+    """
+    Converts each configured field in the data tape to its clean type using the column converters in the config.
+    :param pd.DataFrame data_tape: raw data tape with header names already mapped to config field names.  Arrow
+            backed columns and Arrow tapes (pyarrow.Table or arrowtape.SharedTape) are accepted
+    :param config.AssetVariableConfig config_data: configuration object
+    :param bool compact_dtypes: if True, store each field in the narrowest dtype that holds its values (see
+            compact_tape).  Default is False
+    :param bool arrow_backed: if True, the clean tape is stored in Arrow buffers typed from the config (see
+            arrowtape.to_arrow_backed), or in the compact dtypes if compact_dtypes is True.  Default is False
+    :return: pd.DataFrame of clean data, or False if required fields are missing
+    """
+    data_tape = arrowtape.as_dataframe(data_tape)
     if check_required_tape_fields(data_tape, config_data)[0] is True:
-        for variable in config_data:
-            if variable in self.tape_data.columns:
-                self.tape_data[variable] = self.tape_data[variable].apply(self._converter_dict[variable])
+        for variable in config_data.variables:
+            if variable in data_tape.columns:
+                data_tape[variable] = config_data.convert_column(variable, data_tape[variable])
             else:
                 pass
-        return self.tape_data
+        if compact_dtypes is True:
+            data_tape = compact_tape(data_tape, config_data)
+        if arrow_backed is True:
+            data_tape = arrowtape.to_arrow_backed(data_tape, None if compact_dtypes is True else config_data)
+        return data_tape
     else:
         print('Can not process tape without required fields.  Please check tape fields and retry')
         return False
 
 
-def standardize_state(state_string):
-    state_string = state_string.strip().lower()
-    full_name_dict = {'alabama': 'AL', 'alaska': 'AK', 'arizona': 'AZ', 'arkansas': 'AR', 'california': 'CA',
-                        'colorado': 'CO', 'connecticut': 'CT', 'delaware': 'DE', 'florida': 'FL', 'georgia': 'GA',
-                        'hawaii': 'HI', 'idaho': 'ID', 'illinois': 'IL', 'indiana': 'IN', 'iowa': 'IA', 'kansas': 'KS',
-                        'kentucky': 'KY', 'louisiana': 'LA', 'maine': 'ME', 'maryland': 'MD', 'massachusetts': 'MA',
-                        'michigan': 'MI', 'minnesota': 'MN', 'mississippi': 'MS', 'missouri': 'MO', 'montana': 'MT',
-                        'nebraska': 'NE', 'nevada': 'NV', 'new hampshire': 'NH', 'new jersey': 'NJ', 'new mexico': 'NM',
-                        'new york': 'NY', 'north carolina': 'NC', 'north dakota': 'ND', 'ohio': 'OH', 'oklahoma': 'OK',
-                        'oregon': 'OR', 'pennsylvania': 'PA', 'rhode island': 'RI', 'south carolina': 'SC',
-                        'south dakota': 'SD', 'tennessee': 'TN', 'texas': 'TX', 'utah': 'UT', 'vermont': 'VT',
-                        'virginia': 'VA', 'washington': 'WA', 'west virginia': 'WV', 'wisconsin': 'WI',
-                        'wyoming': 'WY', 'district of columbia': 'DC', 'american samoa': 'AS', 'guam': 'GU',
-                        'northern mariana islands': 'MP', 'puerto rico': 'PR', 'united states minor outlying islands': 'UM',
-                        'u.s. virgin islands': 'VI'}
-    abbreviation_dict = {'al': 'AL', 'ak': 'AK', 'az': 'AZ', 'ar': 'AR', 'ca': 'CA', 'co': 'CO', 'ct': 'CT', 'de': 'DE',
-                            'fl': 'FL', 'ga': 'GA', 'hi': 'HI', 'id': 'ID', 'il': 'IL', 'in': 'IN', 'ia': 'IA', 'ks': 'KS',
-                            'ky': 'KY', 'la': 'LA', 'me': 'ME', 'md': 'MD', 'ma': 'MA', 'mi': 'MI', 'mn': 'MN', 'ms': 'MS',
-                            'mo': 'MO', 'mt': 'MT', 'ne': 'NE', 'nv': 'NV', 'nh': 'NH', 'nj': 'NJ', 'nm': 'NM', 'ny': 'NY',
-                            'nc': 'NC', 'nd': 'ND', 'oh': 'OH', 'ok': 'OK', 'or': 'OR', 'pa': 'PA', 'ri': 'RI', 'sc': 'SC',
-                            'sd': 'SD', 'tn': 'TN', 'tx': 'TX', 'ut': 'UT', 'vt': 'VT', 'va': 'VA', 'wa': 'WA', 'wv': 'WV',
-                            'wi': 'WI', 'wy': 'WY', 'dc': 'DC', 'as': 'AS', 'gu': 'GU', 'mp': 'MP', 'pr': 'PR', 'um': 'UM',
-                            'vi': 'VI'}
-    if state_string in full_name_dict.keys():
-        return full_name_dict[state_string]
-    elif state_string in abbreviation_dict.keys():
-        return abbreviation_dict[state_string]
+def compact_tape(data_tape: pd.DataFrame, config_data: config.AssetVariableConfig = None,
+                 category_threshold: float = 0.5) -> pd.DataFrame:
+    """
+    Store a converted tape in compact dtypes: integers in the narrowest nullable integer type of their observed range,
+    floats as float32 where that is exact and low cardinality strings as category.  Missing values are kept as masks
+    (nullable integers) or NaN.  See config.AssetVariableConfig.plan_column_dtype.
+    :param pd.DataFrame data_tape: converted data tape
+    :param config.AssetVariableConfig config_data: if given, only configured fields are planned (see
+            AssetVariableConfig.plan_dtypes), otherwise every column is.  Default is None
+    :param float category_threshold: maximum ratio of distinct values to non-missing values for a string column to be
+            stored as category.  Default is 0.5
+    :return: pd.DataFrame with compact dtypes
+    """
+    if config_data is not None:
+        plan = config_data.plan_dtypes(data_tape, category_threshold)
     else:
-        return state_string.strip().upper()
-
-
-def check_pmt_calculation(stated_pmt, original_rate, original_term, original_balance, pmt_threshold_pct=0.005, pool_threshold_pct=.025):
-    calc_pmt = -np.round(npf.pmt(original_rate, original_term, original_balance), 2)
-    calc_error1 = (np.divide(np.abs(np.multiply(calc_pmt, original_term) - np.multiply(stated_pmt, original_term)), np.multiply(stated_pmt, original_term)))
-    calc_error2 = (np.divide(np.abs(np.multiply(calc_pmt, original_term) - np.multiply(stated_pmt, original_term)), original_balance))
-    count_error1 = np.sum(calc_error1 >= pmt_threshold_pct)
-    count_error2 = np.sum(calc_error2 >= pmt_threshold_pct)
-    pct_error1 = count_error1 / (1 if isinstance(original_balance, (float,int)) else len(original_balance))
-    pct_error2 = count_error2 / (1 if isinstance(original_balance, (float, int)) else len(original_balance))
-    if (calc_error1.any() > pmt_threshold_pct or calc_error2.any() > pmt_threshold_pct) and (
-            pct_error1 > pool_threshold_pct or pct_error2 > pool_threshold_pct):
-        print(f'Payment difference ((pmt_c - pmt_s) * term) / (pmt_s * term) exceeds allowed threshold in {count_error1} instances or {round(pct_error1 * 100, 2)}% of pool')
-        print(f'Balance difference ((pmt_c - pmt_s) * term) / origbal) exceeds allowed threshold in {count_error2} instances or {round(pct_error2 * 100, 2)}% of pool')
-        return (False, pct_error1, pct_error2)
+        plan = {field: config.AssetVariableConfig.plan_column_dtype(data_tape[field], category_threshold)
+                for field in data_tape.columns}
+        plan = {field: dtype for field, dtype in plan.items() if dtype != data_tape[field].dtype}
+    return data_tape.astype(plan) if len(plan) > 0 else data_tape
+
 
+def tape_memory_report(data_tape: pd.DataFrame, compacted_tape: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Memory used by each column of a tape, and of its compacted copy if given.  String memory is counted deeply.
+    :param pd.DataFrame data_tape: data tape
+    :param pd.DataFrame compacted_tape: the same tape in other dtypes (e.g. from compact_tape).  Default is None
+    :return: pd.DataFrame with each field as a row plus a total row, with the dtype and bytes of each tape and, if
+            compacted_tape is given, the ratio of the bytes before to the bytes after
+    """
+    report = pd.DataFrame({'type': data_tape.dtypes.astype(str),
+                           'bytes': data_tape.memory_usage(index=False, deep=True)})
+    if compacted_tape is not None:
+        report['compact_type'] = compacted_tape.dtypes.astype(str)
+        report['compact_bytes'] = compacted_tape.memory_usage(index=False, deep=True)
+    report.loc['total'] = report.sum(numeric_only=True)
+    report.loc['total', report.columns.str.endswith('type')] = ''
+    if compacted_tape is not None:
+        report['ratio'] = report['bytes'] / report['compact_bytes']
+    return report
+
+
+def schedule_buffers(schedules: pd.Series) -> (np.ndarray, np.ndarray):
+    """
+    Values buffer and offsets of a payment schedule column (see config.AssetVariableConfig.read_ramp_to_array_column),
+    in the ragged form of cmutils.dateutils.date_schedule_array and cmutils.bondmath.irr_array: the schedule of row i
+    is values[offsets[i]:offsets[i + 1]], so schedules are sliced without copying.  Arrow list columns of one chunk are
+    returned without copying their numeric buffers.  The buffers of a column of several chunks (e.g. a pd.concat of
+    chunks of a chunked import) and of an object column of arrays are concatenated.
+    :param pd.Series schedules: schedule column
+    :return: tuple of (np.ndarray of values, np.ndarray of int64 offsets).  Null schedules are empty
+    """
+    if isinstance(schedules.dtype, pd.ArrowDtype):
+        cells = pa.array(schedules)
+        chunks = cells.chunks if isinstance(cells, pa.ChunkedArray) else [cells]
+        if len(chunks) == 0:
+            return np.empty(0), np.zeros(1, dtype=np.int64)
+        values = [chunk.values.to_numpy(zero_copy_only=False) for chunk in chunks]
+        offsets = [chunk.offsets.to_numpy(zero_copy_only=False).astype(np.int64, copy=False) for chunk in chunks]
+        if len(chunks) == 1:
+            return values[0], offsets[0]
+        # the offsets of each chunk index its own values, so they are shifted by the values of the chunks before it
+        shifts = np.cumsum([0] + [len(chunk_values) for chunk_values in values[:-1]])
+        return (np.concatenate(values),
+                np.concatenate([offsets[0]] + [chunk_offsets[1:] + shift for chunk_offsets, shift in
+                                               zip(offsets[1:], shifts[1:])]))
+    cells = [np.asarray(cell) for cell in schedules if cell is not None and not isinstance(cell, str)]
+    lengths = schedules.map(lambda cell: 0 if cell is None or isinstance(cell, str) else len(cell)).to_numpy()
+    offsets = np.zeros(len(schedules) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return (np.concatenate(cells) if cells else np.empty(0)), offsets
+
+
+def validate_tape(data_tape, schema=None, config_data: config.AssetVariableConfig = None, asset_class: str = None,
+                  mode: str = 'lazy', sample_size: int = 100000, chunksize: int = 100000,
+                  seed: int = None) -> (pd.DataFrame, pd.DataFrame):
+    """
+    Validate a clean tape against a pandera schema, collecting every failure instead of stopping at the first one, and
+    time each check so the costly checks can be found.
+    mode 'lazy' validates every row.  mode 'sample' validates a uniform random sample of sample_size rows for quick
+    feedback on large tapes.  mode 'chunked' validates an iterable of tape chunks (e.g. cleaned chunks of
+    iter_raw_datatape) one at a time, or a DataFrame in chunks of chunksize rows; checks that compare rows (e.g. unique)
+    only compare rows within a chunk.
+    :param data_tape: clean data tape as a pd.DataFrame, or an iterable of pd.DataFrame chunks in mode 'chunked'
+    :param schema: pandera.DataFrameSchema.  Default is built with config_data.build_tape_schema(asset_class)
+    :param config.AssetVariableConfig config_data: configuration object used when no schema is given
+    :param str asset_class: asset_sector value whose fields are required when the schema is built from config_data
+    :param str mode: 'lazy', 'sample' or 'chunked'.  Default is 'lazy'
+    :param int sample_size: number of rows validated in mode 'sample'.  Default is 100,000
+    :param int chunksize: number of rows per chunk when a DataFrame is validated in mode 'chunked'.  Default is 100,000
+    :param int seed: random seed of the sample in mode 'sample'
+    :return: tuple of (failure cases with columns column, check, failure_case and index (the tape index of the
+            failing value, NaN for checks of a whole column); check timings indexed by (column, check) with columns
+            seconds, rows and failures, slowest first)
+    """
+    if schema is None:
+        if config_data is None:
+            raise ValueError('Either a schema or config_data is required to validate a tape')
+        schema = config_data.build_tape_schema(asset_class)
+    if mode == 'lazy':
+        data_chunks = [data_tape]
+    elif mode == 'sample':
+        data_chunks = [data_tape.sample(n=min(sample_size, data_tape.shape[0]), random_state=seed)]
+    elif mode == 'chunked':
+        data_chunks = ([data_tape.iloc[i:i + chunksize] for i in range(0, data_tape.shape[0], chunksize)]
+                       if isinstance(data_tape, pd.DataFrame) else data_tape)
     else:
-        return (True, pct_error1, pct_error2)
-
-
-def check_term_consistency(original_term, promo_term, io_term, amort_term, loan_age, remaining_term, balloon_flag, pool_threshold_pct=.025):
-    age_error = np.sum(original_term, -loan_age, -remaining_term)
-    term_sum_error = np.sum(original_term, -promo_term, -io_term, -amort_term) if balloon_flag in (None, False) else 0
-    balloon_error = np.sum( original_term, -promo_term, -io_term, -amort_term) if (balloon_flag is True and np.sum(promo_term, io_term, amort_term) < original_term) else 0
-    count_age_error = np.sum(age_error != 0)
-    count_term_sum_error = np.sum(term_sum_error != 0)
-    count_balloon_error = np.sum(balloon_error != 0)
-    pct_age_error = count_age_error / (1 if isinstance(original_term, (float, int)) else len(original_term))
-    pct_term_sum_error = count_term_sum_error / (1 if isinstance(original_term, (float, int)) else len(original_term))
-    pct_balloon_error = count_balloon_error / (1 if isinstance(original_term, (float, int)) else len(original_term))
-    if (age_error.any() != 0 or term_sum_error.any() != 0 or balloon_error.any() != 0) and (
-            pct_age_error > pool_threshold_pct or pct_term_sum_error > pool_threshold_pct or pct_balloon_error > pool_threshold_pct):
-        print(f'Original term minus loan age minus remaining term does not equal zero in {count_age_error} instances or {round(pct_age_error * 100, 2)}% of pool')
-        print(f'Original term minus promo term minus IO term minus amort term does not equal zero in {count_term_sum_error} instances or {round(pct_term_sum_error * 100, 2)}% of pool')
-        print(f'Original term minus promo term minus IO term minus amort term does not equal zero in {count_balloon_error} instances or {round(pct_balloon_error * 100, 2)}% of pool')
-        return (False, pct_age_error, pct_term_sum_error, pct_balloon_error)
-
-
-
-
-def check_orig_term_and_dates(original_term, origination_date, first_payment_date, maturity_date, diff_type, pool_threshold_pct=.025):
-    calc_orig_term = datetime.diff(maturity_date, origination_date, diff_type)
-    calc_pmt_term = datetime.diff(maturity_date, first_payment_date)
-    if calc_orig_term == original_term or calc_pmt_term == original term: 
-        return True
-    else: 
-        return (False, {'stated_term': original_term, 'calc_term_orig': calc_orig_term, 'calc_term_pmt': calc_pmt_term})
-
-def check_rem_term_and_dates(remaining_term, origination_date, first_payment_date, maturity_date, cutoff_date, pool_threshold_pct=.025):
-    a = datetime.diff(first_payment_date, origination_date)
-    b = datetime.diff(maturity_date, origination_date)
-    c = datetime.diff(maturity_date, first_payment_date)
-    return(a, b, c)
-
-
-#NOT COMPLETE
-
-def check_doc_types(documentation_type, income_type, asset_type, employment_type, pool_threshold_pct=.025):
-    pass
-
-
-def standardize_doctypes(documentation_type, income_type, asset_type, employment_type):
-    doc_type_dict = {'full': ('verified', 'verified', 'verified'),
-                     'alt_doc': ('alt_doc', 'alt_doc', 'verbal'),
-                     'siva': ('stated', 'verified', 'verbal'),
-                     'sisa': ('stated', 'stated', 'verbal'),
-                     'nina': ('none', 'none', 'verbal'),
-                     'no_doc': ('none', 'none', 'none')
-                     }
-    if documentation_type in doc_type_dict.keys():
+        raise ValueError(f"mode must be 'lazy', 'sample' or 'chunked', not {mode}")
+    failures = []
+    timings = {}
+    missing_columns = set()
+    for data_chunk in data_chunks:
+        _validate_tape_chunk(data_chunk, schema, failures, timings, missing_columns)
+    failure_cases = pd.concat(failures, ignore_index=True) if len(failures) > 0 else \
+        pd.DataFrame(columns=['column', 'check', 'failure_case', 'index'])
+    check_timings = pd.DataFrame.from_dict(timings, orient='index', columns=['seconds', 'rows', 'failures'])
+    check_timings.index = pd.MultiIndex.from_tuples(check_timings.index, names=['column', 'check'])
+    return failure_cases, check_timings.sort_values('seconds', ascending=False)
+
+
+def _validate_tape_chunk(data_chunk: pd.DataFrame, schema, failures: list, timings: dict, missing_columns: set):
+    """
+    Helper function to run every check of a schema on one tape chunk, adding failure cases to failures and the time,
+    rows and failures of each check to timings
+    """
+    def run_check(column_name, check, check_object):
+        start = time.perf_counter()
+        result = check(check_object)
+        elapsed = time.perf_counter() - start
+        if result.failure_cases is not None:
+            failure_cases = pd.DataFrame({'column': column_name, 'check': check.name,
+                                          'failure_case': result.failure_cases.to_numpy(dtype=object),
+                                          'index': result.failure_cases.index})
+        elif not bool(result.check_passed):
+            failure_cases = pd.DataFrame({'column': [column_name], 'check': check.name,
+                                          'failure_case': str(getattr(check_object, 'dtype', None)),
+                                          'index': np.nan})
+        else:
+            failure_cases = None
+        if failure_cases is not None and failure_cases.shape[0] > 0:
+            failures.append(failure_cases)
+        check_timing = timings.setdefault((column_name, check.name), [0.0, 0, 0])
+        check_timing[0] += elapsed
+        check_timing[1] += data_chunk.shape[0]
+        check_timing[2] += 0 if failure_cases is None else failure_cases.shape[0]
+
+    for column_name, column in schema.columns.items():
+        if column_name not in data_chunk.columns:
+            if column.required and column_name not in missing_columns:
+                missing_columns.add(column_name)
+                failures.append(pd.DataFrame({'column': [column_name], 'check': 'column_in_dataframe',
+                                              'failure_case': column_name, 'index': np.nan}))
+            continue
+        for check in column.checks:
+            run_check(column_name, check, data_chunk[column_name])
+    for check in schema.checks:
+        run_check(None, check, data_chunk)
+
+
+class LookupNormalizer:
+    """
+    Normalizer of the free text values of a field (e.g. state names, doc types or flags) to standard values.  The
+    lookup table is compiled once, with every key cleaned the same way values are (lower case, '_' and '-' as spaces,
+    repeated spaces removed).  A column is normalized through its distinct values: the column is factorized, each
+    distinct value is looked up once and the results are mapped back to the rows by the factor codes, so the cost
+    grows with the number of distinct values rather than the number of loans.
+    """
+
+    def __init__(self, lookup: dict, fallback=None, missing=None, dtype=None):
+        """
+        :param dict lookup: dict of raw value to standard value
+        :param fallback: function of the raw value as a str, used for values that are not in lookup.  Default is None
+                for missing
+        :param missing: value returned for missing values (None, NaN and null strings such as 'n/a' that are not in
+                lookup).  Default is None
+        :param dtype: dtype of normalized columns.  Default is None for object
+        """
+        self.lookup = {LookupNormalizer.clean(key): value for key, value in lookup.items()}
+        self.fallback = fallback
+        self.missing = missing
+        self.dtype = dtype
+
+    @staticmethod
+    def clean(value) -> str:
+        return ' '.join(str(value).strip().lower().replace('_', ' ').replace('-', ' ').split())
+
+    def normalize_value(self, value):
+        """
+        Normalize one value
+        :param value: raw value
+        :return: standard value
+        """
+        if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NA:
+            return self.missing
+        cleaned = LookupNormalizer.clean(value)
+        if cleaned in self.lookup:
+            return self.lookup[cleaned]
+        elif cleaned in config.AssetVariableConfig._null_strings:
+            return self.missing
+        elif self.fallback is not None:
+            return self.fallback(str(value))
+        else:
+            return self.missing
+
+    def normalize(self, values, as_category: bool = False) -> pd.Series:
+        """
+        Normalize a column
+        :param values: pandas Series or array like of raw values
+        :param bool as_category: if True, return a category column.  Default is False
+        :return: pandas Series with the index and name of values
+        """
+        series = values if isinstance(values, pd.Series) else pd.Series(values)
+        codes, uniques = pd.factorize(series)
+        normalized = np.empty(len(uniques) + 1, dtype=object)
+        normalized[:-1] = [self.normalize_value(value) for value in np.asarray(uniques, dtype=object)]
+        normalized[-1] = self.missing
+        if as_category is True:
+            # distinct raw values can share a standard value, so the categories are factorized again
+            value_codes, categories = pd.factorize(normalized, sort=True)
+            result = pd.Categorical.from_codes(value_codes[codes], categories)
+        else:
+            result = normalized[codes]
+        result = pd.Series(result, index=series.index, name=series.name)
+        return result if self.dtype is None or as_category is True else result.astype(self.dtype)
+
+    __call__ = normalize
+
+
+_state_names = {'alabama': 'AL', 'alaska': 'AK', 'arizona': 'AZ', 'arkansas': 'AR', 'california': 'CA',
+                'colorado': 'CO', 'connecticut': 'CT', 'delaware': 'DE', 'florida': 'FL', 'georgia': 'GA',
+                'hawaii': 'HI', 'idaho': 'ID', 'illinois': 'IL', 'indiana': 'IN', 'iowa': 'IA', 'kansas': 'KS',
+                'kentucky': 'KY', 'louisiana': 'LA', 'maine': 'ME', 'maryland': 'MD', 'massachusetts': 'MA',
+                'michigan': 'MI', 'minnesota': 'MN', 'mississippi': 'MS', 'missouri': 'MO', 'montana': 'MT',
+                'nebraska': 'NE', 'nevada': 'NV', 'new hampshire': 'NH', 'new jersey': 'NJ', 'new mexico': 'NM',
+                'new york': 'NY', 'north carolina': 'NC', 'north dakota': 'ND', 'ohio': 'OH', 'oklahoma': 'OK',
+                'oregon': 'OR', 'pennsylvania': 'PA', 'rhode island': 'RI', 'south carolina': 'SC',
+                'south dakota': 'SD', 'tennessee': 'TN', 'texas': 'TX', 'utah': 'UT', 'vermont': 'VT',
+                'virginia': 'VA', 'washington': 'WA', 'west virginia': 'WV', 'wisconsin': 'WI',
+                'wyoming': 'WY', 'district of columbia': 'DC', 'american samoa': 'AS', 'guam': 'GU',
+                'northern mariana islands': 'MP', 'puerto rico': 'PR', 'united states minor outlying islands': 'UM',
+                'u.s. virgin islands': 'VI'}
+
+# State names and codes (in any case) to state codes.  Other values are upper cased.
+state_normalizer = LookupNormalizer({**_state_names, **{code: code for code in _state_names.values()}},
+                                    fallback=lambda text: text.strip().upper())
+
+# Income, asset and employment verification implied by each documentation type
+_doc_type_dict = {'full': ('verified', 'verified', 'verified'),
+                  'alt_doc': ('alt_doc', 'alt_doc', 'verbal'),
+                  'siva': ('stated', 'verified', 'verbal'),
+                  'sisa': ('stated', 'stated', 'verbal'),
+                  'nina': ('none', 'none', 'verbal'),
+                  'no_doc': ('none', 'none', 'none')}
+
+
+# Documentation type implied by income, asset and employment verification, or by income and asset verification
+_doc_type_by_verification = {**{verification: doc_type for doc_type, verification in _doc_type_dict.items()},
+                             **{verification[:2]: doc_type for doc_type, verification in _doc_type_dict.items()}}
+
+# Documentation type descriptions to the doc types of _doc_type_dict.  Other values are lower cased.
+doc_type_normalizer = LookupNormalizer(
+    {**{doc_type: doc_type for doc_type in _doc_type_dict.keys()},
+     'full doc': 'full', 'fulldoc': 'full', 'full documentation': 'full', 'verified': 'full',
+     'alt': 'alt_doc', 'alternative': 'alt_doc', 'alternative documentation': 'alt_doc', 'alt documentation': 'alt_doc',
+     'low': 'alt_doc', 'low doc': 'alt_doc', 'limited': 'alt_doc', 'limited documentation': 'alt_doc',
+     'stated income verified assets': 'siva', 'stated income stated assets': 'sisa', 'stated': 'sisa',
+     'stated doc': 'sisa', 'no income no assets': 'nina', 'no income no asset': 'nina', 'no ratio': 'nina',
+     'no documentation': 'no_doc', 'nodoc': 'no_doc', 'no doc': 'no_doc', 'none': 'no_doc'},
+    fallback=LookupNormalizer.clean)
+
+# Income, asset and employment verification descriptions to the verification types of _doc_type_dict
+verification_normalizer = LookupNormalizer(
+    {'verified': 'verified', 'verify': 'verified', 'full': 'verified', 'documented': 'verified', 'alt doc': 'alt_doc',
+     'alternative': 'alt_doc', 'stated': 'stated', 'verbal': 'verbal', 'verbal verification': 'verbal',
+     'none': 'none', 'not verified': 'none', 'unverified': 'none', 'no': 'none'},
+    fallback=LookupNormalizer.clean)
+
+# Yes / no flag text to booleans, using the bool tokens of the config converters.  Other values are missing.
+flag_normalizer = LookupNormalizer({**{text: True for text in config.AssetVariableConfig._true_strings},
+                                    **{text: False for text in config.AssetVariableConfig._false_strings}},
+                                   dtype='boolean')
+
+
+def _parse_product_code(text: str) -> str:
+    """
+    Helper function to parse a loan product description into a product code: fixed_<years>, arm_<initial years>_<reset
+    years>, balloon_<years>_<amortization years> or heloc, with an _io suffix for interest only products.  Other
+    descriptions are cleaned and joined by '_'.
+    """
+    cleaned = LookupNormalizer.clean(text)
+    interest_only = re.search(r'\b(io|i/o|interest only)\b', cleaned) is not None
+    hybrid = re.search(r'(\d+)\s*/\s*(\d+)', cleaned)
+    years = re.search(r'(\d+)\s*(yr|yrs|year|years|y)\b', cleaned) or re.search(r'(?:frm|fixed|fix)\s*(\d+)', cleaned) \
+        or re.search(r'(\d+)\s*(?:frm|fixed|fix)', cleaned)
+    if 'heloc' in cleaned or 'home equity line' in cleaned:
+        code = 'heloc'
+    elif 'balloon' in cleaned and hybrid is not None:
+        code = f'balloon_{hybrid.group(1)}_{hybrid.group(2)}'
+    elif 'balloon' in cleaned and years is not None:
+        code = f'balloon_{years.group(1)}'
+    elif hybrid is not None and ('arm' in cleaned or 'adjustable' in cleaned or 'hybrid' in cleaned or
+                                 re.fullmatch(r'[\d\s/]+(io|i/o)?', cleaned) is not None):
+        code = f'arm_{hybrid.group(1)}_{hybrid.group(2)}'
+    elif re.search(r'\b(arm|adjustable)\b', cleaned) is not None:
+        code = 'arm'
+    elif years is not None and re.search(r'\b(arm|adjustable|balloon)\b', cleaned) is None:
+        code = f'fixed_{years.group(1)}'
+    else:
+        return re.sub(r'[^a-z0-9/]+', '_', cleaned).strip('_')
+    return code + '_io' if interest_only else code
+
+
+# Loan product descriptions (e.g. '30 Yr Fixed', 'FRM30', '5/1 ARM IO') to product codes, see _parse_product_code
+product_normalizer = LookupNormalizer({}, fallback=_parse_product_code)
+
+# Normalizer of each config field that normalize_tape_fields standardizes by default
+field_normalizers = {'prop_state': state_normalizer, 'asset_state': state_normalizer,
+                     'uw_borrwer2_state': state_normalizer, 'uw_doctype': doc_type_normalizer,
+                     'asset_product': product_normalizer}
+
+
+def normalize_tape_fields(data_tape: pd.DataFrame, normalizers: dict = None, as_category: bool = False) -> pd.DataFrame:
+    """
+    Standardize the free text fields of a tape (states, doc types, product codes, flags) in place
+    :param pd.DataFrame data_tape: data tape
+    :param dict normalizers: dict of field name to LookupNormalizer.  Default is field_normalizers
+    :param bool as_category: if True, store the normalized fields as category.  Default is False
+    :return: pd.DataFrame data_tape
+    """
+    for field, normalizer in (field_normalizers if normalizers is None else normalizers).items():
+        if field in data_tape.columns:
+            data_tape[field] = normalizer.normalize(data_tape[field], as_category)
+    return data_tape
+
+
+def standardize_state(state_string):
+    """
+    Standardize a state name or code to its two letter code (see state_normalizer and, for columns,
+    standardize_state_array)
+    """
+    return state_normalizer.normalize_value(state_string)
+
+
+def standardize_state_array(values, as_category: bool = False) -> pd.Series:
+    """
+    Column version of standardize_state
+    :param values: pandas Series or array like of state names or codes
+    :param bool as_category: if True, return a category column.  Default is False
+    :return: pandas Series of two letter state codes
+    """
+    return state_normalizer.normalize(values, as_category)
+
+
+class IntegrityRule:
+    """
+    Declarative tape integrity rule.  check is a vectorized function that takes a dict of field name to column array
+    (floats with NaN, datetime64[D] with NaT, or lower case str with None) and the keyword arguments of
+    check_tape_integrity, and returns (boolean array of failed loans, array of the value reported for each loan).
+    Loans missing any of the rule's fields are not evaluated; optional_fields are passed as None when not in the tape.
+    """
+
+    def __init__(self, name: str, fields: tuple, check, description: str, optional_fields: tuple = ()):
+        self.name = name
+        self.fields = fields
+        self.check = check
+        self.description = description
+        self.optional_fields = optional_fields
+
+
+def _months_between(start_dates: np.ndarray, end_dates: np.ndarray) -> np.ndarray:
+    months = end_dates.astype('datetime64[M]').astype(np.float64) - start_dates.astype('datetime64[M]').astype(np.float64)
+    return np.where(np.isnat(start_dates) | np.isnat(end_dates), np.nan, months)
+
+
+def _rule_pmt_calculation(columns: dict, pmt_threshold_pct: float = 0.005, **kwargs) -> tuple:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        calc_pmt = -npf.pmt(columns['rate_curr'] / 1200.0, columns['term_rem'], columns['bal_curr'])
+        error = np.abs(calc_pmt - columns['pmt_curr']) / columns['pmt_curr']
+    return ~(error < pmt_threshold_pct), error
+
+
+def _rule_term_age(columns: dict, **kwargs) -> tuple:
+    difference = columns['term_orig'] - columns['term_age'] - columns['term_rem']
+    return difference != 0, difference
+
+
+def _rule_term_structure(columns: dict, **kwargs) -> tuple:
+    # promo + io + amort terms must equal the original term, or exceed it for balloon loans
+    difference = columns['term_promo'] + columns['term_io'] + columns['term_amort'] - columns['term_orig']
+    balloon = np.zeros(difference.shape, dtype=bool) if columns.get('flag_balloon') is None \
+        else columns['flag_balloon'] == 1
+    return (difference < 0) | ((difference > 0) & ~balloon), difference
+
+
+def _rule_orig_term_dates(columns: dict, **kwargs) -> tuple:
+    # term_orig runs from the first payment date through the maturity date; some tapes count from origination instead
+    firstpay_term = _months_between(columns['pmt_date_firstpay'], columns['term_matdate']) + 1
+    origdate_term = _months_between(columns['term_origdate'], columns['term_matdate'])
+    return (firstpay_term != columns['term_orig']) & (origdate_term != columns['term_orig']), \
+        firstpay_term - columns['term_orig']
+
+
+def _rule_rem_term_dates(columns: dict, rem_term_tolerance: int = 1, **kwargs) -> tuple:
+    difference = _months_between(columns['cutoffdate'], columns['term_matdate']) - columns['term_rem']
+    return np.abs(difference) > rem_term_tolerance, difference
+
+
+def _rule_date_order(columns: dict, **kwargs) -> tuple:
+    origdate, firstpay, matdate = columns['term_origdate'], columns['pmt_date_firstpay'], columns['term_matdate']
+    failed = (firstpay < origdate) | (matdate < firstpay)
+    if columns.get('cutoffdate') is not None:
+        failed |= matdate < columns['cutoffdate']
+    return failed, _months_between(origdate, matdate)
+
+
+def _rule_doc_income(columns: dict, **kwargs) -> tuple:
+    # loans documented with verified income must report it, and loans without income verification must not
+    doc_types = doc_type_normalizer.normalize(columns['uw_doctype'])
+    income_type = doc_types.map({doc_type: verification[0] for doc_type, verification in _doc_type_dict.items()})
+    verified_income = columns['uw_inc_verify']
+    failed = ((income_type == 'verified').to_numpy() & ~(verified_income > 0)) | \
+        (income_type.isin(('stated', 'none')).to_numpy() & (verified_income > 0))
+    return failed, verified_income
+
+
+integrity_rules = {
+    'pmt_calculation': IntegrityRule('pmt_calculation', ('pmt_curr', 'rate_curr', 'term_rem', 'bal_curr'),
+                                     _rule_pmt_calculation,
+                                     'Payment recalculated from bal_curr, rate_curr and term_rem differs from pmt_curr '
+                                     'by pmt_threshold_pct or more (value is the relative difference)'),
+    'term_age': IntegrityRule('term_age', ('term_orig', 'term_age', 'term_rem'), _rule_term_age,
+                              'term_orig - term_age - term_rem is not zero (value is the difference)'),
+    'term_structure': IntegrityRule('term_structure', ('term_orig', 'term_promo', 'term_io', 'term_amort'),
+                                    _rule_term_structure,
+                                    'term_promo + term_io + term_amort is less than term_orig, or more than term_orig '
+                                    'for a loan that is not a balloon (value is the difference)',
+                                    optional_fields=('flag_balloon',)),
+    'orig_term_dates': IntegrityRule('orig_term_dates', ('term_orig', 'term_origdate', 'pmt_date_firstpay',
+                                                         'term_matdate'), _rule_orig_term_dates,
+                                     'term_orig does not match the months from pmt_date_firstpay or term_origdate to '
+                                     'term_matdate (value is the difference from the first payment date)'),
+    'rem_term_dates': IntegrityRule('rem_term_dates', ('term_rem', 'cutoffdate', 'term_matdate'), _rule_rem_term_dates,
+                                    'term_rem differs from the months from cutoffdate to term_matdate by more than '
+                                    'rem_term_tolerance (value is the difference)'),
+    'date_order': IntegrityRule('date_order', ('term_origdate', 'pmt_date_firstpay', 'term_matdate'), _rule_date_order,
+                                'Dates are out of order: term_origdate <= pmt_date_firstpay <= term_matdate and '
+                                'cutoffdate <= term_matdate (value is the months from origination to maturity)',
+                                optional_fields=('cutoffdate',)),
+    'doc_income': IntegrityRule('doc_income', ('uw_doctype', 'uw_inc_verify'), _rule_doc_income,
+                                'Verified income is missing for a verified income documentation type, or present for '
+                                'a stated or no income documentation type (value is uw_inc_verify)'),
+}
+
+
+def _integrity_column(values: pd.Series) -> (np.ndarray, np.ndarray):
+    """
+    Helper function to convert a tape column once for every integrity rule
+    :return: (array of floats, datetime64[D] or lower case str, boolean array of missing values)
+    """
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        column = values.to_numpy(dtype='datetime64[D]')
+        return column, np.isnat(column)
+    elif pd.api.types.is_numeric_dtype(values.dtype):
+        column = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        return column, np.isnan(column)
+    missing = values.isna().to_numpy()
+    if values.dropna().map(lambda value: isinstance(value, (dt.date, np.datetime64))).all() and not missing.all():
+        column = pd.to_datetime(values, errors='coerce').to_numpy(dtype='datetime64[D]')
+        return column, np.isnat(column)
+    column = values.astype(str).str.strip().str.lower().to_numpy(dtype=object)
+    column[missing] = None
+    return column, missing
+
+
+def check_tape_integrity(data_tape: pd.DataFrame, rules: (list, dict) = None, pool_threshold_pct: float = .025,
+                         **kwargs) -> (pd.DataFrame, pd.DataFrame):
+    """
+    Run integrity rules as vectorized column expressions over the whole tape.  Each field is converted to an array
+    once and shared by every rule, so adding a rule does not add another pass over the tape.  Rules whose fields are
+    not in the tape are skipped.
+    :param pd.DataFrame data_tape: clean data tape
+    :param rules: list of rule names from integrity_rules, or dict of name to IntegrityRule.  Default is every rule in
+            integrity_rules
+    :param float pool_threshold_pct: share of evaluated loans that may fail a rule before the pool fails it
+    :param optional kwargs: rule parameters
+        :keyword float pmt_threshold_pct: relative payment difference at which pmt_calculation fails.  Default is 0.005
+        :keyword int rem_term_tolerance: months term_rem may differ from the dates in rem_term_dates.  Default is 1
+    :return: tuple of (loan level exceptions: one row per failed rule and loan, indexed by the tape index, with
+            columns rule, value and description; pool level results indexed by rule with columns evaluated, failed,
+            failed_pct and passed)
+    """
+    if rules is None:
+        rules = integrity_rules
+    elif not isinstance(rules, dict):
+        rules = {name: integrity_rules[name] for name in rules}
+    columns = {}
+    missing = {}
+    exceptions = []
+    pool_results = {}
+    for name, rule in rules.items():
+        if any(field not in data_tape.columns for field in rule.fields):
+            continue
+        for field in rule.fields + rule.optional_fields:
+            if field not in columns and field in data_tape.columns:
+                columns[field], missing[field] = _integrity_column(data_tape[field])
+        evaluated = ~np.logical_or.reduce([missing[field] for field in rule.fields])
+        failed, values = rule.check({field: columns.get(field) for field in rule.fields + rule.optional_fields},
+                                    **kwargs)
+        failed = np.asarray(failed, dtype=bool) & evaluated
+        evaluated_count = int(evaluated.sum())
+        failed_count = int(failed.sum())
+        failed_pct = failed_count / evaluated_count if evaluated_count > 0 else np.nan
+        pool_results[name] = {'evaluated': evaluated_count, 'failed': failed_count, 'failed_pct': failed_pct,
+                              'passed': not failed_pct > pool_threshold_pct}
+        if failed_count > 0:
+            exceptions.append(pd.DataFrame({'rule': name, 'value': np.asarray(values)[failed],
+                                            'description': rule.description}, index=data_tape.index[failed]))
+    exception_columns = {'rule': pd.Series(dtype=object), 'value': pd.Series(dtype=object),
+                         'description': pd.Series(dtype=object)}
+    exceptions = pd.concat(exceptions) if len(exceptions) > 0 else pd.DataFrame(exception_columns,
+                                                                                index=data_tape.index[:0])
+    pool_results = pd.DataFrame.from_dict(pool_results, orient='index',
+                                          columns=['evaluated', 'failed', 'failed_pct', 'passed'])
+    return exceptions, pool_results
+
+
+def _check_arrays(rule_name: str, arrays: dict, pool_threshold_pct: float, **kwargs) -> (bool, float):
+    """
+    Helper function to run one integrity rule on arrays or scalars (see check_tape_integrity)
+    :return: (True if the pool passes the rule, share of evaluated loans that failed)
+    """
+    arrays = {field: np.asarray(values) for field, values in arrays.items() if values is not None}
+    data_tape = pd.DataFrame(dict(zip(arrays.keys(), np.broadcast_arrays(*map(np.atleast_1d, arrays.values())))))
+    pool_results = check_tape_integrity(data_tape, [rule_name], pool_threshold_pct, **kwargs)[1]
+    return bool(pool_results.loc[rule_name, 'passed']), float(pool_results.loc[rule_name, 'failed_pct'])
+
+
+# Months in each unit of term accepted by check_orig_term_and_dates
+_term_units = {'months': 1, 'years': 12}
+
+
+def check_pmt_calculation(stated_pmt, original_rate, original_term, original_balance, pmt_threshold_pct=0.005,
+                          pool_threshold_pct=.025):
+    """
+    Array version of the pmt_calculation integrity rule (see check_tape_integrity) on the original loan terms.  The
+    rule takes annual rates in percent; original_rate is the periodic decimal rate passed to npf.pmt.
+    :param stated_pmt: stated payment
+    :param original_rate: periodic interest rate as a decimal, e.g. 0.005 for 6% a year paid monthly
+    :param original_term: number of payments
+    :param original_balance: original balance
+    :param float pmt_threshold_pct: relative difference at which a loan fails.  Default is 0.5%
+    :param float pool_threshold_pct: share of failing loans at which the pool fails.  Default is 2.5%
+    :return: (True if the pool passes, share of loans whose payment differs from the calculated payment by
+            pmt_threshold_pct of the stated payment or more, share of loans whose payments over the term differ by
+            pmt_threshold_pct of the original balance or more)
+    """
+    passed, pmt_error_pct = _check_arrays('pmt_calculation', {'pmt_curr': stated_pmt,
+                                                              'rate_curr': np.multiply(original_rate, 1200.0),
+                                                              'term_rem': original_term, 'bal_curr': original_balance},
+                                          pool_threshold_pct, pmt_threshold_pct=pmt_threshold_pct)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        calc_pmt = -npf.pmt(np.asarray(original_rate, dtype=float), original_term, original_balance)
+        balance_error = np.atleast_1d(np.abs(calc_pmt - stated_pmt) * original_term / original_balance)
+    evaluated = ~np.isnan(balance_error)
+    balance_error_pct = float(np.mean(balance_error[evaluated] >= pmt_threshold_pct)) if evaluated.any() else 0.0
+    return passed and not balance_error_pct > pool_threshold_pct, pmt_error_pct, balance_error_pct
+
+
+def check_term_consistency(original_term, promo_term, io_term, amort_term, loan_age, remaining_term, balloon_flag,
+                           pool_threshold_pct=.025):
+    """
+    Array version of the term_age and term_structure integrity rules (see check_tape_integrity)
+    :return: (True if the pool passes both rules, share of loans failing term_age, share failing term_structure)
+    """
+    age_passed, age_pct = _check_arrays('term_age', {'term_orig': original_term, 'term_age': loan_age,
+                                                     'term_rem': remaining_term}, pool_threshold_pct)
+    structure_passed, structure_pct = _check_arrays(
+        'term_structure', {'term_orig': original_term, 'term_promo': promo_term, 'term_io': io_term,
+                           'term_amort': amort_term,
+                           'flag_balloon': None if balloon_flag is None else np.asarray(balloon_flag, dtype=float)},
+        pool_threshold_pct)
+    return age_passed and structure_passed, age_pct, structure_pct
+
+
+def check_orig_term_and_dates(original_term, origination_date, first_payment_date, maturity_date, diff_type='months',
+                              pool_threshold_pct=.025):
+    """
+    Array version of the orig_term_dates integrity rule (see check_tape_integrity)
+    :param str diff_type: unit of original_term, 'months' or 'years'.  Default is 'months'
+    :return: (True if the pool passes, share of loans whose term does not match their dates)
+    :exception ValueError: if diff_type is not a supported unit
+    """
+    if diff_type not in _term_units.keys():
+        raise ValueError(f'diff_type must be one of {list(_term_units.keys())}')
+    return _check_arrays('orig_term_dates', {'term_orig': np.multiply(original_term, _term_units[diff_type]),
+                                             'term_origdate': pd.to_datetime(np.atleast_1d(origination_date)),
+                                             'pmt_date_firstpay': pd.to_datetime(np.atleast_1d(first_payment_date)),
+                                             'term_matdate': pd.to_datetime(np.atleast_1d(maturity_date))},
+                         pool_threshold_pct)
+
+
+def check_rem_term_and_dates(remaining_term, origination_date, first_payment_date, maturity_date, cutoff_date,
+                             pool_threshold_pct=.025):
+    """
+    Array version of the rem_term_dates integrity rule (see check_tape_integrity).  The remaining term is checked
+    against the months from the cutoff date to the maturity date; origination_date and first_payment_date are not used
+    by the rule.
+    :return: (True if the pool passes, share of loans whose remaining term does not match their dates)
+    """
+    return _check_arrays('rem_term_dates', {'term_rem': remaining_term,
+                                            'term_matdate': pd.to_datetime(np.atleast_1d(maturity_date)),
+                                            'cutoffdate': pd.to_datetime(np.atleast_1d(cutoff_date))},
+                         pool_threshold_pct)
+
+
+def check_doc_types(documentation_type, verified_income, pool_threshold_pct=.025):
+    """
+    Array version of the doc_income integrity rule (see check_tape_integrity)
+    :return: (True if the pool passes, share of loans whose verified income does not match their documentation type)
+    """
+    return _check_arrays('doc_income', {'uw_doctype': np.atleast_1d(documentation_type).astype(object),
+                                        'uw_inc_verify': verified_income}, pool_threshold_pct)
+
+
+def standardize_doctypes(documentation_type, income_type=None, asset_type=None, employment_type=None) -> tuple:
+    """
+    Standardize a loan's documentation type and its income, asset and employment verification.  A known documentation
+    type sets the verification types; otherwise the documentation type is inferred from the given verification types
+    (e.g. stated income with verified assets is siva).
+    :param documentation_type: documentation type text, e.g. 'Full Doc' or 'SIVA'
+    :param income_type: income verification text, e.g. 'Verified' or 'Stated'
+    :param asset_type: asset verification text
+    :param employment_type: employment verification text
+    :return: tuple of (doc type, income, asset, employment verification); the doc type is None if it is unknown and
+            can not be inferred
+    """
+    doc_type = doc_type_normalizer.normalize_value(documentation_type)
+    if doc_type in _doc_type_dict.keys():
+        return (doc_type,) + _doc_type_dict[doc_type]
+    verification = tuple(verification_normalizer.normalize_value(value)
+                         for value in (income_type, asset_type, employment_type))
+    return (_doc_type_by_verification.get(verification, _doc_type_by_verification.get(verification[:2])),) + \
+        verification
+
+
+def standardize_doctypes_array(documentation_type, income_type=None, asset_type=None,
+                               employment_type=None) -> pd.DataFrame:
+    """
+    Column version of standardize_doctypes.  Each distinct combination of the four columns is standardized once.
+    :param documentation_type: pandas Series or array like of documentation types
+    :param income_type: pandas Series or array like of income verification types.  Default is None
+    :param asset_type: pandas Series or array like of asset verification types.  Default is None
+    :param employment_type: pandas Series or array like of employment verification types.  Default is None
+    :return: pd.DataFrame with columns uw_doctype, income_verify, asset_verify and employment_verify
+    """
+    documentation_type = documentation_type if isinstance(documentation_type, pd.Series) else \
+        pd.Series(documentation_type)
+    columns = [documentation_type] + [pd.Series(None, index=documentation_type.index, dtype=object) if values is None
+                                      else pd.Series(np.asarray(values, dtype=object), index=documentation_type.index)
+                                      for values in (income_type, asset_type, employment_type)]
+    # factorize each column, then the combined codes, so only the distinct combinations reach Python
+    column_codes, column_uniques = zip(*(pd.factorize(column.astype(object)) for column in columns))
+    key = np.zeros(len(documentation_type), dtype=np.int64)
+    for codes, uniques in zip(column_codes, column_uniques):
+        key = key * (len(uniques) + 1) + codes + 1
+    codes, keys = pd.factorize(key)
+    first_rows = np.empty(keys.size, dtype=np.intp)
+    first_rows[codes[::-1]] = np.arange(codes.size)[::-1]
+    combinations = zip(*([None if code < 0 else uniques[code] for code in column[first_rows]]
+                         for column, uniques in zip(column_codes, column_uniques)))
+    standardized = pd.DataFrame([standardize_doctypes(*combination) for combination in combinations],
+                                columns=['uw_doctype', 'income_verify', 'asset_verify', 'employment_verify'])
+    return standardized.iloc[codes].set_axis(documentation_type.index)
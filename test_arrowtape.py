@@ -0,0 +1,147 @@
+import unittest
+import os
+import csv
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import arrowtape
+import tapetools
+import strattools
+
+
+class TestArrowTape(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        config_path = os.path.join(self.temp_dir.name, 'config.csv')
+        header = list(tapetools.config.AssetVariableConfig._required_config_fields.keys())
+        rows = [['asset_id', 'uniqueid', 'strs', 'str', '', 'NA', '', 'FALSE', 'None', 'None', 'TRUE', 'TRUE', 'TRUE'],
+                ['prop_state', 'categorical', 'strs', 'enum', '', '(CA, TX)', '', 'TRUE', 'unique_value', 'summary',
+                 'TRUE', 'TRUE', 'TRUE'],
+                ['term_rem', 'numeric', 'ints', 'np.int16', '', 'INT>0', '', 'TRUE', 'bucket_auto', 'summary', 'TRUE',
+                 'TRUE', 'FALSE'],
+                ['bal_curr', 'numeric', 'floats', 'np.float128', '', 'FLOAT>=0', '', 'FALSE', 'None', 'None', 'TRUE',
+                 'TRUE', 'FALSE'],
+                ['pmt_date_first', 'date', 'dates', 'datetime.date', '', 'NA', '', 'FALSE', 'None', 'None', 'TRUE',
+                 'FALSE', 'FALSE'],
+                ['pmt_sched', 'numeric', 'arrays', 'np.ndarray', '', 'NA', '', 'FALSE', 'None', 'None', 'TRUE',
+                 'FALSE', 'FALSE']]
+        with open(config_path, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(header)
+            for row in rows:
+                writer.writerow(row + ['FALSE'] * (len(header) - len(row)))
+        self.config_data = tapetools.config.AssetVariableConfig(config_path)
+        self.raw_tape = pd.DataFrame({'asset_id': ['L1', 'L2', 'L3', 'L4'],
+                                      'prop_state': ['CA', 'TX', 'n/a', 'CA'],
+                                      'term_rem': ['360', '120', None, '240'],
+                                      'bal_curr': ['1000.5', '2500', '0', None],
+                                      'pmt_date_first': ['2020-01-01', '2021-06-01', None, '2019-03-01'],
+                                      'pmt_sched': ['100 for 2', '50', None, '10 for 3'],
+                                      'servicer': ['A', 'B', 'A', 'C']})
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_arrow_schema(self):
+        schema = self.config_data.arrow_schema()
+        self.assertEqual(schema.names, self.config_data.variables)
+        self.assertEqual(schema.field('asset_id').type, pa.string())
+        self.assertEqual(schema.field('prop_state').type, pa.dictionary(pa.int32(), pa.string()))
+        self.assertEqual(schema.field('term_rem').type, pa.int16())
+        self.assertEqual(schema.field('bal_curr').type, pa.float64())
+        self.assertEqual(schema.field('pmt_date_first').type, pa.timestamp('s'))
+        self.assertEqual(schema.field('pmt_sched').type, pa.large_list(pa.float64()))
+
+    def test_clean_tape_arrow_backed(self):
+        clean_tape = tapetools.process_to_clean_tape(self.raw_tape.copy(), self.config_data)
+        arrow_tape = tapetools.process_to_clean_tape(self.raw_tape.copy(), self.config_data, arrow_backed=True)
+        self.assertEqual(arrow_tape['term_rem'].dtype, pd.ArrowDtype(pa.int16()))
+        self.assertEqual(arrow_tape['servicer'].dtype, pd.ArrowDtype(pa.string()))
+        self.assertEqual(str(arrow_tape['prop_state'].dtype), 'category')
+        self.assertEqual(arrow_tape['term_rem'].tolist()[:2], [360, 120])
+        self.assertTrue(pd.isna(arrow_tape['term_rem'].iloc[2]))
+        self.assertEqual(arrow_tape['prop_state'].tolist(), clean_tape['prop_state'].tolist())
+        np.testing.assert_array_equal(arrow_tape['pmt_date_first'].to_numpy(dtype='datetime64[s]', na_value=np.nan),
+                                      clean_tape['pmt_date_first'].to_numpy())
+        self.assertEqual(arrow_tape['pmt_sched'].dtype, pd.ArrowDtype(pa.large_list(pa.float64())))
+        self.assertTrue(pa.array(arrow_tape['pmt_sched']).equals(pa.array(clean_tape['pmt_sched'])))
+        # an Arrow tape is cleaned again without changing it
+        recleaned = tapetools.process_to_clean_tape(arrowtape.to_arrow_table(self.raw_tape), self.config_data)
+        pd.testing.assert_frame_equal(recleaned.drop(columns=['servicer', 'pmt_sched']),
+                                      clean_tape.drop(columns=['servicer', 'pmt_sched']))
+
+    def test_shared_tape(self):
+        tape = tapetools.process_to_clean_tape(self.raw_tape.copy(), self.config_data, arrow_backed=True)
+        with arrowtape.SharedTape.write(tape, temp_dir=self.temp_dir.name, config_data=self.config_data) as shared:
+            self.assertEqual(len(shared), 4)
+            self.assertEqual(shared.table().schema.field('term_rem').type, pa.int16())
+            pd.testing.assert_frame_equal(shared.to_pandas(), tape)
+            partition = pickle.loads(pickle.dumps(shared.slice(1, 2)))
+            self.assertEqual(len(pickle.dumps(partition)), len(pickle.dumps(arrowtape.SharedTape(shared.path, 1, 2))))
+            self.assertEqual(partition.to_pandas(['asset_id'])['asset_id'].tolist(), ['L2', 'L3'])
+            self.assertEqual(len(partition.slice(1)), 1)
+            self.assertEqual(partition.to_pandas(arrow_backed=False)['term_rem'].dtype, np.float64)
+        self.assertFalse(os.path.exists(shared.path))
+
+    def test_as_dataframe(self):
+        self.assertIs(arrowtape.as_dataframe(self.raw_tape), self.raw_tape)
+        tape = arrowtape.as_dataframe(pa.Table.from_pandas(self.raw_tape))
+        self.assertEqual(tape['asset_id'].dtype, pd.ArrowDtype(pa.string()))
+        self.assertTrue(arrowtape.is_arrow_tape(pa.Table.from_pandas(self.raw_tape)))
+        self.assertFalse(arrowtape.is_arrow_tape(self.raw_tape))
+
+
+class TestArrowTapeStages(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(24)
+        n = 3000
+        self.tape = pd.DataFrame({'asset_id': np.arange(n),
+                                  'asset_sector': rng.choice(['auto', 'mortgage'], size=n),
+                                  'bal_orig': rng.uniform(10000, 500000, size=n)})
+        self.tape['bal_curr'] = self.tape['bal_orig'] * rng.uniform(0, 1, size=n)
+        self.tape['rate_margin'] = rng.uniform(0.01, 0.08, size=n)
+        self.tape['term_orig'] = rng.choice([180, 240, 360], size=n)
+        self.tape['term_rem'] = self.tape['term_orig'] - rng.integers(0, 100, size=n)
+        self.tape['fico_orig'] = rng.integers(500, 850, size=n)
+        self.tape['fico_curr'] = self.tape['fico_orig'] + rng.integers(-50, 50, size=n)
+        self.tape['uw_ltv_orig'] = rng.uniform(0.3, 1.0, size=n)
+        self.tape['bal_orig_cum'] = self.tape['bal_orig'] * 1.1
+        self.tape['prop_appraisal'] = self.tape['bal_orig'] / self.tape['uw_ltv_orig']
+        self.tape['uw_dti_orig'] = rng.uniform(0.1, 0.5, size=n)
+        self.tape['fc_status'] = rng.choice(['FC', None], size=n, p=[0.1, 0.9])
+        self.tape['bk_status'] = rng.choice(['BK', None], size=n, p=[0.05, 0.95])
+        self.tape['prop_state'] = rng.choice(['CA', 'TX', 'FL', 'NY'], size=n)
+        self.tape['mod_type'] = None
+        self.tape.loc[::7, 'rate_margin'] = np.nan
+        self.variables = ['fico_orig', 'uw_ltv_orig', 'prop_state']
+
+    def test_summaries_match(self):
+        table = arrowtape.to_arrow_table(self.tape)
+        for exact in (True, False):
+            summary = tapetools.summarize_tape(self.tape, exact=exact)
+            arrow_summary = tapetools.summarize_tape(table, exact=exact)
+            numeric = summary.index[summary['mean'].notna()]
+            stats = ['count', 'mean', 'median', 'min', 'quart1', 'quart2', 'quart3', 'max', 'missing', 'unique_num']
+            pd.testing.assert_frame_equal(arrow_summary.loc[numeric, stats].astype(float),
+                                          summary.loc[numeric, stats].astype(float))
+            pd.testing.assert_series_equal(arrow_summary['count'], summary['count'], check_dtype=False)
+            for field, values in summary['unique_values'].items():
+                arrow_values = arrow_summary.loc[field, 'unique_values']
+                self.assertEqual(None if arrow_values is None else list(arrow_values),
+                                 None if values is None else list(values), msg=field)
+
+    def test_stratification_matches(self):
+        strats = strattools.Stratification_Package(self.tape, stratify_by_variables=self.variables).summary_package()
+        with arrowtape.SharedTape.write(self.tape, temp_dir=tempfile.gettempdir()) as shared:
+            arrow_strats = strattools.Stratification_Package(shared, stratify_by_variables=self.variables)
+            for variable, strat in arrow_strats.summary_package().items():
+                pd.testing.assert_frame_equal(strat, strats[variable], check_dtype=False)
+            report = strattools.stratify_by_sector(shared, stratify_by_variables=self.variables, max_workers=1)
+        pd.testing.assert_frame_equal(report, strattools.stratify_by_sector(
+            self.tape, stratify_by_variables=self.variables, max_workers=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+import numpy as np
+import pandas as pd
+from cmutils import bondmath
+
+
+class TestAmortizeCashFlows(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(10)
+        n = 300
+        self.bal = rng.uniform(10000, 500000, size=n)
+        self.rate = rng.uniform(2, 9, size=n)
+        self.term = rng.integers(12, 360, size=n)
+        self.rate[:5] = 0
+
+    def test_level_payment_schedule(self):
+        pool, loans = bondmath.amortize_cash_flows(self.bal[5:6], self.rate[5:6], self.term[5:6], loan_level=True)
+        periodic_rate = self.rate[5] / 1200
+        periods = np.arange(1, self.term[5] + 1)
+        np.testing.assert_allclose(loans['bal_end'][0, :self.term[5]],
+                                   self.bal[5] * bondmath.end_balance_factor(periodic_rate, self.term[5], periods),
+                                   atol=1e-6)
+        payment = loans['prin_sched'][0] + loans['interest'][0]
+        np.testing.assert_allclose(payment[:self.term[5]], self.bal[5] * bondmath.annuity(periodic_rate, self.term[5]))
+        np.testing.assert_allclose(pool['bal_end'], loans['bal_end'][0])
+
+    def test_balances_are_conserved(self):
+        pool, loans = bondmath.amortize_cash_flows(self.bal, self.rate, self.term, cpr=[5, 10, 15], cdr=2,
+                                                   severity=40, loan_level=True)
+        paid = loans['prin_sched'].sum(axis=1) + loans['prepay'].sum(axis=1) + loans['default'].sum(axis=1)
+        np.testing.assert_allclose(paid, self.bal)
+        np.testing.assert_allclose(pool['loss'] + pool['recovery'], pool['default'])
+        np.testing.assert_allclose(pool['loss'], pool['default'] * 0.4)
+        for field in bondmath.CASH_FLOW_FIELDS:
+            np.testing.assert_allclose(pool[field], loans[field].sum(axis=0))
+
+    def test_parallel_matches_serial_and_payment(self):
+        pmt = self.bal * bondmath.annuity(self.rate / 1200, self.term)
+        pmt[:5] = self.bal[:5] / self.term[:5]
+        serial, _ = bondmath.amortize_cash_flows(self.bal, self.rate, self.term, cpr=8, parallel=False)
+        parallel, _ = bondmath.amortize_cash_flows(self.bal, self.rate, self.term, cpr=8, parallel=True)
+        from_payment, _ = bondmath.amortize_cash_flows(self.bal, self.rate, self.term, pmt_curr=pmt, cpr=8)
+        for field in bondmath.CASH_FLOW_FIELDS:
+            np.testing.assert_allclose(serial[field], parallel[field])
+            np.testing.assert_allclose(serial[field], from_payment[field], rtol=1e-9, atol=1e-6)
+
+    def test_interest_only_and_tape(self):
+        tape = pd.DataFrame({'bal_curr': [100000., np.nan, 50000.], 'rate_curr': [6., 5., 4.],
+                             'term_rem': [120, 60, 60], 'term_io': [24, np.nan, 0]})
+        pool, loans = bondmath.amortize_tape(tape, loan_level=True, n_periods=60)
+        self.assertEqual(loans['bal_end'].shape, (3, 60))
+        self.assertTrue((loans['prin_sched'][0, :24] == 0).all())
+        self.assertTrue((loans['prin_sched'][0, 24:] > 0).all())
+        self.assertAlmostEqual(loans['interest'][0, 0], 500)
+        self.assertTrue((loans['bal_beg'][1] == 0).all())
+        self.assertAlmostEqual(loans['bal_end'][2, -1], 0)
+
+
+
+class TestIrrArray(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        self.rates = rng.uniform(0.001, 0.03, size=200)
+        self.terms = rng.integers(12, 120, size=200)
+        self.streams = np.zeros((200, self.terms.max() + 1))
+        for i, (rate, term) in enumerate(zip(self.rates, self.terms)):
+            self.streams[i, 1:term + 1] = bondmath.annuity(rate, term)
+        self.streams[:, 0] = -1
+
+    def test_matches_newton_and_known_yield(self):
+        rates, iterations, converged = bondmath.irr_array(self.streams)
+        self.assertTrue(converged.all())
+        self.assertTrue((iterations > 0).all())
+        np.testing.assert_allclose(rates, self.rates, rtol=1e-9)
+        np.testing.assert_allclose(rates[:20], [bondmath.irrNewton(x) for x in self.streams[:20]], rtol=1e-9)
+
+    def test_ragged_matches_matrix(self):
+        lengths = self.terms + 1
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        values = np.concatenate([row[:length] for row, length in zip(self.streams, lengths)])
+        ragged, _, _ = bondmath.irr_array(values, offsets=offsets, parallel=False)
+        np.testing.assert_allclose(ragged, bondmath.irr_array(self.streams)[0])
+
+    def test_bisection_fallback_and_no_root(self):
+        rates, iterations, converged = bondmath.irr_array(np.array([[-1, 500, 0, 0], [1, 2, 3, 0], [-1, -2, 0, 0],
+                                                                    [0, -1, 2, 0], [0, 0, 0, 0]]))
+        self.assertAlmostEqual(rates[0], 499)
+        self.assertAlmostEqual(rates[3], 1)
+        self.assertEqual(converged.tolist(), [True, False, False, True, False])
+        self.assertTrue(np.isnan(rates[[1, 2, 4]]).all())
+        self.assertEqual(iterations[4], 0)
+
+
+class TestRegZRateArray(unittest.TestCase):
+    def test_whole_years_match_effective_rate(self):
+        apr = bondmath.regZRate_array(10000, 0, 0, [0.06, 0.06, 0.06], ['annual', 'monthly', 'simple'], [24, 36, 12])
+        np.testing.assert_allclose(apr, [0.06, bondmath.intEffectiveAnnualRate(0.06, 'monthly'), 0.06])
+
+    def test_solves_accrued_multiple(self):
+        rng = np.random.default_rng(12)
+        n = 1000
+        cash, fees, back_fees = rng.uniform(1000, 100000, n), rng.uniform(0, 500, n), rng.uniform(0, 100, n)
+        rates, months = rng.uniform(0.02, 0.3, n), rng.integers(1, 361, n)
+        compound_types = rng.choice(['simple', 'daily', 'monthly', 'quarterly', 'annual'], n)
+        apr = bondmath.regZRate_array(cash, fees, back_fees, rates, compound_types, months)
+        self.assertFalse(np.isnan(apr).any())
+        effrate = bondmath.intEffectiveAnnualRate_array(rates, compound_types)
+        intfrac = np.where(compound_types == 'simple', 1 + effrate / 12 * months,
+                           (1 + effrate) ** (months // 12) * (1 + effrate * (months % 12) / 12))
+        np.testing.assert_allclose((1 + apr) ** (months // 12) * (1 + apr * (months % 12) / 12),
+                                   ((cash + fees) * intfrac + back_fees) / cash, rtol=1e-9)
+        self.assertEqual(bondmath.regZRate(cash[0], fees[0], back_fees[0], rates[0], compound_types[0], months[0]),
+                         '%.6f' % apr[0])
+
+    def test_invalid_loans(self):
+        apr = bondmath.regZRate_array([0, 1000, 1000], 0, 0, [0.05, np.nan, 0.05], 'monthly', [12, 12, 0])
+        self.assertTrue(np.isnan(apr).all())
+        with self.assertRaises(ValueError):
+            bondmath.regZRate_array(1000, 0, 0, 0.05, 'hourly', 12)
+
+if __name__ == '__main__':
+    unittest.main()
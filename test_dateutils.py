@@ -0,0 +1,81 @@
+import unittest
+import numpy as np
+import pandas as pd
+from cmutils import dateutils
+
+
+class TestDayfracArray(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(8)
+        self.start = np.datetime64('2000-01-01') + rng.integers(0, 9000, size=500).astype('timedelta64[D]')
+        self.end = self.start + rng.integers(1, 800, size=500).astype('timedelta64[D]')
+        # month ends, leap days and 30th / 31st pairs exercise every 30/360 rule
+        self.start[:6] = np.array(['2020-02-29', '2019-02-28', '2021-01-31', '2021-04-30', '2021-01-30', '2020-02-29'],
+                                  dtype='datetime64[D]')
+        self.end[:6] = np.array(['2021-02-28', '2019-03-31', '2021-03-31', '2021-05-31', '2021-03-31', '2020-03-31'],
+                                dtype='datetime64[D]')
+
+    def test_30360_matches_scalar(self):
+        for method in ('30/360 NASD', '30/360 ISDA', '30/360 FNMA'):
+            scalar = [dateutils.dayfrac(pd.Timestamp(s), pd.Timestamp(e), method) for s, e in zip(self.start, self.end)]
+            np.testing.assert_allclose(dateutils.dayfrac_array(self.start, self.end, method), scalar)
+
+    def test_actual_day_counts(self):
+        days = (self.end - self.start).astype(float)
+        np.testing.assert_allclose(dateutils.dayfrac(self.start, self.end, 'act/360'), days / 360)
+        np.testing.assert_allclose(dateutils.dayfrac(pd.Series(self.start), pd.DatetimeIndex(self.end), 'act/365'),
+                                   days / 365)
+
+    def test_actact_isda(self):
+        start = np.array(['2019-06-01', '2020-01-01', '2019-12-31', '2020-03-01'], dtype='datetime64[D]')
+        end = np.array(['2021-06-01', '2020-07-01', '2020-01-01', '2020-03-01'], dtype='datetime64[D]')
+        np.testing.assert_allclose(dateutils.dayfrac_array(start, end, 'act/act'),
+                                   [214 / 365 + 1 + 151 / 365, 182 / 366, 1 / 365, 0])
+
+    def test_reversed_missing_and_broadcast(self):
+        frac = dateutils.dayfrac_array(['2021-01-01', 'NaT'], ['2020-01-01', '2020-06-30'], 'act/act')
+        self.assertEqual(frac[0], -1)
+        self.assertTrue(np.isnan(frac[1]))
+        frac = dateutils.dayfrac_array(np.datetime64('2020-01-31'), self.end[:3], '30/360 ISDA')
+        self.assertEqual(frac.shape, (3,))
+        with self.assertRaises(ValueError):
+            dateutils.dayfrac_array(self.start, self.end, 'act/364')
+
+
+
+class TestDateScheduleArray(unittest.TestCase):
+    def setUp(self):
+        self.start = np.array(['2020-01-31', '2021-03-15', '2021-03-20', '2019-11-30'], dtype='datetime64[D]')
+        self.periods = np.array([3, 4, 2, 5])
+
+    def test_matches_date_increment(self):
+        for increment_type in ('daily', 'weekly', 'monthly', 'monthend', 'quarterly', 'semiannual', 'annual'):
+            schedule = dateutils.date_schedule_array(self.start, self.periods, increment_type)
+            self.assertEqual(schedule.shape, (4, 5))
+            for i, start_date in enumerate(self.start.astype(object)):
+                expected = [dateutils.dateIncrement(start_date, k, increment_type) for k in range(self.periods[i])]
+                if increment_type == 'monthend':
+                    expected = [dateutils.eomonth(start_date, k) for k in range(self.periods[i])]
+                self.assertEqual(schedule[i, :self.periods[i]].astype(object).tolist(), expected)
+                self.assertTrue(np.isnat(schedule[i, self.periods[i]:]).all())
+
+    def test_matches_date_range_vec(self):
+        for increment_type in ('monthly', 'monthend', 'monthmid'):
+            schedule = dateutils.date_schedule_array(self.start, 6, increment_type)
+            for i, start_date in enumerate(self.start.astype(object)):
+                np.testing.assert_array_equal(schedule[i], dateutils.dateRangeVec(start_date, 6, increment_type))
+
+    def test_ragged_mixed_types_and_business_days(self):
+        increment_types = ['monthly', 'daily', 'weekly', 'annual']
+        values, offsets = dateutils.date_schedule_array(self.start, self.periods, increment_types, weekday_only=True,
+                                                        ragged=True)
+        schedule = dateutils.date_schedule_array(self.start, self.periods, increment_types, weekday_only=True)
+        self.assertEqual(offsets.tolist(), [0, 3, 7, 9, 14])
+        np.testing.assert_array_equal(values, schedule[~np.isnat(schedule)])
+        self.assertTrue(np.is_busday(values).all())
+        self.assertEqual(values[1], np.datetime64('2020-03-02'))
+        with self.assertRaises(ValueError):
+            dateutils.date_schedule_array(self.start, self.periods, 'fortnightly')
+
+if __name__ == '__main__':
+    unittest.main()
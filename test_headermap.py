@@ -0,0 +1,62 @@
+import unittest
+import os
+import tempfile
+import pandas as pd
+import headermap
+
+
+class TestHeaderIndex(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.fields = ['asset_id', 'bal_curr', 'bal_orig', 'rate_curr', 'term_orig', 'term_rem', 'prop_state',
+                       'pmt_date_firstpay', 'uw_ltv_orig', 'fico_orig']
+        self.headers = ['CurrentBalance', 'Original Balance', 'Current Rate', 'OrigTerm', 'Remaining Term',
+                        'Property State', 'First Payment Date', 'Servicer Notes']
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_normalize(self):
+        self.assertEqual(headermap.HeaderIndex.normalize('CurrentBalance'), 'curr_bal')
+        self.assertEqual(headermap.HeaderIndex.normalize(' Current Balance ($) '), 'curr_bal')
+        self.assertEqual(headermap.HeaderIndex.normalize('FICOScore'), 'fico_score')
+        self.assertEqual(headermap.HeaderIndex.normalize('bal_curr'), 'bal_curr')
+
+    def test_resolve(self):
+        resolved = headermap.HeaderIndex(fields=self.fields).resolve(self.headers)
+        self.assertEqual(list(resolved['field']), ['bal_curr', 'bal_orig', 'rate_curr', 'term_orig', 'term_rem',
+                                                   'prop_state', 'pmt_date_firstpay', None])
+        self.assertEqual(resolved.loc['Property State', 'method'], 'exact')
+        self.assertEqual(resolved.loc['CurrentBalance', 'method'], 'tokens')
+        self.assertEqual(resolved.loc['First Payment Date', 'method'], 'ngram')
+        self.assertTrue(0.6 <= resolved.loc['First Payment Date', 'score'] < 0.95)
+        self.assertTrue(pd.isna(resolved.loc['Servicer Notes', 'score']))
+
+    def test_each_field_mapped_once(self):
+        resolved = headermap.HeaderIndex(fields=self.fields).resolve(['Curr Balance', 'Balance Current'])
+        self.assertEqual(resolved['field'].tolist().count('bal_curr'), 1)
+        self.assertEqual(resolved['field'].isna().sum(), 1)
+
+    def test_aliases_persist(self):
+        store_dir = os.path.join(self.temp_dir.name, 'headers')
+        index = headermap.HeaderIndex(store_dir, fields=self.fields)
+        self.assertIsNone(index.resolve(['LoanNumber']).loc['LoanNumber', 'field'])
+        index.add_header_map({'Loan Number': 'asset_id', 'FICO': 'fico_orig'})
+        reloaded = headermap.HeaderIndex(store_dir, fields=self.fields)
+        self.assertEqual(reloaded.header_map(['LoanNumber', 'fico', 'Current Rate']),
+                         {'LoanNumber': 'asset_id', 'fico': 'fico_orig', 'Current Rate': 'rate_curr'})
+
+    def test_layout_cache(self):
+        store_dir = os.path.join(self.temp_dir.name, 'headers')
+        index = headermap.HeaderIndex(store_dir, fields=self.fields)
+        resolved = index.resolve(self.headers)
+        reloaded = headermap.HeaderIndex(store_dir, fields=self.fields)
+        self.assertEqual(len(reloaded.layouts), 1)
+        pd.testing.assert_frame_equal(reloaded.resolve(self.headers), resolved, check_dtype=False)
+        reloaded.add_fields(['servicer_notes'])
+        self.assertEqual(reloaded.layouts, {})
+        self.assertEqual(reloaded.resolve(self.headers).loc['Servicer Notes', 'field'], 'servicer_notes')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import numpy as np
+import pandas as pd
+from cmutils import sketches
+
+
+class TestHyperLogLog(unittest.TestCase):
+    def test_small_counts_exact(self):
+        values = pd.Series(['CA', 'TX', 'FL', None, 'CA'] * 100)
+        self.assertEqual(sketches.HyperLogLog().add(values).count, 3)
+
+    def test_large_count_error(self):
+        rng = np.random.default_rng(1)
+        values = rng.integers(0, 10 ** 9, size=500000)
+        estimate = sketches.HyperLogLog().add(values).count
+        self.assertLess(abs(estimate / np.unique(values).size - 1), 0.03)
+
+    def test_object_and_category_hash_equal(self):
+        values = pd.Series(['a', 'b', None, 'c'], dtype=object)
+        np.testing.assert_array_equal(sketches.hash_values(values), sketches.hash_values(values.astype('category')))
+
+    def test_int_and_float_hash_equal(self):
+        np.testing.assert_array_equal(sketches.hash_values(pd.Series([1, 2, 4])),
+                                      sketches.hash_values(pd.Series([1.0, 2.0, np.nan, 4.0])))
+
+
+class TestTDigest(unittest.TestCase):
+    def test_quantiles(self):
+        rng = np.random.default_rng(2)
+        values = rng.lognormal(10, 1, size=200000)
+        digest = sketches.TDigest()
+        for chunk in np.array_split(values, 20):
+            digest.add(chunk)
+        self.assertLessEqual(digest.means.size, digest.compression + 1)
+        self.assertEqual(digest.quantile(0.0), values.min())
+        self.assertEqual(digest.quantile(1.0), values.max())
+        sorted_values = np.sort(values)
+        for q in (0.001, 0.01, 0.25, 0.5, 0.75, 0.99, 0.999):
+            rank = np.searchsorted(sorted_values, digest.quantile(q)) / values.size
+            self.assertLess(abs(rank - q), 0.002, msg=q)
+
+    def test_empty_and_nan(self):
+        digest = sketches.TDigest().add([np.nan])
+        self.assertTrue(np.isnan(digest.quantile(0.5)))
+        self.assertEqual(digest.add([3.0, np.nan]).quantile(0.5), 3.0)
+
+
+class TestSpaceSaving(unittest.TestCase):
+    def test_exact_below_capacity(self):
+        values = pd.Series(['a'] * 5 + ['b'] * 3 + ['c'] + [None])
+        summary = sketches.SpaceSaving(10).add(values[:4]).add(values[4:])
+        self.assertEqual(summary.top().to_dict(), {'a': 5, 'b': 3, 'c': 1})
+        self.assertEqual(summary.bound, 0)
+        self.assertEqual(summary.total, 9)
+
+    def test_heavy_hitters_over_capacity(self):
+        rng = np.random.default_rng(3)
+        values = pd.Series(rng.zipf(1.5, size=200000))
+        summary = sketches.SpaceSaving(50)
+        for chunk in np.array_split(values.to_numpy(), 10):
+            summary.add(chunk)
+        true_counts = values.value_counts()
+        self.assertEqual(list(summary.top(5).index), list(true_counts.index[:5]))
+        for value, count in summary.top().items():
+            self.assertGreaterEqual(count, true_counts.get(value, 0))
+            self.assertLessEqual(count - summary.errors[value], true_counts.get(value, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
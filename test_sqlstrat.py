@@ -0,0 +1,107 @@
+import unittest
+import os
+import sqlite3
+import tempfile
+import numpy as np
+import pandas as pd
+import strattools
+import sqlstrat
+
+
+class TestSQLStratification(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(25)
+        n = 3000
+        self.tape = pd.DataFrame({'asset_id': np.arange(n),
+                                  'asset_sector': rng.choice(['auto', 'mortgage'], size=n, p=[0.3, 0.7]),
+                                  'bal_orig': rng.uniform(10000, 500000, size=n)})
+        self.tape['bal_curr'] = self.tape['bal_orig'] * rng.uniform(0, 1, size=n)
+        self.tape['rate_margin'] = rng.uniform(0.01, 0.08, size=n)
+        self.tape['term_orig'] = rng.choice([180, 240, 360], size=n)
+        self.tape['term_rem'] = self.tape['term_orig'] - rng.integers(0, 100, size=n)
+        self.tape['fico_orig'] = rng.integers(500, 850, size=n)
+        self.tape['fico_curr'] = self.tape['fico_orig'] + rng.integers(-50, 50, size=n)
+        self.tape['uw_ltv_orig'] = rng.uniform(0.3, 1.0, size=n)
+        self.tape['bal_orig_cum'] = self.tape['bal_orig'] * 1.1
+        self.tape['prop_appraisal'] = self.tape['bal_orig'] / self.tape['uw_ltv_orig']
+        self.tape['uw_dti_orig'] = rng.uniform(0.1, 0.5, size=n)
+        self.tape['fc_status'] = rng.choice(['FC', None], size=n, p=[0.1, 0.9])
+        self.tape['bk_status'] = rng.choice(['BK', None], size=n, p=[0.05, 0.95])
+        self.tape['prop_state'] = rng.choice(['CA', 'TX', 'FL', 'NY', None], size=n, p=[0.4, 0.3, 0.2, 0.05, 0.05])
+        self.tape['mod_type'] = None
+        self.tape['orig_date'] = pd.Timestamp('2020-01-15') + pd.to_timedelta(self.tape.index % 900, unit='D')
+        self.tape.loc[::7, 'rate_margin'] = np.nan
+        self.tape.loc[::11, 'uw_ltv_orig'] = np.nan
+        self.variables = ['fico_orig', 'uw_ltv_orig', 'prop_state', 'orig_date']
+        self.stratify_types = {'orig_date': 'vintage_quarter'}
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def expected(self, asset_class=None, **kwargs):
+        package = strattools.Stratification_Package(self.tape, asset_class=asset_class,
+                                                    stratify_by_variables=self.variables,
+                                                    stratify_types=self.stratify_types, **kwargs)
+        return package, package.summary_package()
+
+    def assert_strats_equal(self, strats, expected):
+        self.assertEqual(list(strats.keys()), list(expected.keys()))
+        for variable, strat in strats.items():
+            pd.testing.assert_frame_equal(strat, expected[variable], check_exact=False, rtol=1e-9)
+
+    def test_parquet_matches_package(self):
+        tape_path = os.path.join(self.temp_dir.name, 'tape.parquet')
+        self.tape.to_parquet(tape_path)
+        for asset_class, zeros in ((None, 0), ('mortgage', 'na')):
+            package, expected = self.expected(asset_class, wa_zeros=zeros)
+            sql_package = sqlstrat.SQLStratification(tape_path, asset_class=asset_class,
+                                                     stratify_by_variables=self.variables,
+                                                     stratify_types=self.stratify_types, wa_zeros=zeros)
+            self.assertEqual(sql_package.buckets, package.buckets)
+            self.assert_strats_equal(sql_package.summary_package(), expected)
+
+    def test_csv_header_map(self):
+        tape_path = os.path.join(self.temp_dir.name, 'tape.csv')
+        header_map = {'FICO': 'fico_orig', 'Current Balance': 'bal_curr'}
+        self.tape.rename(columns={field: column for column, field in header_map.items()}).to_csv(tape_path,
+                                                                                               index=False)
+        sql_package = sqlstrat.SQLStratification(tape_path, header_map=header_map, stratify_by_variables=self.variables,
+                                                 stratify_types=self.stratify_types)
+        self.assert_strats_equal(sql_package.summary_package(), self.expected()[1])
+
+    def test_sqlite_table(self):
+        connection = sqlite3.connect(':memory:')
+        self.tape.assign(orig_date=self.tape['orig_date'].dt.strftime('%Y-%m-%d')).to_sql('tape', connection,
+                                                                                          index=False)
+        sql_package = sqlstrat.SQLStratification('tape', connection, asset_class='auto',
+                                                 stratify_by_variables=self.variables,
+                                                 stratify_types=self.stratify_types)
+        self.assert_strats_equal(sql_package.summary_package(), self.expected('auto')[1])
+        with self.assertRaises(ValueError):
+            sqlstrat.SQLStratification(os.path.join(self.temp_dir.name, 'tape.parquet'), connection)
+
+    def test_single_group_by(self):
+        sql_package = sqlstrat.SQLStratification(self.tape, stratify_by_variables=self.variables,
+                                                 buckets_fico_orig=[600, 700])
+        query = sql_package.strat_totals_query('fico_orig', count_fields=('bal_orig',), sum_fields=('bal_curr',),
+                                               category_fields=('prop_state',))
+        self.assertEqual(query.count('GROUP BY'), 1)
+        self.assertEqual(query.count('SELECT'), 1)
+        totals = sql_package.strat_totals('fico_orig', count_fields=('bal_orig',), sum_fields=('bal_curr',),
+                                          category_fields=('prop_state',))
+        expected = strattools.strat_totals(self.tape, 'fico_orig', [600, 700], count_fields=('bal_orig',),
+                                           sum_fields=('bal_curr',), category_fields=('prop_state',))
+        pd.testing.assert_frame_equal(totals, expected, check_exact=False, rtol=1e-9)
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            sqlstrat.SQLStratification(self.tape, asset_class='student', stratify_by_variables=self.variables)
+        sql_package = sqlstrat.SQLStratification(self.tape.drop(columns='bk_status'),
+                                                 stratify_by_variables=self.variables)
+        with self.assertRaises(ValueError):
+            sql_package.stratify('fico_orig')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@ import unittest
 import pandas as pd
 import numpy as np
 import strattools
+from cmutils import mathutils
 
 class TestBucketizeData(unittest.TestCase):
     def setUp(self):
@@ -65,6 +66,213 @@ class TestBucketizeData(unittest.TestCase):
             self.assertAlmostEqual(result[1] - result[0], expected_step, places=2)
 
 
+class TestStratTotals(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.tape = pd.DataFrame({
+            'fico_orig': rng.integers(500, 850, size=1000),
+            'bal_orig': rng.uniform(1000, 500000, size=1000),
+            'rate_margin': rng.uniform(0.01, 0.08, size=1000),
+            'prop_state': rng.choice(['CA', 'TX', 'FL'], size=1000)
+        })
+        self.tape.loc[::9, 'rate_margin'] = np.nan
+        self.buckets = [600, 650, 700, 750, 800]
+
+    def test_chunks_match_full_tape(self):
+        kwargs = {'count_fields': ('rate_margin',), 'sum_fields': ('bal_orig',),
+                  'weighted_fields': (('rate_margin', 'bal_orig'),)}
+        full = strattools.strat_totals(self.tape, 'fico_orig', self.buckets, **kwargs)
+        chunks = (self.tape.iloc[i:i + 150] for i in range(0, self.tape.shape[0], 150))
+        chunked = strattools.strat_totals(chunks, 'fico_orig', self.buckets, **kwargs)
+        pd.testing.assert_frame_equal(full, chunked)
+        self.assertEqual(full['count'].sum(), self.tape.shape[0])
+        self.assertAlmostEqual(full['sum_bal_orig'].sum(), self.tape['bal_orig'].sum(), places=4)
+
+    def test_weighted_average_matches_factory(self):
+        buckets = strattools.assign_strat_buckets(self.tape['fico_orig'], self.buckets)
+        for zeros in (0, 'na'):
+            weighted_average = strattools.pandas_weighted_average_factory(weights=self.tape['bal_orig'], zeros=zeros)
+            expected = self.tape.groupby(buckets, observed=False)['rate_margin'].agg(weighted_average)
+            totals = strattools.strat_totals(self.tape, 'fico_orig', self.buckets,
+                                             weighted_fields=(('rate_margin', 'bal_orig'),), zeros=zeros)
+            result = totals['wsum_rate_margin_by_bal_orig'] / totals['wt_rate_margin_by_bal_orig']
+            np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(dtype=float))
+
+    def test_unique_value_buckets(self):
+        totals = strattools.strat_totals(self.tape, 'prop_state', sum_fields=('bal_orig',))
+        self.assertEqual(totals.index.tolist(), ['CA', 'FL', 'TX'])
+        self.assertEqual(totals['count'].tolist(), self.tape['prop_state'].value_counts().sort_index().tolist())
+
+
+class TestStratSummaryConsumerClosed(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(21)
+        n = 2000
+        self.tape = pd.DataFrame({'bal_orig': rng.uniform(10000, 500000, size=n)})
+        self.tape['bal_curr'] = self.tape['bal_orig'] * rng.uniform(0, 1, size=n)
+        self.tape['rate_margin'] = rng.uniform(0.01, 0.08, size=n)
+        self.tape['term_orig'] = rng.choice([180, 240, 360], size=n)
+        self.tape['term_rem'] = self.tape['term_orig'] - rng.integers(0, 100, size=n)
+        self.tape['fico_orig'] = rng.integers(500, 850, size=n)
+        self.tape['fico_curr'] = self.tape['fico_orig'] + rng.integers(-50, 50, size=n)
+        self.tape['uw_ltv_orig'] = rng.uniform(0.3, 1.0, size=n)
+        self.tape['bal_orig_cum'] = self.tape['bal_orig'] * 1.1
+        self.tape['prop_appraisal'] = self.tape['bal_orig'] / self.tape['uw_ltv_orig']
+        self.tape['uw_dti_orig'] = rng.uniform(0.1, 0.5, size=n)
+        self.tape['fc_status'] = rng.choice(['FC', None], size=n, p=[0.1, 0.9])
+        self.tape['bk_status'] = rng.choice(['BK', None], size=n, p=[0.05, 0.95])
+        self.tape['prop_state'] = rng.choice(['CA', 'TX', 'FL', 'NY'], size=n, p=[0.4, 0.3, 0.2, 0.1])
+        self.tape['mod_type'] = None
+        self.tape.loc[::7, 'rate_margin'] = np.nan
+        self.buckets = [600, 650, 700, 750, 800]
+
+    def test_matches_weighted_average_factory(self):
+        buckets = strattools.assign_strat_buckets(self.tape['fico_orig'], self.buckets)
+        grouped = self.tape.groupby(buckets, observed=False)
+        for zeros in (0, 'na'):
+            summary = strattools.Stratification.strat_summary_consumer_closed(self.tape, 'fico_orig', self.buckets,
+                                                                              zeros=zeros)
+            origbal_weight = strattools.pandas_weighted_average_factory(weights=self.tape['bal_orig'], zeros=zeros)
+            currbal_weight_int = strattools.pandas_weighted_average_factory(weights=self.tape['bal_curr'], zeros=zeros,
+                                                                            rounding=True, output_type='int')
+            np.testing.assert_allclose(summary['wa_origrate'].to_numpy(dtype=float),
+                                       grouped['rate_margin'].agg(origbal_weight).to_numpy(dtype=float))
+            self.assertEqual(summary['wa_remterm'].tolist(), grouped['term_rem'].agg(currbal_weight_int).tolist())
+        np.testing.assert_allclose(summary['factor'].to_numpy(),
+                                   (grouped['bal_curr'].sum() / grouped['bal_orig'].sum() * 100).round(3).to_numpy())
+        np.testing.assert_allclose(summary['fc_pct'].to_numpy(),
+                                   (grouped['fc_status'].count() / grouped.size() * 100).to_numpy())
+        self.assertAlmostEqual(summary['count_pct'].sum(), 100, places=2)
+        self.assertEqual(list(summary.columns[-2:]), ['CA_pct', 'TX_pct'])
+
+    def test_chunks_match_full_tape(self):
+        summary = strattools.Stratification.strat_summary_consumer_closed(self.tape, 'prop_state', None)
+        chunks = (self.tape.iloc[i:i + 300] for i in range(0, self.tape.shape[0], 300))
+        chunked = strattools.Stratification.strat_summary_consumer_closed(chunks, 'prop_state', None)
+        pd.testing.assert_frame_equal(summary, chunked)
+        self.assertEqual(summary.loc['CA', 'CA_pct'], 100)
+
+    def test_categorical_matches_object(self):
+        categorical_tape = self.tape.copy()
+        categorical_tape['prop_state'] = pd.Categorical(self.tape['prop_state'], categories=['TX', 'NY', 'AL', 'FL', 'CA'])
+        for variable, buckets in (('prop_state', None), ('fico_orig', self.buckets)):
+            pd.testing.assert_frame_equal(
+                strattools.Stratification.strat_summary_consumer_closed(categorical_tape, variable, buckets),
+                strattools.Stratification.strat_summary_consumer_closed(self.tape, variable, buckets),
+                check_index_type=False)
+
+    def test_missing_required_field(self):
+        with self.assertRaises(ValueError):
+            strattools.Stratification.strat_summary_consumer_closed(self.tape.drop(columns='bal_curr'), 'fico_orig',
+                                                                    self.buckets)
+
+
+class TestStratificationPackage(TestStratSummaryConsumerClosed):
+    def setUp(self):
+        super().setUp()
+        self.tape['asset_id'] = np.arange(self.tape.shape[0])
+        self.tape['asset_sector'] = np.where(self.tape.index % 5 == 0, 'auto', 'mortgage')
+        self.tape['orig_date'] = pd.Timestamp('2020-01-15') + pd.to_timedelta(self.tape.index % 900, unit='D')
+        self.variables = ['fico_orig', 'uw_ltv_orig', 'prop_state', 'orig_date']
+
+    def test_matches_summary_per_variable(self):
+        package = strattools.Stratification_Package(self.tape, asset_class='mortgage', buckets_fico_orig=self.buckets,
+                                                    stratify_by_variables=self.variables, wa_zeros='na')
+        package.stratify_types['orig_date'] = 'vintage_annual'
+        strats = package.summary_package()
+        mortgage = self.tape[self.tape['asset_sector'] == 'mortgage']
+        self.assertEqual(list(strats.keys()), self.variables)
+        pd.testing.assert_frame_equal(strats['fico_orig'], strattools.Stratification.strat_summary_consumer_closed(
+            mortgage, 'fico_orig', self.buckets, zeros='na'))
+        pd.testing.assert_frame_equal(strats['uw_ltv_orig'], strattools.Stratification.strat_summary_consumer_closed(
+            mortgage, 'uw_ltv_orig', package.buckets['uw_ltv_orig'], zeros='na'))
+        pd.testing.assert_frame_equal(strats['prop_state'], strattools.Stratification.strat_summary_consumer_closed(
+            mortgage, 'prop_state', None, zeros='na'))
+        self.assertEqual([str(x) for x in strats['orig_date'].index], ['2020', '2021', '2022'])
+        self.assertEqual(strats['orig_date']['count'].sum(), mortgage.shape[0])
+
+    def test_parallel_matches_serial(self):
+        package = strattools.Stratification_Package(self.tape, stratify_by_variables=self.variables[:3])
+        serial = package.summary_package()
+        parallel = package.summary_package(parallel=True, max_workers=2)
+        for variable in self.variables[:3]:
+            pd.testing.assert_frame_equal(serial[variable], parallel[variable])
+
+    def test_empty_asset_class(self):
+        with self.assertRaises(ValueError):
+            strattools.Stratification_Package(self.tape, asset_class='student', stratify_by_variables=self.variables)
+
+    def test_stratify_by_sector_matches_package(self):
+        variables = self.variables[:3]
+        full_package = strattools.Stratification_Package(self.tape, stratify_by_variables=variables)
+        buckets = {f'buckets_{x}': full_package.buckets[x] for x in variables}
+        for max_workers in (1, 2):
+            report = strattools.stratify_by_sector(self.tape, stratify_by_variables=variables, max_workers=max_workers)
+            self.assertEqual(list(report.index.get_level_values('asset_sector').unique()), ['auto', 'mortgage'])
+            for sector in ('auto', 'mortgage'):
+                strats = strattools.Stratification_Package(self.tape, asset_class=sector,
+                                                           stratify_by_variables=variables, **buckets).summary_package()
+                for variable in variables:
+                    rows = (report.index.get_level_values('asset_sector') == sector) & \
+                           (report.index.get_level_values('strat_variable') == variable)
+                    sector_strat = report[rows].droplevel([0, 1]).dropna(axis=1, how='all')
+                    self.assertEqual(sector_strat.index.astype(str).tolist(),
+                                     strats[variable].index.astype(str).tolist())
+                    pd.testing.assert_frame_equal(sector_strat.reset_index(drop=True),
+                                                  strats[variable].reset_index(drop=True), check_dtype=False)
+
+
+    def test_stratify_by_sector_missing_sector(self):
+        variables = self.variables[:3]
+        tape = self.tape.copy()
+        tape.loc[tape.index[:3], 'asset_sector'] = None
+        report = strattools.stratify_by_sector(tape, stratify_by_variables=variables, max_workers=1)
+        self.assertEqual(list(report.index.get_level_values('asset_sector').unique()), ['auto', 'mortgage'])
+        expected = strattools.stratify_by_sector(tape.iloc[3:], stratify_by_variables=variables, max_workers=1)
+        pd.testing.assert_frame_equal(report, expected)
+        tape['asset_sector'] = None
+        with self.assertRaises(ValueError):
+            strattools.stratify_by_sector(tape, stratify_by_variables=variables, max_workers=1)
+
+
+class TestWeightedAverageKernel(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        self.values = pd.Series(rng.choice([np.nan, 0.0, 1.5, 2.0, 3.25, 680.0], size=400))
+        self.weights = pd.Series(rng.choice([0.0, 1.0, 2.5, 100000.0], size=400))
+        self.groups = pd.Series(rng.integers(0, 12, size=400))
+        # group 12 has only zero weights and zero values, group 13 only zero weights
+        self.values[:3], self.weights[:3], self.groups[:3] = 0.0, 0.0, 12
+        self.values[3:6], self.weights[3:6], self.groups[3:6] = 2.0, 0.0, 13
+
+    def test_batch_matches_factory_per_group(self):
+        for zeros in (0, 'na', 5):
+            for rounding, output_type in ((None, None), (True, None), (True, 'int')):
+                factory = mathutils.pandas_weighted_average_factory(weights=self.weights, zeros=zeros,
+                                                                    rounding=rounding, output_type=output_type)
+                expected = self.values.groupby(self.groups).agg(factory).tolist()
+                result = mathutils.weighted_average_kernel(self.values.to_numpy(), self.weights.to_numpy(),
+                                                           self.groups.to_numpy(), zeros=zeros, rounding=rounding,
+                                                           output_type=output_type, na_value='NA').tolist()
+                self.assertEqual(result, expected)
+                self.assertEqual(result[12], 'NA')
+                self.assertEqual(result[13], 2.0)
+
+    def test_totals_are_additive(self):
+        codes = self.groups.to_numpy()
+        full = mathutils.weighted_average_totals(self.values, self.weights, codes, 14, zeros='na')
+        first = mathutils.weighted_average_totals(self.values[:150], self.weights[:150], codes[:150], 14, zeros='na')
+        second = mathutils.weighted_average_totals(self.values[150:], self.weights[150:], codes[150:], 14, zeros='na')
+        merged = {key: first[key] + second[key] for key in full}
+        np.testing.assert_allclose(mathutils.weighted_average_from_totals(merged),
+                                   mathutils.weighted_average_from_totals(full))
+
+    def test_factory_all_missing_raises(self):
+        factory = mathutils.pandas_weighted_average_factory(weights=self.weights, zeros='na')
+        with self.assertRaises(ValueError):
+            factory(pd.Series([np.nan, np.nan], index=[10, 11]))
+
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -0,0 +1,154 @@
+import unittest
+import os
+import csv
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+import tapecache
+import tapetools
+
+
+class TestTapeCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.temp_dir.name, 'cache')
+        self.tape_path = os.path.join(self.temp_dir.name, 'tape.csv')
+        rng = np.random.default_rng(5)
+        self.tape = pd.DataFrame({
+            'LoanID': np.arange(1, 501),
+            'CurrentBalance': rng.uniform(1000, 500000, size=500).round(2),
+            'State': rng.choice(['CA', 'TX', 'FL'], size=500)
+        })
+        self.tape.to_csv(self.tape_path, index=False)
+        self.header_map = {'CurrentBalance': 'bal_curr', 'State': 'prop_state'}
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_repeat_load_reads_cache(self):
+        cache = tapecache.TapeCache(self.cache_dir)
+        first = tapetools.import_raw_datatape(self.tape_path, self.header_map, cache=cache)
+        key = cache.cache_key(self.tape_path, self.header_map)
+        self.assertTrue(cache.contains(key))
+        self.tape.iloc[:250].to_csv(self.tape_path, index=False)
+        # a changed tape file gets a different key, the cached entry is unchanged
+        self.assertNotEqual(cache.cache_key(self.tape_path, self.header_map), key)
+        pd.testing.assert_frame_equal(cache.load(key), first)
+
+    def test_key_depends_on_header_map_and_options(self):
+        cache = tapecache.TapeCache(self.cache_dir)
+        key = cache.cache_key(self.tape_path, self.header_map)
+        self.assertEqual(key, cache.cache_key(self.tape_path, dict(reversed(list(self.header_map.items())))))
+        self.assertNotEqual(key, cache.cache_key(self.tape_path, {'State': 'state'}))
+        self.assertNotEqual(key, cache.cache_key(self.tape_path, self.header_map, index_col=None))
+
+    def test_cache_hit_skips_parse_and_refresh(self):
+        tapetools.import_raw_datatape(self.tape_path, self.header_map, cache=self.cache_dir)
+        original_read = tapetools._read_tape_file
+        tapetools._read_tape_file = None
+        try:
+            cached = tapetools.import_raw_datatape(self.tape_path, self.header_map, cache=self.cache_dir)
+            with self.assertRaises(TypeError):
+                tapetools.import_raw_datatape(self.tape_path, self.header_map, cache=self.cache_dir,
+                                              refresh_cache=True)
+        finally:
+            tapetools._read_tape_file = original_read
+        pd.testing.assert_frame_equal(cached, tapetools.import_raw_datatape(self.tape_path, self.header_map))
+
+    def test_chunked_load_writes_and_reads_cache(self):
+        cache = tapecache.TapeCache(self.cache_dir)
+        first = list(tapetools.iter_raw_datatape(self.tape_path, self.header_map, chunksize=200, cache=cache))
+        self.assertTrue(cache.contains(cache.cache_key(self.tape_path, self.header_map)))
+        second = list(tapetools.iter_raw_datatape(self.tape_path, self.header_map, chunksize=200, cache=cache))
+        self.assertEqual([chunk.shape[0] for chunk in second], [200, 200, 100])
+        pd.testing.assert_frame_equal(pd.concat(second), pd.concat(first))
+
+    def config_data(self):
+        config_path = os.path.join(self.temp_dir.name, 'config.csv')
+        header = list(tapetools.config.AssetVariableConfig._required_config_fields.keys())
+        rows = [['prop_state', 'categorical', 'strs', 'enum', '', '(CA, TX, FL)', '', 'TRUE', 'unique_value',
+                 'summary', 'TRUE', 'TRUE', 'TRUE'],
+                ['bal_curr', 'numeric', 'floats', 'np.float128', '', 'FLOAT>=0', '', 'FALSE', 'None', 'None', 'TRUE',
+                 'TRUE', 'FALSE'],
+                ['rate_curr', 'numeric', 'floats', 'np.float128', '', 'FLOAT>=0', '', 'FALSE', 'None', 'None', 'TRUE',
+                 'TRUE', 'FALSE']]
+        with open(config_path, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(header)
+            for row in rows:
+                writer.writerow(row + ['FALSE'] * (len(header) - len(row)))
+        return tapetools.config.AssetVariableConfig(config_path)
+
+    def test_chunked_clean_caches_unlisted_categories(self):
+        config_data = self.config_data()
+        # each chunk has different categories, which an Arrow IPC file can not hold as one dictionary
+        self.tape.loc[10, 'State'] = 'XX'
+        self.tape.loc[450, 'State'] = 'YY'
+        self.tape.to_csv(self.tape_path, index=False)
+        cache = tapecache.TapeCache(self.cache_dir)
+        first = list(tapetools.iter_raw_datatape(self.tape_path, self.header_map, chunksize=200,
+                                                 config_data=config_data, cache=cache))
+        key = cache.cache_key(self.tape_path, self.header_map, config_data=config_data)
+        self.assertTrue(cache.contains(key))
+        cached = cache.load(key)
+        self.assertEqual(str(cached['prop_state'].dtype), 'category')
+        self.assertEqual(cached['prop_state'].tolist(), [value for chunk in first for value in chunk['prop_state']])
+        second = list(tapetools.iter_raw_datatape(self.tape_path, self.header_map, chunksize=200,
+                                                  config_data=config_data, cache=cache))
+        self.assertEqual(str(pd.concat(second)['prop_state'].dtype), 'category')
+        self.assertEqual(set(pd.concat(second)['prop_state'].cat.categories), {'CA', 'TX', 'FL', 'XX', 'YY'})
+
+    def test_chunked_read_does_not_share_compact_entry(self):
+        config_data = self.config_data()
+        cache = tapecache.TapeCache(self.cache_dir)
+        # chunked reads do not compact dtypes, so they must not be loaded by a whole read with compact_dtypes=True
+        self.tape['Rate'] = np.arange(500) / 8
+        self.tape.to_csv(self.tape_path, index=False)
+        header_map = {**self.header_map, 'Rate': 'rate_curr'}
+        chunks = list(tapetools.iter_raw_datatape(self.tape_path, header_map, chunksize=200, config_data=config_data,
+                                                  compact_dtypes=True, cache=cache))
+        self.assertEqual(chunks[0]['rate_curr'].dtype, np.float64)
+        cached = tapetools.import_raw_datatape(self.tape_path, header_map, config_data=config_data,
+                                               compact_dtypes=True, cache=cache)
+        self.assertEqual(cached['rate_curr'].dtype, np.float32)
+        pd.testing.assert_frame_equal(cached, tapetools.import_raw_datatape(self.tape_path, header_map,
+                                                                            config_data=config_data,
+                                                                            compact_dtypes=True))
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+
+    def test_concurrent_writers_of_one_key(self):
+        cache = tapecache.TapeCache(self.cache_dir)
+        chunks = [self.tape.iloc[start:start + 200] for start in range(0, 500, 200)]
+        writers = [cache.store_chunks('tape', iter(chunks)), cache.store_chunks('tape', iter(chunks))]
+        for _ in chunks:
+            for writer in writers:
+                next(writer)
+        for writer in writers:
+            self.assertEqual(list(writer), [])
+        pd.testing.assert_frame_equal(cache.load('tape'), self.tape)
+        self.assertEqual(os.listdir(self.cache_dir), [os.path.basename(cache.cache_path('tape'))])
+
+    def test_partial_chunked_read_is_not_cached(self):
+        cache = tapecache.TapeCache(self.cache_dir)
+        chunks = tapetools.iter_raw_datatape(self.tape_path, self.header_map, chunksize=200, cache=cache)
+        next(chunks)
+        chunks.close()
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_lru_eviction(self):
+        cache = tapecache.TapeCache(self.cache_dir)
+        for key in ('a', 'b', 'c'):
+            cache.store(key, self.tape)
+            time.sleep(0.01)
+        entry_size = os.path.getsize(cache.cache_path('a'))
+        cache.load('a')
+        cache.max_size_bytes = entry_size * 2
+        self.assertEqual(cache.evict(), ['b'])
+        self.assertTrue(cache.contains('a') and cache.contains('c'))
+        cache.invalidate()
+        self.assertEqual(cache.size_bytes, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,410 @@
+import unittest
+import os
+import tempfile
+import sqlite3
+import numpy as np
+import numpy_financial as npf
+import pandas as pd
+import tapetools
+
+
+class TestIterRawDatatape(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.tape_path = os.path.join(self.temp_dir.name, 'tape.csv')
+        rng = np.random.default_rng(11)
+        self.tape = pd.DataFrame({
+            'LoanID': np.arange(1, 1001),
+            'CurrentBalance': rng.uniform(1000, 500000, size=1000).round(2),
+            'State': rng.choice(['CA', 'TX', 'FL'], size=1000)
+        })
+        self.tape.to_csv(self.tape_path, index=False)
+        self.header_map = {'CurrentBalance': 'bal_curr', 'State': 'prop_state'}
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_chunks_match_full_import(self):
+        full = tapetools.import_raw_datatape(self.tape_path, self.header_map)
+        chunks = list(tapetools.iter_raw_datatape(self.tape_path, self.header_map, chunksize=300))
+        self.assertEqual([chunk.shape[0] for chunk in chunks], [300, 300, 300, 100])
+        self.assertTrue(all(list(chunk.columns) == ['bal_curr', 'prop_state'] for chunk in chunks))
+        pd.testing.assert_frame_equal(pd.concat(chunks), full)
+
+    def test_import_with_chunksize_returns_generator(self):
+        chunks = tapetools.import_raw_datatape(self.tape_path, self.header_map, chunksize=400)
+        self.assertFalse(isinstance(chunks, pd.DataFrame))
+        self.assertEqual(sum(chunk.shape[0] for chunk in chunks), 1000)
+
+    def test_header_map_file(self):
+        header_path = os.path.join(self.temp_dir.name, 'header.csv')
+        pd.DataFrame({'raw_field': list(self.header_map.keys()), 'mapped_field': list(self.header_map.values())}
+                     ).to_csv(header_path, index=False)
+        chunk = next(tapetools.iter_raw_datatape(self.tape_path, header_path, chunksize=10))
+        self.assertEqual(list(chunk.columns), ['bal_curr', 'prop_state'])
+
+    def test_sql_query(self):
+        connection = sqlite3.connect(':memory:')
+        self.tape.to_sql('Tape', connection, index=False)
+        query = "sql_query=SELECT CurrentBalance, State FROM Tape WHERE State = 'CA'"
+        full = tapetools.import_raw_datatape(query, self.header_map, db_connection_string=connection)
+        expected = self.tape[self.tape['State'] == 'CA'].rename(columns=self.header_map)
+        pd.testing.assert_frame_equal(full, expected[['bal_curr', 'prop_state']].reset_index(drop=True))
+        chunks = list(tapetools.iter_raw_datatape(query, self.header_map, chunksize=100, db_connection=connection))
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), full)
+        with self.assertRaises(ValueError):
+            tapetools.import_raw_datatape(query, self.header_map)
+
+    def test_header_index(self):
+        header_index = tapetools.headermap.HeaderIndex(fields=['bal_curr', 'prop_state', 'rate_curr'])
+        header_index.add_header_map({'State': 'prop_state'})
+        full = tapetools.import_raw_datatape(self.tape_path, header_index)
+        self.assertEqual(list(full.columns), ['bal_curr', 'prop_state'])
+        chunk = next(tapetools.iter_raw_datatape(self.tape_path, header_index, chunksize=10))
+        self.assertEqual(list(chunk.columns), ['bal_curr', 'prop_state'])
+
+
+class TestChunkedSummary(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.tape = pd.DataFrame({
+            'bal_curr': rng.uniform(1000, 500000, size=2000),
+            'term_rem': rng.integers(1, 360, size=2000).astype(float),
+            'prop_state': rng.choice(['CA', 'TX', 'FL', None], size=2000)
+        })
+        self.tape.loc[::11, 'bal_curr'] = np.nan
+
+    def chunks(self, size=333):
+        return (self.tape.iloc[i:i + size] for i in range(0, self.tape.shape[0], size))
+
+    def test_summarize_tape_chunks(self):
+        full = tapetools.summarize_tape(self.tape)
+        chunked = tapetools.summarize_tape(self.chunks())
+        for column in ('count', 'mean', 'median', 'min', 'quart1', 'quart2', 'quart3', 'max', 'missing', 'missing_pct'):
+            np.testing.assert_allclose(chunked[column].to_numpy(dtype=float), full[column].to_numpy(dtype=float))
+        self.assertEqual(chunked.loc['term_rem', 'unique_num'], full.loc['term_rem', 'unique_num'])
+        self.assertTrue(np.isnan(chunked.loc['bal_curr', 'unique_num']))
+
+    def test_summarize_unique_values_chunks(self):
+        full = tapetools.summarize_unique_values(self.tape)
+        chunked = tapetools.summarize_unique_values(self.chunks())
+        self.assertEqual(list(chunked.loc['prop_state', 'unique_values']), list(full.loc['prop_state', 'unique_values']))
+        self.assertEqual(list(chunked.loc['term_rem', 'unique_values']), list(full.loc['term_rem', 'unique_values']))
+        self.assertEqual(chunked.loc['bal_curr', 'unique_values'], '')
+
+    def test_top_unique_values(self):
+        tape = pd.DataFrame({'fico': np.repeat(np.arange(600, 640), np.arange(1, 41))[::-1]})
+        unique_values = tapetools.summarize_unique_values(tape).loc['fico', 'unique_values']
+        self.assertEqual(unique_values, list(range(639, 614, -1)))
+
+    def test_sketch_summary(self):
+        full = tapetools.summarize_tape(self.tape)
+        sketched = tapetools.summarize_tape(self.chunks(), exact=False)
+        for column in ('count', 'min', 'max', 'missing', 'missing_pct'):
+            np.testing.assert_allclose(sketched[column].to_numpy(dtype=float), full[column].to_numpy(dtype=float))
+        for column in ('mean', 'median', 'quart1', 'quart2', 'quart3'):
+            np.testing.assert_allclose(sketched[column].to_numpy(dtype=float), full[column].to_numpy(dtype=float),
+                                       rtol=0.02)
+        np.testing.assert_allclose(sketched['unique_num'].to_numpy(dtype=float),
+                                   full['unique_num'].to_numpy(dtype=float), rtol=0.03)
+        self.assertEqual(set(sketched.loc['prop_state', 'unique_values']), {'CA', 'TX', 'FL'})
+        self.assertEqual(sketched.loc['bal_curr', 'unique_values'], '')
+        in_memory = tapetools.summarize_tape(self.tape, exact=False)
+        self.assertEqual(in_memory.loc['term_rem', 'unique_num'], sketched.loc['term_rem', 'unique_num'])
+
+
+    def test_merge_matches_single_pass(self):
+        for exact in (True, False):
+            single = tapetools.TapeSummaryAccumulator(exact=exact).update_all(self.chunks())
+            chunks = list(self.chunks())
+            first = tapetools.TapeSummaryAccumulator(exact=exact).update_all(chunks[:3])
+            second = first.empty_copy().update_all(chunks[3:])
+            merged = first.merge(second).summarize_tape()
+            expected = single.summarize_tape()
+            for column in ('count', 'mean', 'min', 'max', 'missing', 'unique_num'):
+                np.testing.assert_allclose(merged[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+                                           err_msg=f'{column} exact={exact}')
+            self.assertEqual(set(merged.loc['prop_state', 'unique_values']), {'CA', 'TX', 'FL'})
+            np.testing.assert_allclose(merged['median'].to_numpy(dtype=float), expected['median'].to_numpy(dtype=float),
+                                       rtol=0.05)
+
+    def test_int_and_float_chunks(self):
+        # read_csv gives an integer column as float in a chunk with a missing value
+        chunks = [pd.DataFrame({'term_rem': [1, 2, 3, 4]}), pd.DataFrame({'term_rem': [1.0, 2.0, np.nan, 4.0]})]
+        expected = tapetools.summarize_tape(pd.concat(chunks, ignore_index=True))
+        for exact in (True, False):
+            summary = tapetools.TapeSummaryAccumulator(exact=exact).update_all(chunks).summarize_tape()
+            self.assertEqual(summary.loc['term_rem', 'unique_num'], 4, msg=exact)
+            self.assertEqual(summary.loc['term_rem', 'type'], np.float64)
+            self.assertEqual(summary.loc['term_rem', 'mean'], expected.loc['term_rem', 'mean'])
+
+    def test_merge_mismatched_modes(self):
+        with self.assertRaises(ValueError):
+            tapetools.TapeSummaryAccumulator(exact=True).merge(tapetools.TapeSummaryAccumulator(exact=False))
+
+    def test_save_and_load(self):
+        accumulator = tapetools.TapeSummaryAccumulator(exact=False).update_all(self.chunks())
+        with tempfile.TemporaryDirectory() as temp_dir:
+            profile_path = os.path.join(temp_dir, 'profile.pkl')
+            accumulator.save(profile_path)
+            loaded = tapetools.TapeSummaryAccumulator.load(profile_path)
+        pd.testing.assert_frame_equal(loaded.summarize_tape(), accumulator.summarize_tape())
+
+
+class TestProfileTapeFiles(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(13)
+        self.tape = pd.DataFrame({'LoanID': np.arange(1, 3001),
+                                  'bal_curr': rng.uniform(1000, 500000, size=3000).round(2),
+                                  'prop_state': rng.choice(['CA', 'TX', 'FL'], size=3000)})
+        self.paths = []
+        for i in range(3):
+            path = os.path.join(self.temp_dir.name, f'tape_{i}.csv')
+            self.tape.iloc[i * 1000:(i + 1) * 1000].to_csv(path, index=False)
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_profile_files_matches_full_tape(self):
+        full = tapetools.summarize_tape(self.tape.set_index('LoanID'))
+        for max_workers in (1, 2):
+            profile = tapetools.profile_tape_files(self.paths, max_workers=max_workers, chunksize=400)
+            summary = profile.summarize_tape()
+            for column in ('count', 'mean', 'min', 'max'):
+                np.testing.assert_allclose(summary[column].to_numpy(dtype=float), full[column].to_numpy(dtype=float))
+            np.testing.assert_allclose(summary['unique_num'].to_numpy(dtype=float),
+                                       full['unique_num'].to_numpy(dtype=float), rtol=0.03)
+
+    def test_add_files_to_saved_profile(self):
+        profile = tapetools.profile_tape_files(self.paths[:2], max_workers=1)
+        updated = tapetools.profile_tape_files(self.paths[2:], accumulator=profile, max_workers=1)
+        self.assertEqual(updated.rows, 3000)
+        self.assertEqual(updated.summarize_tape().loc['bal_curr', 'max'], self.tape['bal_curr'].max())
+
+
+class TestCompactTape(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        self.tape = pd.DataFrame({
+            'term_rem': pd.Series(rng.integers(1, 360, size=1000), dtype='Int64'),
+            'rate_curr': rng.choice([3.5, 4.125, 6.25, np.nan], size=1000),
+            'bal_curr': rng.uniform(1000, 500000, size=1000),
+            'prop_state': pd.Series(rng.choice(['CA', 'TX', 'FL', None], size=1000), dtype=object),
+            'asset_id': [f'L{i:06d}' for i in range(1000)]
+        })
+        self.tape.loc[::7, 'term_rem'] = pd.NA
+
+    def test_compact_tape_values(self):
+        compact = tapetools.compact_tape(self.tape.copy())
+        self.assertEqual(compact['term_rem'].dtype, pd.Int16Dtype())
+        self.assertEqual(compact['rate_curr'].dtype, np.float32)
+        self.assertEqual(compact['bal_curr'].dtype, np.float64)
+        self.assertIsInstance(compact['prop_state'].dtype, pd.CategoricalDtype)
+        self.assertEqual(compact['asset_id'].dtype, object)
+        for field in self.tape.columns:
+            self.assertTrue(compact[field].isna().equals(self.tape[field].isna()), msg=field)
+            np.testing.assert_array_equal(compact[field].astype(object).dropna().to_numpy(),
+                                          self.tape[field].astype(object).dropna().to_numpy())
+
+    def test_memory_report(self):
+        compact = tapetools.compact_tape(self.tape.copy())
+        report = tapetools.tape_memory_report(self.tape, compact)
+        self.assertEqual(list(report.index), list(self.tape.columns) + ['total'])
+        self.assertEqual(report.loc['total', 'bytes'], self.tape.memory_usage(index=False, deep=True).sum())
+        self.assertGreater(report.loc['total', 'ratio'], 1.5)
+        self.assertEqual(report.loc['term_rem', 'compact_type'], 'Int16')
+
+
+class TestCheckTapeIntegrity(unittest.TestCase):
+    def setUp(self):
+        self.tape = pd.DataFrame({
+            'bal_curr': [179000.0, 179000.0, 100000.0, 250000.0],
+            'rate_curr': [6.0, 6.0, 5.0, 4.5],
+            'pmt_curr': [1073.20, 1500.00, 536.82, np.nan],
+            'term_orig': [360, 360, 360, 360],
+            'term_age': [0, 10, 0, 12],
+            'term_rem': [360, 350, 360, 300],
+            'term_promo': [0, 0, 0, 0],
+            'term_io': [0, 120, 0, 0],
+            'term_amort': [360, 360, 300, 360],
+            'term_origdate': pd.to_datetime(['2024-04-15', '2023-06-10', '2024-04-20', '2023-04-01']),
+            'pmt_date_firstpay': pd.to_datetime(['2024-06-01', '2023-08-01', '2024-06-01', '2023-06-01']),
+            'term_matdate': pd.to_datetime(['2054-05-01', '2053-07-01', '2054-05-01', '2053-05-01']),
+            'cutoffdate': pd.to_datetime(['2024-06-01'] * 4),
+            'uw_doctype': ['Full', 'nina', 'siva', None],
+            'uw_inc_verify': [8000.0, 5000.0, 3000.0, 4000.0]
+        }, index=['a', 'b', 'c', 'd'])
+
+    def test_exceptions(self):
+        exceptions, pool = tapetools.check_tape_integrity(self.tape)
+        self.assertEqual(sorted(zip(exceptions.index, exceptions['rule'])),
+                         [('b', 'doc_income'), ('b', 'pmt_calculation'),
+                          ('b', 'term_structure'), ('c', 'doc_income'), ('c', 'term_structure'),
+                          ('d', 'rem_term_dates'), ('d', 'term_age')])
+        self.assertEqual(pool.loc['pmt_calculation', 'evaluated'], 3)
+        self.assertEqual(pool.loc['doc_income', 'evaluated'], 3)
+        self.assertEqual(pool.loc['orig_term_dates', 'failed'], 0)
+        self.assertAlmostEqual(pool.loc['term_structure', 'failed_pct'], 0.5)
+        self.assertFalse(pool.loc['term_structure', 'passed'])
+        self.assertTrue(pool.loc['date_order', 'passed'])
+        self.assertEqual(exceptions.loc[exceptions['rule'] == 'term_age', 'value'].iloc[0], 48)
+
+    def test_missing_fields_and_rule_selection(self):
+        exceptions, pool = tapetools.check_tape_integrity(self.tape[['term_orig', 'term_age', 'term_rem']])
+        self.assertEqual(list(pool.index), ['term_age'])
+        exceptions, pool = tapetools.check_tape_integrity(self.tape, ['pmt_calculation'], pmt_threshold_pct=0.5)
+        self.assertEqual(list(pool.index), ['pmt_calculation'])
+        self.assertEqual(len(exceptions), 0)
+
+    def test_balloon_flag(self):
+        tape = self.tape.assign(flag_balloon=[0, 1, 0, 0])
+        exceptions, _ = tapetools.check_tape_integrity(tape, ['term_structure'])
+        self.assertEqual(list(exceptions.index), ['c'])
+
+    def test_array_checks(self):
+        self.assertEqual(tapetools.check_pmt_calculation(np.array([1073.20, 1500.0]), 0.005, 360, 179000.0),
+                         (False, 0.5, 0.5))
+        self.assertEqual(tapetools.check_term_consistency(360, 0, 0, 360, 10, 350, None), (True, 0.0, 0.0))
+        self.assertEqual(tapetools.check_orig_term_and_dates(360, '2024-04-15', '2024-06-01', '2054-05-01'),
+                         (True, 0.0))
+        self.assertEqual(tapetools.check_orig_term_and_dates(30, '2024-04-15', '2024-06-01', '2054-05-01', 'years'),
+                         (True, 0.0))
+        with self.assertRaises(ValueError):
+            tapetools.check_orig_term_and_dates(360, '2024-04-15', '2024-06-01', '2054-05-01', 'weeks')
+        self.assertEqual(tapetools.check_rem_term_and_dates([360, 300], '2024-04-15', '2024-06-01',
+                                                            ['2054-05-01', '2054-05-01'], '2024-06-01'), (False, 0.5))
+
+    def test_pmt_calculation_units(self):
+        # original_rate is the periodic decimal rate of npf.pmt
+        stated_pmt = -npf.pmt(0.005, 360, 179000.0)
+        self.assertEqual(tapetools.check_pmt_calculation(stated_pmt, 0.005, 360, 179000.0), (True, 0.0, 0.0))
+        self.assertEqual(tapetools.check_pmt_calculation(stated_pmt, 0.06, 360, 179000.0), (False, 1.0, 1.0))
+        self.assertEqual(tapetools.check_doc_types(['full', 'siva'], [5000.0, np.nan]), (True, 0.0))
+
+
+class TestValidateTape(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        config_path = os.path.join(self.temp_dir.name, 'config.csv')
+        header = list(tapetools.config.AssetVariableConfig._required_config_fields.keys())
+        rows = [['asset_id', 'UniqueID', 'strs', 'str', '', 'NA', '', 'FALSE', 'None', 'None', 'TRUE', 'TRUE'],
+                ['prop_state', 'Categorical', 'strs', 'str', '', '(CA, TX, FL)', '', 'FALSE', 'None', 'None', 'TRUE',
+                 'TRUE'],
+                ['bal_curr', 'Numeric', 'floats', 'np.float64', '', 'FLOAT>=0', '', 'FALSE', 'None', 'None', 'TRUE',
+                 'TRUE'],
+                ['term_rem', 'Numeric', 'ints', 'np.int64', '', 'INT>0', '', 'FALSE', 'None', 'None', 'FALSE',
+                 'TRUE']]
+        pd.DataFrame([row + [''] * (len(header) - len(row)) for row in rows], columns=header).to_csv(config_path,
+                                                                                                    index=False)
+        self.config_data = tapetools.config.AssetVariableConfig()
+        self.config_data.config_file = config_path
+        self.config_data.load_config()
+        rng = np.random.default_rng(9)
+        self.tape = pd.DataFrame({'asset_id': [f'L{i:05d}' for i in range(1000)],
+                                  'prop_state': pd.Series(rng.choice(['CA', 'TX', 'FL'], 1000), dtype='category'),
+                                  'bal_curr': rng.uniform(1000, 50000, 1000)})
+        self.tape.loc[[10, 500], 'bal_curr'] = -5.0
+        self.tape['prop_state'] = self.tape['prop_state'].cat.add_categories(['ZZ'])
+        self.tape.loc[20, 'prop_state'] = 'ZZ'
+        self.tape.loc[999, 'asset_id'] = 'L00000'
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_lazy(self):
+        failures, timings = tapetools.validate_tape(self.tape, config_data=self.config_data)
+        self.assertEqual(sorted(zip(failures['column'], failures['check'], failures['index'])),
+                         [('asset_id', 'unique', 0), ('asset_id', 'unique', 999),
+                          ('bal_curr', 'greater_than_or_equal_to', 10), ('bal_curr', 'greater_than_or_equal_to', 500),
+                          ('prop_state', 'isin', 20)])
+        self.assertEqual(timings.loc[('bal_curr', 'greater_than_or_equal_to'), 'failures'], 2)
+        self.assertEqual(timings.loc[('bal_curr', 'dtype_floats'), 'rows'], 1000)
+
+    def test_required_asset_class_fields(self):
+        failures, _ = tapetools.validate_tape(self.tape, config_data=self.config_data, asset_class='consumer_auto')
+        missing = failures[failures['check'] == 'column_in_dataframe']
+        self.assertEqual(list(missing['column']), ['term_rem'])
+
+    def test_sample_and_chunked(self):
+        failures, timings = tapetools.validate_tape(self.tape, config_data=self.config_data, mode='sample',
+                                                    sample_size=100, seed=1)
+        self.assertEqual(timings['rows'].max(), 100)
+        self.assertTrue(failures['index'].isin(self.tape.index).all())
+        chunked_failures, timings = tapetools.validate_tape(self.tape, config_data=self.config_data, mode='chunked',
+                                                            chunksize=300)
+        self.assertEqual(timings.loc[('bal_curr', 'dtype_floats'), 'rows'], 1000)
+        lazy_failures = tapetools.validate_tape(self.tape, config_data=self.config_data)[0]
+        # the duplicate asset_ids are in different chunks
+        self.assertEqual(len(chunked_failures), len(lazy_failures) - 2)
+        self.assertEqual(list(tapetools.validate_tape(iter([self.tape.iloc[:500], self.tape.iloc[500:]]),
+                                                      config_data=self.config_data, mode='chunked')[0]['index']),
+                         [20, 10, 500])
+
+
+class TestNormalizers(unittest.TestCase):
+    def test_standardize_state(self):
+        self.assertEqual(tapetools.standardize_state(' california '), 'CA')
+        self.assertEqual(tapetools.standardize_state('tx'), 'TX')
+        self.assertEqual(tapetools.standardize_state('zz'), 'ZZ')
+        self.assertIsNone(tapetools.standardize_state(None))
+        states = pd.Series(['CA', 'California', 'ny', None, 'n/a', 'Puerto Rico'], index=list('abcdef'), name='state')
+        standardized = tapetools.standardize_state_array(states)
+        self.assertEqual(standardized.tolist(), ['CA', 'CA', 'NY', None, None, 'PR'])
+        self.assertEqual(list(standardized.index), list('abcdef'))
+        self.assertEqual(standardized.name, 'state')
+        categorical = tapetools.standardize_state_array(states, as_category=True)
+        self.assertEqual(list(categorical.cat.categories), ['CA', 'NY', 'PR'])
+        self.assertEqual(categorical.astype(object).where(categorical.notna(), None).tolist(), standardized.tolist())
+
+    def test_flags_and_products(self):
+        self.assertEqual(tapetools.flag_normalizer(pd.Series(['Y', 'no', '1', 'maybe', None, True])).tolist(),
+                         [True, False, True, pd.NA, pd.NA, True])
+        products = ['30 Yr Fixed', 'FRM30', '15 Year Fixed', '5/1 ARM', '7/1 ARM IO', 'Balloon 15/30', 'HELOC',
+                    'Other Product']
+        self.assertEqual(tapetools.product_normalizer(products).tolist(),
+                         ['fixed_30', 'fixed_30', 'fixed_15', 'arm_5_1', 'arm_7_1_io', 'balloon_15_30', 'heloc',
+                          'other_product'])
+
+    def test_standardize_doctypes(self):
+        self.assertEqual(tapetools.standardize_doctypes('Full Doc'), ('full', 'verified', 'verified', 'verified'))
+        self.assertEqual(tapetools.standardize_doctypes('none'), ('no_doc', 'none', 'none', 'none'))
+        self.assertEqual(tapetools.standardize_doctypes(None, 'Stated', 'Verified', 'Verbal'),
+                         ('siva', 'stated', 'verified', 'verbal'))
+        self.assertIsNone(tapetools.standardize_doctypes('unknown')[0])
+        standardized = tapetools.standardize_doctypes_array(pd.Series(['Full Doc', 'SIVA', None, 'Full Doc']),
+                                                            income_type=[None, None, 'stated', None],
+                                                            asset_type=[None, None, 'stated', None])
+        self.assertEqual(standardized['uw_doctype'].tolist(), ['full', 'siva', 'sisa', 'full'])
+        self.assertEqual(standardized['asset_verify'].tolist(), ['verified', 'verified', 'stated', 'verified'])
+
+    def test_normalize_tape_fields(self):
+        tape = pd.DataFrame({'prop_state': ['Texas', 'tx'], 'uw_doctype': ['Low Doc', 'NINA'], 'bal_curr': [1.0, 2.0]})
+        tapetools.normalize_tape_fields(tape)
+        self.assertEqual(tape['prop_state'].tolist(), ['TX', 'TX'])
+        self.assertEqual(tape['uw_doctype'].tolist(), ['alt_doc', 'nina'])
+
+
+class TestScheduleBuffers(unittest.TestCase):
+    def test_schedule_buffers(self):
+        ramps = pd.Series(['2 for 3', None, '1 ramp 3'])
+        schedules = tapetools.config.AssetVariableConfig.read_ramp_to_array_column(ramps)
+        values, offsets = tapetools.schedule_buffers(schedules)
+        np.testing.assert_array_equal(values, [2, 2, 2, 1, 2, 3])
+        np.testing.assert_array_equal(offsets, [0, 3, 3, 6])
+        values, offsets = tapetools.schedule_buffers(schedules.iloc[2:])
+        np.testing.assert_array_equal(values[offsets[0]:offsets[1]], [1, 2, 3])
+        # a concat of chunks is a column of several Arrow chunks
+        combined = pd.concat([schedules.iloc[1:], schedules], ignore_index=True)
+        values, offsets = tapetools.schedule_buffers(combined)
+        self.assertEqual(len(offsets), len(combined) + 1)
+        self.assertEqual([values[offsets[i]:offsets[i + 1]].tolist() for i in range(len(combined))],
+                         [[], [1, 2, 3], [2, 2, 2], [], [1, 2, 3]])
+        values, offsets = tapetools.schedule_buffers(pd.Series([np.array([1., 2.]), None, np.array([3.])]))
+        np.testing.assert_array_equal(values, [1, 2, 3])
+        np.testing.assert_array_equal(offsets, [0, 2, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
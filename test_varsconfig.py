@@ -2,9 +2,11 @@ import unittest
 import os
 import datetime
 import numpy as np
+import pandas as pd
 import pathlib
 import contextlib
 import csv
+import tempfile
 import varsconfig
 #import CFEngine.cmutils.sysutils as sysutils
 
@@ -424,6 +426,152 @@ class TestConvertDates(unittest.TestCase):
             self.assertIsInstance(varsconfig.AssetVariableConfig.convert_dates(var), type(None))
 
 
+class TestColumnConverters(unittest.TestCase):
+    def setUp(self):
+        self.test_vars = ['NONE', ' na', 'NaN', 'N/A', 'null', '', ' ', None, np.nan,
+                          'TRUE', ' Yes', 'y', 'T', '1', 'FALSE', 'no ', 'N', 'f', '0',
+                          '12%', '12.65%', '%12', '12%12 ', '12.00 %',
+                          '$10,000.65', ' £10,000.50', '€10,000.55 €', '10bps', 'bps10', '10 bps',
+                          '2.65', '3.50', '1,234.5', 'this is a string',
+                          0, 1, 7, 0.0, 1.0, 2.5, True, False,
+                          datetime.date(1982, 4, 13), datetime.datetime(1982, 4, 13, 12, 8, 45), ['a', 'b'], ('a',)]
+        self.series = pd.Series(self.test_vars, dtype=object)
+
+    @staticmethod
+    def _unwrap(value):
+        if value is None or (not isinstance(value, (list, tuple)) and pd.isna(value)):
+            return None
+        elif isinstance(value, pd.Timestamp):
+            return value.date()
+        else:
+            return value
+
+    def assert_matches_scalar(self, scalar_converter, column_converter, series, **kwargs):
+        result = column_converter(series, **kwargs)
+        self.assertEqual(len(result), len(series))
+        self.assertTrue(result.index.equals(series.index))
+        for var, value in zip(series, result):
+            expected = scalar_converter(var, *kwargs.values())
+            if isinstance(expected, (float, np.floating)):
+                self.assertAlmostEqual(self._unwrap(value), float(expected), msg=repr(var))
+            else:
+                self.assertEqual(self._unwrap(value), expected, msg=repr(var))
+
+    def test_bools_array(self):
+        self.assert_matches_scalar(varsconfig.AssetVariableConfig.convert_bools,
+                                   varsconfig.AssetVariableConfig.convert_bools_array, self.series)
+        self.assertEqual(str(varsconfig.AssetVariableConfig.convert_bools_array(self.series).dtype), 'boolean')
+
+    def test_ints_array(self):
+        self.assert_matches_scalar(varsconfig.AssetVariableConfig.convert_ints,
+                                   varsconfig.AssetVariableConfig.convert_ints_array, self.series)
+        self.assertEqual(str(varsconfig.AssetVariableConfig.convert_ints_array(self.series).dtype), 'Int64')
+        self.assertEqual(str(varsconfig.AssetVariableConfig.convert_ints_array(self.series, np.short).dtype), 'Int16')
+
+    def test_floats_array(self):
+        self.assert_matches_scalar(varsconfig.AssetVariableConfig.convert_floats,
+                                   varsconfig.AssetVariableConfig.convert_floats_array, self.series)
+
+    def test_strs_array(self):
+        self.assert_matches_scalar(varsconfig.AssetVariableConfig.convert_strs,
+                                   varsconfig.AssetVariableConfig.convert_strs_array, self.series)
+
+    def test_dates_array(self):
+        self.assert_matches_scalar(varsconfig.AssetVariableConfig.convert_dates,
+                                   varsconfig.AssetVariableConfig.convert_dates_array, self.series)
+        numbers = pd.Series([30054, 30054.75, 19820413, 1982413, 20230230, 59, 60, 61, np.nan])
+        self.assert_matches_scalar(varsconfig.AssetVariableConfig.convert_dates,
+                                   varsconfig.AssetVariableConfig.convert_dates_array, numbers)
+        strings = pd.Series(['04/13/1982', '13/04/1982', None, 'n/a'], index=[3, 3, 1, 0])
+        self.assert_matches_scalar(varsconfig.AssetVariableConfig.convert_dates,
+                                   varsconfig.AssetVariableConfig.convert_dates_array, strings, dt_format='%m/%d/%Y')
+
+    def test_date_parser_matches_strptime(self):
+        values = ['01/15/2023', '1/5/23', '2/29/2023', '02/29/2024', '15-jan-2023', '2023-01-15 23:59:59',
+                  '2023-01-15 24:00:00', ' 2023-01-15', 'Jan 05, 2023']
+        for dt_format in ('%m/%d/%Y', '%m/%d/%y', '%d-%b-%Y', '%Y-%m-%d %H:%M:%S', '%b %d, %Y'):
+            parsed = varsconfig.AssetVariableConfig.date_parser(dt_format)(pd.Series(values))
+            for value, date in zip(values, parsed):
+                try:
+                    expected = datetime.datetime.strptime(value, dt_format).date()
+                except ValueError:
+                    expected = None
+                self.assertEqual(None if np.isnat(date) else date.astype(object), expected, msg=(dt_format, value))
+        self.assertIs(varsconfig.AssetVariableConfig.date_parser('%m/%d/%Y'),
+                      varsconfig.AssetVariableConfig.date_parser('%m/%d/%Y'))
+
+    def test_parse_dates_array(self):
+        expected = [datetime.date(2023, 1, 15), datetime.date(2021, 2, 3), None, None]
+        for values, encoding in ((['01/15/2023', '2/3/2021', None, 'n/a'], ('text', '%m/%d/%Y')),
+                                 (['15/01/2023', '03/02/2021', None, ' '], ('text', '%d/%m/%Y')),
+                                 (['15-Jan-2023', '03-feb-2021', np.nan, ''], ('text', '%d-%b-%Y')),
+                                 (['20230115', '44230', None, 'null'], ('number', '%Y-%m-%d')),
+                                 ([20230115, 44230, None, np.nan], ('number', '%Y-%m-%d'))):
+            series = pd.Series(values, index=[4, 3, 2, 1])
+            self.assertEqual(varsconfig.AssetVariableConfig.detect_date_encoding(series), encoding)
+            result = varsconfig.AssetVariableConfig.parse_dates_array(series)
+            self.assertTrue(result.index.equals(series.index))
+            self.assertEqual([self._unwrap(value) for value in result], expected, msg=values)
+
+    def test_parse_dates_array_mixed_formats(self):
+        values = pd.Series(['01/15/2021'] * 5 + ['2021-03-04', '20210305', '15-Mar-2021', 'not a date', None])
+        self.assertEqual(varsconfig.AssetVariableConfig.detect_date_encoding(values), ('text', '%m/%d/%Y'))
+        result = [self._unwrap(value) for value in varsconfig.AssetVariableConfig.parse_dates_array(values)]
+        self.assertEqual(result[5], varsconfig.AssetVariableConfig.convert_dates('2021-03-04'))
+        self.assertEqual(result, [datetime.date(2021, 1, 15)] * 5 + [datetime.date(2021, 3, 4), None,
+                                                                       datetime.date(2021, 3, 15), None, None])
+
+    def test_numeric_dtypes(self):
+        floats = pd.Series([0.0, 1.0, 2.4, 2.5, 3.5, np.nan])
+        self.assert_matches_scalar(varsconfig.AssetVariableConfig.convert_ints,
+                                   varsconfig.AssetVariableConfig.convert_ints_array, floats)
+        self.assert_matches_scalar(varsconfig.AssetVariableConfig.convert_floats,
+                                   varsconfig.AssetVariableConfig.convert_floats_array, floats)
+        self.assert_matches_scalar(varsconfig.AssetVariableConfig.convert_bools,
+                                   varsconfig.AssetVariableConfig.convert_bools_array, floats)
+        self.assert_matches_scalar(varsconfig.AssetVariableConfig.convert_strs,
+                                   varsconfig.AssetVariableConfig.convert_strs_array, floats)
+
+    def test_categorical_array(self):
+        strs = varsconfig.AssetVariableConfig.convert_strs_array(self.series)
+        categorical = varsconfig.AssetVariableConfig.convert_categorical_array(self.series)
+        self.assertEqual(str(categorical.dtype), 'category')
+        self.assertEqual([None if pd.isna(x) else x for x in categorical], strs.tolist())
+        self.assertEqual(list(categorical.cat.categories), sorted(strs.dropna().unique()))
+        states = pd.Series(['CA', 'TX', 'null', 'NV', None, 'CA'])
+        categorical = varsconfig.AssetVariableConfig.convert_categorical_array(states, ['TX', 'CA', 'AL', 'CA'])
+        self.assertEqual(list(categorical.cat.categories), ['TX', 'CA', 'AL', 'NV'])
+        self.assertEqual(categorical.cat.codes.tolist(), [1, 0, -1, 3, -1, 1])
+
+    def test_parse_possible_values(self):
+        parse = varsconfig.AssetVariableConfig.parse_possible_values
+        self.assertEqual(parse('(AL, AK, LA ,MA, AK)'), ['AL', 'AK', 'LA', 'MA'])
+        self.assertEqual(parse('True;False'), ['True', 'False'])
+        for text in ('', None, 'NA', '[TBD]', 'INT>0', 'MTG: full; low; none | CONS: full; inc',
+                     '{MTG: (app, bpo), AUTO: (app, kbb)}', '()'):
+            self.assertIsNone(parse(text), msg=text)
+
+    def test_parse_value_bounds(self):
+        parse = varsconfig.AssetVariableConfig.parse_value_bounds
+        self.assertEqual(parse('INT>0'), [('>', 0.0)])
+        self.assertEqual(parse('FLOAT(03)>=0'), [('>=', 0.0)])
+        self.assertEqual(parse('0 <= INT <= 12'), [('>=', 0.0), ('<=', 12.0)])
+        self.assertEqual(parse('INT'), [])
+        self.assertEqual(parse('0 <= INT <=term_orig'), [])
+        self.assertEqual(parse(None), [])
+
+    def test_plan_column_dtype(self):
+        plan = varsconfig.AssetVariableConfig.plan_column_dtype
+        self.assertEqual(plan(pd.Series([0, 360, None], dtype='Int64')), pd.Int16Dtype())
+        self.assertEqual(plan(pd.Series([-5, 100], dtype='Int64')), pd.Int8Dtype())
+        self.assertEqual(plan(pd.Series([0.25, 4.125, np.nan])), np.dtype(np.float32))
+        self.assertEqual(plan(pd.Series([0.1, 4.125])), np.dtype(np.float64))
+        self.assertEqual(plan(pd.Series([np.float64(2.5), None], dtype=object)), np.dtype(np.float32))
+        self.assertEqual(plan(pd.Series(['CA', 'TX', 'CA', 'CA'], dtype=object)), pd.CategoricalDtype())
+        self.assertEqual(plan(pd.Series(['a', 'b', 'c'], dtype=object)), np.dtype(object))
+        self.assertEqual(plan(pd.Series([True, None], dtype='boolean')), pd.BooleanDtype())
+
+
 class TestReadDatesToArray(unittest.TestCase):
     def setUp(self):
         pass
@@ -435,33 +583,77 @@ class TestReadDatesToArray(unittest.TestCase):
         #                               2022-05-15, 2022-06-15, 2022-07-15, 2022-08-15, \
         #                               2022-09-15, 2022-10-15, 2022-11-15, 2022-12-15']
 
+    def test_read_dates_to_array_column(self):
+        values = pd.Series(['2022-01-15; 2022-02-15', None, 'n/a', '04/15/2022;05/15/2022;', '2022-06-15;bad'],
+                           index=list('abcde'))
+        result = varsconfig.AssetVariableConfig.read_dates_to_array_column(values)
+        self.assertTrue(result.index.equals(values.index))
+        self.assertTrue(pd.isna(result['b']))
+        self.assertTrue(pd.isna(result['c']))
+        np.testing.assert_array_equal(np.array(result['a'], dtype='datetime64[D]'),
+                                      np.array(['2022-01-15', '2022-02-15'], dtype='datetime64[D]'))
+        # dates that do not match the format detected for the column are parsed with the other formats
+        np.testing.assert_array_equal(np.array(result['d'], dtype='datetime64[D]'),
+                                      np.array(['2022-04-15', '2022-05-15', 'NaT'], dtype='datetime64[D]'))
+        np.testing.assert_array_equal(np.array(result['e'], dtype='datetime64[D]'),
+                                      np.array(['2022-06-15', 'NaT'], dtype='datetime64[D]'))
+        result = varsconfig.AssetVariableConfig.read_dates_to_array_column(values.iloc[3:4])
+        np.testing.assert_array_equal(np.array(result['d'], dtype='datetime64[D]'),
+                                      np.array(['2022-04-15', '2022-05-15', 'NaT'], dtype='datetime64[D]'))
+
 
 class TestReadRampToArray(unittest.TestCase):
     def setUp(self):
-        # self.test_ramps = ['3 for 10; 5 for 2; 2; 1 ramp 15 for 5; 16, 17',
-        #                    '2 for 20',
-        #                    '20 ramp 1 for 10; 5 for 10',
-        #                    '2,2,2, 3 ramp 10 for 5']
-        #
-        # self.test_lists =  [[3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 5, 5, 2, 2, 1, 1, 1, 1, 1, 1, 1],
-        # self.test_tuples = (1, 2, 3, 4, 5)
-        # self.test_dicts = {'a': 1, 'b': 2, 'c': 3}
-        # self.test_floats = (1.0, 2.0, 3.0, 4.0, 5.0)
-        # self.test_ints = (1, 2, 3, 4, 5)
-        # self.test_str = 'this is an all text string, with commas; and semi-colins'
-        pass
-
-
+        self.test_ramps = ['3 for 10; 5 for 2; 2; 1 ramp 15 for 5; 16, 17',
+                           '2 for 20',
+                           '20 ramp 1 for 10; 5 for 10',
+                           '2,2,2, 3 ramp 10 for 5',
+                           '1 ramp 4',
+                           [1, 2, 3],
+                           (1.5, 2),
+                           7]
+        self.test_lists = [[3] * 10 + [5] * 2 + [2, 1, 4.5, 8, 11.5, 15, 16, 17],
+                           [2] * 20,
+                           list(np.linspace(20, 1, 10)) + [5] * 10,
+                           [2, 2, 2, 3, 4.75, 6.5, 8.25, 10],
+                           [1, 2, 3, 4],
+                           [1, 2, 3],
+                           [1.5, 2],
+                           [7]]
+        self.test_bad = [None, 'n/a', 'this is an all text string, with commas; and semi-colins', '3 for -1',
+                         '1 ramp 1 for 3', {'a': 1}]
+
+    def test_read_ramp_to_array(self):
+        for ramp, expected in zip(self.test_ramps, self.test_lists):
+            np.testing.assert_allclose(varsconfig.AssetVariableConfig.read_ramp_to_array(ramp), expected, rtol=1e-12,
+                                       err_msg=repr(ramp))
+        self.assertIsNone(varsconfig.AssetVariableConfig.read_ramp_to_array(None))
+        for ramp in self.test_bad[2:]:
+            self.assertEqual(varsconfig.AssetVariableConfig.read_ramp_to_array(ramp), 'ramp_error', msg=repr(ramp))
+
+    def test_read_ramp_to_array_column(self):
+        values = pd.Series(self.test_ramps + self.test_bad + self.test_ramps[:2], index=range(30, 46))
+        with contextlib.redirect_stdout(None):
+            result = varsconfig.AssetVariableConfig.read_ramp_to_array_column(values)
+        self.assertTrue(result.index.equals(values.index))
+        for ramp, schedule in zip(values, result):
+            expected = varsconfig.AssetVariableConfig.read_ramp_to_array(ramp)
+            if isinstance(expected, np.ndarray):
+                np.testing.assert_array_equal(np.asarray(schedule, dtype=np.float64), expected)
+            else:
+                self.assertTrue(pd.isna(schedule), msg=repr(ramp))
 
 
 class TestNewAssetVariableConfig(unittest.TestCase):
     def setUp(self):
-        self.config_path_good = pathlib.Path(pathlib.Path(__file__).parent, 'good_config.csv')
-        self.config_path_bad_nofile = pathlib.Path(pathlib.Path(__file__).parent, 'no_config_file.csv')
-        self.config_path_bad_filetype = pathlib.Path(pathlib.Path(__file__).parent, 'bad_filetype_config.txt')
-        self.config_path_bad_header = pathlib.Path(pathlib.Path(__file__).parent, 'bad_header_config.csv')
-        self.config_path_bad_datatypes = pathlib.Path(pathlib.Path(__file__).parent, 'bad_datatypes_config.csv')
-        self.config_path_bad_datavalues = pathlib.Path(pathlib.Path(__file__).parent, 'bad_datavalues_config.csv')
+        # test config files are written to a temporary directory, not next to the package
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.config_path_good = pathlib.Path(self.temp_dir.name, 'good_config.csv')
+        self.config_path_bad_nofile = pathlib.Path(self.temp_dir.name, 'no_config_file.csv')
+        self.config_path_bad_filetype = pathlib.Path(self.temp_dir.name, 'bad_filetype_config.txt')
+        self.config_path_bad_header = pathlib.Path(self.temp_dir.name, 'bad_header_config.csv')
+        self.config_path_bad_datatypes = pathlib.Path(self.temp_dir.name, 'bad_datatypes_config.csv')
+        self.config_path_bad_datavalues = pathlib.Path(self.temp_dir.name, 'bad_datavalues_config.csv')
         self.test_default_config_file = pathlib.Path(pathlib.Path(__file__).parent, 'default_config.csv')
 
         self.config_path_good.touch()
@@ -542,12 +734,7 @@ class TestNewAssetVariableConfig(unittest.TestCase):
 
 
     def tearDown(self):
-        #self.config_path_good.unlink()
-        self.config_path_bad_filetype.unlink()
-        if os.path.exists(self.config_path_bad_header):
-            self.config_path_bad_header.unlink()
-        self.config_path_bad_datatypes.unlink()
-        self.config_path_bad_datavalues.unlink()
+        self.temp_dir.cleanup()
         #NOTE: DO NOT DELETE DEFAULT CONFIG FILE BY UNLINKING
 
     def test_config_file_exists(self):
@@ -582,12 +769,111 @@ class TestNewAssetVariableConfig(unittest.TestCase):
     def test_config_file_bad_datatypes(self):
         pass
 
+    def test_load_categorical_fields(self):
+        config = varsconfig.AssetVariableConfig()
+        config.config_file = self.config_path_good
+        config.load_config()
+        self.assertEqual(config.categorical_fields, ['boolean_variable', 'string_variable'])
+        self.assertEqual(config.possible_values, {'boolean_variable': ['True', 'False'], 'string_variable': None})
+        converted = config.convert_column('string_variable', pd.Series(['b', 'a', 'n/a', 'b'], name='string_variable'))
+        self.assertEqual(str(converted.dtype), 'category')
+        self.assertEqual(list(converted.cat.categories), ['a', 'b'])
+        self.assertEqual(converted.name, 'string_variable')
+
+    def test_build_tape_schema(self):
+        config = varsconfig.AssetVariableConfig()
+        config.config_file = self.config_path_good
+        config.load_config()
+        schema = config.build_tape_schema()
+        self.assertIs(config.tape_schema, schema)
+        self.assertEqual(list(schema.columns.keys()), config.variables)
+        self.assertTrue(all(column.required for column in schema.columns.values()))
+        self.assertEqual([check.name for check in schema.columns['boolean_variable'].checks], ['dtype_bools', 'isin'])
+        tape = pd.DataFrame({'int_variable': pd.Series([1, 2, None], dtype='Int64'),
+                             'float_variable1': [1.5, np.nan, 2.0]})
+        self.assertTrue(schema.columns['int_variable'].checks[0](tape['int_variable']).check_passed)
+        self.assertFalse(schema.columns['int_variable'].checks[0](tape['float_variable1']).check_passed)
+        with self.assertRaises(ValueError):
+            config.build_tape_schema('not_an_asset_class')
+
     def test_default_config_file(self):
         self.assertTrue(varsconfig.AssetVariableConfig._check_config_file_exists(self.test_default_config_file))
         #self.assertTrue(varsconfig.AssetVariableConfig._check_config_file_header(self.test_default_config_file))
         #self.assertTrue(varsconfig.AssetVariableConfig._check_config_file_data(self.test_default_config_file))
 
 
+class TestCompiledConfig(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self.temp_dir.name, 'config.csv')
+        self.compiled_dir = os.path.join(self.temp_dir.name, 'compiled')
+        self.header = list(varsconfig.AssetVariableConfig._required_config_fields.keys())
+        self.rows = [['asset_id', 'uniqueid', 'strs', 'str', 'Loan id \xa5', 'NA', '', 'FALSE', 'None', 'None', 'TRUE',
+                      'TRUE', 'TRUE'],
+                     ['prop_state', 'categorical', 'strs', 'enum', '', '(CA, TX)', '', 'TRUE', 'unique_value',
+                      'summary', 'TRUE', 'TRUE', 'TRUE'],
+                     ['term_rem', 'numeric', 'ints', 'np.int16', '', 'INT>0', '', 'TRUE', 'bucket_auto', 'summary',
+                      'TRUE', 'TRUE', 'FALSE'],
+                     ['pmt_sched', 'numeric', 'arrays', 'np.ndarray', '', 'NA', '', 'FALSE', 'None', 'None', 'TRUE',
+                      'FALSE', 'FALSE']]
+        self.write_config(self.rows)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_config(self, rows):
+        # latin-1, as saved by Excel
+        with open(self.config_path, 'w', newline='', encoding='latin-1') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(self.header)
+            for row in rows:
+                writer.writerow(row + ['FALSE'] * (len(self.header) - len(row)))
+
+    def test_load_without_eval(self):
+        config = varsconfig.AssetVariableConfig(self.config_path)
+        self.assertEqual(config.variables, ['asset_id', 'prop_state', 'term_rem', 'pmt_sched'])
+        self.assertIs(config.variable_type('term_rem'), np.int16)
+        self.assertIs(config.variable_type('prop_state'), str)
+        self.assertEqual(config.consumer_mortgage_fields, ['asset_id', 'prop_state'])
+        self.assertEqual(config.possible_values['prop_state'], ['CA', 'TX'])
+
+    def test_compiled_matches_csv(self):
+        config = varsconfig.AssetVariableConfig(self.config_path, compiled_dir=self.compiled_dir)
+        compiled_path = varsconfig.AssetVariableConfig.compiled_config_path(self.compiled_dir, config.config_version)
+        self.assertTrue(os.path.exists(compiled_path))
+        compiled = varsconfig.AssetVariableConfig(self.config_path, compiled_dir=self.compiled_dir)
+        for name, value in config.__dict__.items():
+            if name not in ('config_date', '_converter_dict'):
+                self.assertEqual(getattr(compiled, name), value, msg=name)
+        self.assertIs(compiled.converter_dict['term_rem'], varsconfig.AssetVariableConfig.convert_ints)
+        np.testing.assert_array_equal(compiled.converter_dict['pmt_sched']('1 for 2'), [1.0, 1.0])
+        converted = compiled.convert_column('term_rem', pd.Series(['360', None]))
+        self.assertEqual(converted.dtype, pd.Int16Dtype())
+
+    def test_changed_config_recompiled(self):
+        config = varsconfig.AssetVariableConfig(self.config_path, compiled_dir=self.compiled_dir)
+        self.write_config(self.rows[:2])
+        changed = varsconfig.AssetVariableConfig(self.config_path, compiled_dir=self.compiled_dir)
+        self.assertNotEqual(changed.config_version, config.config_version)
+        self.assertEqual(changed.variables, ['asset_id', 'prop_state'])
+        self.assertEqual(len(os.listdir(self.compiled_dir)), 2)
+
+    def test_required_column(self):
+        self.assertEqual(varsconfig.AssetVariableConfig(self.config_path).required_fields, [])
+        columns = len(self.header)
+        self.header = self.header + ['Required']
+        self.write_config([row + ['FALSE'] * (columns - len(row)) + [required]
+                           for row, required in zip(self.rows, ['TRUE', 'FALSE', 'TRUE', ''])])
+        config = varsconfig.AssetVariableConfig(self.config_path)
+        self.assertEqual(config.required_fields, ['asset_id', 'term_rem'])
+        schema = config.build_tape_schema()
+        self.assertEqual([field for field, column in schema.columns.items() if column.required],
+                         ['asset_id', 'term_rem'])
+        with self.assertRaises(ImportError):
+            varsconfig.AssetVariableConfig._check_config_header(self.header + ['Required'])
+        self.write_config([row + ['FALSE'] * (columns - len(row)) + ['maybe'] for row in self.rows])
+        self.assertFalse(varsconfig.AssetVariableConfig._check_config_file_data(self.config_path))
+
 
 if __name__ == '__main__':
     unittest.main()
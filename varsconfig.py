@@ -1,16 +1,34 @@
 import os
+import io
 import datetime
+import hashlib
+import pickle
+import math
+import functools
+import collections.abc
 import numpy as np
+import re
 import pandas as pd
 import csv
 
+try:
+    import pandera.pandas as pda
+except ImportError:
+    pda = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute
+except ImportError:
+    pa = None
+
 
 class AssetVariableConfig(object):
 
     _required_config_fields = {'FieldName': (str, None),
                                 'DataDesc': (str, ('uniqueid','categorical', 'numeric', 'date', 'flag')),
                                 'DataCategory': (str, ('strs', 'floats', 'ints', 'dates', 'bools', 'arrays', None)),
-                                'DataType': (str, ('str', 'enum', 'datetime.date', 'list', 'tuple', 'bool', 'np.bool_' 
+                                'DataType': (str, ('str', 'enum', 'datetime.date', 'list', 'tuple', 'bool', 'np.bool_',
                                                     'int', 'np.integer', 'np.int8', 'np.byte', 'np.int16', 'np.short',
                                                     'np.int32', 'np.intc', 'np.int_', 'np.int64', 'np.long', 'np.longlong',
                                                     'np.ubyte', 'np.uint16', 'np.ushort', 'np.uint32', 'np.uintc',
@@ -43,9 +61,20 @@ class AssetVariableConfig(object):
                                 'CommercialEquipment': (str, ('', 'none', 'true', 'false')),
                                 }
 
+    # Columns a config file may add after the required columns.  Required flags fields that every tape must contain
+    # (see required_fields and asset_class_fields).
+    _optional_config_fields = {'Required': (str, ('', 'none', 'true', 'false'))}
+
     
     _required_config_field_number = 26
 
+    # String tokens shared by the scalar and column converters.  Column converters compare against these once per
+    # column instead of once per cell.
+    _null_strings = ('none', 'na', 'nan', 'n/a', 'null', '', ' ')
+    _true_strings = ('true', 'yes', 'y', 't', '1')
+    _false_strings = ('false', 'no', 'n', 'f', '0')
+    _currency_symbols = ('$', '£', '€')
+
     @staticmethod
     def convert_bools(var):
         if type(var) in (list, tuple, set, dict, datetime.date, datetime.datetime):
@@ -181,6 +210,618 @@ class AssetVariableConfig(object):
         except ValueError:
             return None
 
+    # --BEGIN: Column (array) converters
+    # The column converters below return the same values as the scalar converters above, but operate on a whole
+    # pandas Series or numpy array at once using pandas string methods and numpy masks.  Missing values are returned
+    # as the pandas missing value for the output dtype (NaN, pd.NA or NaT) rather than None.
+    # Text columns are factorized first so each distinct string is only parsed once, and cells that cannot be handled
+    # in bulk (e.g. python objects mixed into a string column) fall back to the scalar converter.
+
+    @staticmethod
+    def _convert_column(values, column_function, *args) -> pd.Series:
+        """
+        Apply a column function to values.  Columns holding only strings and missing values are reduced to their
+        distinct values first and the converted values are broadcast back by factor codes.
+        :param values: pandas Series or numpy array of raw values
+        :param column_function: function taking a positionally indexed Series (plus args) and returning a Series
+        :param args: extra arguments passed to column_function
+        :return: pandas Series with the same index as values
+        """
+        series = values.reset_index(drop=True) if isinstance(values, pd.Series) else pd.Series(values)
+        if series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty'):
+            codes, uniques = pd.factorize(series)
+            converted = column_function(pd.Series(np.append(uniques.astype(object), None), dtype=object), *args)
+            result = converted.take(np.where(codes < 0, len(uniques), codes)).reset_index(drop=True)
+        else:
+            result = column_function(series, *args)
+        result.index = values.index if isinstance(values, pd.Series) else series.index
+        return result
+
+    @staticmethod
+    def _split_string_cells(series: pd.Series) -> (pd.Series, pd.Series, pd.Series):
+        """
+        Split an object column into string cells and non-string cells.
+        :param pd.Series series: object column to split
+        :return: tuple of (text of string cells, mask of string cells, mask of null non-string cells)
+        """
+        is_str = series.map(type) == str
+        is_null = ~is_str & series.isna()
+        return series[is_str], is_str, is_null
+
+    @staticmethod
+    def _parse_numeric_text(text: pd.Series, leading: tuple, trailing: tuple, scalar_converter,
+                            mixed_symbols: bool = True) -> pd.Series:
+        """
+        Parse numeric text in bulk.  Edge whitespace, one leading symbol from leading, one trailing symbol from
+        trailing and thousands separators are removed before pd.to_numeric.  Cells that still fail to parse and are
+        not null or boolean tokens (e.g. symbols in the middle of a value) are passed to the scalar converter so the
+        results match it exactly.
+        :param pd.Series text: string cells
+        :param tuple leading: symbols that may be removed from the start of a value
+        :param tuple trailing: symbols that may be removed from the end of a value
+        :param scalar_converter: scalar converter used for cells that can not be parsed in bulk
+        :param bool mixed_symbols: if False, values with a leading symbol and a trailing symbol that is not also a
+                leading symbol (e.g. '$12%') are passed to the scalar converter
+        :return: pandas Series of float values
+        """
+        cleaned = text.str.strip()
+        has_lead = cleaned.str.startswith(leading)
+        has_trail = cleaned.str.endswith(trailing)
+        mixed = (has_lead & has_trail).to_numpy() & (not mixed_symbols)
+        if mixed.any():
+            mixed[mixed] = ~cleaned[mixed].str.endswith(leading).to_numpy(dtype=bool)
+        for has_symbol, at_start in ((has_lead, True), (has_trail, False)):
+            if has_symbol.any():
+                edge = cleaned[has_symbol]
+                is_bps = edge.str.startswith('bps') if at_start else edge.str.endswith('bps')
+                edge[is_bps] = edge[is_bps].str[3:] if at_start else edge[is_bps].str[:-3]
+                edge[~is_bps] = edge[~is_bps].str[1:] if at_start else edge[~is_bps].str[:-1]
+                cleaned[has_symbol] = edge.str.strip()
+        numbers = pd.to_numeric(cleaned.str.replace(',', '', regex=False), errors='coerce')
+        numbers[mixed] = np.nan
+        failed = numbers.isna()
+        if failed.any():
+            lowered = text[failed].str.strip().str.lower()
+            numbers[lowered.index[lowered.isin(AssetVariableConfig._true_strings)]] = 1
+            numbers[lowered.index[lowered.isin(AssetVariableConfig._false_strings)]] = 0
+            unresolved = lowered.index[~lowered.isin(AssetVariableConfig._null_strings +
+                                                     AssetVariableConfig._true_strings +
+                                                     AssetVariableConfig._false_strings)]
+            if len(unresolved) > 0:
+                numbers[unresolved] = text[unresolved].map(scalar_converter).astype(np.float64)
+        return numbers
+
+    @staticmethod
+    def _nullable_int_dtype(int_type) -> pd.api.extensions.ExtensionDtype:
+        return pd.api.types.pandas_dtype(np.dtype(int_type).name.replace('uint', 'UInt').replace('int', 'Int'))
+
+    @staticmethod
+    def convert_bools_array(values) -> pd.Series:
+        """
+        Column version of convert_bools.
+        :param values: pandas Series or numpy array of raw values
+        :return: pandas Series of nullable boolean dtype
+        """
+        return AssetVariableConfig._convert_column(values, AssetVariableConfig._bools_column)
+
+    @staticmethod
+    def _bools_column(series: pd.Series) -> pd.Series:
+        if pd.api.types.is_bool_dtype(series.dtype):
+            return series.astype('boolean')
+        elif pd.api.types.is_numeric_dtype(series.dtype):
+            return (series == 1).astype('boolean').mask(series.isna())
+        result = pd.Series(pd.NA, index=series.index, dtype='boolean')
+        text, is_str, is_null = AssetVariableConfig._split_string_cells(series)
+        lowered = text.str.strip().str.lower()
+        result[is_str] = lowered.isin(AssetVariableConfig._true_strings).mask(
+            lowered.isin(AssetVariableConfig._null_strings))
+        other = ~is_str & ~is_null
+        if other.any():
+            result[other] = series[other].map(AssetVariableConfig.convert_bools).astype('boolean')
+        return result
+
+    @staticmethod
+    def convert_ints_array(values, int_type=np.int_) -> pd.Series:
+        """
+        Column version of convert_ints.  Handles null tokens, boolean strings, percentages, currency and bps.
+        :param values: pandas Series or numpy array of raw values
+        :param int_type: numpy integer type to use for the output column
+        :return: pandas Series of nullable integer dtype
+        """
+        if int_type not in (int, np.byte, np.short, np.intc, np.int_, np.longlong,
+                            np.ubyte, np.ushort, np.uintc, np.uint, np.ulonglong):
+            int_type = np.int_
+        return AssetVariableConfig._convert_column(values, AssetVariableConfig._ints_column, int_type)
+
+    @staticmethod
+    def _ints_column(series: pd.Series, int_type) -> pd.Series:
+        out_type = AssetVariableConfig._nullable_int_dtype(int_type)
+        if pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_integer_dtype(series.dtype):
+            return series.astype(out_type)
+        elif pd.api.types.is_numeric_dtype(series.dtype):
+            return np.round(series.astype(np.float64), 0).astype(out_type)
+        result = pd.Series(np.nan, index=series.index, dtype=np.float64)
+        text, is_str, is_null = AssetVariableConfig._split_string_cells(series)
+        # convert_ints only removes one kind of symbol: a trailing % or bps, or a leading/trailing currency symbol
+        result[is_str] = np.round(AssetVariableConfig._parse_numeric_text(
+            text, AssetVariableConfig._currency_symbols, ('%', 'bps') + AssetVariableConfig._currency_symbols,
+            AssetVariableConfig.convert_ints, mixed_symbols=False), 0)
+        other = ~is_str & ~is_null
+        if other.any():
+            result[other] = np.round(pd.to_numeric(series[other], errors='coerce'), 0)
+        return result.astype(out_type)
+
+    @staticmethod
+    def convert_floats_array(values, float_type=np.float64) -> pd.Series:
+        """
+        Column version of convert_floats.  Handles null tokens, boolean strings, percentages, currency and bps.
+        :param values: pandas Series or numpy array of raw values
+        :param float_type: numpy float type to use for the output column.  np.longdouble is stored as np.float64
+                because pandas does not support extended precision columns.
+        :return: pandas Series of float dtype with NaN for missing values
+        """
+        if float_type not in (float, np.single, np.half, np.double, np.float16, np.float32, np.float64):
+            float_type = np.float64
+        return AssetVariableConfig._convert_column(values, AssetVariableConfig._floats_column, float_type)
+
+    @staticmethod
+    def _floats_column(series: pd.Series, float_type) -> pd.Series:
+        if pd.api.types.is_numeric_dtype(series.dtype):
+            return series.astype(float_type)
+        result = pd.Series(np.nan, index=series.index, dtype=np.float64)
+        text, is_str, is_null = AssetVariableConfig._split_string_cells(series)
+        symbols = ('%', 'bps') + AssetVariableConfig._currency_symbols
+        result[is_str] = AssetVariableConfig._parse_numeric_text(text, symbols, symbols,
+                                                                 AssetVariableConfig.convert_floats)
+        other = ~is_str & ~is_null
+        if other.any():
+            result[other] = pd.to_numeric(series[other], errors='coerce')
+        return result.astype(float_type)
+
+    @staticmethod
+    def convert_strs_array(values) -> pd.Series:
+        """
+        Column version of convert_strs.
+        :param values: pandas Series or numpy array of raw values
+        :return: pandas Series of object dtype holding str values or None
+        """
+        return AssetVariableConfig._convert_column(values, AssetVariableConfig._strs_column)
+
+    @staticmethod
+    def _strs_column(series: pd.Series) -> pd.Series:
+        text = series.astype(str)
+        is_null = text.str.strip().str.lower().isin(AssetVariableConfig._null_strings)
+        return text.astype(object).where(~is_null, None)
+
+    @staticmethod
+    def convert_dates_array(values, dt_format='%Y-%m-%d') -> pd.Series:
+        """
+        Column version of convert_dates.  Excel serial numbers (including the 1900 leap year bug) and YYYYMMDD
+        integers are converted with integer arithmetic on datetime64[D]; strings are parsed with dt_format.
+        :param values: pandas Series or numpy array of raw values
+        :param str dt_format: strptime format used for string values
+        :return: pandas Series of datetime64 dtype with NaT for missing or invalid values
+        """
+        return AssetVariableConfig._convert_column(values, AssetVariableConfig._dates_column, dt_format)
+
+    @staticmethod
+    def parse_dates_array(values, dt_format: str = None, sample_size: int = 1000) -> pd.Series:
+        """
+        convert_dates_array with the encoding of the column detected from a sample by detect_date_encoding.  Numeric
+        text is converted like Excel serial numbers and YYYYMMDD integers, and other strings are parsed with the
+        detected format.  Strings that do not match the detected format (columns mixing formats) are parsed with
+        dt_format and then the other _date_formats, in order.
+        :param values: pandas Series or numpy array of raw values
+        :param str dt_format: format tried first for strings.  Default is None (only _date_formats are tried)
+        :param int sample_size: number of values sampled to detect the encoding
+        :return: pandas Series of datetime64 dtype with NaT for missing or invalid values
+        """
+        encoding, detected_format = AssetVariableConfig.detect_date_encoding(values, dt_format, sample_size)
+        fallback_formats = tuple(x for x in dict.fromkeys((dt_format or AssetVariableConfig._date_formats[0],) +
+                                                          AssetVariableConfig._date_formats) if x != detected_format)
+        return AssetVariableConfig._convert_column(values, AssetVariableConfig._dates_column, detected_format,
+                                                   encoding == 'number', fallback_formats)
+
+    @staticmethod
+    def detect_date_encoding(values, dt_format: str = None, sample_size: int = 1000, seed: int = 0) -> (str, str):
+        """
+        Detect how a date column is encoded from a random sample of its values.
+        :param values: pandas Series or numpy array of raw values
+        :param str dt_format: format tried first for strings.  Default is None (only _date_formats are tried)
+        :param int sample_size: number of values sampled
+        :param int seed: random seed of the sample
+        :return: tuple of (encoding, format).  encoding is 'datetime' for datetime64 columns, 'number' for numbers or
+                 numeric text (Excel serial numbers and YYYYMMDD integers), 'text' for date strings and None if no
+                 sampled value is a number or string.  format is the format matching the most sampled strings (ties go
+                 to the format tried first), or dt_format (default '%Y-%m-%d') if no string matches a format.
+        """
+        series = values if isinstance(values, pd.Series) else pd.Series(values)
+        dt_format = dt_format or AssetVariableConfig._date_formats[0]
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            return 'datetime', dt_format
+        elif pd.api.types.is_bool_dtype(series.dtype):
+            return None, dt_format
+        elif pd.api.types.is_numeric_dtype(series.dtype):
+            return 'number', dt_format
+        sample = series.sample(sample_size, random_state=seed) if len(series) > sample_size else series
+        text = sample[sample.map(type) == str].str.strip()
+        counts = text[~text.str.lower().isin(AssetVariableConfig._null_strings)].value_counts()
+        if counts.empty:
+            return None, dt_format
+        strings = pd.Series(counts.index, dtype=object)
+        weights = counts.to_numpy()
+        number_count = weights[strings.str.fullmatch(r'\d+(\.\d*)?').to_numpy(dtype=bool)].sum()
+        best_format, best_count = dt_format, 0
+        for candidate in dict.fromkeys((dt_format,) + AssetVariableConfig._date_formats):
+            count = weights[~np.isnat(AssetVariableConfig.date_parser(candidate)(strings))].sum()
+            if count > best_count:
+                best_format, best_count = candidate, count
+            if best_count == weights.sum():
+                break
+        return ('number' if number_count > 0 and number_count >= best_count else 'text'), best_format
+
+    # Text date formats tried, in order, when the format of a date column is detected
+    _date_formats = ('%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%Y/%m/%d', '%m-%d-%Y', '%d/%m/%Y', '%d-%b-%Y', '%d-%b-%y',
+                     '%b %d, %Y', '%B %d, %Y', '%Y-%m-%d %H:%M:%S', '%m/%d/%Y %H:%M:%S', '%m/%d/%Y %I:%M:%S %p')
+
+    # Regular expressions of the strptime directives the date parsers match in bulk, as strptime itself defines them
+    _month_names = ('january', 'february', 'march', 'april', 'may', 'june', 'july', 'august', 'september', 'october',
+                    'november', 'december')
+    _date_directives = {'Y': r'(?P<Y>\d\d\d\d)', 'y': r'(?P<y>\d\d)', 'm': r'(?P<m>1[0-2]|0[1-9]|[1-9])',
+                        'd': r'(?P<d>3[01]|[12]\d|0[1-9]|[1-9]| [1-9])',
+                        'b': '(?P<b>' + '|'.join(name[:3] for name in _month_names) + ')',
+                        'B': '(?P<B>' + '|'.join(_month_names) + ')',
+                        'H': r'(?P<H>2[0-3]|[0-1]\d|\d)', 'I': r'(?P<I>1[0-2]|0[1-9]|[1-9])',
+                        'M': r'(?P<M>[0-5]\d|\d)', 'S': r'(?P<S>6[0-1]|[0-5]\d|\d)', 'p': r'(?P<p>am|pm)'}
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def date_parser(dt_format: str):
+        """
+        Parser for date strings in one strptime format, built once per format and cached.  Formats made of the
+        _date_directives are matched with one regular expression and the dates are built with integer arithmetic on
+        datetime64[D]; other formats are parsed with pd.to_datetime.  Time fields are checked but dropped, as in
+        convert_dates.
+        :param str dt_format: strptime format
+        :return: function taking a pandas Series of strings and returning a np.ndarray of datetime64[D] with NaT for
+                 strings that do not match the format
+        """
+        pieces = re.split(r'(%.)', dt_format)
+        directives = pieces[1::2]
+        if not directives or any(directive[1] not in AssetVariableConfig._date_directives and directive != '%%'
+                                 for directive in directives) or len(set(directives)) < len(directives):
+            return lambda text: pd.to_datetime(text, format=dt_format, errors='coerce').to_numpy(dtype='datetime64[D]')
+        pattern = ''.join(r'\s+'.join(re.escape(part) for part in re.split(r'\s+', piece)) if index % 2 == 0 else
+                          '%' if piece == '%%' else AssetVariableConfig._date_directives[piece[1]]
+                          for index, piece in enumerate(pieces))
+        pattern = '^' + pattern + r'\Z'
+        months = {name: number for number, full_name in enumerate(AssetVariableConfig._month_names, 1)
+                  for name in (full_name, full_name[:3])}
+
+        def parse(text: pd.Series) -> np.ndarray:
+            result = np.full(len(text), np.datetime64('NaT'), dtype='datetime64[D]')
+            if len(text) == 0:
+                return result
+            parts = text.str.extract(pattern, flags=re.IGNORECASE)
+            matched = parts.notna().all(axis=1).to_numpy()
+            parts = parts[matched]
+            if 'Y' in parts:
+                year = parts['Y'].to_numpy(dtype=np.int64)
+            elif 'y' in parts:
+                year = parts['y'].to_numpy(dtype=np.int64)
+                year = year + np.where(year < 69, 2000, 1900)
+            else:
+                year = np.full(len(parts), 1900)
+            if 'm' in parts:
+                month = parts['m'].to_numpy(dtype=np.int64)
+            elif 'b' in parts or 'B' in parts:
+                month = parts['b' if 'b' in parts else 'B'].str.lower().map(months).to_numpy(dtype=np.int64)
+            else:
+                month = np.ones(len(parts), dtype=np.int64)
+            day = parts['d'].str.strip().to_numpy(dtype=np.int64) if 'd' in parts else np.ones(len(parts), np.int64)
+            result[matched] = AssetVariableConfig._ymd_to_dates(year, month, day)
+            return result
+        return parse
+
+    @staticmethod
+    def _dates_column(series: pd.Series, dt_format: str, numeric_text: bool = False,
+                      fallback_formats: tuple = ()) -> pd.Series:
+        result = np.full(len(series), np.datetime64('NaT'), dtype='datetime64[D]')
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            result = series.to_numpy(dtype='datetime64[D]')
+        elif pd.api.types.is_bool_dtype(series.dtype):
+            pass
+        elif pd.api.types.is_numeric_dtype(series.dtype):
+            AssetVariableConfig._numbers_to_dates(series.to_numpy(dtype=np.float64, na_value=np.nan), result, dt_format)
+        else:
+            text, is_str, is_null = AssetVariableConfig._split_string_cells(series)
+            to_parse = ~text.str.strip().str.lower().isin(AssetVariableConfig._null_strings)
+            if numeric_text:
+                is_number = to_parse & text.str.fullmatch(r'\s*\d+(\.\d*)?\s*')
+                numbers = text[is_number].astype(np.float64).to_numpy()
+                result[text.index[is_number]] = AssetVariableConfig._numbers_to_dates(
+                    numbers, np.full(len(numbers), np.datetime64('NaT'), dtype='datetime64[D]'), dt_format)
+                to_parse &= ~is_number
+            result[text.index[to_parse]] = AssetVariableConfig.date_parser(dt_format)(text[to_parse])
+            for fallback_format in fallback_formats:
+                unparsed = text.index[to_parse][np.isnat(result[text.index[to_parse]])]
+                if len(unparsed) == 0:
+                    break
+                result[unparsed] = AssetVariableConfig.date_parser(fallback_format)(text[unparsed])
+            other = ~is_str & ~is_null
+            if other.any():
+                result[other.to_numpy()] = series[other].map(
+                    lambda x: AssetVariableConfig.convert_dates(x, dt_format)).to_numpy(dtype='datetime64[D]')
+        return pd.Series(result)
+
+    @staticmethod
+    def _numbers_to_dates(numbers: np.ndarray, result: np.ndarray, dt_format: str) -> np.ndarray:
+        """
+        Fill result with dates for Excel serial numbers and YYYYMMDD integers.  Numbers that are neither (e.g. 7 digit
+        values) are passed to the scalar convert_dates so results match.
+        :param np.ndarray numbers: float array of raw values (NaN for missing)
+        :param np.ndarray result: datetime64[D] output array, filled in place
+        :param str dt_format: format passed through to convert_dates for fallback values
+        :return: result
+        """
+        valid = ~np.isnan(numbers)
+        whole = np.zeros(len(numbers), dtype=np.int64)
+        whole[valid] = np.trunc(numbers[valid])
+        serial = valid & (whole <= 409926)
+        result[serial] = (np.datetime64('1899-12-31', 'D') +
+                          (whole[serial] - (whole[serial] >= 60)).astype('timedelta64[D]'))
+        yyyymmdd = valid & (whole >= 10000101) & (whole <= 99991231)
+        result[yyyymmdd] = AssetVariableConfig._ymd_to_dates(whole[yyyymmdd] // 10000, whole[yyyymmdd] // 100 % 100,
+                                                             whole[yyyymmdd] % 100)
+        other = valid & ~serial & ~yyyymmdd
+        if other.any():
+            result[other] = np.array([AssetVariableConfig.convert_dates(x, dt_format) for x in numbers[other]],
+                                     dtype='datetime64[D]')
+        return result
+
+    @staticmethod
+    def _ymd_to_dates(year: np.ndarray, month: np.ndarray, day: np.ndarray) -> np.ndarray:
+        """
+        Dates from integer year, month and day arrays, with integer arithmetic on datetime64
+        :return: np.ndarray of datetime64[D] with NaT where the month or day is out of range
+        """
+        month_ok = (month >= 1) & (month <= 12)
+        month_start = (year - 1970).astype('datetime64[Y]').astype('datetime64[M]') + \
+                      np.where(month_ok, month - 1, 0).astype('timedelta64[M]')
+        month_days = ((month_start + 1).astype('datetime64[D]') - month_start.astype('datetime64[D]')).astype(np.int64)
+        dates = month_start.astype('datetime64[D]') + (day - 1).astype('timedelta64[D]')
+        return np.where(month_ok & (day >= 1) & (day <= month_days), dates, np.datetime64('NaT'))
+
+    @staticmethod
+    def convert_categorical_array(values, categories: list = None) -> pd.Series:
+        """
+        Dictionary encoded version of convert_strs_array for categorical fields.  Each value is stored once in the
+        categories and every cell is an integer code, so memory use and groupby / strat reductions scale with the
+        number of distinct values instead of the number of loans.
+        :param values: pandas Series or numpy array of raw values
+        :param list categories: category set, normally the field's PossibleValues.  Values that are not in the set
+                are added after it (sorted) so no data is lost.  If None, the sorted distinct values are used
+        :return: pandas Series of category dtype
+        """
+        series = values if isinstance(values, pd.Series) else pd.Series(values)
+        # convert each distinct raw value once, then map the raw codes through the codes of the converted values
+        try:
+            raw_codes, raw_uniques = pd.factorize(series.to_numpy())
+        except TypeError:  # unhashable cells (e.g. lists)
+            encoded = pd.Categorical(AssetVariableConfig.convert_strs_array(series))
+        else:
+            unique_strs = pd.Categorical(AssetVariableConfig.convert_strs_array(pd.Series(raw_uniques, dtype=object)))
+            unique_codes = np.append(unique_strs.codes, -1)
+            encoded = pd.Categorical.from_codes(unique_codes[raw_codes], unique_strs.categories)
+        if categories is not None:
+            categories = list(dict.fromkeys(categories))
+            unlisted = encoded.categories.difference(categories)
+            if len(unlisted) > 0:
+                print(f'Values {list(unlisted[:10])} of {getattr(values, "name", None)} are not in its possible values')
+            encoded = encoded.set_categories(categories + sorted(unlisted))
+        return pd.Series(encoded, index=series.index, name=getattr(values, "name", None))
+
+    @staticmethod
+    def parse_possible_values(possible_values: str) -> list:
+        """
+        Parse the PossibleValues of a config row into a list of values.  Lists are written as "(a, b, c)" or
+        "a;b;c".  Anything else (e.g. "NA", "[TBD]", "INT>0" or asset class specific lists) has no fixed value set.
+        :param str possible_values: PossibleValues column of a config row
+        :return: list of str, or None if the field has no fixed value set
+        """
+        text = str(possible_values or '').strip()
+        if text.startswith('(') and text.endswith(')'):
+            values = text[1:-1].split(',')
+        elif ';' in text and not any(x in text for x in ':|{}()[]'):
+            values = text.split(';')
+        else:
+            return None
+        values = [x.strip() for x in values if x.strip() != '']
+        return list(dict.fromkeys(values)) or None
+
+    # --END: Column (array) converters
+
+    # --START: Compact dtype planning
+    # Integer types in order of preference: the first type that holds a column's observed range is used.  Signed types
+    # are used below 64 bits so that differences of compacted columns (e.g. term_rem - loan_age) do not wrap around.
+    _compact_int_types = (np.int8, np.int16, np.int32, np.int64, np.uint64)
+
+    @staticmethod
+    def narrowest_int_type(min_value, max_value):
+        """
+        Narrowest numpy integer type that holds every integer in [min_value, max_value]
+        :param min_value: smallest value
+        :param max_value: largest value
+        :return: numpy integer type, or None if no integer type is wide enough
+        """
+        for int_type in AssetVariableConfig._compact_int_types:
+            type_info = np.iinfo(int_type)
+            if type_info.min <= min_value and max_value <= type_info.max:
+                return int_type
+        return None
+
+    @staticmethod
+    def plan_column_dtype(values: pd.Series, category_threshold: float = 0.5):
+        """
+        Narrowest dtype that holds every value of a converted column without loss.  Integer columns get the nullable
+        (masked) integer dtype of their observed range, 64 bit float columns are stored as float32 when every value
+        round trips exactly, and string columns with at most category_threshold distinct values per row are
+        dictionary encoded.  Object columns of numbers (e.g. numpy scalars from the cell converters) are planned as
+        numbers.  Other columns keep their dtype.
+        :param pd.Series values: converted column
+        :param float category_threshold: maximum ratio of distinct values to non-missing values for a string column
+                to be stored as category.  0 never dictionary encodes
+        :return: pandas or numpy dtype
+        """
+        dtype = values.dtype
+        if dtype == object:
+            inferred_type = pd.api.types.infer_dtype(values, skipna=True)
+            if inferred_type in ('integer', 'floating', 'mixed-integer-float', 'decimal'):
+                return AssetVariableConfig.plan_column_dtype(pd.to_numeric(values), category_threshold)
+            if inferred_type != 'string':
+                return dtype
+            # identifiers are rejected on the first rows instead of hashing the whole column
+            for sample in (values.iloc[:10000], values):
+                count = sample.count()
+                if count == 0 or sample.nunique() > category_threshold * count:
+                    return dtype
+            return pd.CategoricalDtype()
+        elif pd.api.types.is_bool_dtype(dtype) or not pd.api.types.is_numeric_dtype(dtype):
+            return dtype
+        elif pd.api.types.is_integer_dtype(dtype):
+            if values.count() == 0:
+                return pd.Int8Dtype()
+            int_type = AssetVariableConfig.narrowest_int_type(values.min(), values.max())
+            return dtype if int_type is None else AssetVariableConfig._nullable_int_dtype(int_type)
+        elif pd.api.types.is_float_dtype(dtype) and dtype.itemsize > 4:
+            numbers = values.to_numpy(dtype=np.float64, na_value=np.nan)
+            with np.errstate(over='ignore'):
+                exact = np.array_equal(numbers.astype(np.float32), numbers, equal_nan=True)
+            if exact:
+                return pd.Float32Dtype() if isinstance(dtype, pd.api.extensions.ExtensionDtype) else np.dtype(np.float32)
+        return dtype
+
+    def plan_dtypes(self, data_tape: pd.DataFrame, category_threshold: float = 0.5) -> dict:
+        """
+        Plan the compact dtype of each configured field of a converted tape (see plan_column_dtype).  Columns that are
+        already narrower than the planned type (e.g. a DataType of np.int16 or np.float32 applied by convert_column)
+        are not widened, and array and date fields are left as they are.
+        :param pd.DataFrame data_tape: tape converted with convert_column / process_to_clean_tape
+        :param float category_threshold: see plan_column_dtype
+        :return: dict of field name to dtype for the fields whose dtype changes
+        """
+        plan = {}
+        for field in self.ints + self.floats + self.strs + self.bools:
+            if field not in data_tape.columns:
+                continue
+            current_dtype = data_tape[field].dtype
+            planned_dtype = AssetVariableConfig.plan_column_dtype(data_tape[field], category_threshold)
+            if planned_dtype != current_dtype and (current_dtype == object or
+                                                   AssetVariableConfig._dtype_itemsize(planned_dtype) <
+                                                   AssetVariableConfig._dtype_itemsize(current_dtype)):
+                plan[field] = planned_dtype
+        return plan
+
+    @staticmethod
+    def _dtype_itemsize(dtype) -> int:
+        return np.dtype(getattr(dtype, 'numpy_dtype', dtype)).itemsize
+
+    # --END: Compact dtype planning
+
+    # --START: Tape schema
+    # Fields whose values must be unique within a tape
+    _unique_fields = ('asset_id',)
+
+    # Field lists of the loaded config that apply to each asset class (asset_sector value)
+    _asset_class_field_lists = {'consumer_mortgage': ('consumer_fields', 'consumer_mortgage_fields'),
+                                'consumer_auto': ('consumer_fields', 'consumer_auto_fields'),
+                                'consumer_student': ('consumer_fields', 'consumer_student_fields'),
+                                'consumer_unsecured': ('consumer_fields', 'consumer_unsecured_fields'),
+                                'consumer_card': ('consumer_fields', 'consumer_creditcard_fields'),
+                                'commercial_mortgage': ('commercial_fields', 'commercial_mortgage_fields')}
+
+    _bound_pattern = re.compile(r'^(?:(-?\d+(?:\.\d+)?)\s*(<=|<)\s*)?(?:INT|FLOAT)(?:\(\d+\))?'
+                                r'(?:\s*(>=|>|<=|<)\s*(-?\d+(?:\.\d+)?))?$')
+
+    @staticmethod
+    def parse_value_bounds(possible_values: str) -> list:
+        """
+        Parse numeric bounds from the PossibleValues of a config row, e.g. "INT>0", "FLOAT(03)>=0" or "0 <= INT <= 12".
+        Bounds that refer to other fields (e.g. "0 <= INT <=term_orig") are not parsed.
+        :param str possible_values: PossibleValues column of a config row
+        :return: list of (operator, value) tuples with operator one of '>', '>=', '<', '<='; empty if there are none
+        """
+        match = AssetVariableConfig._bound_pattern.match(str(possible_values or '').strip().upper())
+        if match is None:
+            return []
+        lower, lower_operator, operator, value = match.groups()
+        bounds = []
+        if lower is not None:
+            bounds.append(({'<': '>', '<=': '>='}[lower_operator], float(lower)))
+        if operator is not None:
+            bounds.append((operator, float(value)))
+        return bounds
+
+    # Checks that a column holds the clean dtype of each DataCategory (convert_column output or compact_tape dtypes)
+    _category_dtype_checks = {'bools': pd.api.types.is_bool_dtype,
+                              'ints': pd.api.types.is_integer_dtype,
+                              'floats': pd.api.types.is_float_dtype,
+                              'dates': lambda dtype: pd.api.types.is_datetime64_any_dtype(dtype) or dtype == object,
+                              'strs': lambda dtype: dtype == object or isinstance(dtype, (pd.CategoricalDtype,
+                                                                                           pd.StringDtype))}
+
+    def asset_class_fields(self, asset_class: str = None) -> list:
+        """
+        Fields that a tape of an asset class must contain: the required fields plus, for an asset class, the base
+        fields and the fields flagged for the asset class (e.g. ConsumerLoan and ConsumerMortgage for
+        consumer_mortgage)
+        :param str asset_class: asset_sector value, e.g. 'consumer_mortgage'.  Default is the required fields only
+        :return: list of field names
+        """
+        fields = self.required_fields
+        if asset_class is not None:
+            if asset_class not in AssetVariableConfig._asset_class_field_lists.keys():
+                raise ValueError(f'Unknown asset class {asset_class}.  Use one of '
+                                 f'{list(AssetVariableConfig._asset_class_field_lists.keys())}')
+            fields = fields + self.base_fields
+            for field_list in AssetVariableConfig._asset_class_field_lists[asset_class]:
+                fields = fields + getattr(self, field_list)
+        return list(dict.fromkeys(fields))
+
+    def build_tape_schema(self, asset_class: str = None):
+        """
+        Build a pandera schema of a clean tape from the config and store it in tape_schema.  Each configured field is
+        an optional, nullable column (required for the asset class, see asset_class_fields) with checks of its clean
+        dtype, its PossibleValues (a value set for categorical fields or numeric bounds) and, for asset_id,
+        uniqueness.  Missing values pass every check.  Array fields are checked for presence only.
+        :param str asset_class: asset_sector value whose fields are required.  Default is the required fields only
+        :return: pandera.DataFrameSchema
+        """
+        if pda is None:
+            raise ImportError('pandera is required to build a tape schema')
+        required_fields = self.asset_class_fields(asset_class)
+        columns = {}
+        for field in self.variables:
+            category = self.variable_category(field)
+            checks = []
+            if category in AssetVariableConfig._category_dtype_checks.keys():
+                checks.append(pda.Check(lambda values, dtype_check=AssetVariableConfig._category_dtype_checks[category]:
+                                        bool(dtype_check(values.dtype)), name=f'dtype_{category}',
+                                        error=f'dtype is not a clean {category} dtype', ignore_na=False))
+            if self.possible_values.get(field) is not None:
+                checks.append(pda.Check.isin(self.possible_values[field]))
+            if category in ('ints', 'floats'):
+                for operator, value in AssetVariableConfig.parse_value_bounds(self._possible_values_text.get(field)):
+                    checks.append({'>': pda.Check.gt, '>=': pda.Check.ge,
+                                   '<': pda.Check.lt, '<=': pda.Check.le}[operator](value))
+            if field in AssetVariableConfig._unique_fields:
+                checks.append(pda.Check(lambda values: ~values.duplicated(keep=False), name='unique'))
+            columns[field] = pda.Column(checks=checks, nullable=True, required=field in required_fields, name=field)
+        self.tape_schema = pda.DataFrameSchema(columns, name=asset_class or 'tape', strict=False, coerce=False)
+        return self.tape_schema
+
+    # --END: Tape schema
+
     @staticmethod
     def read_dates_to_array(date_string, **kwargs):
         dt_format = '%Y-%m-%d' if kwargs.get('dt_format') is None else kwargs.get('dt_format')
@@ -190,47 +831,224 @@ class AssetVariableConfig(object):
                                if kwargs.get('dt_parser') is None else kwargs.get('dt_parser')(x, dt_format))
         return np.array([dt_parser(element.strip()) for element in date_string.split(dt_delim)], dtype=dt_type)
 
+    @staticmethod
+    def read_dates_to_array_column(values, dt_format: str = None, dt_delim: str = ';') -> pd.Series:
+        """
+        Column version of read_dates_to_array.  The elements of every cell are split and parsed together with
+        parse_dates_array, so the date encoding is detected once for the column, and regrouped by cell.
+        :param values: pandas Series or numpy array of delimited date strings
+        :param str dt_format: format tried first for the elements.  Default is None (the format is detected)
+        :param str dt_delim: delimiter between the dates of a cell
+        :return: pandas Series of datetime64[D] schedules (NaT for elements that are not dates, see _ragged_series).
+                 Missing cells are null
+        """
+        series = values.reset_index(drop=True) if isinstance(values, pd.Series) else pd.Series(values)
+        text = series[series.map(type) == str]
+        text = text[~text.str.strip().str.lower().isin(AssetVariableConfig._null_strings)]
+        elements = text.str.split(dt_delim, regex=False).explode().str.strip()
+        dates = AssetVariableConfig.parse_dates_array(elements.reset_index(drop=True), dt_format)
+        valid = np.zeros(len(series), dtype=bool)
+        valid[text.index] = True
+        offsets = np.zeros(len(series) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(elements.index.to_numpy(dtype=np.int64), minlength=len(series)), out=offsets[1:])
+        return AssetVariableConfig._ragged_series(dates.to_numpy(dtype='datetime64[D]'), offsets, valid,
+                                                  values.index if isinstance(values, pd.Series) else series.index)
+
     @staticmethod
     def read_ramp_to_array(ramp_string):
+        terms = AssetVariableConfig._parse_ramp_terms(ramp_string)
+        if not isinstance(terms, list):
+            return terms
+        ramp_array = np.empty(sum(count for _, _, count in terms))
+        position = 0
+        for first, step, count in terms:
+            ramp_array[position:position + count] = first + step * np.arange(count) if step != 0 else first
+            position += count
+        return ramp_array
+
+    @staticmethod
+    def _parse_ramp_terms(ramp_string):
+        """
+        Parse a ramp expression into its terms without expanding them.  Terms are separated by ',' or ';':
+        'x ramp y for n' is n values evenly spaced from x to y, 'x ramp y' is x, x + 1, ... up to y, 'x for n' is x
+        repeated n times and 'x' is a single value.
+        :param ramp_string: ramp expression, number, list or tuple
+        :return: list of (first, step, count) terms that expand to first + step * k for k in range(count) (the values
+                 np.arange gives), None for missing values or 'ramp_error' if the expression can not be parsed
+        """
+        if ramp_string is None or str(ramp_string).strip().lower() in ('none', 'na', 'nan', 'n/a', 'null', '', ' '):
+            return None
+        elif not isinstance(ramp_string, (str, int, float, np.integer, np.floating, list, tuple)):
+            return 'ramp_error'
+        ramp_string = str(ramp_string)
+        for symbol in ('[', ']', '(', ')', '{', '}'):
+            ramp_string = ramp_string.strip(symbol)
+        terms = []
         try:
-            if ramp_string is None or str(ramp_string).strip().lower() in ('none', 'na', 'nan', 'n/a', 'null', '', ' '):
-                return None
-            elif not isinstance(ramp_string, (str, int, float, np.integer, np.floating, list, tuple)):
-                raise ValueError('ramp_string must be a string, integer, float, list or tuple')
-            else:
-                ramp_array = np.empty(0)
-                ramp_string = str(ramp_string)
-                for symbol in ('[', ']', '(', ')', '{', '}'):
-                    ramp_string = ramp_string.strip(symbol)
-                ramp_string = ramp_string.replace(';', ',')
-                for element in ramp_string.split(','):
-                    if 'ramp' in element and 'for' in element:
-                        subramp = element.replace('ramp', ',').replace('for', ',').split(',')
-                        for i in range(len(subramp)):
-                            subramp[i] = float(subramp[i])
-                        ramp_array = np.append(ramp_array,
-                                               np.arange(subramp[0], subramp[1] + ((subramp[1] - subramp[0]) / subramp[2]),
-                                                         ((subramp[1] - subramp[0]) / (subramp[2] - 1))))
-                        del subramp
-                        del element
-                    elif 'ramp' in element and 'for' not in element:
-                        subramp = element.replace('ramp', ',').split(',')
-                        for i in range(len(subramp)):
-                            subramp[i] = float(subramp[i])
-                        ramp_array = np.append(ramp_array, np.arange(subramp[0], subramp[1] + 1))
-                        del subramp
-                        del element
-                    elif 'for' in element:
-                        subramp = element.split('for')
-                        ramp_array = np.append(ramp_array, np.ones(int(subramp[1])) * float(subramp[0]))
-                        del subramp
-                        del element
+            for element in ramp_string.replace(';', ',').split(','):
+                if 'ramp' in element:
+                    bounds = [float(bound) for bound in element.replace('ramp', ',').replace('for', ',').split(',')]
+                    first = bounds[0]
+                    if 'for' in element:
+                        step = (bounds[1] - first) / (bounds[2] - 1)
+                        count = math.ceil((bounds[1] + (bounds[1] - first) / bounds[2] - first) / step)
                     else:
-                        ramp_array = np.append(ramp_array, float(element))
-                        del element
-                return ramp_array
-        except ValueError:
+                        step, count = 1.0, math.ceil(bounds[1] + 1 - first)
+                    # np.arange steps by the difference of its first two values, which may round differently
+                    terms.append((first, (first + step) - first, max(int(count), 0)))
+                elif 'for' in element:
+                    value, count = element.split('for')[:2]
+                    if int(count) < 0:
+                        raise ValueError('negative ramp count')
+                    terms.append((float(value), 0.0, int(count)))
+                else:
+                    terms.append((float(element), 0.0, 1))
+        except (ValueError, ZeroDivisionError, IndexError, OverflowError):
             return 'ramp_error'
+        return terms
+
+    @staticmethod
+    def _expand_ramp_terms(first: np.ndarray, step: np.ndarray, count: np.ndarray) -> np.ndarray:
+        """
+        Expand ramp terms into one preallocated array.  Level terms are filled by np.repeat and only the terms that
+        step are computed element by element.
+        :return: np.ndarray of first + step * k for k in range(count) of each term, one term after another
+        """
+        values = np.repeat(first.astype(np.float64), count)
+        ramps = np.flatnonzero(step != 0)
+        if ramps.size > 0:
+            ramp_counts = count[ramps]
+            term = np.repeat(np.arange(ramps.size), ramp_counts)
+            position = np.arange(int(ramp_counts.sum())) - (np.cumsum(ramp_counts) - ramp_counts)[term]
+            values[(np.cumsum(count) - count)[ramps][term] + position] += step[ramps][term] * position
+        return values
+
+    # A ramp expression term that can be parsed in bulk: 'x', 'x ramp y', 'x for n' or 'x ramp y for n'
+    _ramp_number = r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?'
+    _ramp_term_pattern = (r'^\s*(?P<first>' + _ramp_number + r')\s*(?:ramp\s*(?P<stop>' + _ramp_number +
+                          r')\s*)?(?:for\s*(?P<count>' + _ramp_number + r')\s*)?$')
+
+    @staticmethod
+    def _parse_ramp_terms_column(expressions: np.ndarray) -> tuple:
+        """
+        Column version of _parse_ramp_terms.  The terms of every text expression are split and matched with
+        _ramp_term_pattern together, and the steps and counts are computed with numpy.  Expressions with a term that
+        does not match the pattern, or that is not valid, and non-text expressions are passed to _parse_ramp_terms.
+        :param np.ndarray expressions: ramp expressions
+        :return: tuple of (expression of each term, first, step and count arrays of the terms (one expression after
+                 another), boolean array of the expressions that were parsed, list of expressions that can not be
+                 parsed)
+        """
+        is_text = np.array([type(expression) == str for expression in expressions], dtype=bool)
+        text = pd.Series(expressions[is_text], index=np.flatnonzero(is_text), dtype=object)
+        if pa is not None:
+            # Arrow strings keep the string methods below in compiled kernels
+            text = text.astype(pd.ArrowDtype(pa.string()))
+        text = text[~text.str.strip().str.lower().isin(('none', 'na', 'nan', 'n/a', 'null', '', ' '))]
+        for symbol in ('[', ']', '(', ')', '{', '}'):
+            text = text.str.strip(symbol)
+        elements = text.str.replace(';', ',', regex=False).str.split(',', regex=False).explode()
+        if pa is not None:
+            parts = pa.compute.extract_regex(pa.array(elements), AssetVariableConfig._ramp_term_pattern).flatten()
+            # optional groups that did not match are empty strings rather than null
+            parts = pd.DataFrame({group: pd.Series(pd.arrays.ArrowExtensionArray(
+                pa.compute.if_else(pa.compute.equal(part, ''), pa.scalar(None, pa.string()), part)),
+                index=elements.index) for group, part in zip(('first', 'stop', 'count'), parts)})
+        else:
+            parts = elements.str.extract(AssetVariableConfig._ramp_term_pattern)
+        first, stop, n = (parts[group].astype(np.float64).to_numpy() for group in ('first', 'stop', 'count'))
+        has_stop, has_count = ~np.isnan(stop), ~np.isnan(n)
+        ramp_for = has_stop & has_count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ramp_step = (stop - first) / (n - 1)
+            ramp_count = np.ceil((stop + (stop - first) / n - first) / ramp_step)
+            count = np.where(ramp_for, ramp_count, np.where(has_stop, np.ceil(stop + 1 - first),
+                                                            np.where(has_count, n, 1)))
+        step = np.where(ramp_for, ramp_step, np.where(has_stop, 1.0, 0.0))
+        # terms _parse_ramp_terms rejects (division by zero, non integer 'for' counts) or handles specially
+        unmatched = parts['first'].isna().to_numpy() | ~np.isfinite(count) | ~np.isfinite(step) | \
+            (has_count & ~has_stop & ~parts['count'].str.fullmatch(r'\+?\d+').fillna(False).to_numpy(dtype=bool))
+        scalar_expressions = np.union1d(np.flatnonzero(~is_text), elements.index[unmatched]).astype(np.int64)
+        in_bulk = ~np.isin(elements.index.to_numpy(), scalar_expressions)
+        term_expression = elements.index.to_numpy(dtype=np.int64)[in_bulk]
+        first, step = first[in_bulk], ((first + step) - first)[in_bulk]
+        count = np.maximum(count[in_bulk], 0).astype(np.int64)
+        parsed = np.zeros(len(expressions), dtype=bool)
+        parsed[term_expression] = True
+        errors, scalar_terms = [], []
+        for position in scalar_expressions:
+            terms = AssetVariableConfig._parse_ramp_terms(expressions[position])
+            if isinstance(terms, list):
+                parsed[position] = True
+                scalar_terms += [(position,) + term for term in terms]
+            elif terms is not None:
+                errors.append(expressions[position])
+        if scalar_terms:
+            columns = [np.array(column) for column in zip(*scalar_terms)]
+            term_expression = np.concatenate([term_expression, columns[0].astype(np.int64)])
+            order = np.argsort(term_expression, kind='stable')
+            term_expression = term_expression[order]
+            first, step, count = (np.concatenate([bulk, scalar])[order] for bulk, scalar in
+                                  ((first, columns[1]), (step, columns[2]), (count, columns[3].astype(np.int64))))
+        return term_expression, first, step, count, parsed, errors
+
+    @staticmethod
+    def read_ramp_to_array_column(values) -> pd.Series:
+        """
+        Column version of read_ramp_to_array.  Distinct expressions are parsed together (_parse_ramp_terms_column),
+        their terms are expanded into one preallocated buffer, and the schedules of every cell are stored as a single
+        values buffer with an offsets array where cell i is values[offsets[i]:offsets[i + 1]] (see _ragged_series).
+        :param values: pandas Series or numpy array of ramp expressions
+        :return: pandas Series of schedules.  Missing cells and cells that can not be parsed are null
+        """
+        series = values.reset_index(drop=True) if isinstance(values, pd.Series) else pd.Series(values)
+        if series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) not in ('string', 'empty'):
+            # lists and tuples are parsed from their text; other unhashable cells can not be parsed
+            series = series.map(lambda x: str(x) if isinstance(x, (list, tuple)) else
+                                x if isinstance(x, collections.abc.Hashable) else type(x).__name__)
+        codes, uniques = pd.factorize(series)
+        term_unique, first, step, count, parsed, errors = \
+            AssetVariableConfig._parse_ramp_terms_column(np.asarray(uniques, dtype=object))
+        if errors:
+            print(f'Values {errors[:10]} of {getattr(values, "name", None)} are not valid ramp expressions')
+        unique_values = AssetVariableConfig._expand_ramp_terms(first, step, count)
+        # one extra unique for missing cells (code -1)
+        unique_lengths = np.append(np.bincount(term_unique, weights=count, minlength=len(uniques)), 0).astype(np.int64)
+        lengths = unique_lengths[codes]
+        offsets = np.zeros(len(series) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        present = codes[codes >= 0]
+        if np.array_equal(present, np.arange(present.size)):
+            # every expression is distinct, so the expanded expressions are already in cell order
+            cell_values = unique_values
+        else:
+            unique_offsets = np.cumsum(unique_lengths) - unique_lengths
+            cell_values = unique_values[np.repeat(unique_offsets[codes] - offsets[:-1], lengths) +
+                                        np.arange(offsets[-1])]
+        return AssetVariableConfig._ragged_series(cell_values, offsets, np.append(parsed, False)[codes],
+                                                  values.index if isinstance(values, pd.Series) else series.index)
+
+    @staticmethod
+    def _ragged_series(values: np.ndarray, offsets: np.ndarray, valid: np.ndarray, index) -> pd.Series:
+        """
+        Series of variable length arrays stored as one contiguous values buffer and an offsets array (the Arrow list
+        layout, and the ragged form of dateutils.date_schedule_array and bondmath.irr_array): cell i is
+        values[offsets[i]:offsets[i + 1]].  tapetools.schedule_buffers returns the buffer and offsets of the Series.
+        :param np.ndarray values: values of every cell one after another
+        :param np.ndarray offsets: int64 offsets, one more than the number of cells
+        :param np.ndarray valid: boolean mask of cells that are not null
+        :param index: index of the Series
+        :return: pandas Series of large_list ArrowDtype over the buffer if pyarrow is installed, otherwise an object
+                 Series of read only views into the buffer (None for null cells)
+        """
+        if pa is not None:
+            cells = pa.LargeListArray.from_arrays(pa.array(offsets), pa.array(values), mask=pa.array(~valid))
+            return pd.Series(pd.arrays.ArrowExtensionArray(cells), index=index)
+        values.flags.writeable = False
+        cells = np.full(len(valid), None, dtype=object)
+        for position in np.flatnonzero(valid):
+            cells[position] = values[offsets[position]:offsets[position + 1]]
+        return pd.Series(cells, index=index, dtype=object)
 
     # TODO: REWRITE: ramp_to_array should handle dates and regular array expressions.  \
     #               Dates need to be integrated into the array converter vs. being separate converter.
@@ -239,12 +1057,51 @@ class AssetVariableConfig(object):
                         'pmt_sched_dates': read_dates_to_array,
                         'pmt_draw_sched': read_ramp_to_array,
                         'pmt_draw_sched_dates': read_dates_to_array}
+    # Column versions of the array_converters that parse a whole tape column at once
+    array_column_converters = {'pmt_sched_amort': read_ramp_to_array_column,
+                               'pmt_sched': read_ramp_to_array_column,
+                               'pmt_sched_dates': read_dates_to_array_column,
+                               'pmt_draw_sched': read_ramp_to_array_column,
+                               'pmt_draw_sched_dates': read_dates_to_array_column}
+
+    # Column converters keyed by DataCategory.  Used by convert_column to clean an entire tape column in one call.
+    column_converters = {'bools': convert_bools_array,
+                         'ints': convert_ints_array,
+                         'floats': convert_floats_array,
+                         'strs': convert_strs_array,
+                         'dates': parse_dates_array}
+
+
+    # Python type of each DataType, used by load_config instead of evaluating the DataType text.  'enum' values are
+    # strings, and aliases that this numpy version does not define fall back to the type they alias.
+    _data_types = {'str': str, 'enum': str, 'datetime.date': datetime.date, 'list': list, 'tuple': tuple,
+                   'bool': bool, 'np.bool_': np.bool_, 'int': int, 'np.integer': np.integer, 'np.int8': np.int8,
+                   'np.byte': np.byte, 'np.int16': np.int16, 'np.short': np.short, 'np.int32': np.int32,
+                   'np.intc': np.intc, 'np.int_': np.int_, 'np.int64': np.int64, 'np.long': np.int_,
+                   'np.longlong': np.longlong, 'np.ubyte': np.ubyte, 'np.uint16': np.uint16, 'np.ushort': np.ushort,
+                   'np.uint32': np.uint32, 'np.uintc': np.uintc, 'np.uint': np.uint, 'np.uint64': np.uint64,
+                   'np.ulong': np.uint, 'np.ulonglong': np.ulonglong, 'float': float,
+                   'np.floating': np.floating, 'np.float16': np.float16, 'np.half': np.half, 'np.float32': np.float32,
+                   'np.single': np.single, 'np.float64': np.float64, 'np.double': np.double,
+                   'np.float128': getattr(np, 'float128', np.longdouble), 'np.longdouble': np.longdouble,
+                   'np.ndarray': np.ndarray}
 
+    # Version of the compiled config format.  Compiled configs of another version are rebuilt from the config file.
+    _compiled_format_version = 1
+    _compiled_suffix = '.varsconfig.pkl'
+    # Attributes that are rebuilt rather than compiled: the creation time and the pandera schema (which holds lambdas)
+    _uncompiled_attributes = ('config_date', 'tape_schema')
 
-    def __init__(self, config_file=None):
+    def __init__(self, config_file=None, compiled_dir: str = None):
+        """
+        :param config_file: path to the config csv file.  Default is None for an empty configuration
+        :param str compiled_dir: directory of compiled configs.  If given, the config is loaded from the compiled
+                config of the file's contents when there is one, and compiled there otherwise (see save_compiled)
+        """
         #Configueration Meta Data
         self.config_file = config_file
         self.config_date = datetime.datetime.now()
+        self._config_hash = None
         #Configueration Data
         self.strs = []
         self.dates = []
@@ -254,22 +1111,40 @@ class AssetVariableConfig(object):
         self.arrays = []
         self._type_dict = {}
         self._converter_dict = {}
+        self.field_required = {}
         self.consumer_mortgage_fields = []
         self.consumer_auto_fields = []
         self.consumer_student_fields = []
         self.consumer_unsecured_fields = []
         self.consumer_creditcard_fields = []
         self.commercial_mortgage_fields = []
+        self.base_fields = []
+        self.consumer_fields = []
+        self.commercial_fields = []
         self.stratify_by_fields = []
+        self.stratify_types = {}
         self.stratify_summary_fields = {}
+        self.categorical_fields = []
+        self.possible_values = {}
+        self._possible_values_text = {}
         self.tape_schema = None
 
         #Data Loading Procedure Calls
-        if config_file is None or self.validate_config_file() is False:
-            return self
-        else:
-            self.load_config()
-            return self
+        if config_file is not None and AssetVariableConfig._check_config_file_exists(config_file) is True:
+            config_bytes = AssetVariableConfig._read_config_bytes(config_file)
+            config_hash = hashlib.sha256(config_bytes).hexdigest()
+            compiled_path = None if compiled_dir is None else \
+                AssetVariableConfig.compiled_config_path(compiled_dir, config_hash)
+            if compiled_path is not None and os.path.exists(compiled_path):
+                self._load_compiled(compiled_path)
+            else:
+                header, rows = AssetVariableConfig._parse_config_bytes(config_bytes)
+                if AssetVariableConfig._check_config_header(header) is True and \
+                        AssetVariableConfig._check_config_rows(rows) is True:
+                    self.load_config(rows)
+                    self._config_hash = config_hash
+                    if compiled_path is not None:
+                        self.save_compiled(compiled_dir)
 
 
     @staticmethod
@@ -280,33 +1155,69 @@ class AssetVariableConfig(object):
             return True
 
 
+    @staticmethod
+    def _read_config_bytes(config_file) -> bytes:
+        with open(config_file, 'rb') as config_bytes:
+            return config_bytes.read()
+
+
+    @staticmethod
+    def _parse_config_bytes(config_bytes: bytes) -> (list, list):
+        """
+        Parse the contents of a config file once into its header and rows.  Files that are not utf-8 (e.g. saved from
+        Excel) are read as latin-1.
+        :param bytes config_bytes: contents of the config file
+        :return: tuple of (list of header names, list of dict rows)
+        """
+        try:
+            text = config_bytes.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            text = config_bytes.decode('latin-1')
+        reader = csv.reader(io.StringIO(text, newline=''), delimiter=',')
+        header = next(reader)
+        return header, list(csv.DictReader(io.StringIO(text, newline=''), header, delimiter=','))[1:]
+
+
     @staticmethod
     def _check_config_file_header(config_file):
-        with open(config_file, 'r', newline='') as csvfile:
-            header = next(csv.reader(csvfile, delimiter = ','))
-            if header == list(AssetVariableConfig._required_config_fields.keys()):
-                return True
-            else:
-                raise ImportError('Config file does not contain correct header row.')
+        header = AssetVariableConfig._parse_config_bytes(AssetVariableConfig._read_config_bytes(config_file))[0]
+        return AssetVariableConfig._check_config_header(header)
+
+
+    @staticmethod
+    def _check_config_header(header: list):
+        required_header = list(AssetVariableConfig._required_config_fields.keys())
+        if header[:len(required_header)] == required_header and \
+                all(x in AssetVariableConfig._optional_config_fields.keys() for x in header[len(required_header):]) and \
+                len(set(header)) == len(header):
+            return True
+        else:
+            raise ImportError('Config file does not contain correct header row.')
 
 
     @staticmethod
     def _check_config_file_data(config_file):
+        rows = AssetVariableConfig._parse_config_bytes(AssetVariableConfig._read_config_bytes(config_file))[1]
+        return AssetVariableConfig._check_config_rows(rows)
+
+
+    @staticmethod
+    def _check_config_rows(rows: list):
         try:
-            with open(config_file, 'r', newline='') as csvfile:
-                header = next(csv.reader(csvfile, delimiter = ','))
-                i = 0
-                for row in iter(csv.DictReader(csvfile, header, delimiter = ',')):
-                    i=i+1
-                    for required_field in AssetVariableConfig._required_config_fields.keys():
-                        assert type(row[required_field]) == AssetVariableConfig._required_config_fields[required_field][0]
-                        if AssetVariableConfig._required_config_fields[required_field][1] is not None:
-                            assert row[required_field].lower().strip() in AssetVariableConfig._required_config_fields[required_field][1]
+            i = 0
+            for row in rows:
+                i=i+1
+                config_fields = {**AssetVariableConfig._required_config_fields,
+                                 **{k: v for k, v in AssetVariableConfig._optional_config_fields.items() if k in row}}
+                for required_field in config_fields.keys():
+                    assert type(row[required_field]) == config_fields[required_field][0]
+                    if config_fields[required_field][1] is not None:
+                        assert row[required_field].lower().strip() in config_fields[required_field][1]
             return True
         except AssertionError:
-            if type(row[required_field]) != AssetVariableConfig._required_config_fields[required_field][0]:
+            if type(row[required_field]) != config_fields[required_field][0]:
                 print(f'Value in {required_field} on config file row {i} is not correct data type.')
-            elif row[required_field] not in AssetVariableConfig._required_config_fields[required_field][1]:
+            elif row[required_field] not in config_fields[required_field][1]:
                 print(f'Value of {row[required_field]} in {required_field} on config file row {i} does not contain an accepted value.')
             else:
                 print(f'An unknown error has occured in config file row {i}.')
@@ -315,52 +1226,106 @@ class AssetVariableConfig(object):
 
     def validate_config_file(self):
         if AssetVariableConfig._check_config_file_exists(self.config_file) is True:
-            if AssetVariableConfig._check_config_file_header(self.config_file) is True:
-                return AssetVariableConfig._check_config_file_data(self.config_file)
+            header, rows = AssetVariableConfig._parse_config_bytes(AssetVariableConfig._read_config_bytes(self.config_file))
+            if AssetVariableConfig._check_config_header(header) is True:
+                return AssetVariableConfig._check_config_rows(rows)
             else:
                 return False
         else:
             return False
 
 
-    def load_config(self):
-        with open(self.config_file, 'r', newline='') as csvfile:
-            header = next(csv.reader(csvfile, delimiter = ','))
-            for row in iter(csv.DictReader(csvfile, header, delimiter = ',')):
-                field_name = row['FieldName'].strip().lower()
-                self.field_required[field_name] = bool(row['Required'])
-                eval(str('self.' + str(row['DataCategory']))).append(row['FieldName'])
-                if row['DataType'].strip().lower() in AssetVariableConfig._required_config_fields['DataType'][1]:
-                    self._type_dict[field_name] = eval(row['DataType'].strip().lower())
-                else:
-                    self._type_dict[field_name] = None
-                if field_name in AssetVariableConfig.array_converters.keys():
-                    self._converter_dict[field_name] = AssetVariableConfig.array_converters[field_name]
-                elif row['DataType'].strip().lower() in AssetVariableConfig._required_config_fields['DataType'][1]:
-                    self._converter_dict[field_name] = eval(str('AssetVariableConfig._convert_' + str(row['DataCategory']).strip().lower()))
-                else:
-                    self._converter_dict[field_name] = None
-                if row['StratFlag'].strip().lower() in ('y', 'y(e)'):
-                    self.stratification_fields[field_name] = \
-                        (row['StratFlag'].strip().lower(), row['StratType'].strip().lower())
-                if bool(row['GenericLoan']) is True:
-                    self.base_fields.append(field_name)
-                if bool(row['ConsumerLoan']) is True:
-                    self.consumer_fields.append(field_name)
-                if bool(row['ConsumerMortgage']) is True:
-                    self.consumer_mortgage_fields.append(field_name)
-                if bool(row['ConsumerAuto']) is True:
-                    self.consumer_auto_fields.append(field_name)
-                if bool(row['ConsumerStudent']) is True:
-                    self.consumer_student_fields.append(field_name)
-                if bool(row['ConsumerUnsecured']) is True:
-                    self.consumer_unsecured_fields.append(field_name)
-                if bool(row['ConsumerCard']) is True:
-                    self.consumer_creditcard_fields.append(field_name)
-                if bool(row['CommercialLoan']) is True:
-                    self.commercial_fields.append(field_name)
-                if bool(row['CommercialMortgage']) is True:
-                    self.commercial_mortgage_fields.append(field_name)
+    def load_config(self, rows: list = None):
+        """
+        Load the configuration from the rows of the config file
+        :param list rows: dict rows of the config file, as parsed by _parse_config_bytes.  Default is to read them from
+                config_file
+        :return: self
+        """
+        if rows is None:
+            config_bytes = AssetVariableConfig._read_config_bytes(self.config_file)
+            rows = AssetVariableConfig._parse_config_bytes(config_bytes)[1]
+            self._config_hash = hashlib.sha256(config_bytes).hexdigest()
+        for row in rows:
+            field_name = row['FieldName'].strip().lower()
+            data_category = str(row['DataCategory']).strip().lower()
+            data_type = row['DataType'].strip().lower()
+            self.field_required[field_name] = AssetVariableConfig.convert_bools(row.get('Required')) is True
+            if data_category in ('strs', 'dates', 'bools', 'ints', 'floats', 'arrays'):
+                getattr(self, data_category).append(field_name)
+            self._type_dict[field_name] = AssetVariableConfig._data_types.get(data_type)
+            if field_name in AssetVariableConfig.array_converters.keys():
+                self._converter_dict[field_name] = AssetVariableConfig.array_converters[field_name]
+            elif data_type in AssetVariableConfig._required_config_fields['DataType'][1]:
+                self._converter_dict[field_name] = getattr(AssetVariableConfig, 'convert_' + data_category, None)
+            else:
+                self._converter_dict[field_name] = None
+            self._possible_values_text[field_name] = row['PossibleValues']
+            if str(row['DataDesc']).strip().lower() == 'categorical':
+                self.categorical_fields.append(field_name)
+                self.possible_values[field_name] = AssetVariableConfig.parse_possible_values(row['PossibleValues'])
+            if AssetVariableConfig.convert_bools(row['StratFlag']) is True:
+                self.stratify_by_fields.append(field_name)
+                self.stratify_types[field_name] = str(row['StratType']).strip().lower()
+                self.stratify_summary_fields[field_name] = str(row['StratSumSet']).strip().lower()
+            for column, field_list in (('GenericLoan', self.base_fields),
+                                       ('ConsumerLoan', self.consumer_fields),
+                                       ('ConsumerMortgage', self.consumer_mortgage_fields),
+                                       ('ConsumerAuto', self.consumer_auto_fields),
+                                       ('ConsumerStudent', self.consumer_student_fields),
+                                       ('ConsumerUnsecured', self.consumer_unsecured_fields),
+                                       ('ConsumerCard', self.consumer_creditcard_fields),
+                                       ('CommercialLoan', self.commercial_fields),
+                                       ('CommercialMortgage', self.commercial_mortgage_fields)):
+                if AssetVariableConfig.convert_bools(row.get(column)) is True:
+                    field_list.append(field_name)
+        return self
+
+
+    @staticmethod
+    def compiled_config_path(compiled_dir: str, config_hash: str) -> str:
+        """
+        Path of the compiled config of a config file's contents
+        :param str compiled_dir: directory of compiled configs
+        :param str config_hash: sha256 hex digest of the config file contents (see config_version)
+        :return: str path
+        """
+        return os.path.join(compiled_dir, f'{config_hash}.v{AssetVariableConfig._compiled_format_version}'
+                                          f'{AssetVariableConfig._compiled_suffix}')
+
+
+    def save_compiled(self, compiled_dir: str) -> str:
+        """
+        Save the loaded configuration (type map, converters, asset class field lists, strat settings and possible
+        values) as a compiled config keyed by the hash of the config file contents, so it can be loaded with one
+        deserialize instead of parsing and validating the file again.  Converters are stored by name.
+        :param str compiled_dir: directory of compiled configs, created if it does not exist
+        :return: str path of the compiled config
+        """
+        if self._config_hash is None:
+            raise ValueError('Only a configuration loaded from a config file can be compiled')
+        state = {name: value for name, value in self.__dict__.items()
+                 if name not in AssetVariableConfig._uncompiled_attributes}
+        state['_converter_dict'] = {field: None if converter is None else
+                                    getattr(converter, '__func__', converter).__name__
+                                    for field, converter in self._converter_dict.items()}
+        os.makedirs(compiled_dir, exist_ok=True)
+        compiled_path = AssetVariableConfig.compiled_config_path(compiled_dir, self._config_hash)
+        # write to a temporary file first so a worker process never reads a partly written compiled config
+        temp_path = f'{compiled_path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as compiled_file:
+            pickle.dump(state, compiled_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, compiled_path)
+        return compiled_path
+
+
+    def _load_compiled(self, compiled_path: str):
+        with open(compiled_path, 'rb') as compiled_file:
+            state = pickle.load(compiled_file)
+        state['_converter_dict'] = {field: None if name is None else getattr(AssetVariableConfig, name)
+                                    for field, name in state['_converter_dict'].items()}
+        state['config_file'] = self.config_file
+        self.__dict__.update(state)
         return self
 
 
@@ -383,6 +1348,101 @@ class AssetVariableConfig(object):
             return None
 
 
+    def variable_category(self, variable_name):
+        for category in ('strs', 'dates', 'bools', 'ints', 'floats', 'arrays'):
+            if variable_name in getattr(self, category):
+                return category
+        return None
+
+
+    def convert_column(self, variable_name: str, values) -> pd.Series:
+        """
+        Convert an entire tape column using the column converter for the variable's DataCategory.
+        Date fields are parsed with the encoding detected for the column (parse_dates_array).  Array fields without a
+        column converter (payment schedules) are still parsed cell by cell with array_converters, and categorical
+        string fields are dictionary encoded with convert_categorical_array.
+        :param str variable_name: configured field name
+        :param values: pandas Series of raw values for the field.  Arrow backed columns are converted from their
+                numpy form
+        :return: pandas Series of converted values
+        """
+        if isinstance(values.dtype, pd.ArrowDtype):
+            values = pd.Series(pa.array(values).to_pandas(), index=values.index, name=values.name)
+        if variable_name in AssetVariableConfig.array_column_converters.keys():
+            return AssetVariableConfig.array_column_converters[variable_name](values)
+        if variable_name in AssetVariableConfig.array_converters.keys():
+            return values.apply(AssetVariableConfig.array_converters[variable_name])
+        category = self.variable_category(variable_name)
+        if category == 'strs' and variable_name in self.categorical_fields:
+            return AssetVariableConfig.convert_categorical_array(values, self.possible_values.get(variable_name))
+        elif category == 'ints':
+            return AssetVariableConfig.convert_ints_array(values, self._type_dict.get(variable_name) or np.int_)
+        elif category == 'floats':
+            return AssetVariableConfig.convert_floats_array(values, self._type_dict.get(variable_name) or np.float64)
+        elif category in AssetVariableConfig.column_converters.keys():
+            return AssetVariableConfig.column_converters[category](values)
+        else:
+            return values
+
+
+    def arrow_type(self, variable_name: str):
+        """
+        Arrow type of a clean field: the configured DataType for numbers, timestamp[s] for dates (see
+        parse_dates_array), dictionary encoded strings for categorical fields and large lists for payment schedules
+        (see _ragged_series).  Number DataTypes that Arrow can not store (e.g. np.float128) fall back to the default
+        type of their DataCategory.
+        :param str variable_name: configured field name
+        :return: pyarrow.DataType, or None if the field is not configured
+        """
+        if pa is None:
+            raise ImportError('pyarrow is required to build an Arrow tape schema')
+        if variable_name in AssetVariableConfig.array_column_converters.keys():
+            return pa.large_list(pa.date32() if variable_name.endswith('_dates') else pa.float64())
+        category = self.variable_category(variable_name)
+        if category in ('ints', 'floats'):
+            try:
+                return pa.from_numpy_dtype(np.dtype(self._type_dict.get(variable_name)))
+            except (TypeError, pa.ArrowNotImplementedError):
+                return pa.int64() if category == 'ints' else pa.float64()
+        elif category == 'strs':
+            return pa.dictionary(pa.int32(), pa.string()) if variable_name in self.categorical_fields else pa.string()
+        elif category == 'dates':
+            return pa.timestamp('s')
+        elif category == 'bools':
+            return pa.bool_()
+        return None
+
+
+    def arrow_schema(self, fields: list = None):
+        """
+        Arrow schema of a clean tape (see arrow_type)
+        :param list fields: fields to include.  Default is every configured variable
+        :return: pyarrow.Schema
+        """
+        fields = self.variables if fields is None else fields
+        types = {field: self.arrow_type(field) for field in fields}
+        return pa.schema([pa.field(field, arrow_type) for field, arrow_type in types.items() if arrow_type is not None])
+
+
+    @property
+    def required_fields(self):
+        return [field for field, required in self.field_required.items() if required is True]
+
+
+    @property
+    def config_version(self):
+        """
+        Version of the loaded configuration: a sha256 hash of the config file contents when it was loaded, or None if
+        no file is loaded
+        """
+        if self._config_hash is not None:
+            return self._config_hash
+        elif self.config_file is None or os.path.exists(self.config_file) is False:
+            return None
+        with open(self.config_file, 'rb') as config_bytes:
+            return hashlib.sha256(config_bytes.read()).hexdigest()
+
+
     @property
     def variables(self):
         return self.strs + self.dates + self.bools + self.ints + self.floats + self.arrays